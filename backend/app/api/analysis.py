@@ -10,6 +10,7 @@ from app.core.service_manager import (
 )
 from app.api.auth import get_current_user_optional, user_has_provider_key
 from app.models.repository import User
+from app.services.llm_adapters.scheduler import INTERACTIVE, llm_request_context
 
 logger = logging.getLogger(__name__)
 
@@ -387,12 +388,14 @@ async def analyze_code_snippet(
         logger.info(f"🤖 Analyzing {len(code)} chars of {language} code")
         ai_service, _, ai_analysis_service, _ = get_services()
         user_id = str(current_user.id) if current_user else None
-        pattern_result = await ai_service.analyze_code_pattern(
-            code, language, user_id=user_id
-        )
-        quality_result = await ai_service.analyze_code_quality(
-            code, language, user_id=user_id
-        )
+        # Interactive requests go ahead of queued background analyses
+        with llm_request_context(priority=INTERACTIVE, owner=user_id):
+            pattern_result = await ai_service.analyze_code_pattern(
+                code, language, user_id=user_id
+            )
+            quality_result = await ai_service.analyze_code_quality(
+                code, language, user_id=user_id
+            )
 
         analysis_id = None
         try:
@@ -74,31 +74,33 @@ async def list_repositories(
         50, ge=1, le=100, description="Maximum number of repositories to return"
     ),
     offset: int = Query(0, ge=0, description="Number of repositories to skip"),
+    status: Optional[str] = Query(None, description="Only repositories with this status"),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page (replaces offset)"
+    ),
 ):
     """List all repositories with pagination"""
+    if cursor is not None and not ObjectId.is_valid(cursor):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     try:
         repository_service, _, _, _ = get_services()
 
-        # Get repositories using the service
-        repositories_data = await repository_service.list_repositories()
-
-        # Apply pagination to the repositories list
+        repositories_data = await repository_service.list_repositories(
+            limit=limit, offset=offset, status_filter=status, cursor=cursor
+        )
         repositories = repositories_data.get("repositories", [])
-        total_count = len(repositories)
-
-        # Apply offset and limit
-        paginated_repos = repositories[offset : offset + limit]
 
         result = {
-            "repositories": convert_objectids_to_strings(paginated_repos),
-            "total_count": total_count,
+            "repositories": convert_objectids_to_strings(repositories),
+            "total_count": repositories_data.get("total_count", 0),
             "offset": offset,
             "limit": limit,
-            "has_more": offset + limit < total_count,
+            "has_more": repositories_data.get("has_more", False),
+            "next_cursor": repositories_data.get("next_cursor"),
         }
 
         logger.info(
-            f"Listed {len(paginated_repos)} repositories (total: {total_count})"
+            f"Listed {len(repositories)} repositories (total: {result['total_count']})"
         )
         return result
 
@@ -1357,6 +1359,10 @@ async def add_repository_to_user(
                 description=repo_data.description,
                 unique_users=1,
                 analysis_count=1,
+                commit_count=0,
+                technology_count=0,
+                pattern_count=0,
+                timeline_backfilled=True,
             )
 
             await engine.save(repository)
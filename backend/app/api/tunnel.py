@@ -9,8 +9,10 @@ Provides endpoints for users to:
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional
 from pydantic import BaseModel, HttpUrl
+import json
 import logging
 
 from app.services.secure_tunnel_service import (
@@ -180,6 +182,59 @@ async def proxy_request(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class TunnelStreamRequest(BaseModel):
+    """Request to stream a generation through tunnel"""
+
+    endpoint: str = "/api/generate"
+    data: Optional[Dict[str, Any]] = None
+    timeout: float = 300.0
+
+
+@router.post("/proxy/stream")
+async def proxy_stream_request(
+    request: TunnelStreamRequest, current_user: User = Depends(get_current_user)
+):
+    """
+    Stream a request through the user's tunnel, passing Ollama's
+    newline-delimited JSON chunks through as they arrive
+    """
+    tunnel_service = get_tunnel_service()
+    stream = tunnel_service.stream_ollama_request(
+        user_id=str(current_user.id),
+        endpoint=request.endpoint,
+        data=request.data,
+        timeout=request.timeout,
+    )
+
+    # Surface setup failures (no tunnel, rate limit) as HTTP errors
+    first = await anext(stream, None)
+    if first is None:
+        raise HTTPException(status_code=502, detail="Empty response from tunnel")
+    if not first["success"]:
+        await stream.aclose()
+        error_code = first.get("error_code", "UNKNOWN")
+        if error_code == "TUNNEL_NOT_AVAILABLE":
+            raise HTTPException(status_code=503, detail=first["error"])
+        elif error_code == "RATE_LIMIT_EXCEEDED":
+            raise HTTPException(status_code=429, detail=first["error"])
+        else:
+            raise HTTPException(status_code=502, detail=first["error"])
+
+    async def body():
+        try:
+            yield json.dumps(first["data"]) + "\n"
+            async for chunk in stream:
+                if not chunk["success"]:
+                    yield json.dumps({"error": chunk["error"]}) + "\n"
+                    break
+                yield json.dumps(chunk["data"]) + "\n"
+        finally:
+            # Release the tunnel now on disconnect, not when the generator is collected
+            await stream.aclose()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
 @router.get("/requests/recent")
 async def get_recent_requests(
     limit: int = 50, current_user: User = Depends(get_current_user)
@@ -0,0 +1,70 @@
+"""
+Analysis Executor
+
+Process pool shared by CPU-bound analysis steps (commit diff analysis, static
+analyzers) so they run across cores instead of on the event loop thread.
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_analysis_workers() -> int:
+    """Configured worker count; 0 disables the pool and runs work inline"""
+    from app.core.config import settings
+
+    workers = settings.ANALYSIS_PROCESS_WORKERS
+    if workers < 0:
+        workers = min(4, os.cpu_count() or 1)
+    return workers
+
+
+def get_analysis_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared analysis process pool, or None when disabled"""
+    global _process_pool
+
+    if _process_pool is None:
+        workers = get_analysis_workers()
+        if workers == 0:
+            return None
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+        logger.info(f"⚙️ Analysis process pool started with {workers} workers")
+    return _process_pool
+
+
+async def run_in_analysis_executor(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Await ``fn(*args)`` in the analysis process pool without blocking the
+    event loop. Runs in a thread when the pool is disabled or has broken
+    (a worker died), so callers always get a result.
+    """
+    global _process_pool
+
+    loop = asyncio.get_running_loop()
+    pool = get_analysis_process_pool()
+    if pool is not None:
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool as e:
+            logger.warning(f"⚠️ Analysis process pool broke, running in a thread: {e}")
+            if _process_pool is pool:
+                _process_pool = None
+    return await loop.run_in_executor(None, fn, *args)
+
+
+def shutdown_analysis_process_pool() -> None:
+    """Stop the shared pool (application shutdown)"""
+    global _process_pool
+
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+        logger.info("⚙️ Analysis process pool stopped")
@@ -47,6 +47,56 @@ class Settings(BaseSettings):
 
     # Provider orchestration
     AI_PROVIDER_PRIORITY: str = "ollama,openai,anthropic"
+
+    # LLM HTTP transport (one pooled client per provider)
+    LLM_HTTP_MAX_CONNECTIONS: int = 20
+    LLM_HTTP_MAX_KEEPALIVE: int = 10
+    LLM_HTTP_KEEPALIVE_EXPIRY_S: float = 30.0
+    LLM_HTTP_CONNECT_TIMEOUT_S: float = 10.0
+    LLM_HTTP_READ_TIMEOUT_S: float = 60.0
+    LLM_HTTP_MAX_RETRIES: int = 2  # retries on connection errors, 429 and 5xx
+    LLM_HTTP_BACKOFF_BASE_S: float = 0.5
+    LLM_HTTP2: bool = True  # used only when the h2 package is installed
+    LLM_STREAMING_ENABLED: bool = True  # stream structured completions, stop at the closed JSON object
+
+    # LLM response cache (content-addressed, memory + Redis)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_S: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+    LLM_CACHE_MAX_MB: int = 64
+
+    # LLM prompt batching (several snippets per structured request)
+    LLM_BATCH_TOKEN_BUDGET: int = 6000  # estimated prompt tokens per request
+    LLM_BATCH_MAX_ITEMS: int = 8
+    LLM_BATCH_MAX_OUTPUT_TOKENS: int = 4000
+
+    # LLM scheduler (process-wide limits, "provider=value" lists, 0/absent = unlimited)
+    LLM_SCHEDULER_ENABLED: bool = True
+    LLM_REQUESTS_PER_MINUTE: str = "openai=500,anthropic=50"
+    LLM_TOKENS_PER_MINUTE: str = "openai=90000,anthropic=40000"
+    LLM_MAX_CONCURRENCY: str = "ollama=2,openai=8,anthropic=4"
+    LLM_DEFAULT_MAX_CONCURRENCY: int = 4
+
+    # LLM provider health (circuit breaker) and routing
+    LLM_ROUTING: str = "latency"  # "latency" (fastest healthy first) or "priority"
+    LLM_HEALTH_WINDOW: int = 50  # recent calls kept per provider
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 3  # consecutive failures that open the circuit
+    LLM_CIRCUIT_ERROR_RATE: float = 0.5  # windowed error rate that opens the circuit
+    LLM_CIRCUIT_MIN_SAMPLES: int = 10
+    LLM_CIRCUIT_OPEN_S: float = 30.0  # cooldown before a half-open trial
+
+    # Pattern embeddings (batched, written off the event loop)
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_FLUSH_INTERVAL_S: float = 2.0  # max wait before a partial batch is written
+    LOCAL_VECTOR_INDEX_ENABLED: bool = True  # CPU-only similarity search, no Ollama/Chroma needed
+    LOCAL_VECTOR_INDEX_DIR: str = "./vector_index"
+    LOCAL_EMBEDDING_DIM: int = 512
+
+    # Token usage logs (backend/logs, buffered JSON lines with rotation)
+    TOKEN_LOG_MAX_MB: int = 10
+    TOKEN_LOG_BACKUPS: int = 5
+    TOKEN_LOG_BUFFER_RECORDS: int = 100
+    TOKEN_LOG_FLUSH_INTERVAL_S: float = 5.0
     
     # Security
     SECRET_KEY: str = "dev-secret-key-change-in-production"
@@ -73,7 +123,26 @@ class Settings(BaseSettings):
     MONGODB_READ_PREFERENCE: str = "primary"
     MONGODB_HEARTBEAT_FREQUENCY_MS: str = "10000"
     MONGODB_ENABLE_MONITORING: str = "true"
+    COMMIT_INGEST_BATCH_SIZE: int = 500  # commits per unordered bulk upsert
+    PATTERN_STATS_COMPACTION_INTERVAL_S: float = 60.0  # global pattern stats refresh
     
+    # Git mirror cache (persistent bare mirrors reused across analyses)
+    GIT_MIRROR_CACHE_ENABLED: bool = True
+    GIT_MIRROR_CACHE_DIR: str = "./git_cache"
+    GIT_MIRROR_CACHE_MAX_MB: int = 10240
+    GIT_MIRROR_CLONE_FILTER: str = ""  # partial clone filter (e.g. "blob:none"), "" = full clone
+
+    # Analysis execution
+    ANALYSIS_PROCESS_WORKERS: int = -1  # -1 = auto (min(4, cpu count)), 0 = inline
+    GIT_DIFF_PARALLEL_MIN_COMMITS: int = 200
+    STATIC_ANALYSIS_BATCH_FILES: int = 8  # files per static-analysis work unit
+    STATIC_ANALYSIS_MAX_FILES: int = 2000  # beyond this, source files are sampled
+    STATIC_ANALYSIS_MAX_MB: int = 64  # source bytes analyzed per run
+    STATIC_ANALYSIS_TIME_BUDGET_S: float = 120.0  # 0 = no time limit
+    GIT_BLOB_MAX_BYTES: int = 1024 * 1024  # larger blobs are never read
+    GIT_BLOB_BUDGET_MB: int = 256  # total blob bytes read per analysis step
+    SNAPSHOT_CACHE_MB: int = 64  # decoded file text memoized per analysis run
+
     # GitHub (optional)
     GITHUB_TOKEN: Optional[str] = None
     
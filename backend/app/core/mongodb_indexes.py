@@ -86,6 +86,15 @@ class CollectionIndexes:
         return [index.to_index_model() for index in self.indexes]
 
 
+# Indexes earlier releases created that the definitions no longer contain;
+# create_all_indexes drops them so existing databases stop enforcing them.
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    # Unique on a "sha" field commits never set: every insert after the
+    # first collided on null. Replaced by repository_hash_unique.
+    "commits": ["sha_unique"],
+}
+
+
 class MongoDBIndexManager:
     """
     MongoDB index management with comprehensive strategy for
@@ -156,10 +165,10 @@ class MongoDBIndexManager:
                         description="Compound index for repository commit history",
                     ),
                     IndexDefinition(
-                        name="sha_unique",
-                        keys=[("sha", ASCENDING)],
+                        name="repository_hash_unique",
+                        keys=[("repository_id", ASCENDING), ("hash", ASCENDING)],
                         unique=True,
-                        description="Unique index on commit SHA",
+                        description="Unique commit per repository (bulk upsert key)",
                     ),
                     IndexDefinition(
                         name="author_email",
@@ -231,6 +240,11 @@ class MongoDBIndexManager:
                         keys=[("repository_id", ASCENDING), ("created_at", DESCENDING)],
                         description="Compound index for repository analysis history",
                     ),
+                    IndexDefinition(
+                        name="repository_id_started",
+                        keys=[("repository_id", ASCENDING), ("started_at", DESCENDING)],
+                        description="Latest analysis lookup for repository listings",
+                    ),
                     IndexDefinition(
                         name="status_active",
                         keys=[("status", ASCENDING)],
@@ -255,6 +269,35 @@ class MongoDBIndexManager:
                     ),
                 ],
             ),
+            # Pattern timeline rollup indexes
+            "pattern_timeline": CollectionIndexes(
+                "pattern_timeline",
+                [
+                    IndexDefinition(
+                        name="repository_bucket_pattern_unique",
+                        keys=[
+                            ("repository_id", ASCENDING),
+                            ("granularity", ASCENDING),
+                            ("bucket", ASCENDING),
+                            ("pattern_id", ASCENDING),
+                        ],
+                        unique=True,
+                        description="Rollup upsert key and time-range scans per repository",
+                    ),
+                ],
+            ),
+            # Global pattern statistics indexes
+            "pattern_global_stats": CollectionIndexes(
+                "pattern_global_stats",
+                [
+                    IndexDefinition(
+                        name="pattern_id_unique",
+                        keys=[("pattern_id", ASCENDING)],
+                        unique=True,
+                        description="One statistics document per pattern (upsert key)",
+                    ),
+                ],
+            ),
             # AI analysis results indexes
             "ai_analysis_results": CollectionIndexes(
                 "ai_analysis_results",
@@ -401,6 +444,7 @@ class MongoDBIndexManager:
         results = {
             "created_collections": [],
             "created_indexes": {},
+            "dropped_indexes": [],
             "errors": {},
             "total_indexes": 0,
             "successful_indexes": 0,
@@ -409,6 +453,8 @@ class MongoDBIndexManager:
 
         logger.info("🚀 Starting comprehensive index creation...")
 
+        results["dropped_indexes"] = await self.drop_retired_indexes()
+
         for collection_name, collection_indexes in self._index_definitions.items():
             try:
                 collection = self.database[collection_name]
@@ -445,6 +491,33 @@ class MongoDBIndexManager:
 
         return results
 
+    async def drop_retired_indexes(self) -> List[str]:
+        """
+        Drop indexes listed in RETIRED_INDEXES that still exist
+
+        Returns:
+            List of dropped indexes as "collection.index"
+        """
+        dropped = []
+        for collection_name, index_names in RETIRED_INDEXES.items():
+            try:
+                collection = self.database[collection_name]
+                existing = {
+                    idx["name"] for idx in await collection.list_indexes().to_list(None)
+                }
+                for index_name in index_names:
+                    if index_name in existing:
+                        await collection.drop_index(index_name)
+                        dropped.append(f"{collection_name}.{index_name}")
+                        logger.info(
+                            f"🗑️  Dropped retired index '{index_name}' from '{collection_name}'"
+                        )
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ Could not drop retired indexes from '{collection_name}': {e}"
+                )
+        return dropped
+
     async def drop_all_indexes(self, confirm: bool = False) -> Dict[str, Any]:
         """
         Drop all non-_id indexes (use with caution!)
@@ -121,6 +121,28 @@ async def lifespan(app: FastAPI):
             )
             # Don't raise the exception - continue with SQLite only
 
+        # Backfill global pattern statistics once, before requests can write
+        # any, then keep them compacted in the background
+        try:
+            from app.core.service_manager import get_pattern_service
+
+            global_stats = get_pattern_service().global_stats
+            if global_stats:
+                try:
+                    await global_stats.ensure_backfilled()
+                except Exception as e:
+                    # Not marked done, so the first compaction retries it
+                    logger.warning(f"[LIFESPAN] ⚠️ Pattern statistics backfill failed: {e}")
+                track_background_task(
+                    asyncio.create_task(
+                        global_stats.run_compaction(
+                            settings.PATTERN_STATS_COMPACTION_INTERVAL_S
+                        )
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"[LIFESPAN] ⚠️ Pattern statistics compaction not started: {e}")
+
         # Test all external connections
 
         logger.info("[LIFESPAN] Initializing AIService...")
@@ -130,6 +152,12 @@ async def lifespan(app: FastAPI):
             ai_service = get_ai_service()
             ai_status = ai_service.get_status()
             logger.info(f"🤖 AI Service Status: {ai_status}")
+
+            # Probe LLM providers in the background; failures open their circuits
+            if ai_service.llm_adapter:
+                track_background_task(
+                    asyncio.create_task(ai_service.llm_adapter.probe_providers())
+                )
         except Exception as e:
             logger.error(f"[LIFESPAN] ❌ Error initializing AIService: {e}")
             logger.error(traceback.format_exc())
@@ -208,6 +236,48 @@ async def lifespan(app: FastAPI):
                     logger.warning(f"[LIFESPAN] ⚠️  Error during task cancellation: {e}")
                     logger.warning(traceback.format_exc())
 
+        # Write out queued pattern embeddings
+        try:
+            from app.core.service_manager import get_ai_service
+
+            pipeline = get_ai_service().embedding_pipeline
+            if pipeline:
+                await pipeline.aclose()
+        except Exception as e:
+            logger.warning(f"[LIFESPAN] ⚠️ Error flushing pattern embeddings: {e}")
+
+        # Flush buffered token usage logs
+        try:
+            from app.utils.token_logger import close_log_sinks
+
+            await close_log_sinks()
+        except Exception as e:
+            logger.warning(f"[LIFESPAN] ⚠️ Error flushing token logs: {e}")
+
+        # Close pooled LLM provider connections
+        try:
+            from app.services.llm_adapters.http_pool import close_http_pools
+
+            await close_http_pools()
+        except Exception as e:
+            logger.warning(f"[LIFESPAN] ⚠️ Error closing LLM HTTP pools: {e}")
+
+        # Close pooled tunnel clients
+        try:
+            from app.services.secure_tunnel_service import get_tunnel_service
+
+            await get_tunnel_service().aclose()
+        except Exception as e:
+            logger.warning(f"[LIFESPAN] ⚠️ Error closing tunnel clients: {e}")
+
+        # Stop the analysis process pool
+        try:
+            from app.core.analysis_executor import shutdown_analysis_process_pool
+
+            shutdown_analysis_process_pool()
+        except Exception as e:
+            logger.warning(f"[LIFESPAN] ⚠️ Error stopping analysis process pool: {e}")
+
         logger.info("[LIFESPAN] 👋 Shutdown complete")
 
 
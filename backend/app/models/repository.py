@@ -533,6 +533,16 @@ class Repository(Model):
     description: Optional[str] = Field(default=None)
     primary_language: Optional[str] = Field(default=None, index=True)
 
+    # Denormalized counters maintained on write; None until first backfilled
+    commit_count: Optional[int] = Field(default=None)
+    technology_count: Optional[int] = Field(default=None)
+    pattern_count: Optional[int] = Field(default=None)
+    # Set once the pattern timeline rollup covers all existing occurrences;
+    # None for repositories analysed before the rollup existed. Rebuilds also
+    # keep a raw ``timeline_rebuild`` token and ``timeline_rebuilds`` count on
+    # the document, written only through targeted updates in PatternService.
+    timeline_backfilled: Optional[bool] = Field(default=None)
+
     model_config = {"collection": "repositories"}
 
     @field_validator("created_by_user", mode="before")
@@ -574,6 +584,7 @@ class Commit(Model):
     additions: int = 0
     deletions: int = 0
     stats: Optional[Dict[str, Any]] = None
+    analysis: Optional[Dict[str, Any]] = None
 
     model_config = {"collection": "commits"}
 
@@ -588,6 +599,7 @@ class FileChange(Model):
     """File change model for MongoDB"""
 
     commit_id: ObjectId = Field(index=True)
+    repository_id: Optional[ObjectId] = Field(default=None, index=True)
     file_path: str
     change_type: Optional[str] = None
     language: Optional[str] = None
@@ -655,6 +667,9 @@ class PatternOccurrence(Model):
     processing_time_ms: Optional[int] = None
     token_usage: Optional[Dict[str, Any]] = None
     ai_analysis_metadata: Optional[Dict[str, Any]] = None
+    # True when the global pattern statistics counted this occurrence on write,
+    # so their one-off backfill skips it
+    stats_recorded: Optional[bool] = None
 
     model_config = {"collection": "pattern_occurrences"}
 
@@ -688,6 +703,41 @@ class PatternOccurrence(Model):
         return v
 
 
+class PatternTimelineBucket(Model):
+    """Occurrences of one pattern in one repository per day or month"""
+
+    repository_id: ObjectId
+    granularity: str  # "day" or "month"
+    bucket: datetime  # start of the day/month
+    pattern_id: ObjectId
+    count: int = 0
+
+    model_config = {"collection": "pattern_timeline"}
+
+
+class PatternGlobalStats(Model):
+    """Write-maintained statistics of one pattern (pattern_id None: all patterns)"""
+
+    pattern_id: Optional[ObjectId] = None
+    # Accumulated by writes; occurrences that predate the store are counted
+    # separately by the backfill and added on read
+    occurrence_count: int = 0
+    confidence_sum: float = 0.0
+    backfill_occurrence_count: int = 0
+    backfill_confidence_sum: float = 0.0
+    # Sparse HyperLogLog registers (index -> rank) of repositories and file paths
+    repository_registers: Optional[Dict[str, int]] = None
+    file_registers: Optional[Dict[str, int]] = None
+    # Estimates refreshed by compaction whenever version moves past compacted_version
+    repositories_estimate: int = 0
+    files_estimate: int = 0
+    version: int = 0
+    compacted_version: int = 0
+    updated_at: Optional[datetime] = None
+
+    model_config = {"collection": "pattern_global_stats"}
+
+
 class AnalysisSession(Model):
     """Analysis session model for MongoDB"""
 
@@ -798,61 +848,163 @@ class ModelBenchmark(Model):
 # Utility functions for common MongoDB queries
 
 
-async def get_repositories_with_stats(
-    engine, limit: int = 50, offset: int = 0
-) -> List[Dict[str, Any]]:
-    """Get repositories with enhanced statistics including commits and technology counts"""
-    try:
-        # Get repositories with pagination
-        repositories = await engine.find(Repository, limit=limit, skip=offset)
+# Repository counter field -> model whose documents it counts
+REPOSITORY_COUNTERS = {
+    "commit_count": Commit,
+    "technology_count": Technology,
+    "pattern_count": PatternOccurrence,
+}
 
-        enhanced_repos = []
 
-        for repo in repositories:
-            # Get commit count
-            commit_count = await engine.count(Commit, Commit.repository_id == repo.id)
+async def increment_repository_counters(engine, repository_id, **deltas: int) -> None:
+    """$inc denormalized repository counters, e.g. ``pattern_count=3``.
 
-            # Get technology count
-            tech_count = await engine.count(
-                Technology, Technology.repository_id == repo.id
+    Counters that were never backfilled (null) are left alone so the next
+    listing recounts them instead of storing a partial total.
+    """
+    collection = engine.get_collection(Repository)
+    for field, delta in deltas.items():
+        if delta:
+            await collection.update_one(
+                {"_id": ObjectId(repository_id), field: {"$type": "number"}},
+                {"$inc": {field: delta}},
             )
 
-            # Get pattern occurrences count
-            pattern_count = await engine.count(
-                PatternOccurrence, PatternOccurrence.repository_id == repo.id
-            )  # Get latest analysis session
-            latest_session = await engine.find_one(
-                AnalysisSession,
-                AnalysisSession.repository_id == repo.id,
-                sort=AnalysisSession.started_at.desc(),
-            )
 
-            # Build enhanced repository data
-            repo_dict = repo.dict()
+async def refresh_repository_counters(
+    engine, repository_ids: List[ObjectId]
+) -> Dict[ObjectId, Dict[str, int]]:
+    """Recount and store the counters of the given repositories.
+
+    One grouped aggregation per counted collection plus one bulk write,
+    regardless of how many repositories are refreshed.
+    """
+    from pymongo import UpdateOne
+
+    counts: Dict[ObjectId, Dict[str, int]] = {
+        repo_id: {field: 0 for field in REPOSITORY_COUNTERS} for repo_id in repository_ids
+    }
+    if not repository_ids:
+        return counts
+    for field, model in REPOSITORY_COUNTERS.items():
+        cursor = engine.get_collection(model).aggregate(
+            [
+                {"$match": {"repository_id": {"$in": repository_ids}}},
+                {"$group": {"_id": "$repository_id", "n": {"$sum": 1}}},
+            ]
+        )
+        for row in await cursor.to_list(length=None):
+            counts[row["_id"]][field] = row["n"]
+
+    await engine.get_collection(Repository).bulk_write(
+        [UpdateOne({"_id": repo_id}, {"$set": values}) for repo_id, values in counts.items()],
+        ordered=False,
+    )
+    return counts
+
+
+async def get_repositories_with_stats(
+    engine,
+    limit: int = 50,
+    offset: int = 0,
+    status_filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Get a page of repositories with commit, technology and pattern counts
+    and their latest analysis session, in a single aggregation.
+
+    Pages are ordered by ``_id``. Pass the returned ``next_cursor`` as
+    ``cursor`` to continue after the last repository of a page (``offset``
+    is ignored then). Repositories whose counters predate denormalization
+    are recounted once and the counters stored.
+    """
+    try:
+        match: Dict[str, Any] = {}
+        if status_filter:
+            match["status"] = status_filter
+
+        page: List[Dict[str, Any]] = []
+        if cursor:
+            page.append({"$match": {"_id": {"$gt": ObjectId(cursor)}}})
+        page.append({"$sort": {"_id": 1}})
+        if offset and not cursor:
+            page.append({"$skip": offset})
+        page.extend(
+            [
+                # One extra document tells whether another page follows
+                {"$limit": limit + 1},
+                {
+                    "$lookup": {
+                        "from": engine.get_collection(AnalysisSession).name,
+                        "let": {"repository_id": "$_id"},
+                        "pipeline": [
+                            {"$match": {"$expr": {"$eq": ["$repository_id", "$$repository_id"]}}},
+                            {"$sort": {"started_at": -1}},
+                            {"$limit": 1},
+                            {"$project": {"_id": 0, "started_at": 1, "status": 1}},
+                        ],
+                        "as": "latest_session",
+                    }
+                },
+            ]
+        )
+
+        results = await engine.get_collection(Repository).aggregate(
+            [
+                {"$match": match},
+                {"$facet": {"total": [{"$count": "n"}], "repositories": page}},
+            ]
+        ).to_list(length=1)
+        result = results[0] if results else {}
+        docs = result.get("repositories", [])
+        total = result.get("total") or [{"n": 0}]
+
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+
+        stale = [
+            doc["_id"]
+            for doc in docs
+            if any(doc.get(field) is None for field in REPOSITORY_COUNTERS)
+        ]
+        if stale:
+            refreshed = await refresh_repository_counters(engine, stale)
+            for doc in docs:
+                doc.update(refreshed.get(doc["_id"], {}))
+
+        enhanced_repos = []
+        for doc in docs:
+            sessions = doc.pop("latest_session", None) or []
+            latest_session = sessions[0] if sessions else None
+            repo_dict = Repository.model_validate_doc(doc).dict()
             repo_dict.update(
                 {
                     "stats": {
-                        "commit_count": commit_count,
-                        "technology_count": tech_count,
-                        "pattern_count": pattern_count,
+                        "commit_count": doc.get("commit_count") or 0,
+                        "technology_count": doc.get("technology_count") or 0,
+                        "pattern_count": doc.get("pattern_count") or 0,
                         "has_analysis": latest_session is not None,
                         "last_analysis": (
-                            latest_session.started_at if latest_session else None
+                            latest_session.get("started_at") if latest_session else None
                         ),
                         "analysis_status": (
-                            latest_session.status if latest_session else "not_analyzed"
+                            latest_session.get("status") if latest_session else "not_analyzed"
                         ),
                     }
                 }
             )
-
             enhanced_repos.append(repo_dict)
 
-        return enhanced_repos
+        return {
+            "repositories": enhanced_repos,
+            "total_count": total[0]["n"],
+            "has_more": has_more,
+            "next_cursor": str(docs[-1]["_id"]) if has_more else None,
+        }
 
     except Exception as e:
         logger.error(f"❌ Failed to get repositories with stats: {e}")
-        return []
+        return {"repositories": [], "total_count": 0, "has_more": False, "next_cursor": None}
 
 
 async def get_repository_by_url(engine, url: str) -> Optional[Repository]:
@@ -3,7 +3,7 @@ import logging
 import re
 import asyncio
 import datetime
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
 
 # Optional dependency used for Ollama HTTP checks
 try:
@@ -26,6 +26,7 @@ from langchain.chains import LLMChain
 from pydantic import BaseModel, Field
 from app.models.ai_models import PatternAnalysis, CodeQualityAnalysis, EvolutionAnalysis
 
+from app.core.config import settings
 from app.core.database import get_enhanced_database_manager, get_collection
 from app.core.service_manager import (
     get_security_analyzer,
@@ -36,11 +37,29 @@ from app.services.enhanced_technology_detector import EnhancedTechnologyDetector
 from app.services.enhanced_pattern_detector import EnhancedPatternDetector
 from app.services.enhanced_insights_generator import EnhancedInsightsGenerator
 from app.services.enhanced_code_quality_analyzer import EnhancedCodeQualityAnalyzer
+from app.services.repository_snapshot import RepositorySnapshot
+from app.services.source_index import SourceIndex
+from app.services.static_analysis import StaticAnalysisRunner
+from app.services.file_sampler import FileSampler
+from app.services.embedding_pipeline import EmbeddingPipeline
+from app.services.local_vector_index import get_local_vector_index
+from app.services.llm_batching import (
+    batch_response_model,
+    build_batch_prompt,
+    pack_batches,
+    split_batch_response,
+)
 from app.services.cache_service import cache_analysis_result
+from app.services.llm_adapters.http_pool import get_http_pool_stats
+from app.services.llm_adapters.streaming import get_stream_stats
+from app.services.llm_adapters.usage import get_llm_usage_tracker
 from app.services.llm_adapters.providers import build_default_manager
 
 logger = logging.getLogger(__name__)
 
+# Lifetime of cached single-snippet pattern and quality results (1 hour)
+SNIPPET_CACHE_TTL_SECONDS = 3600
+
 
 # AI analysis models are now imported from app.models.ai_models
 
@@ -83,6 +102,8 @@ class AIService:
         self.llm: Any = None
         self.embeddings: Any = None
         self.collection = None
+        self.embedding_pipeline: Optional[EmbeddingPipeline] = None
+        self.local_index = get_local_vector_index()
         self.ollama_available: bool = False
         self.ollama_model: Optional[str] = None
         self.security_analyzer = get_security_analyzer()
@@ -95,6 +116,14 @@ class AIService:
         self.enhanced_pattern_detector = EnhancedPatternDetector()
         self.enhanced_insights_generator = EnhancedInsightsGenerator()
         self.enhanced_quality_analyzer = EnhancedCodeQualityAnalyzer()
+        self.static_analysis = StaticAnalysisRunner(
+            self.enhanced_tech_detector,
+            self.enhanced_pattern_detector,
+            self.enhanced_quality_analyzer,
+            batch_size=settings.STATIC_ANALYSIS_BATCH_FILES,
+            sampler=FileSampler.from_settings(),
+            time_budget_s=settings.STATIC_ANALYSIS_TIME_BUDGET_S,
+        )
 
         # Model selection support
         self.preferred_model: Optional[str] = None
@@ -185,6 +214,14 @@ class AIService:
             self.collection = get_collection("code_patterns")
             if self.collection:
                 logger.info("ChromaDB collection initialized")
+            if (self.embeddings and self.collection) or self.local_index:
+                self.embedding_pipeline = EmbeddingPipeline(
+                    self.embeddings,
+                    self.collection,
+                    local_index=self.local_index,
+                    batch_size=settings.EMBEDDING_BATCH_SIZE,
+                    flush_interval_s=settings.EMBEDDING_FLUSH_INTERVAL_S,
+                )
 
             # Initialize AI ensemble after services are ready
             from app.core.service_manager import get_ai_ensemble
@@ -340,6 +377,10 @@ class AIService:
             "embeddings_available": self.embeddings is not None,
             "embeddings_model": "nomic-embed-text" if self.embeddings else None,
             "vector_db_available": self.collection is not None,
+            "local_vector_index": self.local_index.get_stats() if self.local_index else None,
+            "embedding_pipeline": (
+                self.embedding_pipeline.get_stats() if self.embedding_pipeline else None
+            ),
             "preferred_model": self.preferred_model,
             "multi_model_service_available": False,  # Multi-model service removed
             "timestamp": self._get_timestamp(),
@@ -347,11 +388,25 @@ class AIService:
             "openai_models_available": openai_models_available,
             "llm_adapter_available": bool(self.llm_adapter and self.llm_adapter.has_providers),
             "llm_providers": self.llm_adapter.provider_names if self.llm_adapter else [],
+            "llm_http_pools": get_http_pool_stats(),
+            "llm_streaming": get_stream_stats(),
+            "llm_token_usage": get_llm_usage_tracker().get_stats(),
+            "llm_provider_health": self.llm_adapter.get_health() if self.llm_adapter else {},
+            "llm_scheduler": (
+                self.llm_adapter.scheduler.get_stats()
+                if self.llm_adapter and self.llm_adapter.scheduler
+                else None
+            ),
+            "llm_response_cache": (
+                self.llm_adapter.response_cache.get_stats()
+                if self.llm_adapter and self.llm_adapter.response_cache
+                else None
+            ),
         }
 
         return status
 
-    @cache_analysis_result("pattern", ttl_seconds=3600)  # 1 hour cache
+    @cache_analysis_result("pattern", ttl_seconds=SNIPPET_CACHE_TTL_SECONDS)
     async def analyze_code_pattern(
         self,
         code: str,
@@ -384,34 +439,7 @@ class AIService:
                 user_id=user_id,
             )
             if isinstance(ai_analysis, PatternAnalysis):
-                try:
-                    complexity_score = float(ai_analysis.complexity_score)
-                except Exception:
-                    complexity_score = 5.0
-
-                if self.embeddings and self.collection:
-                    await self.store_pattern_embedding(
-                        code,
-                        ai_analysis.patterns,
-                        {
-                            "language": language,
-                            "complexity": complexity_score,
-                            "skill_level": "advanced" if complexity_score >= 8 else "beginner" if complexity_score <= 3 else "intermediate",
-                        },
-                    )
-
-                combined = list(set(detected_patterns + ai_analysis.patterns))
-                return {
-                    "detected_patterns": detected_patterns,
-                    "ai_patterns": ai_analysis.patterns,
-                    "combined_patterns": combined,
-                    "complexity_score": complexity_score,
-                    "skill_level": "advanced"
-                    if complexity_score >= 8
-                    else "beginner" if complexity_score <= 3 else "intermediate",
-                    "suggestions": ai_analysis.suggestions,
-                    "ai_powered": True,
-                }
+                return await self._pattern_result(code, language, detected_patterns, ai_analysis)
 
         # Fallback to Ollama if available
         if self.ollama_available and self.llm is not None:
@@ -472,7 +500,7 @@ class AIService:
                     except Exception:
                         skill_level = "intermediate"
 
-                    if self.embeddings and self.collection:
+                    if self.embedding_pipeline:
                         await self.store_pattern_embedding(
                             code,
                             ai_analysis.patterns,
@@ -501,6 +529,172 @@ class AIService:
         # Enhanced fallback analysis
         return self._enhanced_simple_analysis(code, detected_patterns, language)
 
+    async def _pattern_result(
+        self,
+        code: str,
+        language: str,
+        detected_patterns: List[str],
+        ai_analysis: PatternAnalysis,
+    ) -> Dict[str, Any]:
+        """Result dict for an adapter-produced PatternAnalysis"""
+        try:
+            complexity_score = float(ai_analysis.complexity_score)
+        except Exception:
+            complexity_score = 5.0
+
+        if self.embedding_pipeline:
+            await self.store_pattern_embedding(
+                code,
+                ai_analysis.patterns,
+                {
+                    "language": language,
+                    "complexity": complexity_score,
+                    "skill_level": "advanced" if complexity_score >= 8 else "beginner" if complexity_score <= 3 else "intermediate",
+                },
+            )
+
+        combined = list(set(detected_patterns + ai_analysis.patterns))
+        return {
+            "detected_patterns": detected_patterns,
+            "ai_patterns": ai_analysis.patterns,
+            "combined_patterns": combined,
+            "complexity_score": complexity_score,
+            "skill_level": "advanced"
+            if complexity_score >= 8
+            else "beginner" if complexity_score <= 3 else "intermediate",
+            "suggestions": ai_analysis.suggestions,
+            "ai_powered": True,
+        }
+
+    async def _batched_structured_completion(
+        self,
+        model: Type[BaseModel],
+        header: str,
+        sections: Sequence[str],
+        *,
+        tokens_per_result: int,
+        temperature: float,
+        user_id: Optional[str] = None,
+    ) -> List[Optional[BaseModel]]:
+        """
+        One ``model`` result per section, packing several sections into each
+        request. Entries are None where the batched response had no valid
+        result, for the caller to retry singly.
+        """
+        batch_model = batch_response_model(model)
+        batches = pack_batches(
+            sections, settings.LLM_BATCH_TOKEN_BUDGET, settings.LLM_BATCH_MAX_ITEMS
+        )
+
+        async def run_batch(indices: List[int]) -> Dict[int, BaseModel]:
+            # Numbered within the batch so a prompt only depends on its own
+            # snippets and stays cacheable when other candidates change
+            numbers = list(range(1, len(indices) + 1))
+            prompt = build_batch_prompt(header, [sections[i] for i in indices], numbers)
+            max_tokens = min(
+                tokens_per_result * len(indices) + 200, settings.LLM_BATCH_MAX_OUTPUT_TOKENS
+            )
+            try:
+                batch = await self._structured_completion(
+                    batch_model,
+                    prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    user_id=user_id,
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Batched {model.__name__} request failed: {e}")
+                batch = None
+            parsed = split_batch_response(model, batch, numbers)
+            return {indices[n - 1]: result for n, result in parsed.items()}
+
+        by_index: Dict[int, BaseModel] = {}
+        for part in await asyncio.gather(*(run_batch(b) for b in batches)):
+            by_index.update(part)
+
+        missing = len(sections) - len(by_index)
+        logger.info(
+            f"📦 {model.__name__}: {len(sections)} snippets in {len(batches)} requests"
+            + (f", {missing} retried singly" if missing else "")
+        )
+        return [by_index.get(i) for i in range(len(sections))]
+
+    @staticmethod
+    async def _cached_snippet_results(
+        cache_type: str, snippets: Sequence[Tuple[str, str]], user_id: Optional[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Per-snippet results already cached by the single-snippet analyses"""
+        from app.core.service_manager import get_cache_service
+
+        cache_service = get_cache_service()
+        return [
+            await cache_service.get(cache_type, code, language, user_id=user_id)
+            for code, language in snippets
+        ]
+
+    @staticmethod
+    async def _cache_snippet_result(
+        cache_type: str, result: Dict[str, Any], code: str, language: str, user_id: Optional[str]
+    ) -> None:
+        """Store a batched result under the single-snippet analysis cache key"""
+        from app.core.service_manager import get_cache_service
+
+        await get_cache_service().set(
+            cache_type, result, SNIPPET_CACHE_TTL_SECONDS, None, code, language, user_id=user_id
+        )
+
+    async def analyze_code_patterns_batch(
+        self,
+        snippets: Sequence[Tuple[str, str]],
+        *,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        ``analyze_code_pattern`` for many (code, language) snippets, packing
+        several into each LLM request; results are in input order
+        """
+        if not (self.llm_adapter and self.llm_adapter.has_providers) or len(snippets) < 2:
+            return list(
+                await asyncio.gather(
+                    *(self.analyze_code_pattern(c, l, user_id=user_id) for c, l in snippets)
+                )
+            )
+
+        results = await self._cached_snippet_results("pattern", snippets, user_id)
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+
+        detected = {i: self._detect_patterns_simple(*snippets[i]) for i in misses}
+        sections = []
+        for i in misses:
+            code, language = snippets[i]
+            sections.append(
+                f"Language: {language}\nHeuristic detections: {detected[i] or ['none']}\n"
+                f"```{language}\n{code[:2000]}\n```"
+            )
+        analyses = await self._batched_structured_completion(
+            PatternAnalysis,
+            "Analyse each of the following code snippets and return detected patterns, "
+            "complexity score (0-10) and actionable suggestions for each. "
+            "Respond using the schema provided in the system instructions.",
+            sections,
+            tokens_per_result=400,
+            temperature=0.15,
+            user_id=user_id,
+        )
+
+        async def finish(i: int, analysis: Optional[PatternAnalysis]) -> None:
+            code, language = snippets[i]
+            if analysis is None:
+                results[i] = await self.analyze_code_pattern(code, language, user_id=user_id)
+                return
+            results[i] = await self._pattern_result(code, language, detected[i], analysis)
+            await self._cache_snippet_result("pattern", results[i], code, language, user_id)
+
+        await asyncio.gather(*(finish(i, a) for i, a in zip(misses, analyses)))
+        return results
+
     def _parse_llm_response(
         self, result: str, parser, fixing_parser
     ) -> Optional[PatternAnalysis]:
@@ -560,7 +754,7 @@ class AIService:
                 logger.warning(f"Fallback parsing failed: {e3}")
                 return None
 
-    @cache_analysis_result("quality", ttl_seconds=3600)  # 1 hour cache
+    @cache_analysis_result("quality", ttl_seconds=SNIPPET_CACHE_TTL_SECONDS)
     async def analyze_code_quality(
         self,
         code: str,
@@ -586,13 +780,7 @@ class AIService:
                 user_id=user_id,
             )
             if isinstance(quality_analysis, CodeQualityAnalysis):
-                return {
-                    "quality_score": quality_analysis.quality_score,
-                    "readability": quality_analysis.readability,
-                    "issues": quality_analysis.issues or quality_analysis.issues_found,
-                    "improvements": quality_analysis.improvements or quality_analysis.recommendations,
-                    "ai_powered": True,
-                }
+                return self._quality_result(quality_analysis)
 
         # Fallback to Ollama if available
         if self.ollama_available and self.llm is not None:
@@ -646,6 +834,65 @@ class AIService:
 
         return self._enhanced_quality_analysis(code, language)
 
+    @staticmethod
+    def _quality_result(quality_analysis: CodeQualityAnalysis) -> Dict[str, Any]:
+        """Result dict for an adapter-produced CodeQualityAnalysis"""
+        return {
+            "quality_score": quality_analysis.quality_score,
+            "readability": quality_analysis.readability,
+            "issues": quality_analysis.issues or quality_analysis.issues_found,
+            "improvements": quality_analysis.improvements or quality_analysis.recommendations,
+            "ai_powered": True,
+        }
+
+    async def analyze_code_quality_batch(
+        self,
+        snippets: Sequence[Tuple[str, str]],
+        *,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        ``analyze_code_quality`` for many (code, language) snippets, packing
+        several into each LLM request; results are in input order
+        """
+        if not (self.llm_adapter and self.llm_adapter.has_providers) or len(snippets) < 2:
+            return list(
+                await asyncio.gather(
+                    *(self.analyze_code_quality(c, l, user_id=user_id) for c, l in snippets)
+                )
+            )
+
+        results = await self._cached_snippet_results("quality", snippets, user_id)
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+
+        sections = []
+        for i in misses:
+            code, language = snippets[i]
+            sections.append(f"Language: {language}\n```{language}\n{code[:2000]}\n```")
+        analyses = await self._batched_structured_completion(
+            CodeQualityAnalysis,
+            "Evaluate the maintainability, readability and testing posture of each of the "
+            "following code snippets. Provide issues and recommended improvements for each. "
+            "Respond using the schema provided in the system instructions.",
+            sections,
+            tokens_per_result=450,
+            temperature=0.1,
+            user_id=user_id,
+        )
+
+        async def finish(i: int, analysis: Optional[CodeQualityAnalysis]) -> None:
+            code, language = snippets[i]
+            if analysis is None:
+                results[i] = await self.analyze_code_quality(code, language, user_id=user_id)
+                return
+            results[i] = self._quality_result(analysis)
+            await self._cache_snippet_result("quality", results[i], code, language, user_id)
+
+        await asyncio.gather(*(finish(i, a) for i, a in zip(misses, analyses)))
+        return results
+
     def _parse_quality_response(
         self, result: str, parser, fixing_parser
     ) -> Optional[CodeQualityAnalysis]:
@@ -929,7 +1176,10 @@ class AIService:
         return insights
 
     async def enhanced_analyze_repository(
-        self, repo_path: str, file_list: List[str]
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
     ) -> Dict[str, Any]:
         """
         Enhanced repository analysis using all advanced services
@@ -937,6 +1187,7 @@ class AIService:
         Args:
             repo_path: Path to the repository
             file_list: List of file paths in the repository
+            snapshot: Shared file index/content store, so each file is read once
 
         Returns:
             Comprehensive analysis results
@@ -944,23 +1195,15 @@ class AIService:
         try:
             logger.info(f"🔍 Starting enhanced analysis for repository at {repo_path}")
 
-            # 1. Enhanced Technology Detection
-            logger.info("🔧 Detecting technologies...")
-            technologies = self.enhanced_tech_detector.detect_technologies(
-                repo_path, file_list
-            )
-
-            # 2. Enhanced Pattern Detection
-            logger.info("🎯 Detecting patterns...")
-            patterns = self.enhanced_pattern_detector.detect_patterns(
-                repo_path, file_list
-            )
-
-            # 3. Enhanced Code Quality Analysis
-            logger.info("📊 Analyzing code quality...")
-            quality_report = self.enhanced_quality_analyzer.analyze_code_quality(
-                repo_path, file_list
-            )
+            # 1-3. Technology, pattern and quality detection, run per file in
+            # the analysis process pool so the event loop stays free
+            logger.info("🔧 Detecting technologies, patterns and code quality...")
+            (
+                technologies,
+                patterns,
+                quality_report,
+                coverage,
+            ) = await self.static_analysis.run(repo_path, file_list, snapshot)
 
             # 4. Convert patterns to legacy format for compatibility
             legacy_patterns = self._convert_patterns_to_legacy(patterns)
@@ -1008,6 +1251,7 @@ class AIService:
                     for insight in enhanced_insights
                 ],
                 "enhanced_analysis": True,
+                "analysis_coverage": coverage.to_dict(),
                 "timestamp": self._get_timestamp(),
             }
 
@@ -1384,70 +1628,79 @@ class AIService:
         self, code: str, patterns: List[str], metadata: Dict[str, Any]
     ) -> None:
         """
-        Fix #6: Actually store embeddings for similarity search
+        Queue a snippet's embedding for similarity search; the pipeline embeds
+        and stores queued snippets in batches off the event loop
         """
-        if not self.embeddings or not self.collection:
+        if not self.embedding_pipeline:
             logger.warning("Embeddings or collection not available")
             return
 
         try:
-            embedding = self.embeddings.embed_query(code[:1000])
-            metadata.update(
-                {
-                    "patterns": json.dumps(patterns),
-                    "timestamp": self._get_timestamp(),
-                    "code_preview": code[:200],
-                }
-            )
-
-            self.collection.add(
-                embeddings=[embedding],
-                documents=[code[:1000]],
-                metadatas=[metadata],
-                ids=[
-                    f"code_{int(self._get_timestamp().replace('-', '').replace(':', '').replace('T', '').replace('.', '')[:14])}_{hash(code)}"
-                ],
-            )
-
-            logger.info(f"✅ Stored embedding for {len(patterns)} patterns")
-
+            self.embedding_pipeline.enqueue(code, patterns, metadata)
         except Exception as e:
-            logger.error(f"Error storing embedding: {e}")
+            logger.error(f"Error queueing embedding: {e}")
 
     async def find_similar_patterns(
         self, code: str, limit: int = 5
     ) -> List[Dict[str, Any]]:
         """
-        Fix #6: Implement actual similarity search
+        Snippets similar to ``code``, from ChromaDB when it is available,
+        otherwise from the local vector index
         """
-        if not self.embeddings or not self.collection:
+        results = await self.find_similar_patterns_batch([code], limit)
+        return results[0]
+
+    async def find_similar_patterns_batch(
+        self, codes: Sequence[str], limit: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """``find_similar_patterns`` for several snippets with one index query"""
+        if not codes:
             return []
+        documents = [c[:1000] for c in codes]
 
-        try:
-            query_embedding = self.embeddings.embed_query(code[:1000])
-            results = self.collection.query(
-                query_embeddings=[query_embedding], n_results=limit
-            )
+        if self.embeddings and self.collection:
+            try:
+                query_embeddings = await asyncio.to_thread(
+                    self.embeddings.embed_documents, documents
+                )
+                results = await asyncio.to_thread(
+                    self.collection.query, query_embeddings=query_embeddings, n_results=limit
+                )
 
-            similar_patterns: List[Dict[str, Any]] = []
-            metadatas = results.get("metadatas", [])
-            distances = results.get("distances", [])
-            if metadatas and distances:
-                for metadata, distance in zip(metadatas[0], distances[0]):
-                    similar_patterns.append(
-                        {
-                            "patterns": json.loads(str(metadata.get("patterns", "[]"))),
-                            "similarity_score": 1 - distance,
-                            "language": metadata.get("language", "unknown"),
-                            "complexity": metadata.get("complexity", 0),
-                            "code_preview": metadata.get("code_preview", ""),
-                        }
-                    )
-            return similar_patterns
+                metadatas = results.get("metadatas") or [[] for _ in codes]
+                distances = results.get("distances") or [[] for _ in codes]
+                return [
+                    [
+                        self._similar_pattern(metadata, 1 - distance)
+                        for metadata, distance in zip(found, dists)
+                    ]
+                    for found, dists in zip(metadatas, distances)
+                ]
+            except Exception as e:
+                logger.error(f"Similarity search error, falling back to local index: {e}")
 
+        local_index = self.local_index
+        if local_index is None or not len(local_index):
+            return [[] for _ in codes]
+        try:
+            matches = await asyncio.to_thread(local_index.search, documents, limit)
         except Exception as e:
-            logger.error(f"Similarity search error: {e}")
-            return []
+            logger.error(f"Local similarity search error: {e}")
+            return [[] for _ in codes]
+        return [
+            [self._similar_pattern(metadata, score) for _id, score, metadata in found]
+            for found in matches
+        ]
+
+    @staticmethod
+    def _similar_pattern(metadata: Dict[str, Any], score: float) -> Dict[str, Any]:
+        return {
+            "patterns": json.loads(str(metadata.get("patterns", "[]"))),
+            "similarity_score": score,
+            "language": metadata.get("language", "unknown"),
+            "complexity": metadata.get("complexity", 0),
+            "code_preview": metadata.get("code_preview", ""),
+        }
 
     def _detect_patterns_simple(self, code: str, language: Optional[str]) -> List[str]:
         """Enhanced pattern detection with comprehensive rule-based analysis"""
@@ -1772,17 +2025,46 @@ class AIService:
         Returns:
             Dict containing security analysis results
         """
+        return await self._security_report(code, file_path, language)
+
+    @cache_analysis_result("static_analysis", ttl_seconds=1800)  # 30 minute cache
+    async def analyze_security_and_performance(
+        self, code: str, file_path: str = "unknown", language: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the security and performance analyzers over one shared SourceIndex;
+        each detects the language itself when none is given
+
+        Returns:
+            Dict with "security" and "performance" reports
+        """
+        index = SourceIndex(code)
+        return {
+            "security": await self._security_report(code, file_path, language, index),
+            "performance": await self._performance_report(
+                code, file_path, language, index
+            ),
+        }
+
+    async def _security_report(
+        self,
+        code: str,
+        file_path: str,
+        language: Optional[str],
+        index: Optional[SourceIndex] = None,
+    ) -> Dict[str, Any]:
+        """Security analysis report, reusing ``index`` when given"""
         try:
             # Run security analysis
             # Handle both sync and async security analyzers
             if hasattr(self.security_analyzer, "analyze_code"):
                 if asyncio.iscoroutinefunction(self.security_analyzer.analyze_code):
                     vulnerabilities = await self.security_analyzer.analyze_code(
-                        code, file_path, language
+                        code, file_path, language, index=index
                     )
                 else:
                     vulnerabilities = self.security_analyzer.analyze_code(
-                        code, file_path, language
+                        code, file_path, language, index=index
                     )
             else:
                 vulnerabilities = []
@@ -1821,7 +2103,10 @@ class AIService:
             }
 
     async def analyze_architecture(
-        self, repository_path: str, file_list: Optional[List[str]] = None
+        self,
+        repository_path: str,
+        file_list: Optional[List[str]] = None,
+        snapshot: Optional[RepositorySnapshot] = None,
     ) -> Dict[str, Any]:
         """
         Analyze repository architecture using comprehensive pattern detection
@@ -1829,6 +2114,7 @@ class AIService:
         Args:
             repository_path: Path to repository root
             file_list: Optional list of files to analyze
+            snapshot: Optional shared file index/content store
 
         Returns:
             Dict containing architectural analysis results
@@ -1836,7 +2122,7 @@ class AIService:
         try:
             # Run architectural analysis
             analysis = self.architectural_analyzer.analyze_architecture(
-                repository_path, file_list
+                repository_path, file_list, snapshot
             )
 
             # Generate comprehensive report
@@ -1896,6 +2182,16 @@ class AIService:
         Returns:
             Dict containing performance analysis results
         """
+        return await self._performance_report(code, file_path, language)
+
+    async def _performance_report(
+        self,
+        code: str,
+        file_path: str,
+        language: Optional[str],
+        index: Optional[SourceIndex] = None,
+    ) -> Dict[str, Any]:
+        """Performance analysis report, reusing ``index`` when given"""
         try:
             # Run performance analysis
             # Handle both sync and async performance analyzers
@@ -1904,11 +2200,11 @@ class AIService:
                     self.performance_analyzer.analyze_performance
                 ):
                     issues = await self.performance_analyzer.analyze_performance(
-                        code, file_path, language
+                        code, file_path, language, index=index
                     )
                 else:
                     issues = self.performance_analyzer.analyze_performance(
-                        code, file_path, language
+                        code, file_path, language, index=index
                     )
             else:
                 issues = []
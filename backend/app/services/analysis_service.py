@@ -11,6 +11,7 @@ from app.services.repository_service import RepositoryService
 from app.services.pattern_service import PatternService
 from app.services.ai_analysis_service import AIAnalysisService
 from app.services.cache_service import cache_analysis_result
+from app.services.llm_adapters.usage import current_usage, track_llm_usage
 from app.utils.token_logger import log_analysis_run
 
 logger = logging.getLogger(__name__)
@@ -85,6 +86,7 @@ class AnalysisService:
     @cache_analysis_result(
         "repository", ttl_seconds=7200, tags=["analysis"]
     )  # 2 hour cache
+    @track_llm_usage
     async def analyze_repository(
         self,
         repo_url: str,
@@ -129,30 +131,28 @@ class AnalysisService:
             logger.info(f"🔍 Extracting repository information...")
             report["repo_info"] = self.git.get_repository_info(repo)
 
-            # Get file list for enhanced analysis
-            file_list = [
-                str(item.path)
-                for item in repo.head.commit.tree.traverse()
-                if item.type == "blob"
-            ]
+            # Index the tree once; every analyzer below shares its content store
+            snapshot = self.git.build_snapshot(repo)
+            file_list = snapshot.paths
 
             # Use enhanced analysis if requested
             if use_enhanced:
                 logger.info("🚀 Running enhanced analysis with superior detection...")
                 enhanced_results = await self.ai.enhanced_analyze_repository(
-                    repo_path, file_list
+                    repo_path, file_list, snapshot
                 )
 
                 # Merge enhanced results into report
                 report.update(enhanced_results)
 
                 # Still extract legacy technologies for compatibility
-                report["technologies"] = report.get(
-                    "technologies", self.git.extract_technologies(repo)
-                )
+                if "technologies" not in report:
+                    report["technologies"] = self.git.extract_technologies(
+                        repo, snapshot
+                    )
             else:
                 # Standard analysis
-                report["technologies"] = self.git.extract_technologies(repo)
+                report["technologies"] = self.git.extract_technologies(repo, snapshot)
 
             logger.info(
                 f"📚 Found {len(report['technologies'].get('languages', {}))} languages"
@@ -180,47 +180,27 @@ class AnalysisService:
                 f"🤖 Running AI analysis on {len(analysis_candidates)} patterns..."
             )
 
-            # Run AI analyses in parallel
-            pattern_tasks = [
-                self.ai.analyze_code_pattern(
-                    c["code"], c["language"], user_id=user_id
-                )
-                for c in analysis_candidates
-            ]
-            quality_tasks = [
-                self.ai.analyze_code_quality(
-                    c["code"], c["language"], user_id=user_id
-                )
-                for c in analysis_candidates
-            ]
-            security_tasks = [
-                self.ai.analyze_security(
-                    c["code"], c.get("file_path", "unknown"), c["language"]
-                )
-                for c in analysis_candidates
-            ]
-            performance_tasks = [
-                self.ai.analyze_performance(
+            # Run AI analyses in parallel; LLM analyses pack several snippets per request
+            code_snippets = [(c["code"], c["language"]) for c in analysis_candidates]
+            # Security and performance share one SourceIndex per snippet
+            static_tasks = [
+                self.ai.analyze_security_and_performance(
                     c["code"], c.get("file_path", "unknown"), c["language"]
                 )
                 for c in analysis_candidates
             ]
 
             logger.info(
-                f"⚡ Processing {len(pattern_tasks)} pattern, {len(quality_tasks)} quality, {len(security_tasks)} security, and {len(performance_tasks)} performance analyses..."
+                f"⚡ Processing {len(code_snippets)} pattern, {len(code_snippets)} quality, and {len(static_tasks)} security/performance analyses..."
             )
             try:
-                (
-                    pattern_results,
-                    quality_results,
-                    security_results,
-                    performance_results,
-                ) = await asyncio.gather(
-                    asyncio.gather(*pattern_tasks),
-                    asyncio.gather(*quality_tasks),
-                    asyncio.gather(*security_tasks),
-                    asyncio.gather(*performance_tasks),
+                pattern_results, quality_results, static_results = await asyncio.gather(
+                    self.ai.analyze_code_patterns_batch(code_snippets, user_id=user_id),
+                    self.ai.analyze_code_quality_batch(code_snippets, user_id=user_id),
+                    asyncio.gather(*static_tasks),
                 )
+                security_results = [r["security"] for r in static_results]
+                performance_results = [r["performance"] for r in static_results]
                 report["pattern_analyses"] = pattern_results
                 report["quality_analyses"] = quality_results
                 report["security_analyses"] = security_results
@@ -262,6 +242,7 @@ class AnalysisService:
                         for c in analysis_candidates
                         if c.get("file_path")
                     ],
+                    snapshot,
                 )
                 report["architecture_analysis"] = architecture_analysis
                 logger.info(f"✅ Architecture analysis completed")
@@ -273,6 +254,7 @@ class AnalysisService:
                     "design_patterns": [],
                     "quality_metrics": {"overall_score": 50, "grade": "F"},
                 }
+            logger.debug(f"Snapshot content store: {snapshot.stats}")
 
             # Aggregate insights - FIX THE SET ISSUE HERE
             logger.info(f"💡 Generating insights...")
@@ -320,6 +302,7 @@ class AnalysisService:
                 snippets=snippets,
                 task_counts=task_counts,
                 duration_seconds=duration,
+                token_usage=current_usage(),
             )
             logger.info(
                 f"🎉 Analysis complete! Generated {len(report['insights'])} insights"
@@ -455,7 +438,8 @@ class AnalysisService:
     ) -> None:
         """Persist pattern analysis results to MongoDB"""
         try:
-            # Process patterns and their occurrences
+            # One occurrence per (candidate, detected pattern), written in bulk
+            occurrences: List[Dict[str, Any]] = []
             for i, (candidate, pattern_result, quality_result) in enumerate(
                 zip(candidates, pattern_results, quality_results)
             ):
@@ -463,23 +447,27 @@ class AnalysisService:
                 patterns = pattern_result.get("combined_patterns", [])
 
                 for pattern_name in patterns:
-                    # Create pattern occurrence
-                    await self.pattern_service.add_pattern_occurrence(
-                        repository_id=repository_id,
-                        pattern_name=pattern_name,
-                        file_path=candidate.get("file_path", "unknown"),
-                        code_snippet=candidate.get("code", ""),
-                        line_number=candidate.get("line_number", 0),
-                        confidence_score=pattern_result.get("confidence", 0.8),
-                        ai_model_used="codellama:7b",  # TODO: Get from AI service
-                        ai_analysis_metadata={
-                            "pattern_analysis": pattern_result,
-                            "quality_analysis": quality_result,
-                            "analysis_index": i,
-                        },
-                        detected_at=candidate.get("commit_date"),
+                    occurrences.append(
+                        {
+                            "pattern_name": pattern_name,
+                            "file_path": candidate.get("file_path", "unknown"),
+                            "code_snippet": candidate.get("code", ""),
+                            "line_number": candidate.get("line_number", 0),
+                            "confidence_score": pattern_result.get("confidence", 0.8),
+                            "ai_model_used": "codellama:7b",  # TODO: Get from AI service
+                            "ai_analysis_metadata": {
+                                "pattern_analysis": pattern_result,
+                                "quality_analysis": quality_result,
+                                "analysis_index": i,
+                            },
+                            "detected_at": candidate.get("commit_date"),
+                        }
                     )
 
+            await self.pattern_service.add_pattern_occurrences_bulk(
+                repository_id, occurrences
+            )
+
             logger.info(f"✅ Added pattern occurrences for repository {repository_id}")
 
         except Exception as e:
@@ -522,21 +510,10 @@ class AnalysisService:
         # Run AI analyses in parallel (same as analyze_repository)
         logger.info(f"🤖 Running AI analysis on {len(analysis_candidates)} patterns...")
 
-        pattern_tasks = [
-            self.ai.analyze_code_pattern(
-                c["code"], c["language"], user_id=user_id
-            )
-            for c in analysis_candidates
-        ]
-        quality_tasks = [
-            self.ai.analyze_code_quality(
-                c["code"], c["language"], user_id=user_id
-            )
-            for c in analysis_candidates
-        ]
-
+        code_snippets = [(c["code"], c["language"]) for c in analysis_candidates]
         pattern_results, quality_results = await asyncio.gather(
-            asyncio.gather(*pattern_tasks), asyncio.gather(*quality_tasks)
+            self.ai.analyze_code_patterns_batch(code_snippets, user_id=user_id),
+            self.ai.analyze_code_quality_batch(code_snippets, user_id=user_id),
         )
         report["pattern_analyses"] = pattern_results
         report["quality_analyses"] = quality_results
@@ -684,6 +661,7 @@ class AnalysisService:
             except Exception as cleanup_err:
                 logger.warning(f"⚠️ Cleanup error: {cleanup_err}")
 
+    @track_llm_usage
     async def _perform_incremental_analysis(
         self,
         repo,
@@ -751,39 +729,22 @@ class AnalysisService:
             )
 
             # Run AI analyses on changed files only
-            pattern_tasks = [
-                self.ai.analyze_code_pattern(
-                    c["code"], c["language"], user_id=user_id
-                )
-                for c in incremental_candidates
-            ]
-            quality_tasks = [
-                self.ai.analyze_code_quality(
-                    c["code"], c["language"], user_id=user_id
-                )
-                for c in incremental_candidates
-            ]
-            security_tasks = [
-                self.ai.analyze_security(
-                    c["code"], c.get("file_path", "unknown"), c["language"]
-                )
-                for c in incremental_candidates
-            ]
-            performance_tasks = [
-                self.ai.analyze_performance(
+            code_snippets = [(c["code"], c["language"]) for c in incremental_candidates]
+            # Security and performance share one SourceIndex per snippet
+            static_tasks = [
+                self.ai.analyze_security_and_performance(
                     c["code"], c.get("file_path", "unknown"), c["language"]
                 )
                 for c in incremental_candidates
             ]
 
-            pattern_results, quality_results, security_results, performance_results = (
-                await asyncio.gather(
-                    asyncio.gather(*pattern_tasks),
-                    asyncio.gather(*quality_tasks),
-                    asyncio.gather(*security_tasks),
-                    asyncio.gather(*performance_tasks),
-                )
+            pattern_results, quality_results, static_results = await asyncio.gather(
+                self.ai.analyze_code_patterns_batch(code_snippets, user_id=user_id),
+                self.ai.analyze_code_quality_batch(code_snippets, user_id=user_id),
+                asyncio.gather(*static_tasks),
             )
+            security_results = [r["security"] for r in static_results]
+            performance_results = [r["performance"] for r in static_results]
 
             # Package incremental results
             incremental_results = {
@@ -820,6 +781,7 @@ class AnalysisService:
                 snippets=snippets,
                 task_counts=task_counts,
                 duration_seconds=duration,
+                token_usage=current_usage(),
             )
 
             # Create new snapshot
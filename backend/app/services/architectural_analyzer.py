@@ -24,6 +24,9 @@ from enum import Enum
 from collections import defaultdict, Counter
 from datetime import datetime
 
+from app.services.path_filter import ARCHITECTURE_FILTER
+from app.services.repository_snapshot import RepositorySnapshot, read_repository_file
+
 logger = logging.getLogger(__name__)
 
 
@@ -302,13 +305,19 @@ class ArchitecturalAnalyzer:
             "event_driven": ["events", "handlers", "subscribers", "publishers"]
         }
 
-    def analyze_architecture(self, repository_path: str, file_list: List[str] = None) -> ArchitecturalAnalysis:
+    def analyze_architecture(
+        self,
+        repository_path: str,
+        file_list: List[str] = None,
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> ArchitecturalAnalysis:
         """
         Perform comprehensive architectural analysis
         
         Args:
             repository_path: Path to repository root
             file_list: Optional list of files to analyze
+            snapshot: Shared file index/content store of the analysis run
             
         Returns:
             Complete architectural analysis
@@ -316,6 +325,9 @@ class ArchitecturalAnalyzer:
         try:
             if file_list is None:
                 file_list = self._get_all_files(repository_path)
+            if snapshot is None:
+                # Several passes below read the same files; memoize them locally
+                snapshot = RepositorySnapshot.from_paths(repository_path, file_list)
             
             # Analyze directory structure
             directory_structure = self._analyze_directory_structure(repository_path, file_list)
@@ -326,15 +338,15 @@ class ArchitecturalAnalyzer:
             )
             
             # Detect design patterns
-            design_patterns = self._detect_design_patterns(repository_path, file_list)
+            design_patterns = self._detect_design_patterns(repository_path, file_list, snapshot)
             
             # Analyze code quality metrics
             quality_metrics = self._analyze_architecture_quality(
-                repository_path, file_list, design_patterns
+                repository_path, file_list, design_patterns, snapshot
             )
             
             # Generate dependency graph
-            dependency_graph = self._build_dependency_graph(repository_path, file_list)
+            dependency_graph = self._build_dependency_graph(repository_path, file_list, snapshot)
             
             # Analyze layers
             layer_analysis = self._analyze_layers(directory_structure, dependency_graph)
@@ -365,28 +377,12 @@ class ArchitecturalAnalyzer:
 
     def _get_all_files(self, repository_path: str) -> List[str]:
         """Get all relevant files from repository"""
-        files = []
-        excluded_dirs = {'.git', '__pycache__', 'node_modules', '.pytest_cache', 'venv', 'env'}
-        
-        for root, dirs, filenames in os.walk(repository_path):
-            # Remove excluded directories
-            dirs[:] = [d for d in dirs if d not in excluded_dirs]
-            
-            for filename in filenames:
-                if self._is_code_file(filename):
-                    rel_path = os.path.relpath(os.path.join(root, filename), repository_path)
-                    files.append(rel_path)
-        
-        return files
+        path_filter = ARCHITECTURE_FILTER.for_repository(repository_path)
+        return list(path_filter.walk(repository_path))
 
     def _is_code_file(self, filename: str) -> bool:
         """Check if file is a code file"""
-        code_extensions = {
-            '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cs', '.cpp', '.c', 
-            '.h', '.hpp', '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala',
-            '.html', '.css', '.scss', '.sass', '.vue', '.svelte'
-        }
-        return Path(filename).suffix.lower() in code_extensions
+        return ARCHITECTURE_FILTER.includes(filename)
 
     def _analyze_directory_structure(self, repository_path: str, file_list: List[str]) -> Dict[str, Any]:
         """Analyze repository directory structure"""
@@ -492,15 +488,20 @@ class ArchitecturalAnalyzer:
         
         return sum([has_controllers, has_models, has_views]) >= 2
 
-    def _detect_design_patterns(self, repository_path: str, file_list: List[str]) -> List[PatternDetection]:
+    def _detect_design_patterns(
+        self,
+        repository_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> List[PatternDetection]:
         """Detect design patterns in code"""
         detected_patterns = []
         
         for file_path in file_list:
-            full_path = os.path.join(repository_path, file_path)
             try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+                content = read_repository_file(repository_path, file_path, snapshot)
+                if content is None:
+                    raise FileNotFoundError(file_path)
                 
                 language = self._detect_file_language(file_path)
                 patterns = self._analyze_file_patterns(content, language, file_path)
@@ -593,13 +594,14 @@ class ArchitecturalAnalyzer:
         return consolidated
 
     def _analyze_architecture_quality(self, repository_path: str, file_list: List[str], 
-                                    design_patterns: List[PatternDetection]) -> Dict[str, float]:
+                                    design_patterns: List[PatternDetection],
+                                    snapshot: Optional[RepositorySnapshot] = None) -> Dict[str, float]:
         """Analyze architecture quality metrics"""
         # Modularity: based on directory structure and file organization
         modularity = self._calculate_modularity(file_list)
         
         # Coupling: based on imports and dependencies
-        coupling = self._calculate_coupling(repository_path, file_list)
+        coupling = self._calculate_coupling(repository_path, file_list, snapshot)
         
         # Cohesion: based on file organization and pattern usage
         cohesion = self._calculate_cohesion(file_list, design_patterns)
@@ -645,15 +647,20 @@ class ArchitecturalAnalyzer:
         
         return max(0.0, 1.0 - normalized_variance)
 
-    def _calculate_coupling(self, repository_path: str, file_list: List[str]) -> float:
+    def _calculate_coupling(
+        self,
+        repository_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> float:
         """Calculate coupling score based on imports and dependencies"""
         import_counts = []
         
         for file_path in file_list:
-            full_path = os.path.join(repository_path, file_path)
             try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+                content = read_repository_file(repository_path, file_path, snapshot)
+                if content is None:
+                    raise FileNotFoundError(file_path)
                 
                 # Count imports/includes
                 import_count = len(re.findall(r'^(import|from|#include|require\()', content, re.MULTILINE))
@@ -712,15 +719,20 @@ class ArchitecturalAnalyzer:
         
         return (depth_complexity + file_complexity) / 2
 
-    def _build_dependency_graph(self, repository_path: str, file_list: List[str]) -> Dict[str, List[str]]:
+    def _build_dependency_graph(
+        self,
+        repository_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> Dict[str, List[str]]:
         """Build dependency graph between modules"""
         dependencies = defaultdict(list)
         
         for file_path in file_list:
-            full_path = os.path.join(repository_path, file_path)
             try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+                content = read_repository_file(repository_path, file_path, snapshot)
+                if content is None:
+                    raise FileNotFoundError(file_path)
                 
                 # Extract local imports/dependencies
                 local_imports = self._extract_local_imports(content, file_path)
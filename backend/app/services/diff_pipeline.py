@@ -0,0 +1,165 @@
+"""
+Batched Diff Pipeline
+
+Extracts the commit metadata, name-status (with blob ids) and numstat for a
+whole commit range from one ``git log --raw --numstat -z`` stream, instead of
+spawning a ``git diff`` per commit. The stream is parsed incrementally into
+plain, picklable records so per-commit analysis can run in worker processes.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from git import Repo
+
+logger = logging.getLogger(__name__)
+
+NULL_SHA = "0" * 40
+
+# %x1e starts a commit header, %x1f separates its fields
+_LOG_FORMAT = "--format=%x1e%H%x1f%an%x1f%ae%x1f%cI%x1f%B%x1f"
+_NUMSTAT_RE = re.compile(r"^(\d+|-)\t(\d+|-)\t(.*)$", re.DOTALL)
+_READ_CHUNK = 64 * 1024
+
+
+@dataclass
+class FileChangeRecord:
+    """One file touched by a commit, relative to its first parent"""
+
+    status: str  # git name-status letter: A, D, M, R, C, T
+    old_path: Optional[str]
+    new_path: Optional[str]
+    new_blob: Optional[str]  # hex sha of the post-commit blob, None if deleted
+    additions: int = 0
+    deletions: int = 0
+    content: Optional[str] = None
+
+    @property
+    def path(self) -> Optional[str]:
+        return self.new_path or self.old_path
+
+
+@dataclass
+class CommitRecord:
+    """Commit metadata plus its file changes, as parsed from the log stream"""
+
+    hexsha: str
+    author_name: str
+    author_email: str
+    committed_date: datetime
+    message: str
+    files: List[FileChangeRecord] = field(default_factory=list)
+
+
+def _iter_tokens(stream) -> Iterator[str]:
+    """Yield NUL-separated tokens from a byte stream without buffering it all"""
+    pending = b""
+    while True:
+        chunk = stream.read(_READ_CHUNK)
+        if not chunk:
+            break
+        pending += chunk
+        *complete, pending = pending.split(b"\0")
+        for token in complete:
+            yield token.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def _parse_header(token: str) -> CommitRecord:
+    hexsha, author_name, author_email, date_str, message = token[1:].split("\x1f", 4)
+    if message.endswith("\x1f"):
+        message = message[:-1]
+    return CommitRecord(
+        hexsha=hexsha,
+        author_name=author_name,
+        author_email=author_email,
+        committed_date=datetime.fromisoformat(date_str).replace(tzinfo=None),
+        message=message.strip(),
+    )
+
+
+def parse_log_stream(stream) -> Iterator[CommitRecord]:
+    """
+    Parse ``git log --raw --numstat -z`` output into :class:`CommitRecord` objects.
+
+    Records are yielded as soon as the next commit header is seen.
+    """
+    tokens = _iter_tokens(stream)
+    current: Optional[CommitRecord] = None
+    by_path = {}
+
+    for token in tokens:
+        entry = token.lstrip("\n")
+        if entry.startswith("\x1e"):
+            if current is not None:
+                yield current
+            current = _parse_header(entry)
+            by_path = {}
+            continue
+        if current is None or not entry:
+            continue
+
+        if entry.startswith(":"):
+            # :old_mode new_mode old_sha new_sha status \0 path [\0 new_path]
+            meta = entry[1:].split(" ")
+            new_sha, status = meta[3], meta[4][:1]
+            old_path = next(tokens)
+            new_path = next(tokens) if status in ("R", "C") else old_path
+            if status == "A":
+                old_path = None
+            elif status == "D":
+                new_path = None
+            change = FileChangeRecord(
+                status=status,
+                old_path=old_path,
+                new_path=new_path,
+                new_blob=None if new_sha == NULL_SHA else new_sha,
+            )
+            current.files.append(change)
+            by_path[change.path] = change
+            continue
+
+        match = _NUMSTAT_RE.match(entry)
+        if match:
+            added, deleted, path = match.groups()
+            if not path:
+                next(tokens)  # rename source
+                path = next(tokens)
+            change = by_path.get(path)
+            if change is not None:
+                change.additions = int(added) if added != "-" else 0
+                change.deletions = int(deleted) if deleted != "-" else 0
+
+    if current is not None:
+        yield current
+
+
+def iter_commit_records(repo: Repo, limit: int) -> Iterator[CommitRecord]:
+    """Stream the newest ``limit`` commits from HEAD with their file changes"""
+    proc = repo.git.log(
+        f"--max-count={limit}",
+        "--root",
+        "-M",
+        "--no-abbrev",
+        "--raw",
+        "--numstat",
+        "-z",
+        "--diff-merges=first-parent",
+        _LOG_FORMAT,
+        as_process=True,
+    )
+    completed = False
+    try:
+        yield from parse_log_stream(proc.stdout)
+        completed = True
+    finally:
+        if completed:
+            proc.wait()
+        else:
+            # Abandoned mid-stream: don't block on a writer with a full pipe
+            proc.proc.kill()
+            proc.proc.wait()
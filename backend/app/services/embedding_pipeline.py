@@ -0,0 +1,235 @@
+"""
+Embedding Pipeline
+
+Queues pattern snippets for the vector store and writes them in batches:
+documents are embedded with one ``embed_documents`` call per batch and stored
+with one Chroma ``upsert``, both on a worker thread so the event loop never
+waits on the embedding model or the database.
+
+When a local vector index is configured every batch is also added to it, so
+similarity search keeps working without Ollama or Chroma.
+
+A batch that fails to embed or store is queued again for the next flush, up
+to ``max_attempts`` times; after that its snippets are dropped and counted as
+failed.
+
+Document IDs are a hash of the embedded text, so the same snippet always maps
+to the same vector. Snippets already queued, already written by this process,
+or already present in the collection are never embedded again.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Characters of a snippet that are embedded and stored as the document
+DOCUMENT_CHARS = 1000
+
+
+def embedding_document(code: str) -> str:
+    return code[:DOCUMENT_CHARS]
+
+
+def embedding_id(document: str) -> str:
+    """Deterministic vector ID for an embedded document"""
+    return "code_" + hashlib.sha256(document.encode("utf-8")).hexdigest()[:32]
+
+
+class EmbeddingPipeline:
+    """Batches snippet embeddings and vector-store writes off the event loop"""
+
+    def __init__(
+        self,
+        embeddings: Any,
+        collection: Any,
+        *,
+        local_index: Any = None,
+        batch_size: int = 32,
+        flush_interval_s: float = 2.0,
+        max_known_ids: int = 50000,
+        max_attempts: int = 3,
+    ):
+        self.embeddings = embeddings
+        self.collection = collection
+        self.local_index = local_index
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self.max_known_ids = max_known_ids
+        self.max_attempts = max(1, max_attempts)
+
+        # id -> (document, metadata); a re-queued snippet keeps the latest metadata
+        self._pending: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        # IDs known to be in the collection (bounded, oldest forgotten first)
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        # id -> failed write attempts so far, for snippets queued again after an error
+        self._attempts: Dict[str, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.stats: Dict[str, int] = {
+            "queued": 0,
+            "duplicates_skipped": 0,
+            "already_stored": 0,
+            "embedded": 0,
+            "indexed_locally": 0,
+            "batches": 0,
+            "errors": 0,
+            "requeued": 0,
+            "failed": 0,
+        }
+
+    def enqueue(self, code: str, patterns: List[str], metadata: Dict[str, Any]) -> str:
+        """Queue a snippet for embedding and return its vector ID"""
+        document = embedding_document(code)
+        doc_id = embedding_id(document)
+        if doc_id in self._known:
+            self._known.move_to_end(doc_id)
+            self.stats["duplicates_skipped"] += 1
+            return doc_id
+        if doc_id in self._pending:
+            self.stats["duplicates_skipped"] += 1
+
+        self._pending[doc_id] = (
+            document,
+            {
+                **metadata,
+                "patterns": json.dumps(patterns),
+                "timestamp": datetime.utcnow().isoformat(),
+                "code_preview": code[:200],
+            },
+        )
+        self.stats["queued"] += 1
+
+        if len(self._pending) >= self.batch_size:
+            self._schedule_flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.flush_interval_s, self._schedule_flush)
+        return doc_id
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> int:
+        """Embed and store everything queued; returns the number of newly stored snippets
+
+        Failed batches are queued again for a later flush rather than
+        retried in a loop here.
+        """
+        written = 0
+        failed: List[Tuple[str, str, Dict[str, Any]]] = []
+        async with self._flush_lock:
+            while self._pending:
+                batch: List[Tuple[str, str, Dict[str, Any]]] = []
+                while self._pending and len(batch) < self.batch_size:
+                    doc_id, (document, metadata) = self._pending.popitem(last=False)
+                    batch.append((doc_id, document, metadata))
+                try:
+                    stored, skipped, indexed = await asyncio.to_thread(self._write_batch, batch)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"❌ Error storing {len(batch)} embeddings: {e}")
+                    failed.extend(batch)
+                    continue
+                self._remember([doc_id for doc_id, _, _ in batch])
+                for doc_id, _, _ in batch:
+                    self._attempts.pop(doc_id, None)
+                self.stats["already_stored"] += skipped
+                self.stats["indexed_locally"] += indexed
+                if stored:
+                    self.stats["embedded"] += stored
+                    self.stats["batches"] += 1
+                    logger.info(f"✅ Stored {stored} pattern embeddings")
+                written += max(stored, indexed)
+            if failed:
+                self._requeue(failed)
+        return written
+
+    def _requeue(self, failed: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Queue failed snippets for another attempt, dropping those out of attempts"""
+        dropped = 0
+        for doc_id, document, metadata in failed:
+            attempts = self._attempts.get(doc_id, 0) + 1
+            if attempts >= self.max_attempts:
+                self._attempts.pop(doc_id, None)
+                dropped += 1
+                continue
+            self._attempts[doc_id] = attempts
+            # Re-enqueued while the batch was being written: the newer entry wins
+            self._pending.setdefault(doc_id, (document, metadata))
+            self.stats["requeued"] += 1
+        if dropped:
+            self.stats["failed"] += dropped
+            logger.error(f"❌ Gave up storing {dropped} embeddings after {self.max_attempts} attempts")
+        if self._pending and self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._timer = loop.call_later(self.flush_interval_s, self._schedule_flush)
+
+    def _write_batch(
+        self, batch: List[Tuple[str, str, Dict[str, Any]]]
+    ) -> Tuple[int, int, int]:
+        """Embed and store one batch on a worker thread; returns (stored, skipped, indexed)"""
+        indexed = 0
+        if self.local_index is not None:
+            indexed = self.local_index.add(*zip(*batch))
+        if not (self.embeddings and self.collection):
+            return 0, 0, indexed
+
+        existing = self._existing_ids([doc_id for doc_id, _, _ in batch])
+        new = [entry for entry in batch if entry[0] not in existing]
+        if new:
+            vectors = self.embeddings.embed_documents([document for _, document, _ in new])
+            self.collection.upsert(
+                ids=[doc_id for doc_id, _, _ in new],
+                embeddings=vectors,
+                documents=[document for _, document, _ in new],
+                metadatas=[metadata for _, _, metadata in new],
+            )
+        return len(new), len(batch) - len(new), indexed
+
+    def _existing_ids(self, ids: List[str]) -> set:
+        try:
+            result = self.collection.get(ids=ids, include=[])
+        except Exception as e:
+            logger.debug(f"Could not look up existing embeddings: {e}")
+            return set()
+        return set((result or {}).get("ids") or [])
+
+    def _remember(self, ids: List[str]) -> None:
+        for doc_id in ids:
+            self._known[doc_id] = None
+            self._known.move_to_end(doc_id)
+        while len(self._known) > self.max_known_ids:
+            self._known.popitem(last=False)
+
+    async def aclose(self) -> None:
+        """Write out anything still queued, retrying failed batches up to ``max_attempts``"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Every failed flush uses up an attempt, so this ends
+        while self._pending:
+            await self.flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._pending), "known_ids": len(self._known)}
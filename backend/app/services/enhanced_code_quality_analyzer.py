@@ -16,7 +16,10 @@ import logging
 from typing import Dict, List, Any, Optional, Tuple, Set
 from dataclasses import dataclass
 from collections import defaultdict, Counter
-from pathlib import Path
+
+from app.services.file_sampler import select_source_files
+from app.services.path_filter import SOURCE_FILE_FILTER
+from app.services.repository_snapshot import RepositorySnapshot, read_repository_file
 
 logger = logging.getLogger(__name__)
 
@@ -143,41 +146,61 @@ class EnhancedCodeQualityAnalyzer:
             ]
         }
 
-    def analyze_code_quality(self, repo_path: str, file_list: List[str]) -> QualityReport:
+    def analyze_code_quality(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> QualityReport:
         """
         Comprehensive code quality analysis
         
         Args:
             repo_path: Path to the repository
             file_list: List of file paths in the repository
+            snapshot: Shared file index/content store; files are read from disk without one
             
         Returns:
             Comprehensive quality report
         """
         try:
-            # Analyze source files
-            source_files = [f for f in file_list if self._is_source_file(f)]
-            
-            all_metrics = []
             file_analyses = []
-            
-            for file_path in source_files[:50]:  # Limit for performance
-                full_path = Path(repo_path) / file_path
-                
-                if not full_path.exists():
-                    continue
-                    
+            for file_path in self.select_files(repo_path, file_list, snapshot):
                 try:
-                    with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    file_analysis = self._analyze_file_quality(content, file_path)
-                    file_analyses.append(file_analysis)
-                    all_metrics.extend(file_analysis["metrics"])
+                    content = read_repository_file(repo_path, file_path, snapshot)
+                    if content is None:
+                        continue
+                    file_analyses.append(self.analyze_file(content, file_path))
                     
                 except Exception as e:
                     logger.debug(f"Error analyzing file {file_path}: {e}")
             
+            return self.merge_results(file_analyses)
+            
+        except Exception as e:
+            logger.error(f"Error analyzing code quality: {e}")
+            return self._create_empty_report()
+
+    def select_files(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> List[str]:
+        """Source files inspected by analyze_code_quality (budgeted sample)"""
+        return select_source_files(repo_path, file_list, snapshot).paths
+
+    def analyze_file(self, content: str, file_path: str) -> Dict[str, Any]:
+        """Quality metrics of one file (per-file work unit)"""
+        return self._analyze_file_quality(content, file_path)
+
+    def merge_results(self, file_analyses: List[Dict[str, Any]]) -> QualityReport:
+        """Aggregate per-file analyses into the repository quality report"""
+        try:
+            all_metrics = []
+            for file_analysis in file_analyses:
+                all_metrics.extend(file_analysis["metrics"])
+            
             # Aggregate metrics
             aggregated_metrics = self._aggregate_metrics(all_metrics)
             
@@ -606,13 +629,7 @@ class EnhancedCodeQualityAnalyzer:
 
     def _is_source_file(self, file_path: str) -> bool:
         """Check if file is a source code file"""
-        source_extensions = {
-            '.js', '.jsx', '.ts', '.tsx', '.py', '.java', '.cpp', '.c', '.cs',
-            '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala', '.clj',
-            '.hs', '.ml', '.fs', '.dart', '.vue', '.svelte'
-        }
-        
-        return Path(file_path).suffix.lower() in source_extensions
+        return SOURCE_FILE_FILTER.includes(file_path)
 
     def _create_empty_report(self) -> QualityReport:
         """Create empty quality report for error cases"""
@@ -15,7 +15,12 @@ import ast
 from typing import Dict, List, Set, Optional, Any, Tuple
 from dataclasses import dataclass
 from collections import defaultdict, Counter
-from pathlib import Path
+
+from app.services.file_sampler import select_source_files
+from app.services.path_filter import SOURCE_FILE_FILTER
+from app.services.pattern_scanner import PatternScanner
+from app.services.source_index import SourceIndex
+from app.services.repository_snapshot import RepositorySnapshot, read_repository_file
 
 logger = logging.getLogger(__name__)
 
@@ -50,8 +55,29 @@ class EnhancedPatternDetector:
         self.modern_patterns = self._load_modern_patterns()
         self.antipatterns = self._load_antipatterns()
         
+        # Pattern tables compiled once; each scan matches a whole file per rule
+        self._design_scanner = self._build_scanner(self.design_patterns)
+        self._quality_scanner = self._build_scanner(self.quality_patterns)
+        self._performance_scanner = self._build_scanner(self.performance_patterns)
+        self._security_scanner = self._build_scanner(self.security_patterns)
+        self._modern_scanner = self._build_scanner({None: self.modern_patterns})
+        self._antipattern_scanner = self._build_scanner({None: self.antipatterns})
+        
         logger.info("EnhancedPatternDetector initialized with comprehensive pattern databases")
 
+    @staticmethod
+    def _build_scanner(table: Dict[Optional[str], Dict[str, Dict]]) -> PatternScanner:
+        """Compile a {category: {pattern_name: info}} table, keyed by (category, name, info)"""
+        return PatternScanner(
+            (
+                ((category, pattern_name, pattern_info), pattern_regex)
+                for category, patterns in table.items()
+                for pattern_name, pattern_info in patterns.items()
+                for pattern_regex in pattern_info["patterns"]
+            ),
+            re.IGNORECASE | re.MULTILINE,
+        )
+
     def _load_design_patterns(self) -> Dict[str, Dict]:
         """Load Gang of Four and architectural design patterns"""
         return {
@@ -457,209 +483,193 @@ class EnhancedPatternDetector:
             }
         }
 
-    def detect_patterns(self, repo_path: str, file_list: List[str]) -> Dict[str, List[PatternMatch]]:
+    def detect_patterns(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> Dict[str, List[PatternMatch]]:
         """
         Comprehensive pattern detection for a repository
         
         Args:
             repo_path: Path to the repository
             file_list: List of file paths in the repository
+            snapshot: Shared file index/content store; files are read from disk without one
             
         Returns:
             Dictionary of detected patterns by category
         """
-        detected_patterns = defaultdict(list)
-        
         try:
-            # Analyze source files
-            source_files = [f for f in file_list if self._is_source_file(f)]
-            
-            for file_path in source_files[:100]:  # Limit for performance
-                full_path = Path(repo_path) / file_path
-                
-                if not full_path.exists():
-                    continue
-                    
+            file_matches = []
+            for file_path in self.select_files(repo_path, file_list, snapshot):
                 try:
-                    with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    # Detect different pattern categories
-                    design_matches = self._detect_design_patterns(content, file_path)
-                    quality_matches = self._detect_quality_patterns(content, file_path)
-                    performance_matches = self._detect_performance_patterns(content, file_path)
-                    security_matches = self._detect_security_patterns(content, file_path)
-                    modern_matches = self._detect_modern_patterns(content, file_path)
-                    antipattern_matches = self._detect_antipatterns(content, file_path)
-                    
-                    # Combine all matches
-                    all_matches = (design_matches + quality_matches + performance_matches + 
-                                 security_matches + modern_matches + antipattern_matches)
-                    
-                    for match in all_matches:
-                        detected_patterns[match.category].append(match)
-                        
+                    content = read_repository_file(repo_path, file_path, snapshot)
+                    if content is None:
+                        continue
+                    file_matches.append(self.analyze_file(content, file_path))
                 except Exception as e:
                     logger.debug(f"Error analyzing file {file_path}: {e}")
             
-            # Remove duplicates and rank by confidence
-            for category in detected_patterns:
-                detected_patterns[category] = self._deduplicate_and_rank_patterns(
-                    detected_patterns[category]
-                )
-            
-            logger.info(f"Detected {sum(len(matches) for matches in detected_patterns.values())} patterns")
-            return dict(detected_patterns)
+            return self.merge_results(file_matches)
             
         except Exception as e:
             logger.error(f"Error detecting patterns: {e}")
             return {}
 
-    def _detect_design_patterns(self, content: str, file_path: str) -> List[PatternMatch]:
-        """Detect design patterns in code"""
-        matches = []
-        lines = content.split('\n')
+    def select_files(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> List[str]:
+        """Source files inspected by detect_patterns (budgeted sample)"""
+        return select_source_files(repo_path, file_list, snapshot).paths
+
+    def analyze_file(self, content: str, file_path: str) -> List[PatternMatch]:
+        """Detect every pattern category in one file (per-file work unit)"""
+        index = SourceIndex(content)
+        return (
+            self._detect_design_patterns(content, file_path, index)
+            + self._detect_quality_patterns(content, file_path, index)
+            + self._detect_performance_patterns(content, file_path, index)
+            + self._detect_security_patterns(content, file_path, index)
+            + self._detect_modern_patterns(content, file_path, index)
+            + self._detect_antipatterns(content, file_path, index)
+        )
+
+    def merge_results(self, file_matches: List[List[PatternMatch]]) -> Dict[str, List[PatternMatch]]:
+        """Group per-file matches by category, then deduplicate and rank them"""
+        detected_patterns = defaultdict(list)
+        for matches in file_matches:
+            for match in matches:
+                detected_patterns[match.category].append(match)
         
-        for category, patterns in self.design_patterns.items():
-            for pattern_name, pattern_info in patterns.items():
-                for pattern_regex in pattern_info["patterns"]:
-                    for i, line in enumerate(lines):
-                        if re.search(pattern_regex, line, re.IGNORECASE | re.MULTILINE):
-                            matches.append(PatternMatch(
-                                pattern_name=pattern_name.replace("_", " ").title(),
-                                category=f"design_patterns_{category}",
-                                confidence=0.8,
-                                file_path=file_path,
-                                line_number=i + 1,
-                                code_snippet=line.strip()[:100],
-                                description=pattern_info["description"],
-                                complexity_score=self._calculate_complexity_score(pattern_info.get("complexity", "intermediate"))
-                            ))
+        for category in detected_patterns:
+            detected_patterns[category] = self._deduplicate_and_rank_patterns(
+                detected_patterns[category]
+            )
         
-        return matches
+        logger.info(f"Detected {sum(len(matches) for matches in detected_patterns.values())} patterns")
+        return dict(detected_patterns)
+
+    def _detect_design_patterns(
+        self, content: str, file_path: str, index: Optional[SourceIndex] = None
+    ) -> List[PatternMatch]:
+        """Detect design patterns in code"""
+        index = index or SourceIndex(content)
+        return [
+            PatternMatch(
+                pattern_name=pattern_name.replace("_", " ").title(),
+                category=f"design_patterns_{category}",
+                confidence=0.8,
+                file_path=file_path,
+                line_number=i + 1,
+                code_snippet=index.line(i).strip()[:100],
+                description=pattern_info["description"],
+                complexity_score=self._calculate_complexity_score(pattern_info.get("complexity", "intermediate"))
+            )
+            for (category, pattern_name, pattern_info), i in self._design_scanner.scan(index)
+        ]
 
-    def _detect_quality_patterns(self, content: str, file_path: str) -> List[PatternMatch]:
+    def _detect_quality_patterns(
+        self, content: str, file_path: str, index: Optional[SourceIndex] = None
+    ) -> List[PatternMatch]:
         """Detect code quality patterns"""
-        matches = []
-        lines = content.split('\n')
-        
-        for category, patterns in self.quality_patterns.items():
-            for pattern_name, pattern_info in patterns.items():
-                for pattern_regex in pattern_info["patterns"]:
-                    for i, line in enumerate(lines):
-                        if re.search(pattern_regex, line, re.IGNORECASE | re.MULTILINE):
-                            matches.append(PatternMatch(
-                                pattern_name=pattern_name.replace("_", " ").title(),
-                                category=f"quality_patterns_{category}",
-                                confidence=0.7,
-                                file_path=file_path,
-                                line_number=i + 1,
-                                code_snippet=line.strip()[:100],
-                                description=pattern_info["description"],
-                                severity=pattern_info.get("severity", "info")
-                            ))
-        
-        return matches
+        index = index or SourceIndex(content)
+        return [
+            PatternMatch(
+                pattern_name=pattern_name.replace("_", " ").title(),
+                category=f"quality_patterns_{category}",
+                confidence=0.7,
+                file_path=file_path,
+                line_number=i + 1,
+                code_snippet=index.line(i).strip()[:100],
+                description=pattern_info["description"],
+                severity=pattern_info.get("severity", "info")
+            )
+            for (category, pattern_name, pattern_info), i in self._quality_scanner.scan(index)
+        ]
 
-    def _detect_performance_patterns(self, content: str, file_path: str) -> List[PatternMatch]:
+    def _detect_performance_patterns(
+        self, content: str, file_path: str, index: Optional[SourceIndex] = None
+    ) -> List[PatternMatch]:
         """Detect performance patterns"""
-        matches = []
-        lines = content.split('\n')
-        
-        for category, patterns in self.performance_patterns.items():
-            for pattern_name, pattern_info in patterns.items():
-                for pattern_regex in pattern_info["patterns"]:
-                    for i, line in enumerate(lines):
-                        if re.search(pattern_regex, line, re.IGNORECASE | re.MULTILINE):
-                            matches.append(PatternMatch(
-                                pattern_name=pattern_name.replace("_", " ").title(),
-                                category=f"performance_patterns_{category}",
-                                confidence=0.8,
-                                file_path=file_path,
-                                line_number=i + 1,
-                                code_snippet=line.strip()[:100],
-                                description=pattern_info["description"],
-                                severity=pattern_info.get("severity", "info")
-                            ))
-        
-        return matches
+        index = index or SourceIndex(content)
+        return [
+            PatternMatch(
+                pattern_name=pattern_name.replace("_", " ").title(),
+                category=f"performance_patterns_{category}",
+                confidence=0.8,
+                file_path=file_path,
+                line_number=i + 1,
+                code_snippet=index.line(i).strip()[:100],
+                description=pattern_info["description"],
+                severity=pattern_info.get("severity", "info")
+            )
+            for (category, pattern_name, pattern_info), i in self._performance_scanner.scan(index)
+        ]
 
-    def _detect_security_patterns(self, content: str, file_path: str) -> List[PatternMatch]:
+    def _detect_security_patterns(
+        self, content: str, file_path: str, index: Optional[SourceIndex] = None
+    ) -> List[PatternMatch]:
         """Detect security patterns"""
-        matches = []
-        lines = content.split('\n')
-        
-        for category, patterns in self.security_patterns.items():
-            for pattern_name, pattern_info in patterns.items():
-                for pattern_regex in pattern_info["patterns"]:
-                    for i, line in enumerate(lines):
-                        if re.search(pattern_regex, line, re.IGNORECASE | re.MULTILINE):
-                            matches.append(PatternMatch(
-                                pattern_name=pattern_name.replace("_", " ").title(),
-                                category=f"security_patterns_{category}",
-                                confidence=0.9,
-                                file_path=file_path,
-                                line_number=i + 1,
-                                code_snippet=line.strip()[:100],
-                                description=pattern_info["description"],
-                                severity=pattern_info.get("severity", "error")
-                            ))
-        
-        return matches
+        index = index or SourceIndex(content)
+        return [
+            PatternMatch(
+                pattern_name=pattern_name.replace("_", " ").title(),
+                category=f"security_patterns_{category}",
+                confidence=0.9,
+                file_path=file_path,
+                line_number=i + 1,
+                code_snippet=index.line(i).strip()[:100],
+                description=pattern_info["description"],
+                severity=pattern_info.get("severity", "error")
+            )
+            for (category, pattern_name, pattern_info), i in self._security_scanner.scan(index)
+        ]
 
-    def _detect_modern_patterns(self, content: str, file_path: str) -> List[PatternMatch]:
+    def _detect_modern_patterns(
+        self, content: str, file_path: str, index: Optional[SourceIndex] = None
+    ) -> List[PatternMatch]:
         """Detect modern development patterns"""
-        matches = []
-        lines = content.split('\n')
-        
-        for pattern_name, pattern_info in self.modern_patterns.items():
-            for pattern_regex in pattern_info["patterns"]:
-                for i, line in enumerate(lines):
-                    if re.search(pattern_regex, line, re.IGNORECASE | re.MULTILINE):
-                        matches.append(PatternMatch(
-                            pattern_name=pattern_name.replace("_", " ").title(),
-                            category="modern_patterns",
-                            confidence=0.8,
-                            file_path=file_path,
-                            line_number=i + 1,
-                            code_snippet=line.strip()[:100],
-                            description=pattern_info["description"],
-                            complexity_score=self._calculate_complexity_score(pattern_info.get("complexity", "intermediate"))
-                        ))
-        
-        return matches
+        index = index or SourceIndex(content)
+        return [
+            PatternMatch(
+                pattern_name=pattern_name.replace("_", " ").title(),
+                category="modern_patterns",
+                confidence=0.8,
+                file_path=file_path,
+                line_number=i + 1,
+                code_snippet=index.line(i).strip()[:100],
+                description=pattern_info["description"],
+                complexity_score=self._calculate_complexity_score(pattern_info.get("complexity", "intermediate"))
+            )
+            for (_category, pattern_name, pattern_info), i in self._modern_scanner.scan(index)
+        ]
 
-    def _detect_antipatterns(self, content: str, file_path: str) -> List[PatternMatch]:
+    def _detect_antipatterns(
+        self, content: str, file_path: str, index: Optional[SourceIndex] = None
+    ) -> List[PatternMatch]:
         """Detect antipatterns"""
-        matches = []
-        lines = content.split('\n')
-        
-        for pattern_name, pattern_info in self.antipatterns.items():
-            for pattern_regex in pattern_info["patterns"]:
-                for i, line in enumerate(lines):
-                    if re.search(pattern_regex, line, re.IGNORECASE | re.MULTILINE):
-                        matches.append(PatternMatch(
-                            pattern_name=pattern_name.replace("_", " ").title(),
-                            category="antipatterns",
-                            confidence=0.8,
-                            file_path=file_path,
-                            line_number=i + 1,
-                            code_snippet=line.strip()[:100],
-                            description=pattern_info["description"],
-                            severity=pattern_info.get("severity", "warning")
-                        ))
-        
-        return matches
+        index = index or SourceIndex(content)
+        return [
+            PatternMatch(
+                pattern_name=pattern_name.replace("_", " ").title(),
+                category="antipatterns",
+                confidence=0.8,
+                file_path=file_path,
+                line_number=i + 1,
+                code_snippet=index.line(i).strip()[:100],
+                description=pattern_info["description"],
+                severity=pattern_info.get("severity", "warning")
+            )
+            for (_category, pattern_name, pattern_info), i in self._antipattern_scanner.scan(index)
+        ]
 
     def _is_source_file(self, file_path: str) -> bool:
         """Check if file is a source code file"""
-        source_extensions = {
-            '.js', '.jsx', '.ts', '.tsx', '.py', '.java', '.cpp', '.c', '.cs',
-            '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala', '.clj',
-            '.hs', '.ml', '.fs', '.dart', '.vue', '.svelte'
-        }
-        
-        return Path(file_path).suffix.lower() in source_extensions
+        return SOURCE_FILE_FILTER.includes(file_path)
 
     def _calculate_complexity_score(self, complexity: str) -> float:
         """Calculate complexity score based on complexity level"""
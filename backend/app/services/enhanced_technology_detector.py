@@ -19,8 +19,22 @@ from pathlib import Path
 from dataclasses import dataclass
 from collections import defaultdict
 
+from app.services.file_sampler import select_source_files
+from app.services.path_filter import SOURCE_FILE_FILTER
+from app.services.repository_snapshot import RepositorySnapshot, read_repository_file
+
 logger = logging.getLogger(__name__)
 
+# Lock files recognised by name alone; their contents are never parsed
+LOCK_FILE_NAMES = frozenset({"yarn.lock", "package-lock.json", "pnpm-lock.yaml"})
+
+# Manifest and lock files inspected by _analyze_package_files
+PACKAGE_FILE_NAMES = LOCK_FILE_NAMES | frozenset({
+    "package.json", "requirements.txt", "pyproject.toml", "pom.xml", "build.gradle",
+    "build.gradle.kts", "cargo.toml", "go.mod", "gemfile", "composer.json",
+    "pubspec.yaml", "project.clj", "mix.exs", "deno.json", "deno.jsonc",
+})
+
 
 @dataclass
 class TechnologyInfo:
@@ -338,29 +352,72 @@ class EnhancedTechnologyDetector:
             "firestore": ["firestore", "@google-cloud/firestore"]
         }
 
-    def detect_technologies(self, repo_path: str, file_list: List[str]) -> Dict[str, List[TechnologyInfo]]:
+    def detect_technologies(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> Dict[str, List[TechnologyInfo]]:
         """
         Comprehensive technology detection for a repository
         
         Args:
             repo_path: Path to the repository
             file_list: List of file paths in the repository
+            snapshot: Shared file index/content store; files are read from disk without one
             
         Returns:
             Dictionary of detected technologies by category
         """
+        try:
+            file_results = []
+            for file_path in self.select_files(repo_path, file_list, snapshot):
+                try:
+                    content = read_repository_file(repo_path, file_path, snapshot)
+                    if content is None:
+                        continue
+                    file_results.append(self.analyze_file(content, file_path))
+                except Exception as e:
+                    logger.debug(f"Error analyzing source file {file_path}: {e}")
+            
+            return self.merge_results(repo_path, file_list, file_results, snapshot)
+            
+        except Exception as e:
+            logger.error(f"Error detecting technologies: {e}")
+            return {}
+
+    def select_files(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> List[str]:
+        """Source files scanned for technology patterns (budgeted sample)"""
+        return select_source_files(repo_path, file_list, snapshot).paths
+
+    def merge_results(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        file_results: List[Dict[str, List[TechnologyInfo]]],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> Dict[str, List[TechnologyInfo]]:
+        """
+        Combine per-file source detections with the manifest, config and
+        deployment file analyses, then deduplicate and rank
+        """
         detected_tech = defaultdict(list)
         
         try:
             # Analyze package files
-            package_tech = self._analyze_package_files(repo_path, file_list)
+            package_tech = self._analyze_package_files(repo_path, file_list, snapshot)
             for category, tech_list in package_tech.items():
                 detected_tech[category].extend(tech_list)
             
-            # Analyze source code patterns
-            source_tech = self._analyze_source_patterns(repo_path, file_list)
-            for category, tech_list in source_tech.items():
-                detected_tech[category].extend(tech_list)
+            # Source code patterns, analyzed per file
+            for source_tech in file_results:
+                for category, tech_list in source_tech.items():
+                    detected_tech[category].extend(tech_list)
             
             # Analyze configuration files
             config_tech = self._analyze_config_files(repo_path, file_list)
@@ -383,33 +440,39 @@ class EnhancedTechnologyDetector:
             logger.error(f"Error detecting technologies: {e}")
             return {}
 
-    def _analyze_package_files(self, repo_path: str, file_list: List[str]) -> Dict[str, List[TechnologyInfo]]:
+    def _analyze_package_files(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> Dict[str, List[TechnologyInfo]]:
         """Analyze package management files"""
         detected = defaultdict(list)
         
         for file_path in file_list:
-            full_path = Path(repo_path) / file_path
-            
-            if not full_path.exists():
+            file_name = Path(file_path).name.lower()
+            if file_name not in PACKAGE_FILE_NAMES:
                 continue
                 
+            # Lock files are classified by name, so size limits never hide them
+            if file_name in LOCK_FILE_NAMES:
+                detected["package_managers"].append(TechnologyInfo(
+                    name=file_name.split('.')[0].title(),
+                    category="package_managers",
+                    confidence=1.0,
+                    evidence=[file_path],
+                    description=f"{file_name.split('.')[0].title()} package manager lock file"
+                ))
+                continue
+
             try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                file_name = Path(file_path).name.lower()
+                content = read_repository_file(repo_path, file_path, snapshot)
+                if content is None:
+                    continue
                 
                 # JavaScript/TypeScript ecosystem
                 if file_name == "package.json":
                     detected.update(self._parse_package_json(content, file_path))
-                elif file_name in ["yarn.lock", "package-lock.json", "pnpm-lock.yaml"]:
-                    detected["package_managers"].append(TechnologyInfo(
-                        name=file_name.split('.')[0].title(),
-                        category="package_managers",
-                        confidence=1.0,
-                        evidence=[file_path],
-                        description=f"{file_name.split('.')[0].title()} package manager lock file"
-                    ))
                 
                 # Python ecosystem
                 elif file_name == "requirements.txt":
@@ -664,47 +727,31 @@ class EnhancedTechnologyDetector:
         
         return None
 
-    def _analyze_source_patterns(self, repo_path: str, file_list: List[str]) -> Dict[str, List[TechnologyInfo]]:
-        """Analyze source code for technology patterns"""
+    def analyze_file(self, content: str, file_path: str) -> Dict[str, List[TechnologyInfo]]:
+        """Detect technology patterns in one source file (per-file work unit)"""
         detected = defaultdict(list)
         
-        # Focus on key source files
-        source_files = [f for f in file_list if self._is_source_file(f)]
-        
-        for file_path in source_files[:50]:  # Limit to avoid performance issues
-            full_path = Path(repo_path) / file_path
-            
-            if not full_path.exists():
-                continue
-                
-            try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+        # Detect patterns in each technology category
+        for category, technologies in self.tech_patterns.items():
+            for tech_name, tech_info in technologies.items():
+                patterns = tech_info.get("patterns", [])
+                confidence = 0.0
+                matches = []
                 
-                # Detect patterns in each technology category
-                for category, technologies in self.tech_patterns.items():
-                    for tech_name, tech_info in technologies.items():
-                        patterns = tech_info.get("patterns", [])
-                        confidence = 0.0
-                        matches = []
-                        
-                        for pattern in patterns:
-                            if re.search(pattern, content, re.IGNORECASE | re.MULTILINE):
-                                confidence += 0.3
-                                matches.append(pattern)
-                        
-                        if confidence > 0.0:
-                            detected[category].append(TechnologyInfo(
-                                name=tech_name.replace("_", " ").title(),
-                                category=category,
-                                confidence=min(confidence, 1.0),
-                                evidence=[f"{file_path}: {', '.join(matches[:3])}"],
-                                description=tech_info.get("description", ""),
-                                maturity=tech_info.get("maturity", "stable")
-                            ))
+                for pattern in patterns:
+                    if re.search(pattern, content, re.IGNORECASE | re.MULTILINE):
+                        confidence += 0.3
+                        matches.append(pattern)
                 
-            except Exception as e:
-                logger.debug(f"Error analyzing source file {file_path}: {e}")
+                if confidence > 0.0:
+                    detected[category].append(TechnologyInfo(
+                        name=tech_name.replace("_", " ").title(),
+                        category=category,
+                        confidence=min(confidence, 1.0),
+                        evidence=[f"{file_path}: {', '.join(matches[:3])}"],
+                        description=tech_info.get("description", ""),
+                        maturity=tech_info.get("maturity", "stable")
+                    ))
         
         return dict(detected)
 
@@ -797,13 +844,7 @@ class EnhancedTechnologyDetector:
 
     def _is_source_file(self, file_path: str) -> bool:
         """Check if file is a source code file"""
-        source_extensions = {
-            '.js', '.jsx', '.ts', '.tsx', '.py', '.java', '.cpp', '.c', '.cs',
-            '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala', '.clj',
-            '.hs', '.ml', '.fs', '.dart', '.vue', '.svelte'
-        }
-        
-        return Path(file_path).suffix.lower() in source_extensions
+        return SOURCE_FILE_FILTER.includes(file_path)
 
     def _deduplicate_and_rank(self, tech_list: List[TechnologyInfo]) -> List[TechnologyInfo]:
         """Remove duplicates and rank by confidence"""
@@ -0,0 +1,324 @@
+"""
+Git Mirror Cache
+
+Keeps a persistent, content-addressed cache of bare mirror clones so that
+re-analyzing the same repository only pays for an incremental ``git fetch``
+instead of a full network clone. Each analysis gets a cheap detached worktree
+that shares the mirror's object store.
+
+Mirrors are full clones by default. With a partial-clone filter configured
+(e.g. ``blob:none``) the blobs an analysis will diff are prefetched in one
+batched request by :meth:`GitMirrorCache.prefetch_blobs`, since letting
+``git log``/``cat-file`` fault them in would cost a fetch per object.
+
+Mirrors are keyed by the normalized repository URL, guarded by per-mirror
+locks (in-process and on-disk) so concurrent background analyses can share
+them, and evicted in least-recently-used order once the cache exceeds its
+disk budget.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from git import GitCommandError, Repo
+
+try:  # POSIX only; Windows falls back to in-process locking
+    import fcntl
+except ImportError:  # pragma: no cover - platform dependent
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MirrorLease:
+    """A worktree checked out from a cached mirror for a single analysis"""
+
+    key: str
+    mirror_path: str
+    worktree_path: str
+
+
+class GitMirrorCache:
+    """
+    Persistent bare-mirror cache with per-analysis worktrees and LRU eviction
+    """
+
+    LAST_USED_MARKER = "code-evo-last-used"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = 10 * 1024**3,
+        clone_filter: Optional[str] = None,
+    ):
+        """
+        Args:
+            cache_dir: Directory holding the mirrors
+            max_bytes: Disk budget for all mirrors combined
+            clone_filter: Partial-clone filter for new mirrors (None for full clones)
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.mirrors_dir = os.path.join(self.cache_dir, "mirrors")
+        self.max_bytes = max_bytes
+        self.clone_filter = clone_filter
+        os.makedirs(self.mirrors_dir, exist_ok=True)
+
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._active_leases: Dict[str, int] = {}
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "fetches": 0,
+            "evictions": 0,
+            "prefetched_blobs": 0,
+        }
+        logger.info(f"GitMirrorCache initialized at {self.cache_dir}")
+
+    @staticmethod
+    def mirror_key(normalized_url: str) -> str:
+        """Content-address a mirror by its normalized URL"""
+        return hashlib.sha256(normalized_url.encode()).hexdigest()[:24]
+
+    def _mirror_path(self, key: str) -> str:
+        return os.path.join(self.mirrors_dir, f"{key}.git")
+
+    @contextmanager
+    def _mirror_lock(self, key: str) -> Iterator[None]:
+        """Hold the in-process and on-disk lock for a single mirror"""
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            lock_path = os.path.join(self.mirrors_dir, f"{key}.lock")
+            with open(lock_path, "a+") as handle:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _touch(self, mirror_path: str) -> None:
+        marker = os.path.join(mirror_path, self.LAST_USED_MARKER)
+        with open(marker, "a"):
+            pass
+        os.utime(marker, None)
+
+    def _last_used(self, mirror_path: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(mirror_path, self.LAST_USED_MARKER))
+        except OSError:
+            return 0.0
+
+    def _sync_mirror(self, url: str, key: str) -> Repo:
+        """Create the mirror or fetch new objects into it (caller holds the lock)"""
+        mirror_path = self._mirror_path(key)
+        if os.path.isdir(mirror_path):
+            mirror = Repo(mirror_path)
+            logger.info(f"🔄 Fetching updates into cached mirror {key}")
+            mirror.git.fetch("--prune", "--tags", "origin")
+            self.stats["hits"] += 1
+            self.stats["fetches"] += 1
+        else:
+            logger.info(f"📥 Creating mirror {key} for {url}")
+            partial = f"{mirror_path}.partial"
+            shutil.rmtree(partial, ignore_errors=True)
+            # Bare clone restricted to branches and tags: a full --mirror would
+            # also pull hosting-specific refs such as GitHub's refs/pull/*.
+            clone_options = {"filter": self.clone_filter} if self.clone_filter else {}
+            Repo.clone_from(url, partial, bare=True, **clone_options)
+            Repo(partial).git.config(
+                "remote.origin.fetch", "+refs/heads/*:refs/heads/*"
+            )
+            os.replace(partial, mirror_path)
+            mirror = Repo(mirror_path)
+            self.stats["misses"] += 1
+        self._touch(mirror_path)
+        return mirror
+
+    def checkout(self, url: str, branch: str = "main") -> MirrorLease:
+        """
+        Sync the mirror for ``url`` and add a detached worktree for ``branch``.
+
+        Falls back to the mirror's default HEAD when ``branch`` does not exist.
+        The lease must be handed back with :meth:`release`.
+        """
+        key = self.mirror_key(url)
+        worktree_path = tempfile.mkdtemp(prefix=f"code-evo-{key[:8]}-")
+        with self._mirror_lock(key):
+            try:
+                mirror = self._sync_mirror(url, key)
+                try:
+                    mirror.git.worktree("add", "--detach", "--force", worktree_path, branch)
+                except GitCommandError:
+                    logger.warning(f"Branch '{branch}' not found, using default branch")
+                    mirror.git.worktree("add", "--detach", "--force", worktree_path, "HEAD")
+            except Exception:
+                shutil.rmtree(worktree_path, ignore_errors=True)
+                if os.path.isdir(self._mirror_path(key)):
+                    try:
+                        Repo(self._mirror_path(key)).git.worktree("prune")
+                    except Exception:
+                        pass
+                raise
+            self._active_leases[key] = self._active_leases.get(key, 0) + 1
+
+        self._evict_if_needed()
+        return MirrorLease(
+            key=key, mirror_path=self._mirror_path(key), worktree_path=worktree_path
+        )
+
+    def prefetch_blobs(self, repo: Repo, max_commits: int) -> int:
+        """
+        Fetch in one request the blobs a partial mirror lacks for the newest
+        ``max_commits`` commits of ``repo`` (a lease worktree or a mirror).
+
+        Returns the number of blobs requested; 0 for full clones.
+        """
+        try:
+            clone_filter = repo.git.config("--get", "remote.origin.partialclonefilter")
+        except GitCommandError:
+            return 0
+
+        # One extra commit so the oldest analysed commit can be diffed too
+        listing = repo.git.rev_list(
+            "--objects", "--missing=print", f"--max-count={max_commits + 1}", "HEAD"
+        )
+        missing = [line[1:] for line in listing.splitlines() if line.startswith("?")]
+        if not missing:
+            return 0
+
+        # Same request git makes for a single lazy fetch, with every id at once
+        subprocess.run(
+            [
+                "git",
+                "-c",
+                "fetch.negotiationAlgorithm=noop",
+                "fetch",
+                "origin",
+                "--no-tags",
+                "--no-write-fetch-head",
+                "--recurse-submodules=no",
+                f"--filter={clone_filter}",
+                "--stdin",
+            ],
+            cwd=repo.working_tree_dir or repo.git_dir,
+            input="\n".join(missing) + "\n",
+            text=True,
+            check=True,
+            capture_output=True,
+        )
+        self.stats["prefetched_blobs"] += len(missing)
+        logger.info(f"📦 Prefetched {len(missing)} blobs for {max_commits} commits")
+        return len(missing)
+
+    def release(self, lease: MirrorLease) -> None:
+        """Remove a lease's worktree and unregister it from the mirror"""
+        with self._mirror_lock(lease.key):
+            try:
+                mirror = Repo(lease.mirror_path)
+                mirror.git.worktree("remove", "--force", lease.worktree_path)
+            except Exception as e:
+                logger.warning(f"Worktree removal warning for {lease.worktree_path}: {e}")
+                shutil.rmtree(lease.worktree_path, ignore_errors=True)
+                try:
+                    Repo(lease.mirror_path).git.worktree("prune")
+                except Exception:
+                    pass
+            remaining = self._active_leases.get(lease.key, 1) - 1
+            if remaining > 0:
+                self._active_leases[lease.key] = remaining
+            else:
+                self._active_leases.pop(lease.key, None)
+
+    def _in_use(self, key: str) -> bool:
+        """True if any process still has a worktree registered on the mirror"""
+        if self._active_leases.get(key):
+            return True
+        worktrees_dir = os.path.join(self._mirror_path(key), "worktrees")
+        return os.path.isdir(worktrees_dir) and bool(os.listdir(worktrees_dir))
+
+    def _directory_size(self, path: str) -> int:
+        total = 0
+        for root, _dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    continue
+        return total
+
+    def _evict_if_needed(self) -> None:
+        """Evict least-recently-used idle mirrors until the cache fits its budget"""
+        mirrors: List[Dict] = []
+        for entry in os.listdir(self.mirrors_dir):
+            if not entry.endswith(".git"):
+                continue
+            path = os.path.join(self.mirrors_dir, entry)
+            mirrors.append(
+                {
+                    "key": entry[: -len(".git")],
+                    "path": path,
+                    "size": self._directory_size(path),
+                    "last_used": self._last_used(path),
+                }
+            )
+
+        total = sum(m["size"] for m in mirrors)
+        if total <= self.max_bytes:
+            return
+
+        for mirror in sorted(mirrors, key=lambda m: m["last_used"]):
+            if total <= self.max_bytes:
+                break
+            key = mirror["key"]
+            if self._in_use(key):
+                continue
+            with self._mirror_lock(key):
+                if self._in_use(key):
+                    continue
+                shutil.rmtree(mirror["path"], ignore_errors=True)
+            total -= mirror["size"]
+            self.stats["evictions"] += 1
+            logger.info(f"🧹 Evicted cached mirror {key} ({mirror['size']} bytes)")
+
+    def get_stats(self) -> Dict:
+        """Cache statistics for monitoring"""
+        return {
+            **self.stats,
+            "active_leases": sum(self._active_leases.values()),
+            "cache_dir": self.cache_dir,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_mirror_cache: Optional[GitMirrorCache] = None
+
+
+def get_git_mirror_cache() -> Optional[GitMirrorCache]:
+    """Get the global mirror cache, or None when disabled in settings"""
+    global _mirror_cache
+
+    from app.core.config import settings
+
+    if not settings.GIT_MIRROR_CACHE_ENABLED:
+        return None
+    if _mirror_cache is None:
+        _mirror_cache = GitMirrorCache(
+            settings.GIT_MIRROR_CACHE_DIR,
+            max_bytes=settings.GIT_MIRROR_CACHE_MAX_MB * 1024 * 1024,
+            clone_filter=settings.GIT_MIRROR_CLONE_FILTER or None,
+        )
+    return _mirror_cache
@@ -8,17 +8,34 @@ import logging
 from datetime import datetime
 from urllib.parse import urlparse, urlunparse
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
+
+from app.core.analysis_executor import get_analysis_process_pool, get_analysis_workers
+from app.core.config import settings
+from app.services.blob_reader import BlobReader, ByteBudget
+from app.services.diff_pipeline import (
+    CommitRecord,
+    FileChangeRecord,
+    iter_commit_records,
+)
+from app.services.git_mirror_cache import MirrorLease, get_git_mirror_cache
+from app.services.path_filter import GIT_SKIP_FILTER, PathFilter
+from app.services.history_summary import get_history_summary_engine
+from app.services.repository_snapshot import RepositorySnapshot
 
 logger = logging.getLogger(__name__)
 
+# Characters of post-change file content kept per file for snippet extraction
+CONTENT_SNIPPET_CHARS = 5000
+
 
 class GitService:
     """Enhanced Git service with robust URL handling, repository analysis, and cleanup"""
 
     def __init__(self):
-        # Track temp directories for cleanup
+        # Track temp directories and mirror worktrees for cleanup
         self.temp_dirs: List[str] = []
+        self.mirror_leases: List[MirrorLease] = []
         # Language detection mapping (comprehensive)
         self.language_map: Dict[str, str] = {
             # JavaScript ecosystem
@@ -276,6 +293,28 @@ class GitService:
         return normalized
 
     def clone_repository(self, repo_url: str, branch: str = "main") -> Repo:
+        """
+        Check out a repository for analysis.
+
+        Uses a worktree from the persistent mirror cache when it is enabled,
+        otherwise falls back to a shallow temporary clone.
+        """
+        mirror_cache = get_git_mirror_cache()
+        if mirror_cache is not None:
+            try:
+                url = self._normalize_git_url(repo_url)
+                lease = mirror_cache.checkout(url, branch)
+                self.mirror_leases.append(lease)
+                logger.info(f"✅ Checked out {url} from mirror cache")
+                return Repo(lease.worktree_path)
+            except ValueError as ve:
+                logger.error(str(ve))
+                raise
+            except Exception as e:
+                logger.warning(f"Mirror cache unavailable, cloning directly: {e}")
+        return self._clone_shallow(repo_url, branch)
+
+    def _clone_shallow(self, repo_url: str, branch: str = "main") -> Repo:
         """Clone a repository (shallow) with fallback on default branch"""
         temp_dir = tempfile.mkdtemp()
         self.temp_dirs.append(temp_dir)
@@ -302,25 +341,11 @@ class GitService:
             raise ValueError(f"Git clone error: {msg}")
 
     def get_repository_info(self, repo: Repo) -> Dict:
-        """Basic repo info: commit count, dates, authors, branches"""
+        """Basic repo info: commit count, dates, authors, branches and histograms"""
         try:
-            all_commits = list(repo.iter_commits())
-            authors = {
-                c.author.email for c in all_commits if c.author and c.author.email
-            }
+            summary = get_history_summary_engine().summarize(repo)
             return {
-                "total_commits": len(all_commits),
-                "first_commit_date": (
-                    all_commits[-1].committed_datetime.replace(tzinfo=None)
-                    if all_commits
-                    else None
-                ),
-                "last_commit_date": (
-                    all_commits[0].committed_datetime.replace(tzinfo=None)
-                    if all_commits
-                    else None
-                ),
-                "authors": list(authors),
+                **summary.to_dict(),
                 "branches": [b.name for b in repo.branches],
             }
         except Exception as e:
@@ -330,119 +355,38 @@ class GitService:
                 "first_commit_date": None,
                 "last_commit_date": None,
                 "authors": [],
+                "commits_by_author": {},
+                "commits_by_month": {},
                 "branches": [],
             }
 
     def get_commit_history(self, repo: Repo, limit: int = 100) -> List[Dict]:
         """Enhanced commit history with deep analysis, refactoring detection, and complexity metrics"""
-        commits: List[Dict] = []
         try:
-            commit_list = list(repo.iter_commits(max_count=limit))
-            logger.info(f"📊 Analyzing {len(commit_list)} commits for deep insights")
-
-            for idx, commit in enumerate(commit_list):
-                # Enhanced commit data structure
-                data = {
-                    "hash": commit.hexsha,
-                    "short_hash": commit.hexsha[:8],
-                    "author_name": (
-                        commit.author.name
-                        if hasattr(commit.author, "name")
-                        else str(commit.author)
-                    ),
-                    "author_email": getattr(commit.author, "email", ""),
-                    "committed_date": commit.committed_datetime.replace(tzinfo=None),
-                    "message": commit.message.strip(),
-                    "files_changed": [],
-                    "stats": {
-                        "additions": 0,
-                        "deletions": 0,
-                        "files": 0,
-                        "net_lines": 0,
-                        "complexity_change": 0,
-                        "refactoring_score": 0.0,
-                    },
-                    # Enhanced analysis fields
-                    "analysis": {
-                        "is_feature": False,
-                        "is_bugfix": False,
-                        "is_refactoring": False,
-                        "is_breaking_change": False,
-                        "complexity_impact": "low",
-                        "risk_level": "low",
-                        "patterns_detected": [],
-                        "quality_indicators": {},
-                    },
-                }
-
-                # Analyze commit message for intent
-                self._analyze_commit_message(data)
-
-                # Process file changes with enhanced analysis
-                parent = commit.parents[0] if commit.parents else None
-                diffs = commit.diff(parent)
-
-                total_complexity_change = 0
-                refactoring_indicators = 0
-
-                for diff in diffs:
-                    info = self._analyze_file_change(diff)
-                    if info:
-                        data["files_changed"].append(info)
-                        data["stats"]["additions"] += info.get("additions", 0)
-                        data["stats"]["deletions"] += info.get("deletions", 0)
-
-                        # Enhanced analysis per file
-                        complexity_change = info.get("complexity_change", 0)
-                        total_complexity_change += complexity_change
-
-                        # Detect refactoring patterns
-                        if self._is_refactoring_pattern(info):
-                            refactoring_indicators += 1
-
-                        # Detect potential breaking changes
-                        if self._is_potential_breaking_change(info):
-                            data["analysis"]["is_breaking_change"] = True
-
-                # Calculate enhanced metrics
-                data["stats"]["files"] = len(data["files_changed"])
-                data["stats"]["net_lines"] = (
-                    data["stats"]["additions"] - data["stats"]["deletions"]
-                )
-                data["stats"]["complexity_change"] = total_complexity_change
-                data["stats"]["refactoring_score"] = refactoring_indicators / max(
-                    len(data["files_changed"]), 1
-                )
-
-                # Determine complexity impact
-                if abs(total_complexity_change) > 50:
-                    data["analysis"]["complexity_impact"] = "high"
-                elif abs(total_complexity_change) > 20:
-                    data["analysis"]["complexity_impact"] = "medium"
-
-                # Detect refactoring
-                if data["stats"]["refactoring_score"] > 0.3:
-                    data["analysis"]["is_refactoring"] = True
-
-                # Calculate risk level
-                data["analysis"]["risk_level"] = self._calculate_risk_level(data)
-
-                # Quality indicators
-                data["analysis"]["quality_indicators"] = {
-                    "commit_size": data["stats"]["additions"]
-                    + data["stats"]["deletions"],
-                    "file_impact": data["stats"]["files"],
-                    "message_quality": self._assess_message_quality(data["message"]),
-                    "author_experience": self._estimate_author_experience(
-                        data["author_email"]
-                    ),
-                }
+            self._prefetch_blobs(repo, limit)
+            records: List[CommitRecord] = list(self._iter_loaded_records(repo, limit))
+            logger.info(f"📊 Analyzing {len(records)} commits for deep insights")
 
-                commits.append(data)
+            pool = None
+            if len(records) >= settings.GIT_DIFF_PARALLEL_MIN_COMMITS:
+                pool = get_analysis_process_pool()
 
-                # Log progress for large repositories
-                if idx % 10 == 0 and idx > 0:
-                    logger.debug(f"📈 Processed {idx}/{len(commit_list)} commits")
+            commits: Optional[List[Dict]] = None
+            if pool is not None:
+                chunksize = max(1, len(records) // (get_analysis_workers() * 4))
+                try:
+                    commits = list(
+                        pool.map(_analyze_commit_record, records, chunksize=chunksize)
+                    )
+                except Exception as e:
+                    logger.warning(f"Process pool failed, analyzing inline: {e}")
+            if commits is None:
+                commits = []
+                for idx, record in enumerate(records):
+                    commits.append(self._analyze_commit_record(record))
+                    # Log progress for large repositories
+                    if idx % 10 == 0 and idx > 0:
+                        logger.debug(f"📈 Processed {idx}/{len(records)} commits")
 
             logger.info(
                 f"✅ Enhanced commit analysis completed: {len(commits)} commits analyzed"
@@ -453,6 +397,149 @@ class GitService:
             logger.error(f"❌ Error processing commit history: {e}")
             raise
 
+    def _prefetch_blobs(self, repo: Repo, limit: int) -> None:
+        """Batch-fetch the blobs a partial mirror lacks for the analysed commits"""
+        mirror_cache = get_git_mirror_cache() if self.mirror_leases else None
+        if mirror_cache is None:
+            return
+        try:
+            mirror_cache.prefetch_blobs(repo, limit)
+        except Exception as e:
+            # Missing blobs are still fetched lazily, just one at a time
+            logger.warning(f"Blob prefetch failed, fetching lazily: {e}")
+
+    def _iter_loaded_records(self, repo: Repo, limit: int) -> Iterator[CommitRecord]:
+        """Commit records with skipped files dropped and file contents loaded"""
+        reader = self._blob_reader(repo)
+        path_filter = GIT_SKIP_FILTER.for_repository(repo.working_dir)
+        for record in iter_commit_records(repo, limit):
+            record.files = [
+                change
+                for change in record.files
+                if change.path and not self._should_skip_file(change.path, path_filter)
+            ]
+            self._load_file_contents(reader, record)
+            yield record
+        logger.debug(f"Blob reads: {reader.stats}")
+
+    def _blob_reader(self, repo: Repo) -> BlobReader:
+        """Bounded blob reader with a fresh per-analysis byte budget"""
+        budget = ByteBudget(settings.GIT_BLOB_BUDGET_MB * 1024 * 1024)
+        return BlobReader(repo, budget, max_blob_bytes=settings.GIT_BLOB_MAX_BYTES)
+
+    def build_snapshot(self, repo: Repo) -> RepositorySnapshot:
+        """Index the HEAD tree once for all analyzers of a run"""
+        return RepositorySnapshot.build(
+            repo,
+            language_map=self.language_map,
+            reader=self._blob_reader(repo),
+            max_cached_chars=settings.SNAPSHOT_CACHE_MB * 1024 * 1024,
+        )
+
+    def _load_file_contents(self, reader: BlobReader, record: CommitRecord) -> None:
+        """Attach a bounded prefix of each analyzable file's post-commit blob"""
+        for change in record.files:
+            if not change.new_blob or not change.path:
+                continue
+            try:
+                # UTF-8 needs at most 4 bytes per character
+                text = reader.read_text(change.new_blob, CONTENT_SNIPPET_CHARS * 4)
+                if text is not None:
+                    change.content = text[:CONTENT_SNIPPET_CHARS]
+            except Exception:
+                pass
+
+    def _analyze_commit_record(self, record: CommitRecord) -> Dict:
+        """Build the enhanced commit dict for one parsed commit record"""
+        data = {
+            "hash": record.hexsha,
+            "short_hash": record.hexsha[:8],
+            "author_name": record.author_name,
+            "author_email": record.author_email,
+            "committed_date": record.committed_date,
+            "message": record.message,
+            "files_changed": [],
+            "stats": {
+                "additions": 0,
+                "deletions": 0,
+                "files": 0,
+                "net_lines": 0,
+                "complexity_change": 0,
+                "refactoring_score": 0.0,
+            },
+            # Enhanced analysis fields
+            "analysis": {
+                "is_feature": False,
+                "is_bugfix": False,
+                "is_refactoring": False,
+                "is_breaking_change": False,
+                "complexity_impact": "low",
+                "risk_level": "low",
+                "patterns_detected": [],
+                "quality_indicators": {},
+            },
+        }
+
+        # Analyze commit message for intent
+        self._analyze_commit_message(data)
+
+        total_complexity_change = 0
+        refactoring_indicators = 0
+
+        # Process file changes with enhanced analysis
+        for change in record.files:
+            info = self._analyze_file_change(change)
+            if info:
+                data["files_changed"].append(info)
+                data["stats"]["additions"] += info.get("additions", 0)
+                data["stats"]["deletions"] += info.get("deletions", 0)
+
+                # Enhanced analysis per file
+                complexity_change = info.get("complexity_change", 0)
+                total_complexity_change += complexity_change
+
+                # Detect refactoring patterns
+                if self._is_refactoring_pattern(info):
+                    refactoring_indicators += 1
+
+                # Detect potential breaking changes
+                if self._is_potential_breaking_change(info):
+                    data["analysis"]["is_breaking_change"] = True
+
+        # Calculate enhanced metrics
+        data["stats"]["files"] = len(data["files_changed"])
+        data["stats"]["net_lines"] = (
+            data["stats"]["additions"] - data["stats"]["deletions"]
+        )
+        data["stats"]["complexity_change"] = total_complexity_change
+        data["stats"]["refactoring_score"] = refactoring_indicators / max(
+            len(data["files_changed"]), 1
+        )
+
+        # Determine complexity impact
+        if abs(total_complexity_change) > 50:
+            data["analysis"]["complexity_impact"] = "high"
+        elif abs(total_complexity_change) > 20:
+            data["analysis"]["complexity_impact"] = "medium"
+
+        # Detect refactoring
+        if data["stats"]["refactoring_score"] > 0.3:
+            data["analysis"]["is_refactoring"] = True
+
+        # Calculate risk level
+        data["analysis"]["risk_level"] = self._calculate_risk_level(data)
+
+        # Quality indicators
+        data["analysis"]["quality_indicators"] = {
+            "commit_size": data["stats"]["additions"] + data["stats"]["deletions"],
+            "file_impact": data["stats"]["files"],
+            "message_quality": self._assess_message_quality(data["message"]),
+            "author_experience": self._estimate_author_experience(
+                data["author_email"]
+            ),
+        }
+        return data
+
     def _analyze_commit_message(self, commit_data: Dict) -> None:
         """Analyze commit message for intent and patterns"""
         message = commit_data["message"].lower()
@@ -588,62 +675,42 @@ class GitService:
         else:
             return "junior"  # Other domains might indicate less experience
 
-    def _analyze_file_change(self, diff) -> Optional[Dict]:
-        """Analyze a single file diff for metadata and snippet"""
+    def _analyze_file_change(self, change: FileChangeRecord) -> Optional[Dict]:
+        """Analyze a single file change for metadata and snippet"""
         try:
-            path = diff.b_path or diff.a_path
-            if not path or self._should_skip_file(path):
+            # Records were already filtered with the repository's own overrides
+            path = change.path
+            if not path:
                 return None
             ext = Path(path).suffix.lower()
             language = self.language_map.get(ext, "Other")
-            info = {
+            return {
                 "file_path": path,
-                "change_type": self._get_change_type(diff),
+                "change_type": self._get_change_type(change),
                 "language": language,
-                "additions": 0,
-                "deletions": 0,
-                "content": None,
+                "additions": change.additions,
+                "deletions": change.deletions,
+                "content": change.content,
             }
-            if diff.b_blob:
-                try:
-                    raw = diff.b_blob.data_stream.read().decode(
-                        "utf-8", errors="ignore"
-                    )
-                    info["content"] = raw[:5000]
-                except:
-                    pass
-            try:
-                text = diff.diff.decode("utf-8", errors="ignore")
-                info["additions"] = text.count("\n+")
-                info["deletions"] = text.count("\n-")
-            except:
-                pass
-            return info
         except Exception as e:
             logger.warning(f"Error analyzing diff: {e}")
             return None
 
-    def _get_change_type(self, diff) -> str:
-        if diff.new_file:
+    def _get_change_type(self, change: FileChangeRecord) -> str:
+        if change.status == "A":
             return "added"
-        if diff.deleted_file:
+        if change.status == "D":
             return "deleted"
-        if diff.renamed_file:
+        if change.status == "R":
             return "renamed"
         return "modified"
 
-    def _should_skip_file(self, path: str) -> bool:
-        patterns = [
-            r"\.git/",
-            r"node_modules/",
-            r"__pycache__/",
-            r"\.(jpg|jpeg|png|gif|pdf|docx?)$",
-            r"\.(pyc|lock)$",
-            r"\.env",
-        ]
-        return any(re.search(p, path, re.IGNORECASE) for p in patterns)
+    def _should_skip_file(self, path: str, path_filter: Optional[PathFilter] = None) -> bool:
+        return (path_filter or GIT_SKIP_FILTER).excludes(path)
 
-    def extract_technologies(self, repo: Repo) -> Dict:
+    def extract_technologies(
+        self, repo: Repo, snapshot: Optional[RepositorySnapshot] = None
+    ) -> Dict:
         """Scan latest commit tree for languages, frameworks, tools"""
         tech: Dict = {
             "languages": {},
@@ -652,42 +719,43 @@ class GitService:
             "tools": set(),
         }
         try:
-            latest = next(repo.iter_commits())
-            for item in latest.tree.traverse():
-                if item.type != "blob":
+            if snapshot is None:
+                snapshot = self.build_snapshot(repo)
+            path_filter = GIT_SKIP_FILTER.for_repository(repo.working_dir)
+            for item in snapshot:
+                if self._should_skip_file(item.path, path_filter):
                     continue
-                ext = Path(item.path).suffix.lower()
-                lang = self.language_map.get(ext, "Other")
+                lang = item.language
                 if lang != "Other":
                     tech["languages"][lang] = tech["languages"].get(lang, 0) + 1
                 name = Path(item.path).name.lower()
                 # parse known package files
                 if name == "package.json":
-                    self._parse_package_json(item.data_stream.read().decode(), tech)
+                    self._parse_package_json(self._read_manifest(snapshot, item.path), tech)
                 elif name == "requirements.txt":
-                    self._parse_requirements_txt(item.data_stream.read().decode(), tech)
+                    self._parse_requirements_txt(self._read_manifest(snapshot, item.path), tech)
                 elif name == "cargo.toml":
-                    self._parse_cargo_toml(item.data_stream.read().decode(), tech)
+                    self._parse_cargo_toml(self._read_manifest(snapshot, item.path), tech)
                 elif name == "go.mod":
-                    self._parse_go_mod(item.data_stream.read().decode(), tech)
+                    self._parse_go_mod(self._read_manifest(snapshot, item.path), tech)
                 elif name == "gemfile":
-                    self._parse_gemfile(item.data_stream.read().decode(), tech)
+                    self._parse_gemfile(self._read_manifest(snapshot, item.path), tech)
                 elif name == "composer.json":
-                    self._parse_composer_json(item.data_stream.read().decode(), tech)
+                    self._parse_composer_json(self._read_manifest(snapshot, item.path), tech)
                 elif name == "pom.xml":
-                    self._parse_pom_xml(item.data_stream.read().decode(), tech)
+                    self._parse_pom_xml(self._read_manifest(snapshot, item.path), tech)
                 elif name in ("build.gradle", "build.gradle.kts"):
-                    self._parse_gradle(item.data_stream.read().decode(), tech)
+                    self._parse_gradle(self._read_manifest(snapshot, item.path), tech)
                 elif name == "pubspec.yaml":
-                    self._parse_pubspec_yaml(item.data_stream.read().decode(), tech)
+                    self._parse_pubspec_yaml(self._read_manifest(snapshot, item.path), tech)
                 elif name == "project.clj":
-                    self._parse_project_clj(item.data_stream.read().decode(), tech)
+                    self._parse_project_clj(self._read_manifest(snapshot, item.path), tech)
                 elif name == "mix.exs":
-                    self._parse_mix_exs(item.data_stream.read().decode(), tech)
+                    self._parse_mix_exs(self._read_manifest(snapshot, item.path), tech)
                 elif name == "deno.json" or name == "deno.jsonc":
-                    self._parse_deno_json(item.data_stream.read().decode(), tech)
+                    self._parse_deno_json(self._read_manifest(snapshot, item.path), tech)
                 elif name == "pyproject.toml":
-                    self._parse_pyproject_toml(item.data_stream.read().decode(), tech)
+                    self._parse_pyproject_toml(self._read_manifest(snapshot, item.path), tech)
                 # Docker detection
                 elif name in (
                     "dockerfile",
@@ -696,7 +764,7 @@ class GitService:
                     "dockerfile.test",
                 ):
                     tech["tools"].add("Docker")
-                    self._parse_dockerfile(item.data_stream.read().decode(), tech)
+                    self._parse_dockerfile(self._read_manifest(snapshot, item.path), tech)
                 elif name in (
                     "docker-compose.yml",
                     "docker-compose.yaml",
@@ -704,7 +772,7 @@ class GitService:
                     "docker-compose.prod.yml",
                 ):
                     tech["tools"].add("Docker Compose")
-                    self._parse_docker_compose(item.data_stream.read().decode(), tech)
+                    self._parse_docker_compose(self._read_manifest(snapshot, item.path), tech)
                 elif name == ".dockerignore":
                     tech["tools"].add("Docker")
         except Exception as e:
@@ -714,6 +782,10 @@ class GitService:
         tech["tools"] = list(tech["tools"])
         return tech
 
+    def _read_manifest(self, snapshot: RepositorySnapshot, path: str) -> str:
+        """Read a whole manifest file, or "" if it is oversized or binary"""
+        return snapshot.read_text(path) or ""
+
     def _parse_package_json(self, content: str, tech: Dict) -> None:
         import json
 
@@ -2460,7 +2532,15 @@ class GitService:
             logger.warning(f"Error parsing docker-compose: {e}")
 
     def cleanup(self) -> None:
-        """Remove all temp dirs with better Windows compatibility"""
+        """Release mirror worktrees and remove all temp dirs with better Windows compatibility"""
+        mirror_cache = get_git_mirror_cache() if self.mirror_leases else None
+        for lease in self.mirror_leases:
+            try:
+                mirror_cache.release(lease)
+                logger.info(f"Released worktree {lease.worktree_path}")
+            except Exception as e:
+                logger.warning(f"Cleanup warning for {lease.worktree_path}: {e}")
+        self.mirror_leases = []
         for d in self.temp_dirs:
             try:
                 import stat
@@ -2492,3 +2572,15 @@ class GitService:
 
     def __del__(self):
         self.cleanup()
+
+
+_worker_git_service: Optional[GitService] = None
+
+
+def _analyze_commit_record(record: CommitRecord) -> Dict:
+    """Process-pool entry point for per-commit analysis"""
+    global _worker_git_service
+
+    if _worker_git_service is None:
+        _worker_git_service = GitService()
+    return _worker_git_service._analyze_commit_record(record)
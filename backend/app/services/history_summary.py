@@ -0,0 +1,126 @@
+"""
+Streaming History Summary
+
+Summarizes a repository's full commit history in a single pass over
+``git log`` output instead of materializing every Commit object. Memory use is
+bounded by the number of distinct authors and months, not by history length.
+Summaries are cached by HEAD sha: a commit id pins its entire ancestry, so a
+repeat call for the same HEAD never re-walks history.
+"""
+
+import logging
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from git import Repo
+
+logger = logging.getLogger(__name__)
+
+# One record per commit: committer date (strict ISO 8601) and author email
+_LOG_FORMAT = "--format=%cI%x00%ae"
+
+
+@dataclass
+class HistorySummary:
+    """Aggregate statistics for all commits reachable from HEAD"""
+
+    head_sha: str
+    total_commits: int = 0
+    first_commit_date: Optional[datetime] = None
+    last_commit_date: Optional[datetime] = None
+    commits_by_author: Counter = field(default_factory=Counter)
+    commits_by_month: Counter = field(default_factory=Counter)
+
+    @property
+    def authors(self) -> list:
+        return list(self.commits_by_author.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_commits": self.total_commits,
+            "first_commit_date": self.first_commit_date,
+            "last_commit_date": self.last_commit_date,
+            "authors": self.authors,
+            "commits_by_author": dict(self.commits_by_author),
+            "commits_by_month": dict(sorted(self.commits_by_month.items())),
+        }
+
+
+class HistorySummaryEngine:
+    """Computes and caches :class:`HistorySummary` objects keyed by HEAD sha"""
+
+    def __init__(self, max_cached: int = 256):
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[str, HistorySummary]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def summarize(self, repo: Repo) -> HistorySummary:
+        head_sha = repo.head.commit.hexsha
+        with self._lock:
+            cached = self._cache.get(head_sha)
+            if cached is not None:
+                self._cache.move_to_end(head_sha)
+                self.stats["hits"] += 1
+                return cached
+            self.stats["misses"] += 1
+
+        summary = self._walk(repo, head_sha)
+
+        with self._lock:
+            self._cache[head_sha] = summary
+            self._cache.move_to_end(head_sha)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return summary
+
+    def _walk(self, repo: Repo, head_sha: str) -> HistorySummary:
+        """Stream ``git log`` once, newest commit first"""
+        summary = HistorySummary(head_sha=head_sha)
+        proc = repo.git.log(head_sha, _LOG_FORMAT, as_process=True)
+        completed = False
+        try:
+            for raw in proc.stdout:
+                line = raw.decode("utf-8", errors="replace").rstrip("\n")
+                if not line:
+                    continue
+                date_str, _, email = line.partition("\x00")
+                committed = datetime.fromisoformat(date_str).replace(tzinfo=None)
+
+                if summary.total_commits == 0:
+                    summary.last_commit_date = committed
+                summary.first_commit_date = committed
+                summary.total_commits += 1
+
+                if email:
+                    summary.commits_by_author[email] += 1
+                summary.commits_by_month[committed.strftime("%Y-%m")] += 1
+            completed = True
+        finally:
+            if completed:
+                proc.wait()
+            else:
+                # Parsing failed mid-stream: don't block on a writer with a full pipe
+                proc.proc.kill()
+                proc.proc.wait()
+
+        logger.info(
+            f"📊 Summarized {summary.total_commits} commits "
+            f"({len(summary.commits_by_author)} authors) at {head_sha[:8]}"
+        )
+        return summary
+
+
+_history_engine: Optional[HistorySummaryEngine] = None
+
+
+def get_history_summary_engine() -> HistorySummaryEngine:
+    """Get global history summary engine"""
+    global _history_engine
+
+    if _history_engine is None:
+        _history_engine = HistorySummaryEngine()
+    return _history_engine
@@ -14,6 +14,8 @@ from typing import Dict, List, Set, Optional, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from app.services.path_filter import INCREMENTAL_FILTER
+
 logger = logging.getLogger(__name__)
 
 
@@ -80,28 +82,21 @@ class IncrementalAnalyzer:
         
         try:
             # Walk through repository and hash all relevant files
-            for root, dirs, files in os.walk(repository_path):
-                # Skip common non-source directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {
-                    'node_modules', '__pycache__', 'target', 'build', 'dist'
-                }]
+            path_filter = INCREMENTAL_FILTER.for_repository(repository_path)
+            for rel_path in path_filter.walk(repository_path):
+                file_path = os.path.join(repository_path, rel_path)
                 
-                for file in files:
-                    if self._should_analyze_file(file):
-                        file_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(file_path, repository_path)
+                try:
+                    content_hash = self._hash_file(file_path)
+                    file_hashes[rel_path] = content_hash
+                    total_files += 1
+                    
+                    # Count lines for metrics
+                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                        total_lines += sum(1 for _ in f)
                         
-                        try:
-                            content_hash = self._hash_file(file_path)
-                            file_hashes[rel_path] = content_hash
-                            total_files += 1
-                            
-                            # Count lines for metrics
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                total_lines += sum(1 for _ in f)
-                                
-                        except Exception as e:
-                            logger.warning(f"Could not hash file {file_path}: {e}")
+                except Exception as e:
+                    logger.warning(f"Could not hash file {file_path}: {e}")
                             
         except Exception as e:
             logger.error(f"Error creating snapshot: {e}")
@@ -158,21 +153,15 @@ class IncrementalAnalyzer:
         try:
             # Get current file state
             current_files = {}
-            for root, dirs, files in os.walk(repository_path):
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {
-                    'node_modules', '__pycache__', 'target', 'build', 'dist'
-                }]
+            path_filter = INCREMENTAL_FILTER.for_repository(repository_path)
+            for rel_path in path_filter.walk(repository_path):
+                file_path = os.path.join(repository_path, rel_path)
                 
-                for file in files:
-                    if self._should_analyze_file(file):
-                        file_path = os.path.join(root, file)
-                        rel_path = os.path.relpath(file_path, repository_path)
-                        
-                        try:
-                            content_hash = self._hash_file(file_path)
-                            current_files[rel_path] = content_hash
-                        except Exception as e:
-                            logger.warning(f"Could not hash file {file_path}: {e}")
+                try:
+                    content_hash = self._hash_file(file_path)
+                    current_files[rel_path] = content_hash
+                except Exception as e:
+                    logger.warning(f"Could not hash file {file_path}: {e}")
                             
             # Compare with previous snapshot
             previous_files = previous_snapshot.file_hashes
@@ -326,34 +315,7 @@ class IncrementalAnalyzer:
         
     def _should_analyze_file(self, filename: str) -> bool:
         """Check if file should be included in analysis"""
-        # Source code extensions
-        source_extensions = {
-            '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h',
-            '.cs', '.php', '.rb', '.go', '.rs', '.kt', '.swift', '.scala',
-            '.clj', '.hs', '.ml', '.fs', '.r', '.m', '.sh', '.ps1', '.pl',
-            '.lua', '.dart', '.elm', '.ex', '.exs', '.jl', '.nim', '.zig'
-        }
-        
-        # Config and markup extensions
-        config_extensions = {
-            '.json', '.yaml', '.yml', '.toml', '.xml', '.html', '.css',
-            '.scss', '.sass', '.less', '.md', '.dockerfile', '.makefile'
-        }
-        
-        filename_lower = filename.lower()
-        ext = os.path.splitext(filename_lower)[1]
-        
-        # Check extensions
-        if ext in source_extensions or ext in config_extensions:
-            return True
-            
-        # Check special filenames
-        special_files = {
-            'dockerfile', 'makefile', 'rakefile', 'gemfile', 'procfile',
-            'package.json', 'requirements.txt', 'setup.py', 'cargo.toml'
-        }
-        
-        return filename_lower in special_files
+        return INCREMENTAL_FILTER.includes(filename)
         
     def _hash_file(self, file_path: str) -> str:
         """Generate SHA-256 hash of file content"""
@@ -1,6 +1,9 @@
 """LLM provider adapter utilities."""
 
-from .base import LLMAdapterManager, LLMProvider, LLMProviderNotAvailable, build_adapter_manager
+from .base import LLMAdapterManager, LLMProvider, LLMProviderNotAvailable, LLMTunnelError, build_adapter_manager
+from .http_pool import ProviderHTTPPool, close_http_pools, get_http_pool, get_http_pool_stats
+from .response_cache import LLMResponseCache, get_llm_response_cache
+from .scheduler import BACKGROUND, INTERACTIVE, LLMScheduler, get_llm_scheduler, llm_request_context
 from .providers import (
     AnthropicProvider,
     BedrockProvider,
@@ -14,7 +17,19 @@ __all__ = [
     "LLMAdapterManager",
     "LLMProvider",
     "LLMProviderNotAvailable",
+    "LLMTunnelError",
     "build_adapter_manager",
+    "ProviderHTTPPool",
+    "close_http_pools",
+    "get_http_pool",
+    "get_http_pool_stats",
+    "LLMResponseCache",
+    "get_llm_response_cache",
+    "BACKGROUND",
+    "INTERACTIVE",
+    "LLMScheduler",
+    "get_llm_scheduler",
+    "llm_request_context",
     "AnthropicProvider",
     "BedrockProvider",
     "OllamaProvider",
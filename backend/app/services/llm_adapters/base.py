@@ -15,13 +15,22 @@ configuration.
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import json
 import logging
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+
+from .health import CLOSED, ProviderHealth
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .response_cache import LLMResponseCache
+    from .scheduler import LLMScheduler
+    from .usage import LLMUsageTracker
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +39,14 @@ class LLMProviderNotAvailable(RuntimeError):
     """Raised when a provider cannot handle a request."""
 
 
+class LLMTunnelError(LLMProviderNotAvailable):
+    """Raised when a user's tunnel, rather than the provider, failed a request.
+
+    Tunnels track their own health, so these failures are kept out of the
+    provider's shared circuit.
+    """
+
+
 class LLMProvider(ABC):
     """Base contract all concrete providers must satisfy."""
 
@@ -43,6 +60,23 @@ class LLMProvider(ABC):
     async def acompletion(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> str:
         """Execute a completion request and return the textual response."""
 
+    async def ahealth_check(self) -> bool:
+        """Probe the provider; the default trusts :meth:`is_available`."""
+        return self.is_available()
+
+    @property
+    def supports_streaming(self) -> bool:
+        """``True`` when :meth:`astream` yields text incrementally."""
+        return False
+
+    async def astream(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> AsyncIterator[str]:
+        """Yield the completion text in pieces as it is generated.
+
+        The default yields the whole :meth:`acompletion` result at once.
+        Closing the iterator early cancels the generation.
+        """
+        yield await self.acompletion(prompt, instructions=instructions, **kwargs)
+
     async def astructured_completion(
         self,
         prompt: str,
@@ -59,6 +93,9 @@ class LLMProvider(ABC):
         Pydantic.
         """
 
+        if self.supports_streaming:
+            return await self._astructured_from_stream(prompt, response_model, instructions=instructions, **kwargs)
+
         raw = await self.acompletion(prompt, instructions=instructions, **kwargs)
         parsed = _extract_json(raw)
         if parsed is None:
@@ -77,6 +114,55 @@ class LLMProvider(ABC):
             return None
 
 
+    async def _astructured_from_stream(
+        self,
+        prompt: str,
+        response_model: Type[BaseModel],
+        *,
+        instructions: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Optional[BaseModel]:
+        """Validate each JSON object as soon as it closes and stop generating
+        at the first one matching ``response_model``.
+
+        Usage the provider reported before the stop (e.g. Anthropic's prompt
+        tokens) is kept; whatever comes only in the final events is counted
+        with the local tokenizer when the call's usage is resolved.
+        """
+
+        from .streaming import IncrementalJSONParser, parse_object, stream_stats
+
+        parser = IncrementalJSONParser()
+        stream = self.astream(prompt, instructions=instructions, **kwargs)
+        stream_stats["streams"] += 1
+        try:
+            async for chunk in stream:
+                stream_stats["chars_received"] += len(chunk)
+                for text in parser.feed(chunk):
+                    parsed = parse_object(text)
+                    if parsed is None:
+                        continue
+                    stream_stats["objects_parsed"] += 1
+                    try:
+                        result = response_model.model_validate(parsed)
+                    except ValidationError as exc:
+                        logger.debug(
+                            "Provider %s streamed an object not matching %s: %s",
+                            getattr(self, "name", "unknown"),
+                            response_model.__name__,
+                            exc,
+                        )
+                        continue
+                    stream_stats["stopped_at_object"] += 1
+                    return result
+        finally:
+            await stream.aclose()
+
+        stream_stats["no_valid_object"] += 1
+        logger.debug("Provider %s streamed no valid %s", getattr(self, "name", "unknown"), response_model.__name__)
+        return None
+
+
 TModel = TypeVar("TModel", bound=BaseModel)
 
 
@@ -90,9 +176,30 @@ class ProviderMetadata:
 
 
 class LLMAdapterManager:
-    """Holds a list of providers and handles fail-over between them."""
+    """Holds a list of providers and handles fail-over between them.
+
+    Each call is routed through the providers whose circuit is not open.
+    With ``routing="latency"`` they are tried fastest first (by rolling p50
+    latency); providers without measurements rank alongside the fastest
+    measured one, so static priority decides until there is evidence.
+    ``routing="priority"`` keeps the static order.
+
+    With a ``usage_tracker`` every successful call's token usage (as reported
+    by the provider, or counted locally) is recorded.
+    """
 
-    def __init__(self, providers: Sequence[Tuple[int, LLMProvider]]):
+    def __init__(
+        self,
+        providers: Sequence[Tuple[int, LLMProvider]],
+        response_cache: Optional["LLMResponseCache"] = None,
+        scheduler: Optional["LLMScheduler"] = None,
+        routing: str = "latency",
+        usage_tracker: Optional["LLMUsageTracker"] = None,
+    ):
+        self.response_cache = response_cache
+        self.scheduler = scheduler
+        self.routing = routing
+        self.usage_tracker = usage_tracker
         ordered: List[ProviderMetadata] = []
         for priority, provider in providers:
             if not provider.is_available():
@@ -102,6 +209,7 @@ class LLMAdapterManager:
 
         # Order by priority (lower value == higher priority)
         self._providers: List[ProviderMetadata] = sorted(ordered, key=lambda item: item.priority)
+        self.health: Dict[str, ProviderHealth] = {meta.name: ProviderHealth(meta.name) for meta in self._providers}
 
     @property
     def has_providers(self) -> bool:
@@ -122,17 +230,39 @@ class LLMAdapterManager:
         """Return a structured completion using the first working provider."""
 
         last_error: Optional[Exception] = None
-        for meta in self._providers:
+        for meta in self._route():
+            cache_key = self._cache_key(meta, prompt, instructions, kwargs)
+            if cache_key is not None:
+                cached = await self.response_cache.get(cache_key, prompt_chars=len(prompt))
+                if cached is not None:
+                    try:
+                        logger.debug("LLM response cache hit for provider %s", meta.name)
+                        return response_model.model_validate(cached)
+                    except Exception:  # schema changed since the entry was written
+                        logger.debug("Discarding stale cached response for %s", response_model.__name__)
+
+            if not self.health[meta.name].allow_request():
+                logger.debug("Skipping provider %s: circuit open", meta.name)
+                continue
+
             try:
                 logger.debug("Attempting completion using provider %s", meta.name)
-                response = await meta.provider.astructured_completion(
+                response = await self._call(
+                    meta,
                     prompt,
-                    response_model,
-                    instructions=instructions,
-                    **kwargs,
+                    instructions,
+                    kwargs,
+                    lambda: meta.provider.astructured_completion(
+                        prompt,
+                        response_model,
+                        instructions=instructions,
+                        **kwargs,
+                    ),
                 )
                 if response is not None:
                     logger.info("LLM provider %s handled the request", meta.name)
+                    if cache_key is not None:
+                        await self.response_cache.set(cache_key, response.model_dump(mode="json"))
                     return response
             except Exception as exc:  # pragma: no cover - defensive
                 last_error = exc
@@ -142,6 +272,147 @@ class LLMAdapterManager:
             logger.error("All configured LLM providers failed, last error: %s", last_error)
         return None
 
+    def _route(self) -> List[ProviderMetadata]:
+        """Providers in the order a call should try them."""
+
+        if self.routing != "latency":
+            return list(self._providers)
+        latencies = {meta.name: self.health[meta.name].latency(0.5) for meta in self._providers}
+        measured = [value for value in latencies.values() if value is not None]
+        neutral = min(measured) if measured else 0.0
+
+        def key(meta: ProviderMetadata) -> Tuple[int, float, int]:
+            health = self.health[meta.name]
+            latency = latencies[meta.name]
+            return (
+                0 if health.state == CLOSED else 1,
+                neutral if latency is None else latency,
+                meta.priority,
+            )
+
+        return sorted(self._providers, key=key)
+
+    async def _call(
+        self,
+        meta: ProviderMetadata,
+        prompt: str,
+        instructions: Optional[str],
+        kwargs: Dict[str, Any],
+        call: Any,
+    ) -> Any:
+        """Run ``call()`` in a scheduler slot and record its outcome in the
+        provider's health and the usage tracker."""
+
+        from .usage import capture_usage
+
+        health = self.health[meta.name]
+        try:
+            async with self._slot(meta, prompt, instructions, kwargs):
+                started = time.monotonic()
+                with capture_usage() as reported:
+                    try:
+                        result = await call()
+                    except LLMTunnelError:
+                        # One user's tunnel going down says nothing about the provider
+                        health.abandon()
+                        raise
+                    except Exception as exc:
+                        health.record_failure(time.monotonic() - started, str(exc) or type(exc).__name__)
+                        raise
+                latency = time.monotonic() - started
+                health.record_success(latency)
+                if self.usage_tracker is not None:
+                    self._record_usage(meta, prompt, instructions, kwargs, reported, result, latency)
+                return result
+        except asyncio.CancelledError:
+            health.abandon()
+            raise
+
+    def _record_usage(
+        self,
+        meta: ProviderMetadata,
+        prompt: str,
+        instructions: Optional[str],
+        kwargs: Dict[str, Any],
+        reported: Any,
+        result: Any,
+        latency: float,
+    ) -> None:
+        from .response_cache import provider_model
+        from .scheduler import current_request_context
+
+        if isinstance(result, BaseModel):
+            completion = result.model_dump_json()
+        else:
+            completion = result if isinstance(result, str) else ""
+        usage = reported.resolve(f"{instructions or ''}\n{prompt}", completion)
+        _priority, owner = current_request_context()
+        self.usage_tracker.record(
+            meta.name,
+            provider_model(meta.provider),
+            usage,
+            user_id=kwargs.get("user_id"),
+            owner=owner,
+            latency_s=latency,
+        )
+
+    async def probe_providers(self) -> Dict[str, bool]:
+        """Health-check every provider concurrently, opening circuits that fail."""
+
+        async def probe(meta: ProviderMetadata) -> bool:
+            try:
+                healthy = await meta.provider.ahealth_check()
+            except Exception as exc:
+                logger.debug("Health check for %s failed: %s", meta.name, exc)
+                healthy = False
+            if not healthy:
+                self.health[meta.name].trip("health check failed")
+            return healthy
+
+        results = await asyncio.gather(*(probe(meta) for meta in self._providers))
+        return {meta.name: ok for meta, ok in zip(self._providers, results)}
+
+    def get_health(self) -> Dict[str, Dict[str, Any]]:
+        return {name: health.snapshot() for name, health in self.health.items()}
+
+    def _slot(
+        self,
+        meta: ProviderMetadata,
+        prompt: str,
+        instructions: Optional[str],
+        kwargs: Dict[str, Any],
+    ):
+        """Scheduler slot for one provider call (a no-op without a scheduler)."""
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        from .scheduler import estimate_request_tokens
+
+        return self.scheduler.slot(
+            meta.name,
+            estimate_request_tokens(prompt, instructions, kwargs.get("max_tokens")),
+            user_id=kwargs.get("user_id"),
+        )
+
+    def _cache_key(
+        self,
+        meta: ProviderMetadata,
+        prompt: str,
+        instructions: Optional[str],
+        kwargs: Dict[str, Any],
+    ) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        from .response_cache import provider_model
+
+        return self.response_cache.make_key(
+            meta.name,
+            provider_model(meta.provider),
+            instructions,
+            prompt,
+            kwargs.get("temperature"),
+            kwargs.get("max_tokens"),
+        )
+
     async def acompletion(
         self,
         prompt: str,
@@ -151,10 +422,18 @@ class LLMAdapterManager:
     ) -> Optional[str]:
         """Return a raw completion string using the first working provider."""
 
-        for meta in self._providers:
+        for meta in self._route():
+            if not self.health[meta.name].allow_request():
+                continue
             try:
                 logger.debug("Attempting raw completion using provider %s", meta.name)
-                return await meta.provider.acompletion(prompt, instructions=instructions, **kwargs)
+                return await self._call(
+                    meta,
+                    prompt,
+                    instructions,
+                    kwargs,
+                    lambda: meta.provider.acompletion(prompt, instructions=instructions, **kwargs),
+                )
             except Exception as exc:  # pragma: no cover - defensive
                 logger.warning("Provider %s failed to produce raw output: %s", meta.name, exc)
         return None
@@ -181,10 +460,22 @@ def _extract_json(raw: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def build_adapter_manager(providers: Iterable[Tuple[int, LLMProvider]]) -> Optional[LLMAdapterManager]:
+def build_adapter_manager(
+    providers: Iterable[Tuple[int, LLMProvider]],
+    response_cache: Optional["LLMResponseCache"] = None,
+    scheduler: Optional["LLMScheduler"] = None,
+    routing: str = "latency",
+    usage_tracker: Optional["LLMUsageTracker"] = None,
+) -> Optional[LLMAdapterManager]:
     """Helper used by the service manager to instantiate adapters."""
 
-    manager = LLMAdapterManager(list(providers))
+    manager = LLMAdapterManager(
+        list(providers),
+        response_cache=response_cache,
+        scheduler=scheduler,
+        routing=routing,
+        usage_tracker=usage_tracker,
+    )
     if not manager.has_providers:
         return None
     return manager
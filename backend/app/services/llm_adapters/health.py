@@ -0,0 +1,140 @@
+"""Per-provider health tracking and circuit breaking.
+
+Each provider call records its latency and outcome in a rolling window.  A
+provider whose calls keep failing has its circuit *opened*: the manager skips
+it instantly instead of paying a full timeout per request.  After a cooldown
+the circuit goes *half-open* and lets a single trial request through; success
+closes it again, failure re-opens it with a longer cooldown.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _percentile(values, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ProviderHealth:
+    """Rolling latency/error statistics and circuit state for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: Optional[int] = None,
+        failure_threshold: Optional[int] = None,
+        error_rate_threshold: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        open_seconds: Optional[float] = None,
+        max_open_seconds: float = 600.0,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.LLM_CIRCUIT_FAILURE_THRESHOLD
+        self.error_rate_threshold = error_rate_threshold or settings.LLM_CIRCUIT_ERROR_RATE
+        self.min_samples = min_samples or settings.LLM_CIRCUIT_MIN_SAMPLES
+        self.base_open_seconds = open_seconds or settings.LLM_CIRCUIT_OPEN_S
+        self.max_open_seconds = max_open_seconds
+
+        # (latency seconds, succeeded)
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window or settings.LLM_HEALTH_WINDOW)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = self.base_open_seconds
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self._trial_in_flight = False
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to this provider now (reserves the half-open trial)."""
+
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.stats["rejected"] += 1
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                self.stats["rejected"] += 1
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self, latency: float) -> None:
+        self._outcomes.append((latency, True))
+        self.stats["successes"] += 1
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self.open_seconds = self.base_open_seconds
+        self._trial_in_flight = False
+
+    def record_failure(self, latency: float, error: Optional[str] = None) -> None:
+        self._outcomes.append((latency, False))
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN:
+            # Trial failed: back off harder before the next one
+            self._open(min(self.open_seconds * 2, self.max_open_seconds))
+        elif self.state == CLOSED and (
+            self.consecutive_failures >= self.failure_threshold
+            or (len(self._outcomes) >= self.min_samples and self.error_rate >= self.error_rate_threshold)
+        ):
+            self._open(self.base_open_seconds)
+        self._trial_in_flight = False
+
+    def trip(self, error: str) -> None:
+        """Open the circuit immediately (e.g. a failed startup probe)."""
+
+        self.last_error = error
+        self._open(self.base_open_seconds)
+
+    def abandon(self) -> None:
+        """Release a half-open trial whose call was cancelled before finishing."""
+
+        self._trial_in_flight = False
+
+    def _open(self, seconds: float) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.open_seconds = seconds
+        self.stats["opened"] += 1
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _latency, ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def latency(self, fraction: float) -> Optional[float]:
+        """Latency percentile of successful calls in the window."""
+
+        return _percentile([latency for latency, ok in self._outcomes if ok], fraction)
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50 = self.latency(0.5)
+        p95 = self.latency(0.95)
+        return {
+            **self.stats,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate, 4),
+            "p50_latency_s": round(p50, 4) if p50 is not None else None,
+            "p95_latency_s": round(p95, 4) if p95 is not None else None,
+            "samples": len(self._outcomes),
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,282 @@
+"""Pooled async HTTP transport shared by the HTTP based LLM providers.
+
+Each provider gets one long-lived :class:`httpx.AsyncClient` so requests
+reuse keep-alive connections (HTTP/2 when the ``h2`` package is installed)
+instead of paying a TCP+TLS handshake per completion, and run natively on
+the event loop rather than occupying a default executor thread.  Transient
+failures (connection errors, 429 and 5xx responses) are retried with
+exponential backoff; 409/425 are only retried for idempotent methods, since
+a conflicting POST may already have been acted on.  Responses can also be consumed as a line stream for
+providers that emit NDJSON or server-sent events.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Only safe to re-send when repeating the request cannot duplicate its effect
+IDEMPOTENT_RETRYABLE_STATUS_CODES = frozenset({409, 425})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ProviderHTTPPool:
+    """Connection-pooled client plus retry policy for a single provider."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.name = name
+        # Explicit zeros (no keep-alive, no retries, ...) are honoured
+        self.max_connections = (
+            settings.LLM_HTTP_MAX_CONNECTIONS if max_connections is None else max_connections
+        )
+        self.max_keepalive = settings.LLM_HTTP_MAX_KEEPALIVE if max_keepalive is None else max_keepalive
+        self.keepalive_expiry = (
+            settings.LLM_HTTP_KEEPALIVE_EXPIRY_S if keepalive_expiry is None else keepalive_expiry
+        )
+        self.connect_timeout = (
+            settings.LLM_HTTP_CONNECT_TIMEOUT_S if connect_timeout is None else connect_timeout
+        )
+        self.read_timeout = settings.LLM_HTTP_READ_TIMEOUT_S if read_timeout is None else read_timeout
+        self.max_retries = settings.LLM_HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = settings.LLM_HTTP_BACKOFF_BASE_S if backoff_base is None else backoff_base
+        wants_http2 = settings.LLM_HTTP2 if http2 is None else http2
+        self.http2 = bool(wants_http2 and _HTTP2_AVAILABLE)
+        self._transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats: Dict[str, Any] = {
+            "requests": 0,
+            "streams": 0,
+            "retries": 0,
+            "failures": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "clients_opened": 0,
+            "clients_closed": 0,
+            "total_latency_s": 0.0,
+            "http_versions": {},
+        }
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # An AsyncClient is bound to the loop that opened its connections;
+        # callers that run their own loop (asyncio.run in a worker) get a
+        # fresh client instead of one tied to a closed loop.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            stale, stale_loop = self._client, self._client_loop
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                transport=self._transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    self.read_timeout,
+                    connect=self.connect_timeout,
+                ),
+            )
+            self._client_loop = loop
+            self.stats["clients_opened"] += 1
+            logger.debug(
+                "Opened pooled HTTP client for %s (http2=%s, max_connections=%s)",
+                self.name,
+                self.http2,
+                self.max_connections,
+            )
+            if stale is not None and not stale.is_closed:
+                await self._close_stale_client(stale, stale_loop)
+        return self._client
+
+    async def _close_stale_client(
+        self, client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]
+    ) -> None:
+        """Close a client left behind by another event loop."""
+
+        self.stats["clients_closed"] += 1
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            # Still serving another thread: close it there, on its own loop
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            await client.aclose()
+        except Exception as exc:  # connections tied to a closed loop may not shut down cleanly
+            logger.debug("Closing stale HTTP client for %s failed: %s", self.name, exc)
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), 60.0)
+                except ValueError:
+                    pass
+        delay = self.backoff_base * (2 ** attempt)
+        return delay + random.uniform(0, delay / 2)
+
+    async def _send(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        payload: Optional[Dict[str, Any]],
+        *,
+        method: str = "POST",
+        stream: bool = False,
+    ) -> httpx.Response:
+        """Send with retries on transient failures; the returned response is successful."""
+
+        client = await self._get_client()
+        retryable = RETRYABLE_STATUS_CODES
+        if method.upper() in IDEMPOTENT_METHODS:
+            retryable = retryable | IDEMPOTENT_RETRYABLE_STATUS_CODES
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            try:
+                request = client.build_request(method, url, headers=headers, json=payload)
+                response = await client.send(request, stream=stream)
+                if response.status_code not in retryable or attempt >= self.max_retries:
+                    if response.is_error and stream:
+                        await response.aread()
+                    response.raise_for_status()
+                    versions = self.stats["http_versions"]
+                    versions[response.http_version] = versions.get(response.http_version, 0) + 1
+                    return response
+                if stream:
+                    await response.aclose()
+            except httpx.TransportError as exc:
+                if attempt >= self.max_retries:
+                    raise
+                logger.debug("%s request failed (%s), retrying", self.name, exc)
+
+            delay = self._backoff(attempt, response)
+            attempt += 1
+            self.stats["retries"] += 1
+            logger.debug(
+                "Retrying %s request in %.2fs (attempt %s/%s)",
+                self.name,
+                delay,
+                attempt,
+                self.max_retries,
+            )
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def _track(self) -> AsyncIterator[None]:
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.stats["failures"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+            self.stats["total_latency_s"] += time.perf_counter() - started
+
+    async def post_json(self, url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST ``payload`` and return the decoded JSON body, retrying transient failures."""
+
+        async with self._track():
+            response = await self._send(url, headers, payload)
+            return response.json()
+
+    async def get_json(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """GET ``url`` and return the decoded JSON body."""
+
+        async with self._track():
+            response = await self._send(url, headers or {}, None, method="GET")
+            return response.json()
+
+    async def stream_lines(
+        self, url: str, headers: Dict[str, str], payload: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """POST ``payload`` and yield the response body line by line as it arrives.
+
+        Only opening the stream is retried.  Closing the generator early
+        closes the connection, which stops the generation server-side.
+        """
+
+        async with self._track():
+            response = await self._send(url, headers, payload, stream=True)
+            self.stats["streams"] += 1
+            try:
+                async for line in response.aiter_lines():
+                    yield line
+            finally:
+                await response.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["http_versions"] = dict(self.stats["http_versions"])
+        stats["http2"] = self.http2
+        stats["max_connections"] = self.max_connections
+        stats["max_keepalive"] = self.max_keepalive
+        completed = stats["requests"] - stats["in_flight"]
+        stats["avg_latency_s"] = round(stats["total_latency_s"] / completed, 4) if completed else 0.0
+        return stats
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        self._client_loop = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+
+_http_pools: Dict[str, ProviderHTTPPool] = {}
+
+
+def get_http_pool(name: str) -> ProviderHTTPPool:
+    """Get the shared pool for provider ``name``, creating it on first use."""
+
+    pool = _http_pools.get(name)
+    if pool is None:
+        pool = ProviderHTTPPool(name)
+        _http_pools[name] = pool
+    return pool
+
+
+def get_http_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Pool statistics for every provider that has issued a request."""
+
+    return {name: pool.get_stats() for name, pool in _http_pools.items()}
+
+
+async def close_http_pools() -> None:
+    """Close every pooled client (application shutdown)."""
+
+    for pool in list(_http_pools.values()):
+        try:
+            await pool.aclose()
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning("Failed to close HTTP pool for %s: %s", pool.name, exc)
@@ -4,13 +4,16 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from typing import Any, Dict, Optional, Tuple
-
-import requests
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
 from app.core.config import settings
 
-from .base import LLMAdapterManager, LLMProvider, LLMProviderNotAvailable, build_adapter_manager
+from .base import LLMAdapterManager, LLMProvider, LLMProviderNotAvailable, LLMTunnelError, build_adapter_manager
+from .http_pool import ProviderHTTPPool, get_http_pool
+from .response_cache import get_llm_response_cache
+from .scheduler import get_llm_scheduler
+from .streaming import parse_object, sse_data
+from .usage import get_llm_usage_tracker, report_usage
 
 try:  # pragma: no cover - optional dependency during startup
     from app.services.secure_tunnel_service import (
@@ -29,18 +32,21 @@ logger = logging.getLogger(__name__)
 
 
 class _BaseHTTPProvider(LLMProvider):
-    """Utility class that performs blocking HTTP requests in a thread."""
+    """Utility class that sends requests through the provider's pooled async client."""
+
+    @property
+    def http_pool(self) -> ProviderHTTPPool:
+        return get_http_pool(self.name)
 
-    timeout: int = 60
+    @property
+    def supports_streaming(self) -> bool:
+        return settings.LLM_STREAMING_ENABLED
 
     async def _post_json(self, url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> Dict[str, Any]:
-        def _call() -> Dict[str, Any]:
-            response = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
+        return await self.http_pool.post_json(url, headers, payload)
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _call)
+    def _stream_lines(self, url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> AsyncIterator[str]:
+        return self.http_pool.stream_lines(url, headers, payload)
 
 
 class OllamaProvider(_BaseHTTPProvider):
@@ -99,19 +105,23 @@ class OllamaProvider(_BaseHTTPProvider):
         return None
 
     def is_available(self) -> bool:
+        # Configuration only: reachability is probed asynchronously by
+        # ahealth_check and tracked by the manager's circuit breaker
+        return bool(self.model and (self.base_url or self._resolve_tunnel_target(None)))
+
+    async def ahealth_check(self) -> bool:
         if self._resolve_tunnel_target(None):
             return True
 
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            response.raise_for_status()
-            models = response.json().get("models", [])
-            if not models:
-                return True
-            return any(tag.get("name") == self.model for tag in models)
+            data = await self.http_pool.get_json(f"{self.base_url}/api/tags")
         except Exception:
             logger.debug("Ollama provider not available", exc_info=True)
             return False
+        models = data.get("models", [])
+        if not models:
+            return True
+        return any(tag.get("name") == self.model for tag in models)
 
     async def acompletion(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> str:
         user_id = kwargs.pop("user_id", None)
@@ -125,7 +135,7 @@ class OllamaProvider(_BaseHTTPProvider):
         if tunnel_target:
             service = self._ensure_tunnel_service()
             if service is None:
-                raise LLMProviderNotAvailable("Tunnel service unavailable")
+                raise LLMTunnelError("Tunnel service unavailable")
 
             tunnel_user, _ = tunnel_target
             result = await service.proxy_ollama_request(
@@ -135,7 +145,7 @@ class OllamaProvider(_BaseHTTPProvider):
                 data=payload,
             )
             if not result.get("success"):
-                raise LLMProviderNotAvailable(result.get("error", "Tunnel request failed"))
+                raise LLMTunnelError(result.get("error", "Tunnel request failed"))
             data = result.get("data") or {}
         else:
             data = await self._post_json(
@@ -144,11 +154,53 @@ class OllamaProvider(_BaseHTTPProvider):
                 payload=payload,
             )
 
+        report_usage(data.get("prompt_eval_count"), data.get("eval_count"))
         text = data.get("response") or data.get("text")
         if not text:
             raise LLMProviderNotAvailable("Ollama response did not contain text")
         return text
 
+    async def astream(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> AsyncIterator[str]:
+        user_id = kwargs.pop("user_id", None)
+        payload = {
+            "model": self.model,
+            "prompt": self._build_prompt(prompt, instructions),
+            "stream": True,
+        }
+
+        tunnel_target = self._resolve_tunnel_target(user_id)
+        if tunnel_target:
+            service = self._ensure_tunnel_service()
+            if service is None:
+                raise LLMTunnelError("Tunnel service unavailable")
+            stream = service.stream_ollama_request(tunnel_target[0], "/api/generate", data=payload)
+            try:
+                async for result in stream:
+                    if not result.get("success"):
+                        raise LLMTunnelError(result.get("error", "Tunnel request failed"))
+                    chunk = result["data"]
+                    if chunk.get("done"):
+                        report_usage(chunk.get("prompt_eval_count"), chunk.get("eval_count"))
+                    text = chunk.get("response")
+                    if text:
+                        yield text
+            finally:
+                await stream.aclose()
+            return
+
+        lines = self._stream_lines(f"{self.base_url}/api/generate", {}, payload)
+        try:
+            async for line in lines:
+                chunk = parse_object(line)
+                if not chunk:
+                    continue
+                if chunk.get("done"):
+                    report_usage(chunk.get("prompt_eval_count"), chunk.get("eval_count"))
+                if chunk.get("response"):
+                    yield chunk["response"]
+        finally:
+            await lines.aclose()
+
     def _build_prompt(self, prompt: str, instructions: Optional[str]) -> str:
         if not instructions:
             return prompt
@@ -166,7 +218,9 @@ class OpenAIProvider(_BaseHTTPProvider):
     def is_available(self) -> bool:
         return bool(self.api_key and self.model)
 
-    async def acompletion(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> str:
+    def _request(
+        self, prompt: str, instructions: Optional[str], kwargs: Dict[str, Any]
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -187,13 +241,38 @@ class OpenAIProvider(_BaseHTTPProvider):
         payload["response_format"] = {"type": "json_object"}
         if "max_tokens" in kwargs:
             payload["max_tokens"] = kwargs["max_tokens"]
+        return headers, payload
 
+    async def acompletion(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> str:
+        headers, payload = self._request(prompt, instructions, kwargs)
         data = await self._post_json(self.base_url, headers=headers, payload=payload)
+        usage = data.get("usage") or {}
+        report_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
         try:
             return data["choices"][0]["message"]["content"]
         except Exception as exc:  # pragma: no cover - defensive
             raise LLMProviderNotAvailable(f"Unexpected OpenAI response format: {exc}") from exc
 
+    async def astream(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> AsyncIterator[str]:
+        headers, payload = self._request(prompt, instructions, kwargs)
+        payload["stream"] = True
+        # Usage is only sent, in a final chunk without choices, when asked for
+        payload["stream_options"] = {"include_usage": True}
+        lines = self._stream_lines(self.base_url, headers, payload)
+        try:
+            async for line in lines:
+                event = sse_data(line)
+                if not event:
+                    continue
+                usage = event.get("usage") or {}
+                report_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+                for choice in event.get("choices") or []:
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        yield text
+        finally:
+            await lines.aclose()
+
 
 class AnthropicProvider(_BaseHTTPProvider):
     name = "anthropic"
@@ -206,7 +285,9 @@ class AnthropicProvider(_BaseHTTPProvider):
     def is_available(self) -> bool:
         return bool(self.api_key and self.model)
 
-    async def acompletion(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> str:
+    def _request(
+        self, prompt: str, instructions: Optional[str], kwargs: Dict[str, Any]
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
         headers = {
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01",
@@ -222,7 +303,13 @@ class AnthropicProvider(_BaseHTTPProvider):
             "system": system_prompt,
             "messages": [{"role": "user", "content": prompt}],
         }
+        return headers, payload
+
+    async def acompletion(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> str:
+        headers, payload = self._request(prompt, instructions, kwargs)
         data = await self._post_json(self._base_url, headers=headers, payload=payload)
+        usage = data.get("usage") or {}
+        report_usage(usage.get("input_tokens"), usage.get("output_tokens"))
         content = data.get("content") or []
         if not content:
             raise LLMProviderNotAvailable("Anthropic response missing content")
@@ -233,6 +320,28 @@ class AnthropicProvider(_BaseHTTPProvider):
             raise LLMProviderNotAvailable("Anthropic response empty")
         return result
 
+    async def astream(self, prompt: str, *, instructions: Optional[str] = None, **kwargs: Any) -> AsyncIterator[str]:
+        headers, payload = self._request(prompt, instructions, kwargs)
+        payload["stream"] = True
+        lines = self._stream_lines(self._base_url, headers, payload)
+        try:
+            async for line in lines:
+                event = sse_data(line)
+                if not event:
+                    continue
+                if event.get("type") == "error":
+                    raise LLMProviderNotAvailable(f"Anthropic stream error: {event.get('error')}")
+                if event.get("type") == "message_start":
+                    # Output tokens here are only the count so far
+                    report_usage(((event.get("message") or {}).get("usage") or {}).get("input_tokens"))
+                elif event.get("type") == "message_delta":
+                    report_usage(completion_tokens=(event.get("usage") or {}).get("output_tokens"))
+                delta = event.get("delta") or {}
+                if event.get("type") == "content_block_delta" and delta.get("text"):
+                    yield delta["text"]
+        finally:
+            await lines.aclose()
+
 
 class BedrockProvider(LLMProvider):
     name = "bedrock"
@@ -270,15 +379,22 @@ class BedrockProvider(LLMProvider):
         client = self._client
         assert client is not None
 
-        def _call() -> str:
+        def _call() -> Tuple[str, Any, Any]:
             response = client.invoke_model(modelId=self._model_id, body=json.dumps(body))
             payload = json.loads(response.get("body", "{}"))
             results = payload.get("results") or []
             if not results:
                 raise LLMProviderNotAvailable("Bedrock response missing results")
-            return results[0].get("outputText", "")
+            return (
+                results[0].get("outputText", ""),
+                payload.get("inputTextTokenCount"),
+                results[0].get("tokenCount"),
+            )
 
-        return await loop.run_in_executor(None, _call)
+        # Executor threads do not see the call's context, so usage is reported here
+        text, prompt_tokens, completion_tokens = await loop.run_in_executor(None, _call)
+        report_usage(prompt_tokens, completion_tokens)
+        return text
 
     def _build_prompt(self, prompt: str, instructions: Optional[str]) -> str:
         if not instructions:
@@ -330,7 +446,7 @@ class VertexAIProvider(LLMProvider):
         system_prompt = instructions or "You are an expert software analysis system."
         model = self._model
 
-        def _call() -> str:
+        def _call() -> Tuple[str, Any, Any]:
             response = model.generate_content([
                 {"role": "user", "parts": [system_prompt]},
                 {"role": "user", "parts": [prompt]},
@@ -338,9 +454,16 @@ class VertexAIProvider(LLMProvider):
             text = "".join([part.text for part in response.candidates[0].content.parts])
             if not text:
                 raise LLMProviderNotAvailable("Vertex response empty")
-            return text
+            usage = getattr(response, "usage_metadata", None)
+            return (
+                text,
+                getattr(usage, "prompt_token_count", None),
+                getattr(usage, "candidates_token_count", None),
+            )
 
-        return await loop.run_in_executor(None, _call)
+        text, prompt_tokens, completion_tokens = await loop.run_in_executor(None, _call)
+        report_usage(prompt_tokens, completion_tokens)
+        return text
 
 
 def build_default_manager() -> Optional[LLMAdapterManager]:
@@ -371,4 +494,10 @@ def build_default_manager() -> Optional[LLMAdapterManager]:
         else:
             logger.warning("Unknown LLM provider '%s' in AI_PROVIDER_PRIORITY", provider_name)
 
-    return build_adapter_manager(providers)
+    return build_adapter_manager(
+        providers,
+        response_cache=get_llm_response_cache(),
+        scheduler=get_llm_scheduler(),
+        routing=settings.LLM_ROUTING,
+        usage_tracker=get_llm_usage_tracker(),
+    )
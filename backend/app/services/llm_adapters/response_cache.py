@@ -0,0 +1,212 @@
+"""Content-addressed cache for structured LLM responses.
+
+Re-analysing a repository sends the same snippets with the same schema
+instructions to the same model.  Responses are keyed by a hash of everything
+that shapes the output (provider, model, instructions, prompt and sampling
+parameters) so unchanged inputs are answered without a provider call.
+
+Two tiers are used: a size-bounded in-process LRU and, when available, Redis
+so entries survive restarts and are shared between workers.  Both tiers
+expire entries after a TTL.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+from .base import LLMProvider
+
+logger = logging.getLogger(__name__)
+
+
+def provider_model(provider: LLMProvider) -> str:
+    """Model identifier a provider answers with, for cache keys."""
+
+    return str(getattr(provider, "model", None) or getattr(provider, "_model_id", None) or "")
+
+
+class LLMResponseCache:
+    """Memory + Redis cache of parsed structured completions."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        *,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_entries: int = 5000,
+        max_bytes: int = 64 * 1024 * 1024,
+        namespace: str = "llm_response:",
+    ) -> None:
+        self.redis_client = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+
+        # key -> (expires_at, serialized JSON)
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+            "redis_errors": 0,
+            "saved_prompt_chars": 0,
+        }
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        instructions: Optional[str],
+        prompt: str,
+        temperature: Any = None,
+        max_tokens: Any = None,
+    ) -> str:
+        """Stable content hash of everything that determines a response."""
+
+        document = json.dumps(
+            [provider, model, instructions or "", prompt, temperature, max_tokens],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str, prompt_chars: int = 0) -> Optional[Dict[str, Any]]:
+        """Cached response payload for ``key``, or None."""
+
+        raw = self._memory_get(key)
+        if raw is not None:
+            self.stats["memory_hits"] += 1
+        else:
+            raw = await self._redis_get(key)
+            if raw is not None:
+                self.stats["redis_hits"] += 1
+                self._memory_put(key, raw, self.ttl_seconds)
+
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.stats["saved_prompt_chars"] += prompt_chars
+        return json.loads(raw)
+
+    async def set(self, key: str, payload: Dict[str, Any]) -> None:
+        """Store a response payload in both tiers."""
+
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+        self._memory_put(key, raw, self.ttl_seconds)
+        self.stats["stores"] += 1
+
+        if self.redis_client is None:
+            return
+        try:
+            result = self.redis_client.setex(self.namespace + key, self.ttl_seconds, raw)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as exc:
+            self.stats["redis_errors"] += 1
+            logger.debug("LLM cache Redis write failed: %s", exc)
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at < time.time():
+                self._memory_remove(key)
+                self.stats["expired"] += 1
+                return None
+            self._memory.move_to_end(key)
+            return raw
+
+    def _memory_put(self, key: str, raw: str, ttl_seconds: int) -> None:
+        size = len(raw)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_remove(key)
+            self._memory[key] = (time.time() + ttl_seconds, raw)
+            self._memory_bytes += size
+            while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+                oldest = next(iter(self._memory))
+                self._memory_remove(oldest)
+                self.stats["evictions"] += 1
+
+    def _memory_remove(self, key: str) -> None:
+        _expires_at, raw = self._memory.pop(key)
+        self._memory_bytes -= len(raw)
+
+    async def _redis_get(self, key: str) -> Optional[str]:
+        if self.redis_client is None:
+            return None
+        try:
+            result = self.redis_client.get(self.namespace + key)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except Exception as exc:
+            self.stats["redis_errors"] += 1
+            logger.debug("LLM cache Redis read failed: %s", exc)
+            return None
+        if isinstance(result, bytes):
+            result = result.decode("utf-8")
+        return result
+
+    def clear(self) -> None:
+        """Drop the in-process tier (Redis entries expire by TTL)."""
+
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "redis_enabled": self.redis_client is not None,
+        }
+
+
+_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """Get the shared response cache, or None when caching is disabled."""
+
+    global _response_cache
+
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        try:
+            from app.core.database import redis_client
+        except Exception:  # pragma: no cover - Redis is optional
+            redis_client = None
+        _response_cache = LLMResponseCache(
+            redis_client,
+            ttl_seconds=settings.LLM_CACHE_TTL_S,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+        )
+        logger.info(
+            "LLM response cache enabled (%s)", "memory + Redis" if redis_client else "memory only"
+        )
+    return _response_cache
@@ -0,0 +1,310 @@
+"""Process-wide scheduler for outbound LLM requests.
+
+Every provider call made through :class:`LLMAdapterManager` first acquires a
+slot here, which enforces per provider:
+
+* a concurrency cap,
+* token buckets for requests/minute and (estimated) tokens/minute,
+* fair queuing: waiting requests are served round-robin across owners (a
+  user or an analysis run) so one large job cannot starve the others,
+* priority: interactive requests are always served before background ones.
+
+The priority and owner of the current request come from
+:func:`llm_request_context`, which callers set around a unit of work; because
+it is a context variable it follows the work into ``asyncio.gather`` children.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+_request_context: contextvars.ContextVar[Tuple[int, Optional[str]]] = contextvars.ContextVar(
+    "llm_request_context", default=(BACKGROUND, None)
+)
+
+
+@contextmanager
+def llm_request_context(*, priority: Optional[int] = None, owner: Optional[str] = None) -> Iterator[None]:
+    """Tag LLM requests made inside the block with a priority and fairness owner."""
+
+    current_priority, current_owner = _request_context.get()
+    token = _request_context.set(
+        (current_priority if priority is None else priority, owner or current_owner)
+    )
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def current_request_context() -> Tuple[int, Optional[str]]:
+    """(priority, owner) of the LLM requests made in the current context."""
+
+    return _request_context.get()
+
+
+def estimate_request_tokens(prompt: str, instructions: Optional[str], max_tokens: Any) -> int:
+    """Prompt tokens (about four characters each) plus the completion allowance."""
+
+    prompt_tokens = (len(prompt) + len(instructions or "")) // 4 + 1
+    try:
+        completion_tokens = int(max_tokens or 0)
+    except (TypeError, ValueError):
+        completion_tokens = 0
+    return prompt_tokens + completion_tokens
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute of allowance."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (requests above capacity wait for a full bucket)."""
+
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+@dataclass
+class _Waiter:
+    future: "asyncio.Future[None]"
+    tokens: int
+    enqueued: float
+
+
+@dataclass
+class _ProviderState:
+    name: str
+    max_concurrency: int
+    requests: Optional[TokenBucket]
+    tokens: Optional[TokenBucket]
+    in_flight: int = 0
+    # priority -> owner -> FIFO of waiters; owners rotate after each grant
+    queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = field(default_factory=dict)
+    timer: Optional[asyncio.TimerHandle] = None
+    stats: Dict[str, Any] = field(
+        default_factory=lambda: {
+            "granted": 0,
+            "queued": 0,
+            "max_queued": 0,
+            "throttled": 0,
+            "total_wait_s": 0.0,
+            "max_wait_s": 0.0,
+        }
+    )
+
+    def next_waiter(self) -> Optional[Tuple[int, str, _Waiter]]:
+        for priority in sorted(self.queues):
+            owners = self.queues[priority]
+            for owner in list(owners):
+                waiters = owners[owner]
+                while waiters and waiters[0].future.done():
+                    waiters.popleft()  # cancelled while queued
+                if waiters:
+                    return priority, owner, waiters[0]
+                del owners[owner]
+            if not owners:
+                del self.queues[priority]
+        return None
+
+    def remove(self, priority: int, owner: str) -> None:
+        owners = self.queues[priority]
+        owners[owner].popleft()
+        if owners[owner]:
+            owners.move_to_end(owner)
+        else:
+            del owners[owner]
+
+    def queued(self) -> int:
+        return sum(
+            1
+            for owners in self.queues.values()
+            for waiters in owners.values()
+            for waiter in waiters
+            if not waiter.future.done()
+        )
+
+
+def _parse_limits(raw: str) -> Dict[str, int]:
+    limits: Dict[str, int] = {}
+    for item in raw.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            try:
+                limits[name.strip().lower()] = int(value)
+            except ValueError:
+                logger.warning("Ignoring invalid LLM limit '%s'", item)
+    return limits
+
+
+class LLMScheduler:
+    """Concurrency, rate and fairness control for LLM provider calls."""
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: Optional[Dict[str, int]] = None,
+        tokens_per_minute: Optional[Dict[str, int]] = None,
+        max_concurrency: Optional[Dict[str, int]] = None,
+        default_max_concurrency: int = 4,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute or {}
+        self.tokens_per_minute = tokens_per_minute or {}
+        self.max_concurrency = max_concurrency or {}
+        self.default_max_concurrency = default_max_concurrency
+        self._providers: Dict[str, _ProviderState] = {}
+
+    @classmethod
+    def from_settings(cls) -> "LLMScheduler":
+        return cls(
+            requests_per_minute=_parse_limits(settings.LLM_REQUESTS_PER_MINUTE),
+            tokens_per_minute=_parse_limits(settings.LLM_TOKENS_PER_MINUTE),
+            max_concurrency=_parse_limits(settings.LLM_MAX_CONCURRENCY),
+            default_max_concurrency=settings.LLM_DEFAULT_MAX_CONCURRENCY,
+        )
+
+    def _state(self, provider: str) -> _ProviderState:
+        state = self._providers.get(provider)
+        if state is None:
+            rpm = self.requests_per_minute.get(provider, 0)
+            tpm = self.tokens_per_minute.get(provider, 0)
+            state = _ProviderState(
+                name=provider,
+                max_concurrency=self.max_concurrency.get(provider, self.default_max_concurrency),
+                requests=TokenBucket(rpm) if rpm > 0 else None,
+                tokens=TokenBucket(tpm) if tpm > 0 else None,
+            )
+            self._providers[provider] = state
+        return state
+
+    @asynccontextmanager
+    async def slot(self, provider: str, tokens: int = 0, user_id: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a request slot for ``provider`` for the duration of the block."""
+
+        state = self._state(provider)
+        priority, owner = _request_context.get()
+        owner = owner or user_id or "default"
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(future=loop.create_future(), tokens=tokens, enqueued=time.monotonic())
+        state.queues.setdefault(priority, OrderedDict()).setdefault(owner, deque()).append(waiter)
+        self._dispatch(state)
+        if not waiter.future.done():
+            state.stats["queued"] += 1
+            state.stats["max_queued"] = max(state.stats["max_queued"], state.queued())
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we were cancelled; hand the slot back
+                self._release(state)
+            raise
+
+        wait = time.monotonic() - waiter.enqueued
+        state.stats["total_wait_s"] += wait
+        state.stats["max_wait_s"] = max(state.stats["max_wait_s"], wait)
+        if wait > 5:
+            logger.debug("LLM request for %s waited %.1fs for a slot", provider, wait)
+        try:
+            yield
+        finally:
+            self._release(state)
+
+    def _release(self, state: _ProviderState) -> None:
+        state.in_flight -= 1
+        self._dispatch(state)
+
+    def _dispatch(self, state: _ProviderState) -> None:
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+
+        while state.max_concurrency <= 0 or state.in_flight < state.max_concurrency:
+            head = state.next_waiter()
+            if head is None:
+                return
+            priority, owner, waiter = head
+
+            delay = 0.0
+            if state.requests is not None:
+                delay = state.requests.time_until(1)
+            if state.tokens is not None:
+                delay = max(delay, state.tokens.time_until(waiter.tokens))
+            if delay > 0:
+                state.stats["throttled"] += 1
+                state.timer = asyncio.get_running_loop().call_later(delay, self._dispatch, state)
+                return
+
+            state.remove(priority, owner)
+            if state.requests is not None:
+                state.requests.take(1)
+            if state.tokens is not None:
+                state.tokens.take(waiter.tokens)
+            state.in_flight += 1
+            state.stats["granted"] += 1
+            waiter.future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Backpressure metrics per provider."""
+
+        stats: Dict[str, Dict[str, Any]] = {}
+        for name, state in self._providers.items():
+            granted = state.stats["granted"]
+            stats[name] = {
+                **state.stats,
+                "in_flight": state.in_flight,
+                "waiting": state.queued(),
+                "waiting_by_priority": {
+                    priority: sum(len(w) for w in owners.values())
+                    for priority, owners in state.queues.items()
+                },
+                "max_concurrency": state.max_concurrency,
+                "avg_wait_s": round(state.stats["total_wait_s"] / granted, 4) if granted else 0.0,
+            }
+        return stats
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> Optional[LLMScheduler]:
+    """Get the shared scheduler, or None when scheduling is disabled."""
+
+    global _scheduler
+
+    if not settings.LLM_SCHEDULER_ENABLED:
+        return None
+    if _scheduler is None:
+        _scheduler = LLMScheduler.from_settings()
+    return _scheduler
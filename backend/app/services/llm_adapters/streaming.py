@@ -0,0 +1,98 @@
+"""Helpers for consuming streamed LLM completions.
+
+Providers stream text as Ollama NDJSON or OpenAI/Anthropic server-sent
+events.  :class:`IncrementalJSONParser` watches that text as it arrives and
+reports each top-level JSON object the moment its closing brace is seen, so a
+structured completion can be validated and the generation cancelled without
+waiting for (or paying for) any prose the model adds afterwards.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+stream_stats: Dict[str, int] = {
+    "streams": 0,
+    "chars_received": 0,
+    "objects_parsed": 0,
+    "stopped_at_object": 0,
+    "no_valid_object": 0,
+}
+
+
+class IncrementalJSONParser:
+    """Finds balanced top-level ``{...}`` objects in text fed in pieces.
+
+    Text outside objects (prose, markdown fences) is discarded, and braces
+    inside JSON strings are ignored.  Only the object currently being
+    assembled is buffered.
+    """
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def in_object(self) -> bool:
+        return self._depth > 0
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consume ``chunk`` and return the text of every object it completes."""
+
+        completed: List[str] = []
+        start = 0 if self._depth else None
+        for i, char in enumerate(chunk):
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    start = i
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start : i + 1])
+                    completed.append("".join(self._parts))
+                    self._parts = []
+                    start = None
+        if self._depth and start is not None:
+            self._parts.append(chunk[start:])
+        return completed
+
+
+def parse_object(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def sse_data(line: str) -> Optional[Dict[str, Any]]:
+    """Decoded JSON payload of a server-sent ``data:`` line, if any."""
+
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    return parse_object(data)
+
+
+def get_stream_stats() -> Dict[str, int]:
+    return dict(stream_stats)
@@ -0,0 +1,240 @@
+"""Token usage accounting for LLM provider calls.
+
+Providers report the usage their API returns (OpenAI ``usage``, Anthropic
+``usage``, Ollama ``prompt_eval_count``/``eval_count``) with
+:func:`report_usage` while a call is in flight.  The manager resolves each
+call's usage when it finishes, counting with the local tokenizer whatever the
+provider did not report, and hands it to :class:`LLMUsageTracker`.
+
+The tracker aggregates usage per model, per user and per owner (the analysis
+run set by :func:`~.scheduler.llm_request_context`), adds it to every open
+:func:`usage_scope`, and writes one record per call to the buffered
+``llm_usage.log`` sink.
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from app.utils.token_logger import count_tokens, get_log_sink
+
+logger = logging.getLogger(__name__)
+
+USAGE_LOG = "llm_usage.log"
+
+
+@dataclass
+class TokenUsage:
+    """Tokens consumed by one provider call."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    estimated: bool = False  # True when any part came from the local tokenizer
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class _CallUsage:
+    """Usage reported by the provider during the current call."""
+
+    def __init__(self) -> None:
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+    def resolve(self, prompt_text: str, completion_text: str) -> TokenUsage:
+        estimated = self.prompt_tokens is None or self.completion_tokens is None
+        return TokenUsage(
+            prompt_tokens=self.prompt_tokens if self.prompt_tokens is not None else count_tokens(prompt_text),
+            completion_tokens=(
+                self.completion_tokens if self.completion_tokens is not None else count_tokens(completion_text)
+            ),
+            estimated=estimated,
+        )
+
+
+_call_usage: contextvars.ContextVar[Optional[_CallUsage]] = contextvars.ContextVar("llm_call_usage", default=None)
+
+
+def report_usage(prompt_tokens: Any = None, completion_tokens: Any = None) -> None:
+    """Record provider-reported token counts for the call in progress.
+
+    Values that are missing or not integers are ignored, so providers can pass
+    fields straight from the response body.
+    """
+
+    usage = _call_usage.get()
+    if usage is None:
+        return
+    if isinstance(prompt_tokens, int):
+        usage.prompt_tokens = prompt_tokens
+    if isinstance(completion_tokens, int):
+        usage.completion_tokens = completion_tokens
+
+
+@contextmanager
+def capture_usage() -> Iterator[_CallUsage]:
+    """Collect :func:`report_usage` calls made inside the block."""
+
+    usage = _CallUsage()
+    token = _call_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _call_usage.reset(token)
+
+
+class UsageTotals:
+    """Running usage totals, overall and per ``provider/model``."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_requests = 0
+        self.by_model: Dict[str, Dict[str, int]] = {}
+
+    def add(self, model_key: str, usage: TokenUsage) -> None:
+        self.requests += 1
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        self.estimated_requests += int(usage.estimated)
+        model = self.by_model.setdefault(model_key, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        model["requests"] += 1
+        model["prompt_tokens"] += usage.prompt_tokens
+        model["completion_tokens"] += usage.completion_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "estimated_requests": self.estimated_requests,
+            "by_model": {key: dict(value) for key, value in self.by_model.items()},
+        }
+
+
+_scopes: contextvars.ContextVar[Tuple[UsageTotals, ...]] = contextvars.ContextVar("llm_usage_scopes", default=())
+
+
+@contextmanager
+def usage_scope() -> Iterator[UsageTotals]:
+    """Accumulate the usage of every LLM call made inside the block."""
+
+    totals = UsageTotals()
+    token = _scopes.set(_scopes.get() + (totals,))
+    try:
+        yield totals
+    finally:
+        _scopes.reset(token)
+
+
+def current_usage() -> Optional[Dict[str, Any]]:
+    """Totals of the innermost open :func:`usage_scope`, if any."""
+
+    scopes = _scopes.get()
+    return scopes[-1].as_dict() if scopes else None
+
+
+def track_llm_usage(func: Callable) -> Callable:
+    """Run an async function inside its own :func:`usage_scope`."""
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with usage_scope():
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+class LLMUsageTracker:
+    """Process-wide usage aggregates plus the per-call usage log."""
+
+    def __init__(self, max_keys: int = 1000, log_filename: Optional[str] = USAGE_LOG) -> None:
+        self.max_keys = max_keys
+        self.log_filename = log_filename
+        self.totals = UsageTotals()
+        self.by_user: "OrderedDict[str, UsageTotals]" = OrderedDict()
+        self.by_owner: "OrderedDict[str, UsageTotals]" = OrderedDict()
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        usage: TokenUsage,
+        *,
+        user_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        latency_s: Optional[float] = None,
+    ) -> None:
+        model_key = f"{provider}/{model}" if model else provider
+        self.totals.add(model_key, usage)
+        if user_id:
+            self._bucket(self.by_user, user_id).add(model_key, usage)
+        if owner:
+            self._bucket(self.by_owner, owner).add(model_key, usage)
+        for scope in _scopes.get():
+            scope.add(model_key, usage)
+
+        if self.log_filename:
+            record: Dict[str, Any] = {
+                "provider": provider,
+                "model": model,
+                "user_id": user_id,
+                "owner": owner,
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "estimated": usage.estimated,
+            }
+            if latency_s is not None:
+                record["latency_s"] = round(latency_s, 4)
+            try:
+                get_log_sink(self.log_filename).write({"timestamp": datetime.utcnow().isoformat(), **record})
+            except Exception as exc:  # pragma: no cover - logging must not break calls
+                logger.debug("Failed to log LLM usage: %s", exc)
+
+    def _bucket(self, buckets: "OrderedDict[str, UsageTotals]", key: str) -> UsageTotals:
+        totals = buckets.get(key)
+        if totals is None:
+            totals = buckets[key] = UsageTotals()
+            while len(buckets) > self.max_keys:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return totals
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.totals.as_dict(),
+            "users": len(self.by_user),
+            "owners": len(self.by_owner),
+        }
+
+    def user_usage(self, user_id: str) -> Optional[Dict[str, Any]]:
+        totals = self.by_user.get(user_id)
+        return totals.as_dict() if totals else None
+
+    def owner_usage(self, owner: str) -> Optional[Dict[str, Any]]:
+        totals = self.by_owner.get(owner)
+        return totals.as_dict() if totals else None
+
+
+_usage_tracker: Optional[LLMUsageTracker] = None
+
+
+def get_llm_usage_tracker() -> LLMUsageTracker:
+    """Get the shared usage tracker."""
+
+    global _usage_tracker
+
+    if _usage_tracker is None:
+        _usage_tracker = LLMUsageTracker()
+    return _usage_tracker
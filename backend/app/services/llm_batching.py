@@ -0,0 +1,95 @@
+"""
+LLM Prompt Batching
+
+Packs several code snippets into one structured-completion request. Snippets
+are grouped greedily under a prompt token budget, the model is asked for an
+array of results tagged with each snippet's number, and the array is split
+back into one result per snippet. Callers fall back to single requests for
+any snippet whose result is missing or invalid.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Type
+
+from pydantic import BaseModel, Field, ValidationError, create_model
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for code; exact counts are provider specific
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_batches(
+    sections: Sequence[str], token_budget: int, max_items: int
+) -> List[List[int]]:
+    """
+    Group section indices, in order, into batches of at most ``max_items``
+    whose combined estimated size stays within ``token_budget``. A section
+    larger than the budget gets a batch of its own.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, section in enumerate(sections):
+        tokens = estimate_tokens(section)
+        if current and (len(current) >= max_items or current_tokens + tokens > token_budget):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+@lru_cache(maxsize=None)
+def batch_response_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """``{"results": [<model fields> + "index"]}`` schema for a batched request"""
+    item = create_model(
+        f"{model.__name__}BatchItem",
+        __base__=model,
+        index=(int, Field(description="Number of the snippet this result describes")),
+    )
+    return create_model(
+        f"{model.__name__}Batch",
+        results=(List[item], Field(description="One result per snippet, in any order")),
+    )
+
+
+def build_batch_prompt(header: str, sections: Sequence[str], numbers: Sequence[int]) -> str:
+    body = "\n\n".join(f"### Snippet {n}\n{s}" for n, s in zip(numbers, sections))
+    return (
+        f"{header}\n"
+        f"There are {len(numbers)} snippets. Return a JSON object whose \"results\" array "
+        "holds exactly one entry per snippet, each with \"index\" set to the snippet number.\n\n"
+        f"{body}"
+    )
+
+
+def split_batch_response(
+    model: Type[BaseModel], batch: Optional[BaseModel], numbers: Sequence[int]
+) -> Dict[int, BaseModel]:
+    """Per-snippet results keyed by snippet number; missing or duplicate entries are dropped"""
+    if batch is None:
+        return {}
+    wanted = set(numbers)
+    results: Dict[int, BaseModel] = {}
+    duplicates = set()
+    for item in getattr(batch, "results", []):
+        if item.index not in wanted:
+            continue
+        if item.index in results:
+            duplicates.add(item.index)
+            continue
+        try:
+            results[item.index] = model.model_validate(item.model_dump(exclude={"index"}))
+        except ValidationError as e:
+            logger.debug(f"Dropping invalid batched result {item.index}: {e}")
+    for number in duplicates:
+        results.pop(number, None)
+    return results
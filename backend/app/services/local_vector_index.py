@@ -0,0 +1,227 @@
+"""
+Local Vector Index
+
+In-process similarity search that needs no embedding server or vector
+database. Snippets are embedded on the CPU with :class:`HashingEmbedder`
+(signed feature hashing of identifiers, sub-words and token bigrams) and
+stored in :class:`LocalVectorIndex`, an append-only float32 matrix that is
+memory-mapped from disk. Rows are L2-normalised, so one matrix product scores
+every stored snippet against a whole batch of queries.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDER_NAME = "hashing-v1"
+
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+|[^\sA-Za-z0-9_]{1,3}")
+_SUBWORD_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-features code embedder (no model, no network)"""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(text)
+        features: List[str] = []
+        for token in tokens:
+            features.append(token.lower())
+            if token[0].isalpha() or token[0] == "_":
+                parts = _SUBWORD_RE.findall(token)
+                if len(parts) > 1:
+                    features.extend("~" + part.lower() for part in parts)
+        features.extend(f"{a.lower()} {b.lower()}" for a, b in zip(tokens, tokens[1:]))
+        return features
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit-length ``(len(texts), dim)`` float32 matrix"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter(
+                (zlib.crc32(f.encode("utf-8")) for f in self._features(text)),
+                dtype=np.uint32,
+            )
+            if not hashes.size:
+                continue
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+            counts = np.bincount(hashes % self.dim, weights=signs, minlength=self.dim)
+            # Sublinear term frequency keeps repeated boilerplate from dominating
+            vector = np.sign(counts) * np.log1p(np.abs(counts))
+            norm = np.linalg.norm(vector)
+            if norm:
+                matrix[row] = vector / norm
+        return matrix
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_documents([text])[0]
+
+
+class LocalVectorIndex:
+    """Append-only, memory-mapped cosine-similarity index with metadata"""
+
+    def __init__(self, directory: str, embedder: Optional[HashingEmbedder] = None):
+        self.directory = directory
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._meta_path = os.path.join(directory, "meta.jsonl")
+        self._header_path = os.path.join(directory, "index.json")
+
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"added": 0, "queries": 0}
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        header = {"dim": self.dim, "embedder": EMBEDDER_NAME}
+        if os.path.exists(self._header_path):
+            with open(self._header_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored != header:
+                logger.warning(f"⚠️ Local vector index built with {stored}, rebuilding")
+                for path in (self._vectors_path, self._meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+        with open(self._header_path, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn final line from an interrupted write
+                    self._ids.append(entry["id"])
+                    self._metadata.append(entry.get("metadata") or {})
+
+        row_bytes = self.dim * 4
+        stored_rows = (
+            os.path.getsize(self._vectors_path) // row_bytes
+            if os.path.exists(self._vectors_path)
+            else 0
+        )
+        rows = min(stored_rows, len(self._ids))
+        if rows != stored_rows or rows != len(self._ids):
+            # Interrupted append: keep only rows present in both files
+            logger.warning(f"⚠️ Local vector index out of sync, keeping {rows} rows")
+            del self._ids[rows:]
+            del self._metadata[rows:]
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+            self._rewrite_metadata()
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        if rows:
+            logger.info(f"📚 Loaded local vector index with {rows} vectors")
+
+    def _rewrite_metadata(self) -> None:
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            for doc_id, metadata in zip(self._ids, self._metadata):
+                f.write(json.dumps({"id": doc_id, "metadata": metadata}) + "\n")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    def add(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> int:
+        """Embed and append documents whose IDs are not indexed yet"""
+        with self._lock:
+            new: List[Tuple[str, str, Dict[str, Any]]] = []
+            seen = set()
+            for doc_id, document, metadata in zip(ids, documents, metadatas):
+                if doc_id in self._positions or doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                new.append((doc_id, document, metadata))
+            if not new:
+                return 0
+            vectors = self.embedder.embed_documents([document for _, document, _ in new])
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._meta_path, "a", encoding="utf-8") as f:
+                for doc_id, _, metadata in new:
+                    f.write(json.dumps({"id": doc_id, "metadata": metadata}) + "\n")
+            for doc_id, _, metadata in new:
+                self._positions[doc_id] = len(self._ids)
+                self._ids.append(doc_id)
+                self._metadata.append(metadata)
+            self._matrix = None  # re-mapped with the new rows on the next query
+            self.stats["added"] += len(new)
+            return len(new)
+
+    def _vectors(self) -> Optional[np.ndarray]:
+        if self._matrix is None and self._ids:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._ids), self.dim)
+            )
+        return self._matrix
+
+    def search(
+        self, queries: Sequence[str], k: int = 5
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        """Top ``k`` (id, cosine similarity, metadata) per query, best first"""
+        with self._lock:
+            matrix = self._vectors()
+            ids, metadata = self._ids, self._metadata
+        self.stats["queries"] += len(queries)
+        if matrix is None or not queries or k <= 0:
+            return [[] for _ in queries]
+
+        scores = matrix @ self.embedder.embed_documents(queries).T  # (rows, queries)
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        results = []
+        for q in range(scores.shape[1]):
+            rows = sorted(top[:, q], key=lambda r: -scores[r, q])
+            results.append([(ids[r], float(scores[r, q]), metadata[r]) for r in rows])
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "vectors": len(self._ids), "dim": self.dim, "embedder": EMBEDDER_NAME}
+
+
+_local_index: Optional[LocalVectorIndex] = None
+
+
+def get_local_vector_index() -> Optional[LocalVectorIndex]:
+    """Get the shared local index, or None when it is disabled or unusable"""
+    global _local_index
+
+    if not settings.LOCAL_VECTOR_INDEX_ENABLED:
+        return None
+    if _local_index is None:
+        try:
+            _local_index = LocalVectorIndex(
+                settings.LOCAL_VECTOR_INDEX_DIR,
+                HashingEmbedder(settings.LOCAL_EMBEDDING_DIM),
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Local vector index not available: {e}")
+            return None
+    return _local_index
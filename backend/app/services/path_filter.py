@@ -0,0 +1,272 @@
+"""
+Path Filter Engine
+
+Shared include/exclude matching for repository paths. The hard exclude rules
+(raw regexes, excluded directory names and hidden directories) are compiled
+into a single regular expression. ``.gitignore``-style globs are compiled into
+one regex per run of consecutive same-polarity rules and resolved
+last-match-wins, and includes go through frozen extension/name sets, so
+checking a path costs a handful of regex searches plus a set lookup regardless
+of how many rules exist.
+
+Repositories can extend a filter with a ``.codeevoignore`` file in their root,
+using ``.gitignore`` syntax. A ``!`` re-include only cancels glob excludes
+listed before it; the hard excludes can never be overridden.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPO_OVERRIDE_FILE = ".codeevoignore"
+
+# Distinct .codeevoignore contents kept compiled per base filter
+MAX_CACHED_OVERRIDES = 32
+
+
+def glob_to_regex(pattern: str) -> Optional[str]:
+    """
+    Translate one ``.gitignore``-style glob into a regex over "/"-separated paths.
+
+    Returns None for blank lines and comments. Negation (``!``) is handled by
+    the caller.
+    """
+    pattern = pattern.strip()
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = pattern.startswith("/") or "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    out: List[str] = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            out.append("[^/]*")
+        elif char == "?":
+            out.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                body = pattern[i + 1 : end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(char))
+        i += 1
+
+    prefix = "^" if anchored else "(?:^|/)"
+    # A directory rule matches everything below it; a plain rule matches the
+    # path itself or, when it names a directory, everything below it.
+    suffix = "/" if dir_only else "(?:/|$)"
+    return f"{prefix}{''.join(out)}{suffix}"
+
+
+class PathFilter:
+    """
+    Compiled include/exclude matcher for repository-relative paths
+    """
+
+    def __init__(
+        self,
+        exclude_regexes: Iterable[str] = (),
+        exclude_globs: Iterable[str] = (),
+        exclude_dirs: Iterable[str] = (),
+        exclude_hidden_dirs: bool = False,
+        include_extensions: Optional[Iterable[str]] = None,
+        include_names: Iterable[str] = (),
+        ignore_case: bool = True,
+    ):
+        """
+        Args:
+            exclude_regexes: Regexes searched anywhere in the path
+            exclude_globs: ``.gitignore``-style globs; ``!glob`` re-includes
+            exclude_dirs: Directory names excluded at any depth
+            exclude_hidden_dirs: Exclude directories whose name starts with "."
+            include_extensions: Extensions (".py") that are included; None means all
+            include_names: File names included regardless of extension
+            ignore_case: Match rules case-insensitively
+        """
+        self.exclude_regexes = tuple(exclude_regexes)
+        self.exclude_globs = tuple(exclude_globs)
+        self.exclude_dirs = frozenset(exclude_dirs)
+        self.exclude_hidden_dirs = exclude_hidden_dirs
+        self.ignore_case = ignore_case
+        self.include_extensions = (
+            frozenset(ext.lower() for ext in include_extensions)
+            if include_extensions is not None
+            else None
+        )
+        self.include_names = frozenset(name.lower() for name in include_names)
+
+        excludes: List[str] = [f"(?:{regex})" for regex in self.exclude_regexes]
+        if self.exclude_dirs:
+            names = "|".join(re.escape(d) for d in sorted(self.exclude_dirs))
+            excludes.append(f"(?:(?:^|/)(?:{names})/)")
+        if exclude_hidden_dirs:
+            excludes.append(r"(?:(?:^|/)\.[^/]+/)")
+
+        # Consecutive globs of the same polarity share one regex
+        runs: List[Tuple[bool, List[str]]] = []
+        for glob in self.exclude_globs:
+            negated = glob.startswith("!")
+            regex = glob_to_regex(glob[1:] if negated else glob)
+            if regex is None:
+                continue
+            if runs and runs[-1][0] == negated:
+                runs[-1][1].append(f"(?:{regex})")
+            else:
+                runs.append((negated, [f"(?:{regex})"]))
+
+        flags = re.IGNORECASE if ignore_case else 0
+        self._exclude = re.compile("|".join(excludes), flags) if excludes else None
+        # Checked last run first: the latest matching rule decides
+        self._glob_runs: List[Tuple[bool, Pattern]] = [
+            (negated, re.compile("|".join(parts), flags)) for negated, parts in reversed(runs)
+        ]
+        self._overrides: Dict[str, "PathFilter"] = {}
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return path.replace("\\", "/")
+
+    def excludes(self, path: str) -> bool:
+        """True if a hard exclude matches, or the last matching glob is not a re-include"""
+        path = self._normalize(path)
+        if self._exclude is not None and self._exclude.search(path) is not None:
+            return True
+        for negated, regex in self._glob_runs:
+            if regex.search(path) is not None:
+                return not negated
+        return False
+
+    def includes(self, path: str) -> bool:
+        """True if the path is not excluded and passes the extension/name rules"""
+        if self.excludes(path):
+            return False
+        if self.include_extensions is None:
+            return True
+        name = self._normalize(path).rsplit("/", 1)[-1].lower()
+        if name in self.include_names:
+            return True
+        dot = name.rfind(".")
+        return dot > 0 and name[dot:] in self.include_extensions
+
+    def walk(self, root: str) -> Iterator[str]:
+        """Yield root-relative paths of included files, pruning excluded directories"""
+        for current, dirs, files in os.walk(root):
+            rel_dir = os.path.relpath(current, root)
+            rel_prefix = "" if rel_dir == "." else self._normalize(rel_dir) + "/"
+            dirs[:] = [d for d in dirs if not self.excludes(f"{rel_prefix}{d}/")]
+            for name in files:
+                if self.includes(f"{rel_prefix}{name}"):
+                    yield os.path.relpath(os.path.join(current, name), root)
+
+    def with_rules(self, globs: Iterable[str]) -> "PathFilter":
+        """Return a new filter with extra ``.gitignore``-style rules appended"""
+        return PathFilter(
+            exclude_regexes=self.exclude_regexes,
+            exclude_globs=self.exclude_globs + tuple(globs),
+            exclude_dirs=self.exclude_dirs,
+            exclude_hidden_dirs=self.exclude_hidden_dirs,
+            include_extensions=self.include_extensions,
+            include_names=self.include_names,
+            ignore_case=self.ignore_case,
+        )
+
+    def for_repository(self, repository_path: Optional[str]) -> "PathFilter":
+        """Apply the repository's ``.codeevoignore`` overrides, if it has one"""
+        if not repository_path:
+            return self
+        override_path = os.path.join(repository_path, REPO_OVERRIDE_FILE)
+        try:
+            with open(override_path, "r", encoding="utf-8", errors="ignore") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return self
+        except OSError as e:
+            logger.warning(f"Could not read {override_path}: {e}")
+            return self
+
+        # Keyed by content: every analysis checks out a fresh worktree path
+        key = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        cached = self._overrides.pop(key, None)
+        if cached is None:
+            cached = self.with_rules(content.splitlines())
+            while len(self._overrides) >= MAX_CACHED_OVERRIDES:
+                self._overrides.pop(next(iter(self._overrides)))
+        # Re-inserted so the dict stays in least-recently-used order
+        self._overrides[key] = cached
+        return cached
+
+
+# Source files inspected by the enhanced static analyzers
+SOURCE_EXTENSIONS = frozenset(
+    {
+        ".js", ".jsx", ".ts", ".tsx", ".py", ".java", ".cpp", ".c", ".cs",
+        ".go", ".rs", ".rb", ".php", ".swift", ".kt", ".scala", ".clj",
+        ".hs", ".ml", ".fs", ".dart", ".vue", ".svelte",
+    }
+)
+
+# Files never worth analyzing in commit diffs: VCS internals, dependencies,
+# binaries, lock files and environment files
+GIT_SKIP_FILTER = PathFilter(
+    exclude_regexes=[
+        r"\.git/",
+        r"node_modules/",
+        r"__pycache__/",
+        r"\.(jpg|jpeg|png|gif|pdf|docx?)$",
+        r"\.(pyc|lock)$",
+        r"\.env",
+    ]
+)
+
+SOURCE_FILE_FILTER = PathFilter(include_extensions=SOURCE_EXTENSIONS)
+
+INCREMENTAL_FILTER = PathFilter(
+    exclude_dirs={"node_modules", "__pycache__", "target", "build", "dist"},
+    exclude_hidden_dirs=True,
+    include_extensions={
+        # Source code
+        ".py", ".js", ".ts", ".jsx", ".tsx", ".java", ".cpp", ".c", ".h",
+        ".cs", ".php", ".rb", ".go", ".rs", ".kt", ".swift", ".scala",
+        ".clj", ".hs", ".ml", ".fs", ".r", ".m", ".sh", ".ps1", ".pl",
+        ".lua", ".dart", ".elm", ".ex", ".exs", ".jl", ".nim", ".zig",
+        # Config and markup
+        ".json", ".yaml", ".yml", ".toml", ".xml", ".html", ".css",
+        ".scss", ".sass", ".less", ".md", ".dockerfile", ".makefile",
+    },
+    include_names={
+        "dockerfile", "makefile", "rakefile", "gemfile", "procfile",
+        "package.json", "requirements.txt", "setup.py", "cargo.toml",
+    },
+)
+
+ARCHITECTURE_FILTER = PathFilter(
+    exclude_dirs={".git", "__pycache__", "node_modules", ".pytest_cache", "venv", "env"},
+    include_extensions={
+        ".py", ".js", ".ts", ".jsx", ".tsx", ".java", ".cs", ".cpp", ".c",
+        ".h", ".hpp", ".go", ".rs", ".rb", ".php", ".swift", ".kt", ".scala",
+        ".html", ".css", ".scss", ".sass", ".vue", ".svelte",
+    },
+)
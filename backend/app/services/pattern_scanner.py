@@ -0,0 +1,76 @@
+"""
+Pattern Scanner
+
+Line-oriented regex scanning over a whole file. Each rule is compiled once;
+scanning runs the regex over the full text and only verifies the lines its
+matches land on, so a rule that occurs nowhere in a file costs one C-level
+search instead of one Python-level call per line.
+
+Results are exactly those of ``re.search(rule, line)`` for every line, in
+rule order then line order: any match inside a line is also a match in the
+full text at the same offset, so the leftmost full-text match from a given
+line never skips a matching line, and each candidate line is confirmed
+against the line itself. Rules that require a literal newline can never
+match a single line and are dropped at compile time.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Pattern, Tuple
+
+from app.services.source_index import SourceIndex
+
+_CHAR_CLASS_RE = re.compile(r"\[(?:\\.|[^\]\\])*\]")
+_REQUIRED_NEWLINE_RE = re.compile(r"(?<!\\)\\n(?![?*]|\{0)")
+
+
+def requires_newline(pattern: str) -> bool:
+    """
+    True if every match of ``pattern`` must contain a newline character.
+
+    Conservative: patterns with alternation or optional groups report False.
+    """
+    stripped = _CHAR_CLASS_RE.sub("c", pattern)
+    if "|" in stripped or ")?" in stripped or ")*" in stripped or "){0" in stripped:
+        return False
+    return _REQUIRED_NEWLINE_RE.search(stripped) is not None
+
+
+@dataclass(frozen=True)
+class ScanRule:
+    """A compiled regex plus the caller's payload for its matches"""
+
+    key: Any
+    regex: Pattern
+
+
+class PatternScanner:
+    """Compiled rule table matched against whole files"""
+
+    def __init__(self, rules: Iterable[Tuple[Any, str]], flags: int = 0):
+        """
+        Args:
+            rules: (key, regex source) pairs, in the order results are reported
+            flags: ``re`` flags applied to every rule
+        """
+        self.rules: List[ScanRule] = [
+            ScanRule(key=key, regex=re.compile(source, flags))
+            for key, source in rules
+            if not requires_newline(source)
+        ]
+
+    def scan(self, index: SourceIndex) -> Iterator[Tuple[Any, int]]:
+        """Yield (rule key, 0-based line index) for every line each rule matches"""
+        content = index.content
+        line_starts = index.line_starts
+        last_line = len(line_starts) - 1
+        for rule in self.rules:
+            search = rule.regex.search
+            match = search(content)
+            while match is not None:
+                line_no = index.line_index(match.start())
+                if search(index.line(line_no)):
+                    yield rule.key, line_no
+                if line_no >= last_line:
+                    break
+                match = search(content, line_starts[line_no + 1])
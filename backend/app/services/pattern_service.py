@@ -10,22 +10,34 @@ optimization and comprehensive error handling.
 import logging
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from bson import ObjectId
 from collections import Counter, defaultdict
 
 from app.core.database import get_enhanced_database_manager
+from app.services.pattern_stats import OccurrenceStat, PatternStatsStore
 from app.models.repository import (
     Pattern,
     PatternOccurrence,
+    PatternTimelineBucket,
     Repository,
     AIAnalysisResult,
     AIModel,
+    increment_repository_counters,
     # ModelComparison removed - using single model analysis only
 )
 
 logger = logging.getLogger(__name__)
 
+# Timeline rollup granularities -> label format of their buckets
+TIMELINE_GRANULARITIES = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+
+
+def timeline_bucket(moment: datetime, granularity: str) -> datetime:
+    """Start of the day or month containing ``moment``"""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.replace(day=1) if granularity == "month" else start
+
 
 class PatternService:
     """
@@ -39,12 +51,14 @@ class PatternService:
             self.db_manager = get_enhanced_database_manager()
             self.engine = self.db_manager.engine
             self.cache = self.db_manager.cache
+            self.global_stats = PatternStatsStore(self.engine)
             logger.info("PatternService initialized with enhanced MongoDB backend")
         except Exception as e:
             logger.warning(f"⚠️  PatternService initialized without MongoDB: {e}")
             self.db_manager = None
             self.engine = None
             self.cache = None
+            self.global_stats = None
 
         # Service metrics
         self._operation_count = 0
@@ -167,9 +181,22 @@ class PatternService:
                 token_usage=token_usage,
                 ai_analysis_metadata=ai_analysis_metadata,
                 detected_at=detected_at,
+                stats_recorded=True if self.global_stats else None,
             )
 
+            rebuilds_seen = await self._timeline_rebuilds(occurrence.repository_id)
             saved_occurrence = await self.engine.save(occurrence)
+            await increment_repository_counters(
+                self.engine, repository_id, pattern_count=1
+            )
+            await self._record_timeline(
+                occurrence.repository_id,
+                [(pattern.id, occurrence.detected_at)],
+                rebuilds_seen,
+            )
+            await self._record_global_stats(
+                [(pattern.id, occurrence.repository_id, file_path, confidence_score)]
+            )
 
             # Update pattern statistics cache
             await self._invalidate_pattern_cache(repository_id, str(pattern.id))
@@ -182,6 +209,121 @@ class PatternService:
             logger.error(f"❌ Failed to add pattern occurrence: {e}")
             raise
 
+    async def _resolve_pattern_ids(self, names: List[str]) -> Dict[str, ObjectId]:
+        """Map pattern names to IDs, creating missing patterns in one bulk upsert"""
+        from pymongo import UpdateOne
+
+        collection = self.engine.get_collection(Pattern)
+        ids: Dict[str, ObjectId] = {}
+
+        async def lookup(wanted: List[str]) -> None:
+            cursor = collection.find({"name": {"$in": wanted}}, {"name": 1})
+            for doc in await cursor.to_list(length=None):
+                ids[doc["name"]] = doc["_id"]
+
+        await lookup(names)
+        missing = [name for name in names if name not in ids]
+        if missing:
+            requests = []
+            for name in missing:
+                doc = Pattern(name=name).doc()
+                doc.pop("_id")
+                # Upsert on name so a concurrent insert of the same pattern wins cleanly
+                requests.append(
+                    UpdateOne({"name": name}, {"$setOnInsert": doc}, upsert=True)
+                )
+            await collection.bulk_write(requests, ordered=False)
+            await lookup(missing)
+            logger.info(f"✅ Created {len(missing)} new patterns")
+        return ids
+
+    async def add_pattern_occurrences_bulk(
+        self, repository_id: str, occurrences: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Add many pattern occurrences for one repository in a few round trips
+
+        Args:
+            repository_id: Repository ID
+            occurrences: Dicts with ``pattern_name`` plus any keyword accepted
+                by ``add_pattern_occurrence``
+
+        Returns:
+            int: Number of occurrences inserted
+        """
+        from pymongo.errors import BulkWriteError
+
+        if not occurrences:
+            return 0
+        try:
+            self._operation_count += 1
+
+            names = list(dict.fromkeys(o["pattern_name"] for o in occurrences))
+            pattern_ids = await self._resolve_pattern_ids(names)
+
+            docs = []
+            for entry in occurrences:
+                fields = {k: v for k, v in entry.items() if k != "pattern_name"}
+                docs.append(
+                    PatternOccurrence(
+                        repository_id=ObjectId(repository_id),
+                        pattern_id=pattern_ids[entry["pattern_name"]],
+                        stats_recorded=True if self.global_stats else None,
+                        **fields,
+                    ).doc()
+                )
+
+            rebuilds_seen = await self._timeline_rebuilds(ObjectId(repository_id))
+            failed = set()
+            try:
+                result = await self.engine.get_collection(PatternOccurrence).insert_many(
+                    docs, ordered=False
+                )
+                inserted = len(result.inserted_ids)
+            except BulkWriteError as e:
+                inserted = e.details.get("nInserted", 0)
+                failed = {err.get("index") for err in e.details.get("writeErrors", [])}
+                self._error_count += 1
+                logger.warning(
+                    f"⚠️ Inserted {inserted}/{len(docs)} pattern occurrences: "
+                    f"{len(e.details.get('writeErrors', []))} failed"
+                )
+
+            await increment_repository_counters(
+                self.engine, repository_id, pattern_count=inserted
+            )
+            written = [doc for i, doc in enumerate(docs) if i not in failed]
+            await self._record_timeline(
+                ObjectId(repository_id),
+                [(doc["pattern_id"], doc["detected_at"]) for doc in written],
+                rebuilds_seen,
+            )
+            await self._record_global_stats(
+                [
+                    (
+                        doc["pattern_id"],
+                        doc["repository_id"],
+                        doc.get("file_path"),
+                        doc["confidence_score"],
+                    )
+                    for doc in written
+                ]
+            )
+            await self._invalidate_pattern_cache(
+                repository_id, *(str(pattern_ids[name]) for name in names)
+            )
+
+            logger.info(
+                f"✅ Added {inserted} pattern occurrences ({len(names)} patterns) "
+                f"for repository {repository_id}"
+            )
+            return inserted
+
+        except Exception as e:
+            self._error_count += 1
+            logger.error(f"❌ Failed to add pattern occurrences in bulk: {e}")
+            raise
+
     async def get_repository_patterns(
         self,
         repository_id: str,
@@ -366,19 +508,164 @@ class PatternService:
                 "timestamp": datetime.utcnow().isoformat(),
             }
 
+    async def _timeline_rebuilds(self, repository_id: ObjectId) -> Optional[int]:
+        """Completed timeline rebuilds of a repository, read before writing
+        occurrences so ``_record_timeline`` can detect a rebuild that raced it"""
+        repository = await self.engine.get_collection(Repository).find_one(
+            {"_id": repository_id}, {"timeline_rebuilds": 1}
+        )
+        return repository.get("timeline_rebuilds") if repository else None
+
+    async def _record_timeline(
+        self,
+        repository_id: ObjectId,
+        entries: Iterable[Tuple[ObjectId, datetime]],
+        rebuilds_seen: Optional[int],
+    ) -> None:
+        """$inc the day and month timeline buckets of newly written occurrences
+
+        A rebuild overlapping the write may have counted these occurrences
+        already, or missed them; either way the repository is unmarked so the
+        next read rebuilds it. The same happens when the bucket write fails.
+        """
+        from pymongo import UpdateOne
+
+        counts: Counter = Counter()
+        for pattern_id, detected_at in entries:
+            for granularity in TIMELINE_GRANULARITIES:
+                counts[(granularity, timeline_bucket(detected_at, granularity), pattern_id)] += 1
+        if not counts:
+            return
+        repositories = self.engine.get_collection(Repository)
+        unmark = {"$set": {"timeline_backfilled": False, "timeline_rebuild": None}}
+        try:
+            await self.engine.get_collection(PatternTimelineBucket).bulk_write(
+                [
+                    UpdateOne(
+                        {
+                            "repository_id": repository_id,
+                            "granularity": granularity,
+                            "bucket": bucket,
+                            "pattern_id": pattern_id,
+                        },
+                        {"$inc": {"count": n}},
+                        upsert=True,
+                    )
+                    for (granularity, bucket, pattern_id), n in counts.items()
+                ],
+                ordered=False,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to update pattern timeline, scheduling a rebuild: {e}")
+            await repositories.update_one({"_id": repository_id}, unmark)
+            return
+
+        # A rebuild still in flight, or one that finished since we started
+        await repositories.update_one(
+            {"_id": repository_id, "timeline_rebuild": {"$ne": None}}, unmark
+        )
+        await repositories.update_one(
+            {"_id": repository_id, "timeline_rebuilds": {"$ne": rebuilds_seen}}, unmark
+        )
+
+    async def _record_global_stats(self, entries: List[OccurrenceStat]) -> None:
+        """Fold newly written occurrences into the global pattern statistics"""
+        if not self.global_stats or not entries:
+            return
+        try:
+            await self.global_stats.record(entries)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to update global pattern stats: {e}")
+
+    async def rebuild_pattern_timeline(self, repository_id: str) -> int:
+        """Recompute a repository's timeline rollup from its occurrences and
+        mark the repository as backfilled
+
+        The repository is claimed with a fresh ``timeline_rebuild`` token and
+        only marked if no occurrence write cleared the token meanwhile.
+        """
+        from pymongo import UpdateOne
+
+        obj_id = ObjectId(repository_id)
+        token = ObjectId()
+        repositories = self.engine.get_collection(Repository)
+        await repositories.update_one(
+            {"_id": obj_id},
+            {"$set": {"timeline_backfilled": False, "timeline_rebuild": token}},
+        )
+        cursor = self.engine.get_collection(PatternOccurrence).aggregate(
+            [
+                {"$match": {"repository_id": obj_id}},
+                {
+                    "$group": {
+                        "_id": {
+                            "pattern_id": "$pattern_id",
+                            "year": {"$year": "$detected_at"},
+                            "month": {"$month": "$detected_at"},
+                            "day": {"$dayOfMonth": "$detected_at"},
+                        },
+                        "n": {"$sum": 1},
+                    }
+                },
+            ]
+        )
+        counts: Counter = Counter()
+        for row in await cursor.to_list(length=None):
+            key = row["_id"]
+            day = datetime(key["year"], key["month"], key["day"])
+            counts[("day", day, key["pattern_id"])] += row["n"]
+            counts[("month", day.replace(day=1), key["pattern_id"])] += row["n"]
+
+        if counts:
+            await self.engine.get_collection(PatternTimelineBucket).bulk_write(
+                [
+                    UpdateOne(
+                        {
+                            "repository_id": obj_id,
+                            "granularity": granularity,
+                            "bucket": bucket,
+                            "pattern_id": pattern_id,
+                        },
+                        {"$set": {"count": n}},
+                        upsert=True,
+                    )
+                    for (granularity, bucket, pattern_id), n in counts.items()
+                ],
+                ordered=False,
+            )
+        result = await repositories.update_one(
+            {"_id": obj_id, "timeline_rebuild": token},
+            {
+                "$set": {"timeline_backfilled": True, "timeline_rebuild": None},
+                "$inc": {"timeline_rebuilds": 1},
+            },
+        )
+        if not result.modified_count:
+            logger.info(f"🔁 Pattern timeline of {repository_id} changed during rebuild, left unmarked")
+        logger.info(
+            f"✅ Rebuilt pattern timeline for repository {repository_id} ({len(counts)} buckets)"
+        )
+        return len(counts)
+
     async def get_pattern_timeline(
         self,
         repository_id: str,
         pattern_name: Optional[str] = None,
-        date_range_days: int = 365,  # Increased to 1 year to include more data
+        date_range_days: Optional[int] = None,
+        granularity: str = "day",
     ) -> Dict[str, Any]:
         """
         Get pattern timeline for repository showing evolution over time
 
+        Served from the pre-aggregated ``pattern_timeline`` rollup. Repositories
+        not yet marked ``timeline_backfilled`` have it rebuilt from their
+        occurrences first.
+
         Args:
             repository_id: Repository ID
             pattern_name: Optional specific pattern name
-            date_range_days: Number of days to include in timeline
+            date_range_days: Number of days to include in timeline (None for full history)
+            granularity: Bucket size, "day" or "month"
 
         Returns:
             Dict containing timeline data
@@ -386,72 +673,76 @@ class PatternService:
         try:
             self._operation_count += 1
 
-            obj_id = ObjectId(repository_id)
-            # Use a much longer date range to include historical data
-            start_date = datetime.utcnow() - timedelta(days=date_range_days)
+            if granularity not in TIMELINE_GRANULARITIES:
+                raise ValueError(f"Unsupported timeline granularity: {granularity}")
 
-            # Build query conditions - only filter by repository_id for now
-            conditions = [
-                PatternOccurrence.repository_id == obj_id,
-                # Temporarily remove date filter to include all patterns
-                # PatternOccurrence.detected_at >= start_date,
-            ]
+            obj_id = ObjectId(repository_id)
+            query: Dict[str, Any] = {"repository_id": obj_id, "granularity": granularity}
+            if date_range_days is not None:
+                start_date = datetime.utcnow() - timedelta(days=date_range_days)
+                query["bucket"] = {"$gte": timeline_bucket(start_date, granularity)}
 
             if pattern_name:
                 pattern = await self.engine.find_one(
                     Pattern, Pattern.name == pattern_name
                 )
                 if pattern:
-                    conditions.append(PatternOccurrence.pattern_id == pattern.id)
+                    query["pattern_id"] = pattern.id
                 else:
                     return {"error": f"Pattern '{pattern_name}' not found"}
 
-            # Get occurrences in date range
-            occurrences = await self.engine.find(
-                PatternOccurrence, *conditions, sort=PatternOccurrence.detected_at.asc()
+            repository = await self.engine.get_collection(Repository).find_one(
+                {"_id": obj_id}, {"timeline_backfilled": 1}
             )
-
-            # Group by date and pattern
-            timeline_data = defaultdict(lambda: defaultdict(int))
-            pattern_names = {}
-
-            for occurrence in occurrences:
-                date_key = occurrence.detected_at.strftime("%Y-%m-%d")
-                pattern_id = str(occurrence.pattern_id)
-                timeline_data[date_key][pattern_id] += 1
-
-                # Cache pattern name
-                if pattern_id not in pattern_names:
-                    pattern = await self.engine.find_one(
-                        Pattern, Pattern.id == occurrence.pattern_id
-                    )
-                    pattern_names[pattern_id] = pattern.name if pattern else "Unknown"
-
-            # Convert to timeline format
-            timeline = []
-            for date_str in sorted(timeline_data.keys()):
-                date_data = {
+            if repository is not None and not repository.get("timeline_backfilled"):
+                # Buckets written since the rollup was introduced may cover only
+                # part of the history, so their presence proves nothing
+                await self.rebuild_pattern_timeline(repository_id)
+
+            cursor = self.engine.get_collection(PatternTimelineBucket).find(
+                query, {"bucket": 1, "pattern_id": 1, "count": 1}
+            ).sort("bucket", 1)
+            buckets = await cursor.to_list(length=None)
+
+            # Resolve all pattern names in one query
+            pattern_ids = list(dict.fromkeys(b["pattern_id"] for b in buckets))
+            pattern_names: Dict[str, str] = {}
+            if pattern_ids:
+                cursor = self.engine.get_collection(Pattern).find(
+                    {"_id": {"$in": pattern_ids}}, {"name": 1}
+                )
+                for doc in await cursor.to_list(length=None):
+                    pattern_names[str(doc["_id"])] = doc["name"]
+
+            # Convert to timeline format (buckets arrive sorted by date)
+            label_format = TIMELINE_GRANULARITIES[granularity]
+            timeline_data: Dict[str, Dict[str, int]] = defaultdict(dict)
+            for entry in buckets:
+                name = pattern_names.get(str(entry["pattern_id"]), "Unknown")
+                patterns = timeline_data[entry["bucket"].strftime(label_format)]
+                patterns[name] = patterns.get(name, 0) + entry["count"]
+
+            timeline = [
+                {
                     "date": date_str,
-                    "total_patterns": sum(timeline_data[date_str].values()),
-                    "patterns": {},
+                    "total_patterns": sum(patterns.values()),
+                    "patterns": patterns,
                 }
+                for date_str, patterns in timeline_data.items()
+            ]
 
-                for pattern_id, count in timeline_data[date_str].items():
-                    pattern_name = pattern_names.get(pattern_id, "Unknown")
-                    date_data["patterns"][pattern_name] = count
-
-                timeline.append(date_data)
-
+            tracked = [pattern_names.get(str(pid), "Unknown") for pid in pattern_ids]
             result = {
                 "repository_id": repository_id,
                 "timeline": timeline,
                 "date_range_days": date_range_days,
+                "granularity": granularity,
                 "total_data_points": len(timeline),
                 "pattern_filter": pattern_name,
                 "summary": {
                     "total_occurrences": sum(day["total_patterns"] for day in timeline),
-                    "unique_patterns": len(pattern_names),
-                    "patterns_tracked": list(pattern_names.values()),
+                    "unique_patterns": len(pattern_ids),
+                    "patterns_tracked": tracked,
                 },
                 "timestamp": datetime.utcnow().isoformat(),
             }
@@ -649,65 +940,38 @@ class PatternService:
                 logger.debug("📋 Cache hit for global pattern stats")
                 return cached
 
-            # Get all patterns
+            # Patterns plus their write-maintained statistics: O(patterns)
             patterns = await self.engine.find(Pattern)
-
-            # Get all pattern occurrences
-            occurrences = await self.engine.find(PatternOccurrence)
-
-            # Calculate statistics
-            pattern_stats = defaultdict(
-                lambda: {
-                    "total_occurrences": 0,
-                    "repositories": set(),
-                    "files": set(),
-                    "avg_confidence": [],
-                }
-            )
-
-            for occurrence in occurrences:
-                pattern_id = str(occurrence.pattern_id)
-                stats = pattern_stats[pattern_id]
-                stats["total_occurrences"] += 1
-                stats["repositories"].add(str(occurrence.repository_id))
-                if occurrence.file_path:
-                    stats["files"].add(occurrence.file_path)
-                stats["avg_confidence"].append(occurrence.confidence_score)
+            pattern_stats = await self.global_stats.read()
 
             # Build result
             pattern_results = []
             for pattern in patterns:
-                pattern_id = str(pattern.id)
-                stats = pattern_stats[pattern_id]
+                stats = pattern_stats.get(pattern.id) or {}
+                occurrences = stats.get("occurrence_count", 0)
+                repositories = stats.get("repositories_estimate", 0)
 
                 pattern_results.append(
                     {
                         "pattern": pattern.dict(),
-                        "total_occurrences": stats["total_occurrences"],
-                        "repositories_count": len(stats["repositories"]),
-                        "unique_files_count": len(stats["files"]),
+                        "total_occurrences": occurrences,
+                        "repositories_count": repositories,
+                        "unique_files_count": stats.get("files_estimate", 0),
                         "avg_confidence": (
-                            round(
-                                sum(stats["avg_confidence"])
-                                / len(stats["avg_confidence"]),
-                                3,
-                            )
-                            if stats["avg_confidence"]
+                            round(stats.get("confidence_sum", 0.0) / occurrences, 3)
+                            if occurrences
                             else 0
                         ),
-                        "popularity_score": stats["total_occurrences"]
-                        * len(stats["repositories"]),
+                        "popularity_score": occurrences * repositories,
                     }
                 )
 
             # Sort by popularity
             pattern_results.sort(key=lambda x: x["popularity_score"], reverse=True)
 
-            # Calculate global metrics
-            total_repositories = len(
-                set().union(
-                    *[stats["repositories"] for stats in pattern_stats.values()]
-                )
+            # Distinct repositories across all patterns (approximate)
+            total_repositories = (pattern_stats.get(None) or {}).get(
+                "repositories_estimate", 0
             )
 
             result = {
@@ -743,13 +1007,13 @@ class PatternService:
             return {"error": str(e), "timestamp": datetime.utcnow().isoformat()}
 
     async def _invalidate_pattern_cache(
-        self, repository_id: str, pattern_id: str
+        self, repository_id: str, *pattern_ids: str
     ) -> None:
         """Invalidate pattern-related cache entries"""
         try:
             cache_keys = [
                 f"repo_patterns:{repository_id}:*",
-                f"pattern:id:{pattern_id}",
+                *(f"pattern:id:{pattern_id}" for pattern_id in pattern_ids),
                 "global_pattern_stats",
             ]
 
@@ -0,0 +1,292 @@
+"""
+Global Pattern Statistics
+
+Per-pattern statistics maintained on write instead of recomputed from every
+occurrence. Each occurrence write ``$inc``s the pattern's occurrence count and
+confidence sum, and folds its repository and file path into HyperLogLog
+sketches with ``$max`` on the touched registers, so concurrent writers never
+read-modify-write. A document with ``pattern_id: None`` tracks all patterns
+together for the global distinct counts.
+
+Compaction turns the registers of every changed pattern into stored
+estimates, so reads only fetch one small document per pattern. It runs
+periodically in the background and before each read.
+
+Statistics for occurrences written before this store existed are backfilled
+once, at application startup, and the all-patterns document is marked
+``backfilled``. The marker, not an empty collection, decides whether the
+backfill ran: a write recorded first must not prevent it. Occurrences that
+``record`` counts are stamped ``stats_recorded`` when inserted; the backfill
+only counts unstamped ones and stores them in separate ``backfill_*`` totals
+that reads add to the recorded ones, so writes during the backfill are
+neither lost nor counted twice.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.models.repository import PatternGlobalStats, PatternOccurrence
+
+logger = logging.getLogger(__name__)
+
+HLL_PRECISION = 12  # 4096 registers, ~1.6% standard error
+_SKETCHES = ("repository_registers", "file_registers")
+_ESTIMATES = {"repository_registers": "repositories_estimate", "file_registers": "files_estimate"}
+
+# (pattern_id, repository_id, file_path, confidence_score)
+OccurrenceStat = Tuple[ObjectId, ObjectId, Optional[str], float]
+
+
+class HyperLogLog:
+    """Approximate distinct counter over string values"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def register(self, value: str) -> Tuple[int, int]:
+        """(register index, rank) that ``value`` maps to"""
+        h = int.from_bytes(
+            hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        bits = 64 - self.precision
+        rest = h & ((1 << bits) - 1)
+        return h >> bits, bits - rest.bit_length() + 1
+
+    def add(self, value: str) -> None:
+        index, rank = self.register(value)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def sparse(self) -> Dict[str, int]:
+        """Non-zero registers keyed by index, as stored in MongoDB"""
+        return {str(i): r for i, r in enumerate(self.registers) if r}
+
+    @classmethod
+    def from_sparse(
+        cls, registers: Optional[Dict[str, int]], precision: int = HLL_PRECISION
+    ) -> "HyperLogLog":
+        hll = cls(precision)
+        for index, rank in (registers or {}).items():
+            hll.registers[int(index)] = rank
+        return hll
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is far more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class PatternStatsStore:
+    """Write-maintained global pattern statistics in MongoDB"""
+
+    def __init__(self, engine: Any, compaction_batch: int = 100):
+        self.engine = engine
+        self.compaction_batch = compaction_batch
+        self._compact_lock = asyncio.Lock()
+        self._backfilled = False
+        self.stats: Dict[str, int] = {"recorded": 0, "compacted": 0, "rebuilds": 0, "errors": 0}
+
+    @property
+    def collection(self):
+        return self.engine.get_collection(PatternGlobalStats)
+
+    async def record(self, occurrences: Iterable[OccurrenceStat]) -> None:
+        """Fold newly written occurrences into the statistics, one upsert per pattern"""
+        from pymongo import UpdateOne
+
+        hll = HyperLogLog()
+        counts: Dict[Optional[ObjectId], Dict[str, Any]] = defaultdict(
+            lambda: {"n": 0, "confidence": 0.0, "registers": {}}
+        )
+        for pattern_id, repository_id, file_path, confidence in occurrences:
+            updates = [("repository_registers", str(repository_id))]
+            if file_path:
+                updates.append(("file_registers", file_path))
+            for key in (pattern_id, None):
+                entry = counts[key]
+                entry["n"] += 1
+                entry["confidence"] += confidence or 0.0
+                for sketch, value in updates:
+                    index, rank = hll.register(value)
+                    path = f"{sketch}.{index}"
+                    entry["registers"][path] = max(entry["registers"].get(path, 0), rank)
+        if not counts:
+            return
+
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"pattern_id": pattern_id},
+                    {
+                        "$inc": {
+                            "occurrence_count": entry["n"],
+                            "confidence_sum": entry["confidence"],
+                            "version": 1,
+                        },
+                        "$max": entry["registers"],
+                        "$set": {"updated_at": datetime.utcnow()},
+                    },
+                    upsert=True,
+                )
+                for pattern_id, entry in counts.items()
+            ],
+            ordered=False,
+        )
+        self.stats["recorded"] += counts[None]["n"]
+
+    async def ensure_backfilled(self) -> bool:
+        """Backfill from the stored occurrences unless already done; True if it ran"""
+        if self._backfilled:
+            return False
+        async with self._compact_lock:
+            return await self._ensure_backfilled()
+
+    async def _ensure_backfilled(self) -> bool:
+        if self._backfilled:
+            return False
+        marker = await self.collection.find_one({"pattern_id": None, "backfilled": True}, {"_id": 1})
+        ran = marker is None
+        if ran:
+            await self.rebuild()
+        self._backfilled = True
+        return ran
+
+    async def compact(self) -> int:
+        """Refresh the estimates of patterns changed since the last compaction"""
+        from pymongo import UpdateOne
+
+        async with self._compact_lock:
+            await self._ensure_backfilled()
+
+            compacted = 0
+            pending: List[UpdateOne] = []
+            cursor = self.collection.find(
+                {"$expr": {"$ne": ["$version", "$compacted_version"]}},
+                {"version": 1, **{sketch: 1 for sketch in _SKETCHES}},
+            )
+            async for doc in cursor:
+                values: Dict[str, Any] = {
+                    _ESTIMATES[sketch]: HyperLogLog.from_sparse(doc.get(sketch)).count()
+                    for sketch in _SKETCHES
+                }
+                # Writes after this read bump version again and stay pending
+                values["compacted_version"] = doc["version"]
+                pending.append(UpdateOne({"_id": doc["_id"]}, {"$set": values}))
+                if len(pending) >= self.compaction_batch:
+                    await self.collection.bulk_write(pending, ordered=False)
+                    compacted += len(pending)
+                    pending = []
+            if pending:
+                await self.collection.bulk_write(pending, ordered=False)
+                compacted += len(pending)
+
+            self.stats["compacted"] += compacted
+            if compacted:
+                logger.debug(f"📊 Compacted statistics of {compacted} patterns")
+            return compacted
+
+    async def rebuild(self) -> int:
+        """Recompute the statistics of unrecorded occurrences in one streaming pass
+
+        Only occurrences not stamped ``stats_recorded`` are scanned. Their
+        totals are ``$set`` into the ``backfill_*`` fields, apart from what
+        ``record`` accumulates, and sketch registers are merged with ``$max``.
+        Rerunning, or running alongside writers, gives the same result.
+        """
+        from pymongo import UpdateOne
+
+        totals: Dict[Optional[ObjectId], Dict[str, Any]] = defaultdict(
+            lambda: {
+                "n": 0,
+                "confidence": 0.0,
+                "repository_registers": HyperLogLog(),
+                "file_registers": HyperLogLog(),
+            }
+        )
+        cursor = self.engine.get_collection(PatternOccurrence).find(
+            {"stats_recorded": {"$ne": True}},
+            {"pattern_id": 1, "repository_id": 1, "file_path": 1, "confidence_score": 1}
+        )
+        async for doc in cursor:
+            for key in (doc["pattern_id"], None):
+                entry = totals[key]
+                entry["n"] += 1
+                entry["confidence"] += doc.get("confidence_score") or 0.0
+                entry["repository_registers"].add(str(doc["repository_id"]))
+                if doc.get("file_path"):
+                    entry["file_registers"].add(doc["file_path"])
+
+        totals[None]  # the all-patterns document carries the marker
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"pattern_id": pattern_id},
+                    {
+                        "$max": {
+                            f"{sketch}.{index}": rank
+                            for sketch in _SKETCHES
+                            for index, rank in entry[sketch].sparse().items()
+                        },
+                        # Pending compaction
+                        "$inc": {"version": 1},
+                        "$set": {
+                            "backfill_occurrence_count": entry["n"],
+                            "backfill_confidence_sum": entry["confidence"],
+                            "updated_at": datetime.utcnow(),
+                            **({"backfilled": True} if pattern_id is None else {}),
+                        },
+                    },
+                    upsert=True,
+                )
+                for pattern_id, entry in totals.items()
+            ],
+            ordered=False,
+        )
+        self.stats["rebuilds"] += 1
+        logger.info(f"✅ Rebuilt global statistics for {max(len(totals) - 1, 0)} patterns")
+        return len(totals)
+
+    async def read(self) -> Dict[Optional[ObjectId], Dict[str, Any]]:
+        """Compacted statistics keyed by pattern id (None for all patterns)"""
+        await self.compact()
+        cursor = self.collection.find({}, {sketch: 0 for sketch in _SKETCHES})
+        stats = {}
+        for doc in await cursor.to_list(length=None):
+            doc["occurrence_count"] = doc.get("occurrence_count", 0) + doc.pop(
+                "backfill_occurrence_count", 0
+            )
+            doc["confidence_sum"] = doc.get("confidence_sum", 0.0) + doc.pop(
+                "backfill_confidence_sum", 0.0
+            )
+            stats[doc.get("pattern_id")] = doc
+        return stats
+
+    async def run_compaction(self, interval_s: float) -> None:
+        """Background loop compacting changed patterns every ``interval_s`` seconds"""
+        logger.info(f"🔁 Pattern statistics compaction every {interval_s}s")
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await self.compact()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Pattern statistics compaction failed: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -23,6 +23,8 @@ from enum import Enum
 from collections import defaultdict, Counter
 from pathlib import Path
 
+from app.services.source_index import SourceIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -323,7 +325,11 @@ class PerformanceAnalyzer:
         }
 
     def analyze_performance(
-        self, code: str, file_path: str, language: Optional[str] = None
+        self,
+        code: str,
+        file_path: str,
+        language: Optional[str] = None,
+        index: Optional[SourceIndex] = None,
     ) -> List[PerformanceIssue]:
         """
         Analyze code for performance issues and antipatterns
@@ -332,6 +338,7 @@ class PerformanceAnalyzer:
             code: Source code to analyze
             file_path: Path to the file being analyzed
             language: Programming language (auto-detected if None)
+            index: Line index of ``code`` when the caller already built one
 
         Returns:
             List of detected performance issues
@@ -340,34 +347,35 @@ class PerformanceAnalyzer:
             language = self._detect_language(file_path)
 
         issues = []
-        lines = code.split("\n")
+        if index is None:
+            index = SourceIndex(code)
 
         # Analyze performance patterns
         for pattern_name, pattern_info in self.performance_patterns.items():
             issues.extend(
                 self._find_performance_issues(
-                    pattern_name, pattern_info, code, lines, file_path, language
+                    pattern_name, pattern_info, index, file_path, language
                 )
             )
 
         # Analyze complexity patterns
-        issues.extend(self._analyze_complexity_issues(code, lines, file_path))
+        issues.extend(self._analyze_complexity_issues(index, file_path))
 
         # Analyze memory patterns
-        issues.extend(self._analyze_memory_issues(code, lines, file_path))
+        issues.extend(self._analyze_memory_issues(index, file_path))
 
         # Analyze concurrency patterns
         issues.extend(
-            self._analyze_concurrency_issues(code, lines, file_path, language)
+            self._analyze_concurrency_issues(index, file_path, language)
         )
 
         # Language-specific analysis
         if language.lower() == "python":
-            issues.extend(self._analyze_python_performance(code, lines, file_path))
+            issues.extend(self._analyze_python_performance(index, file_path))
         elif language.lower() in ["javascript", "typescript"]:
-            issues.extend(self._analyze_javascript_performance(code, lines, file_path))
+            issues.extend(self._analyze_javascript_performance(index, file_path))
         elif language.lower() == "java":
-            issues.extend(self._analyze_java_performance(code, lines, file_path))
+            issues.extend(self._analyze_java_performance(index, file_path))
 
         return issues
 
@@ -375,8 +383,7 @@ class PerformanceAnalyzer:
         self,
         pattern_name: str,
         pattern_info: Dict,
-        code: str,
-        lines: List[str],
+        index: SourceIndex,
         file_path: str,
         language: str,
     ) -> List[PerformanceIssue]:
@@ -384,9 +391,8 @@ class PerformanceAnalyzer:
         issues = []
 
         for pattern in pattern_info["patterns"]:
-            for match in re.finditer(pattern, code, re.MULTILINE | re.IGNORECASE):
-                line_num = code[: match.start()].count("\n") + 1
-                line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+            for match in re.finditer(pattern, index.content, re.MULTILINE | re.IGNORECASE):
+                line_num, line_content = index.line_at(match.start())
 
                 confidence = self._calculate_confidence(
                     match, line_content, pattern_name, language
@@ -413,16 +419,15 @@ class PerformanceAnalyzer:
         return issues
 
     def _analyze_complexity_issues(
-        self, code: str, lines: List[str], file_path: str
+        self, index: SourceIndex, file_path: str
     ) -> List[PerformanceIssue]:
         """Analyze algorithmic complexity issues"""
         issues = []
 
         for pattern_name, pattern_info in self.complexity_patterns.items():
             for pattern in pattern_info["patterns"]:
-                for match in re.finditer(pattern, code, re.MULTILINE | re.IGNORECASE):
-                    line_num = code[: match.start()].count("\n") + 1
-                    line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+                for match in re.finditer(pattern, index.content, re.MULTILINE | re.IGNORECASE):
+                    line_num, line_content = index.line_at(match.start())
 
                     issue = PerformanceIssue(
                         id=f"complexity_{pattern_name}_{file_path}_{line_num}",
@@ -446,16 +451,15 @@ class PerformanceAnalyzer:
         return issues
 
     def _analyze_memory_issues(
-        self, code: str, lines: List[str], file_path: str
+        self, index: SourceIndex, file_path: str
     ) -> List[PerformanceIssue]:
         """Analyze memory usage issues"""
         issues = []
 
         for pattern_name, pattern_info in self.memory_patterns.items():
             for pattern in pattern_info["patterns"]:
-                for match in re.finditer(pattern, code, re.MULTILINE | re.IGNORECASE):
-                    line_num = code[: match.start()].count("\n") + 1
-                    line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+                for match in re.finditer(pattern, index.content, re.MULTILINE | re.IGNORECASE):
+                    line_num, line_content = index.line_at(match.start())
 
                     issue = PerformanceIssue(
                         id=f"memory_{pattern_name}_{file_path}_{line_num}",
@@ -479,16 +483,15 @@ class PerformanceAnalyzer:
         return issues
 
     def _analyze_concurrency_issues(
-        self, code: str, lines: List[str], file_path: str, language: str
+        self, index: SourceIndex, file_path: str, language: str
     ) -> List[PerformanceIssue]:
         """Analyze concurrency and threading issues"""
         issues = []
 
         for pattern_name, pattern_info in self.concurrency_patterns.items():
             for pattern in pattern_info["patterns"]:
-                for match in re.finditer(pattern, code, re.MULTILINE | re.IGNORECASE):
-                    line_num = code[: match.start()].count("\n") + 1
-                    line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+                for match in re.finditer(pattern, index.content, re.MULTILINE | re.IGNORECASE):
+                    line_num, line_content = index.line_at(match.start())
 
                     issue = PerformanceIssue(
                         id=f"concurrency_{pattern_name}_{file_path}_{line_num}",
@@ -512,16 +515,15 @@ class PerformanceAnalyzer:
         return issues
 
     def _analyze_python_performance(
-        self, code: str, lines: List[str], file_path: str
+        self, index: SourceIndex, file_path: str
     ) -> List[PerformanceIssue]:
         """Python-specific performance analysis"""
         issues = []
 
         # Check for list comprehension opportunities
         list_comp_pattern = r"for\s+\w+\s+in\s+\w+:\s*\n\s*\w+\.append\s*\("
-        for match in re.finditer(list_comp_pattern, code, re.MULTILINE):
-            line_num = code[: match.start()].count("\n") + 1
-            line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+        for match in re.finditer(list_comp_pattern, index.content, re.MULTILINE):
+            line_num, line_content = index.line_at(match.start())
 
             issues.append(
                 PerformanceIssue(
@@ -544,7 +546,7 @@ class PerformanceAnalyzer:
         return issues
 
     def _analyze_javascript_performance(
-        self, code: str, lines: List[str], file_path: str
+        self, index: SourceIndex, file_path: str
     ) -> List[PerformanceIssue]:
         """JavaScript-specific performance analysis"""
         issues = []
@@ -557,9 +559,8 @@ class PerformanceAnalyzer:
         ]
 
         for pattern in array_inefficiency_patterns:
-            for match in re.finditer(pattern, code, re.MULTILINE):
-                line_num = code[: match.start()].count("\n") + 1
-                line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+            for match in re.finditer(pattern, index.content, re.MULTILINE):
+                line_num, line_content = index.line_at(match.start())
 
                 issues.append(
                     PerformanceIssue(
@@ -581,16 +582,15 @@ class PerformanceAnalyzer:
         return issues
 
     def _analyze_java_performance(
-        self, code: str, lines: List[str], file_path: str
+        self, index: SourceIndex, file_path: str
     ) -> List[PerformanceIssue]:
         """Java-specific performance analysis"""
         issues = []
 
         # Check for string concatenation in loops
         string_concat_pattern = r"for\s*\([^)]*\)\s*{\s*[^}]*\+\s*=.*String"
-        for match in re.finditer(string_concat_pattern, code, re.MULTILINE):
-            line_num = code[: match.start()].count("\n") + 1
-            line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+        for match in re.finditer(string_concat_pattern, index.content, re.MULTILINE):
+            line_num, line_content = index.line_at(match.start())
 
             issues.append(
                 PerformanceIssue(
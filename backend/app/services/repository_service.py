@@ -11,10 +11,14 @@ import logging
 import asyncio
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from bson import ObjectId
 from odmantic.exceptions import DuplicateKeyError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
+from app.core.config import settings
 from app.core.database import get_enhanced_database_manager
 from app.models.repository import (
     Repository,
@@ -29,6 +33,7 @@ from app.models.repository import (
     # ModelComparison removed - using single model analysis only
     ModelBenchmark,
     get_repositories_with_stats,
+    increment_repository_counters,
     get_technologies_by_repository,
     get_analysis_sessions_by_repository,
     get_available_ai_models,
@@ -37,6 +42,9 @@ from app.models.repository import (
 
 logger = logging.getLogger(__name__)
 
+# Characters of a changed file's content kept on its FileChange row
+FILE_CHANGE_SNIPPET_CHARS = 2000
+
 
 class RepositoryService:
     """
@@ -117,6 +125,10 @@ class RepositoryService:
                 status="created",
                 created_at=datetime.utcnow(),
                 updated_at=datetime.utcnow(),
+                commit_count=0,
+                technology_count=0,
+                pattern_count=0,
+                timeline_backfilled=True,
             )
 
             # Save to database
@@ -290,15 +302,20 @@ class RepositoryService:
             return None
 
     async def list_repositories(
-        self, limit: int = 50, offset: int = 0, status_filter: Optional[str] = None
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        status_filter: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         List repositories with pagination and filtering
 
         Args:
             limit: Maximum number of repositories to return
-            offset: Number of repositories to skip
+            offset: Number of repositories to skip (ignored with a cursor)
             status_filter: Optional status filter
+            cursor: ``next_cursor`` of the previous page
 
         Returns:
             Dict containing repositories and metadata
@@ -317,28 +334,26 @@ class RepositoryService:
                     "limit": limit,
                     "offset": offset,
                     "has_more": False,
+                    "next_cursor": None,
                     "error": "MongoDB not initialized",
                 }
 
-            # Build query conditions
-            conditions = {}
-            if status_filter:
-                conditions["status"] = status_filter
-
-            # Get repositories with enhanced stats
-            repositories = await get_repositories_with_stats(
-                self.engine, limit=limit, offset=offset
+            # One aggregation returns the page, its stats and the total count
+            page = await get_repositories_with_stats(
+                self.engine,
+                limit=limit,
+                offset=offset,
+                status_filter=status_filter,
+                cursor=cursor,
             )
 
-            # Get total count for pagination
-            total_count = await self.engine.count(Repository)
-
             return {
-                "repositories": repositories,
-                "total_count": total_count,
+                "repositories": page["repositories"],
+                "total_count": page["total_count"],
                 "limit": limit,
                 "offset": offset,
-                "has_more": offset + limit < total_count,
+                "has_more": page["has_more"],
+                "next_cursor": page["next_cursor"],
             }
 
         except Exception as e:
@@ -350,6 +365,7 @@ class RepositoryService:
                 "limit": limit,
                 "offset": offset,
                 "has_more": False,
+                "next_cursor": None,
                 "error": str(e),
             }
 
@@ -413,67 +429,40 @@ class RepositoryService:
             return False
 
     async def add_commits(
-        self, repository_id: str, commits_data: List[Dict[str, Any]]
+        self, repository_id: str, commits_data: Iterable[Dict[str, Any]]
     ) -> int:
         """
-        Add multiple commits to repository with bulk operations
+        Idempotently upsert commits and their file changes in unordered bulk writes
+
+        Commits are keyed on (repository_id, hash), so re-analysing a repository
+        updates existing rows instead of failing on duplicates. The input is
+        consumed one batch at a time and may be a generator.
 
         Args:
             repository_id: Repository ID
-            commits_data: List of commit data dictionaries
+            commits_data: Commit dicts as produced by ``GitService.get_commit_history``
 
         Returns:
-            int: Number of commits successfully added
+            int: Number of commits newly added
         """
         try:
             self._operation_count += 1
 
             obj_id = ObjectId(repository_id)
             added_count = 0
-
-            # Process commits in batches for better performance
-            batch_size = 100
-            for i in range(0, len(commits_data), batch_size):
-                batch = commits_data[i : i + batch_size]
-
-                commits = []
-                for commit_data in batch:
-                    try:
-                        commit = Commit(
-                            repository_id=obj_id,
-                            hash=commit_data["hash"],
-                            message=commit_data.get("message", ""),
-                            author_name=commit_data.get("author_name", ""),
-                            author_email=commit_data.get("author_email", ""),
-                            committed_date=commit_data.get(
-                                "committed_date", datetime.utcnow()
-                            ),
-                            additions=commit_data.get("additions", 0),
-                            deletions=commit_data.get("deletions", 0),
-                            files_changed=commit_data.get("files_changed", 0),
-                        )
-                        commits.append(commit)
-                    except Exception as ce:
-                        logger.warning(f"⚠️ Skipping invalid commit data: {ce}")
-                        continue
-
-                # Bulk save commits
-                if commits:
-                    try:
-                        await self.engine.save_all(commits)
-                        added_count += len(commits)
-                        logger.debug(f"📊 Added batch of {len(commits)} commits")
-                    except DuplicateKeyError:
-                        # Handle duplicate commits individually
-                        for commit in commits:
-                            try:
-                                await self.engine.save(commit)
-                                added_count += 1
-                            except DuplicateKeyError:
-                                logger.debug(
-                                    f"⚠️ Duplicate commit skipped: {commit.hash}"
-                                )
-                                continue
+            batch_size = max(1, settings.COMMIT_INGEST_BATCH_SIZE)
+
+            commits_iter = iter(commits_data)
+            while True:
+                batch = list(islice(commits_iter, batch_size))
+                if not batch:
+                    break
+                added, file_count = await self._upsert_commit_batch(obj_id, batch)
+                added_count += added
+                logger.debug(
+                    f"📊 Upserted batch of {len(batch)} commits "
+                    f"({added} new, {file_count} file changes)"
+                )
 
             # Update repository commit count
             await self._update_repository_stats(repository_id)
@@ -486,6 +475,127 @@ class RepositoryService:
             logger.error(f"❌ Failed to add commits: {e}")
             return 0
 
+    async def _upsert_commit_batch(
+        self, repository_id: ObjectId, batch: List[Dict[str, Any]]
+    ) -> Tuple[int, int]:
+        """Upsert one batch of commits and their file changes; returns (new commits, file changes)"""
+        commits: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]] = {}
+        for commit_data in batch:
+            try:
+                stats = commit_data.get("stats") or {}
+                files = commit_data.get("files_changed")
+                if not isinstance(files, list):
+                    # Legacy shape: a plain count and top-level line stats
+                    files = []
+                commit = Commit(
+                    repository_id=repository_id,
+                    hash=commit_data["hash"],
+                    message=commit_data.get("message", ""),
+                    author_name=commit_data.get("author_name", ""),
+                    author_email=commit_data.get("author_email", ""),
+                    committed_date=commit_data.get("committed_date", datetime.utcnow()),
+                    additions=stats.get("additions", commit_data.get("additions", 0)),
+                    deletions=stats.get("deletions", commit_data.get("deletions", 0)),
+                    files_changed_count=(
+                        len(files) if files else commit_data.get("files_changed") or 0
+                    ),
+                    stats=stats or None,
+                    analysis=commit_data.get("analysis"),
+                )
+            except Exception as ce:
+                logger.warning(f"⚠️ Skipping invalid commit data: {ce}")
+                continue
+            doc = commit.doc()
+            doc.pop("_id")
+            commits[commit.hash] = (doc, files)
+
+        if not commits:
+            return 0, 0
+
+        commit_collection = self.engine.get_collection(Commit)
+        hashes = list(commits)
+
+        async def lookup_ids(wanted: List[str]) -> Dict[str, ObjectId]:
+            cursor = commit_collection.find(
+                {"repository_id": repository_id, "hash": {"$in": wanted}}, {"hash": 1}
+            )
+            return {doc["hash"]: doc["_id"] for doc in await cursor.to_list(length=None)}
+
+        # File changes reference commit ids, so known ids are fetched and new
+        # ones assigned up front instead of reading them back after the write
+        commit_ids = await lookup_ids(hashes)
+        assigned = {h: ObjectId() for h in hashes if h not in commit_ids}
+        requests = [
+            UpdateOne(
+                {"repository_id": repository_id, "hash": h},
+                {"$set": doc, "$setOnInsert": {"_id": assigned[h]}}
+                if h in assigned
+                else {"$set": doc},
+                upsert=True,
+            )
+            for h, (doc, _) in commits.items()
+        ]
+        try:
+            result = await commit_collection.bulk_write(requests, ordered=False)
+            upserted = result.upserted_count
+        except BulkWriteError as bwe:
+            # Unordered: every other commit in the batch was still written
+            details = bwe.details
+            upserted = details.get("nUpserted", 0)
+            logger.warning(
+                f"⚠️ {len(details.get('writeErrors', []))} of {len(requests)} commit writes failed "
+                f"({upserted} inserted, {details.get('nMatched', 0)} updated)"
+            )
+        if upserted < len(assigned):
+            # A concurrent ingest inserted some of these first, or their
+            # writes failed; use whatever ids are actually stored
+            commit_ids.update(await lookup_ids(list(assigned)))
+        else:
+            commit_ids.update(assigned)
+
+        file_requests = []
+        for h, (_, files) in commits.items():
+            if h not in commit_ids:
+                continue  # the commit itself was not written
+            for info in files:
+                if not info.get("file_path"):
+                    continue
+                change = FileChange(
+                    commit_id=commit_ids[h],
+                    repository_id=repository_id,
+                    file_path=info["file_path"],
+                    change_type=info.get("change_type"),
+                    language=info.get("language"),
+                    additions=info.get("additions", 0),
+                    deletions=info.get("deletions", 0),
+                    content_snippet=(info.get("content") or "")[:FILE_CHANGE_SNIPPET_CHARS]
+                    or None,
+                )
+                doc = change.doc()
+                doc.pop("_id")
+                file_requests.append(
+                    UpdateOne(
+                        {"commit_id": change.commit_id, "file_path": change.file_path},
+                        {"$set": doc},
+                        upsert=True,
+                    )
+                )
+        file_count = len(file_requests)
+        if file_requests:
+            try:
+                await self.engine.get_collection(FileChange).bulk_write(
+                    file_requests, ordered=False
+                )
+            except BulkWriteError as bwe:
+                details = bwe.details
+                file_count = details.get("nUpserted", 0) + details.get("nMatched", 0)
+                logger.warning(
+                    f"⚠️ {len(details.get('writeErrors', []))} of {len(file_requests)} "
+                    f"file change writes failed"
+                )
+
+        return upserted, file_count
+
     async def add_technologies(
         self, repository_id: str, technologies_data: List[Dict[str, Any]]
     ) -> int:
@@ -504,6 +614,7 @@ class RepositoryService:
 
             obj_id = ObjectId(repository_id)
             processed_count = 0
+            created_count = 0
 
             for tech_data in technologies_data:
                 try:
@@ -532,6 +643,7 @@ class RepositoryService:
                             tech_metadata=tech_data.get("metadata"),
                         )
                         await self.engine.save(technology)
+                        created_count += 1
 
                     processed_count += 1
 
@@ -541,6 +653,10 @@ class RepositoryService:
                     )
                     continue
 
+            await increment_repository_counters(
+                self.engine, obj_id, technology_count=created_count
+            )
+
             logger.info(
                 f"✅ Processed {processed_count} technologies for repository {repository_id}"
             )
@@ -660,6 +776,7 @@ class RepositoryService:
             repository = await self.engine.find_one(Repository, Repository.id == obj_id)
             if repository:
                 repository.total_commits = commit_count
+                repository.commit_count = commit_count
                 repository.updated_at = datetime.utcnow()
                 await self.engine.save(repository)
 
@@ -872,27 +989,22 @@ class RepositoryService:
                             analysis_count = repo.get_analysis_count() + 1
                             unique_users = repo.get_unique_users() + 1
 
-                            updated_repo = Repository(
-                                id=repo.id,
-                                url=repo.url,
-                                name=repo.name,
-                                default_branch=repo.default_branch,
-                                status=repo.status,
-                                total_commits=repo.total_commits,
-                                created_at=repo.created_at,
-                                updated_at=datetime.utcnow(),
-                                last_analyzed=repo.last_analyzed,
-                                error_message=repo.error_message,
-                                is_public=repo.is_public,
-                                created_by_user=repo.created_by_user
-                                or ObjectId(user_id),
-                                analysis_count=analysis_count,
-                                unique_users=unique_users,
-                                tags=repo.tags,
-                                description=repo.description,
-                                primary_language=repo.primary_language,
+                            # Targeted update so counters and markers maintained
+                            # elsewhere are not overwritten by a full save
+                            await self.db_manager.engine.get_collection(
+                                Repository
+                            ).update_one(
+                                {"_id": repo.id},
+                                {
+                                    "$set": {
+                                        "analysis_count": analysis_count,
+                                        "unique_users": unique_users,
+                                        "updated_at": datetime.utcnow(),
+                                        "created_by_user": repo.created_by_user
+                                        or ObjectId(user_id),
+                                    }
+                                },
                             )
-                            await self.db_manager.engine.save(updated_repo)
                             logger.info(
                                 f"📊 Updated repository stats: {analysis_count} analyses, {unique_users} unique users"
                             )
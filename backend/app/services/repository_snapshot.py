@@ -0,0 +1,194 @@
+"""
+Repository Snapshot
+
+One scan of the HEAD tree shared by every analyzer in a run. The file index
+(path, size, language, blob id) comes from a single ``git ls-tree -r -l``
+call, and file contents are read lazily through the bounded blob reader,
+decoded once and memoized in an LRU store with a size cap, so analyzers that
+look at the same file do not re-open and re-decode it from disk.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set
+
+from git import Repo
+
+from app.services.blob_reader import BlobReader
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SnapshotFile:
+    """One blob in the snapshot tree"""
+
+    path: str
+    size: int
+    language: str
+    blob_sha: str
+
+
+class RepositorySnapshot:
+    """File index of a repository revision with a lazy, memoized content store"""
+
+    def __init__(
+        self,
+        repo_path: str,
+        files: List[SnapshotFile],
+        reader: Optional[BlobReader] = None,
+        max_cached_chars: int = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            repo_path: Working directory the paths are relative to
+            files: Blobs of the snapshot tree
+            reader: Blob reader used for content; contents are read from
+                ``repo_path`` on disk when omitted
+            max_cached_chars: Upper bound on decoded text kept in memory
+        """
+        self.repo_path = repo_path
+        self.reader = reader
+        self.max_cached_chars = max_cached_chars
+        self._files: Dict[str, SnapshotFile] = {f.path: f for f in files}
+        self._contents: "OrderedDict[str, str]" = OrderedDict()
+        self._unreadable: Set[str] = set()
+        self._cached_chars = 0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "unreadable": 0,
+            "evictions": 0,
+        }
+
+    @classmethod
+    def build(
+        cls,
+        repo: Repo,
+        language_map: Optional[Dict[str, str]] = None,
+        reader: Optional[BlobReader] = None,
+        max_cached_chars: int = 64 * 1024 * 1024,
+        rev: str = "HEAD",
+    ) -> "RepositorySnapshot":
+        """Index every blob of ``rev`` with one ``git ls-tree`` call"""
+        language_map = language_map or {}
+        files: List[SnapshotFile] = []
+        output = repo.git.ls_tree("-r", "-l", "-z", "--full-tree", rev)
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            # <mode> SP <type> SP <sha> SP+ <size> TAB <path>
+            meta, path = entry.split("\t", 1)
+            _mode, obj_type, sha, size = meta.split()
+            if obj_type != "blob":
+                continue
+            ext = os.path.splitext(path)[1].lower()
+            files.append(
+                SnapshotFile(
+                    path=path,
+                    size=int(size),
+                    language=language_map.get(ext, "Other"),
+                    blob_sha=sha,
+                )
+            )
+        logger.info(f"📸 Indexed {len(files)} files from {rev}")
+        return cls(repo.working_dir, files, reader, max_cached_chars)
+
+    @classmethod
+    def from_paths(
+        cls, repo_path: str, paths: List[str], max_cached_chars: int = 64 * 1024 * 1024
+    ) -> "RepositorySnapshot":
+        """Disk-backed snapshot of an explicit file list (no git index needed)"""
+        files = []
+        for path in paths:
+            try:
+                size = os.path.getsize(os.path.join(repo_path, path))
+            except OSError:
+                continue
+            files.append(SnapshotFile(path=path, size=size, language="Other", blob_sha=""))
+        return cls(repo_path, files, None, max_cached_chars)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._files
+
+    def __iter__(self) -> Iterator[SnapshotFile]:
+        return iter(self._files.values())
+
+    @property
+    def paths(self) -> List[str]:
+        return list(self._files)
+
+    def get(self, path: str) -> Optional[SnapshotFile]:
+        return self._files.get(path)
+
+    def read_text(self, path: str) -> Optional[str]:
+        """
+        Decoded content of a snapshot file, read at most once while cached.
+
+        Returns None for unknown, oversized, binary or unreadable files.
+        """
+        entry = self._files.get(path)
+        if entry is None:
+            return None
+        with self._lock:
+            if path in self._contents:
+                self._contents.move_to_end(path)
+                self.stats["hits"] += 1
+                return self._contents[path]
+            if path in self._unreadable:
+                self.stats["hits"] += 1
+                return None
+
+            self.stats["misses"] += 1
+            text = self._load(entry)
+            if text is None:
+                self._unreadable.add(path)
+                self.stats["unreadable"] += 1
+                return None
+            self._remember(path, text)
+            return text
+
+    def _load(self, entry: SnapshotFile) -> Optional[str]:
+        try:
+            if self.reader is not None:
+                return self.reader.read_text(entry.blob_sha, self.reader.max_blob_bytes)
+            with open(
+                os.path.join(self.repo_path, entry.path), "r", encoding="utf-8", errors="ignore"
+            ) as f:
+                return f.read()
+        except Exception as e:
+            logger.debug(f"Could not read {entry.path}: {e}")
+            return None
+
+    def _remember(self, path: str, text: str) -> None:
+        if len(text) > self.max_cached_chars:
+            return
+        self._contents[path] = text
+        self._cached_chars += len(text)
+        while self._cached_chars > self.max_cached_chars:
+            _evicted, old = self._contents.popitem(last=False)
+            self._cached_chars -= len(old)
+            self.stats["evictions"] += 1
+
+
+def read_repository_file(
+    repo_path: str, file_path: str, snapshot: Optional[RepositorySnapshot] = None
+) -> Optional[str]:
+    """
+    Read a repository file through the snapshot when it covers the path,
+    otherwise from disk. Returns None if the file cannot be read.
+    """
+    if snapshot is not None and file_path in snapshot:
+        return snapshot.read_text(file_path)
+    full_path = os.path.join(repo_path, file_path)
+    if not os.path.isfile(full_path):
+        return None
+    with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
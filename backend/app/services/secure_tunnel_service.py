@@ -11,6 +11,11 @@ Security Features:
 - Rate limiting per user
 - Request validation and audit logging
 - User-controlled tunnel enable/disable
+
+Each tunnel keeps one pooled HTTP client for its lifetime, so proxied requests
+reuse keep-alive connections to the tunnel edge instead of paying a TLS
+handshake per call. Clients are evicted when a tunnel is disabled, replaced,
+expires, turns unhealthy, or sits idle.
 """
 
 import asyncio
@@ -20,10 +25,10 @@ import secrets
 import time
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any, List
+from typing import AsyncIterator, Dict, Optional, Any, List
 from enum import Enum
 import httpx
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 logger = logging.getLogger(__name__)
 
@@ -68,7 +73,15 @@ class TunnelConnection(BaseModel):
     last_used: datetime
     expires_at: datetime
     request_count: int = 0
+    consecutive_failures: int = 0
     error_message: Optional[str] = None
+    # When the tunnel was last marked ERROR (or last failed a recovery probe)
+    unhealthy_since: Optional[datetime] = None
+
+    # Pooled client for this tunnel, created on first proxied request
+    _client: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
+    # Proxied requests and streams currently using the client
+    _in_flight: int = PrivateAttr(default=0)
 
 
 class TunnelRequest(BaseModel):
@@ -100,6 +113,15 @@ class SecureTunnelService:
         # Token settings
         self.token_ttl_hours = 24
 
+        # Pooled per-tunnel clients
+        self.client_max_connections = 4
+        self.client_idle_seconds = 300  # evict clients unused this long
+        self.max_retries = 2  # retries on connection errors and 502/503/504
+        self.retry_backoff = 0.5  # seconds, doubled per attempt
+        self.max_consecutive_failures = 3  # failed requests, then the tunnel is marked ERROR
+        self.error_cooldown_seconds = 30  # then one request may probe an ERROR tunnel
+        self.client_stats = {"opened": 0, "evicted": 0, "retries": 0}
+
     def generate_auth_token(self) -> str:
         """Generate a cryptographically secure authentication token"""
         return secrets.token_urlsafe(32)
@@ -145,7 +167,10 @@ class SecureTunnelService:
                 expires_at=datetime.utcnow() + timedelta(hours=self.token_ttl_hours),
             )
 
-            # Store tunnel
+            # Store tunnel, dropping the client of any tunnel it replaces
+            previous = self.active_tunnels.get(user_id)
+            if previous is not None:
+                self._evict_client(previous)
             self.active_tunnels[user_id] = tunnel
 
             logger.info(f"✅ Tunnel registered for user {user_id} via {tunnel_method}")
@@ -288,6 +313,7 @@ class SecureTunnelService:
         if tunnel and tunnel.expires_at < datetime.utcnow():
             logger.warning(f"⚠️ Tunnel expired for user {user_id}")
             tunnel.status = TunnelStatus.DISABLED
+            self._evict_client(tunnel)
             return None
 
         return tunnel
@@ -316,24 +342,9 @@ class SecureTunnelService:
         request_id = secrets.token_urlsafe(16)
         start_time = time.time()
 
-        # Rate limiting check
-        if not self._check_rate_limit(user_id):
-            logger.warning(f"⚠️ Rate limit exceeded for user {user_id}")
-            return {
-                "success": False,
-                "error": "Rate limit exceeded. Please wait before making more requests.",
-                "error_code": "RATE_LIMIT_EXCEEDED",
-            }
-
-        # Get tunnel
-        tunnel = self.get_tunnel(user_id)
-        if not tunnel or tunnel.status != TunnelStatus.CONNECTED:
-            logger.warning(f"⚠️ No active tunnel for user {user_id}")
-            return {
-                "success": False,
-                "error": "No active tunnel connection. Please enable tunnel first.",
-                "error_code": "TUNNEL_NOT_AVAILABLE",
-            }
+        tunnel, error = self._acquire_tunnel(user_id)
+        if error:
+            return error
 
         try:
             # Build request
@@ -341,44 +352,38 @@ class SecureTunnelService:
 
             logger.info(f"🔄 Proxying request for user {user_id}: {method} {endpoint}")
 
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                if method == "POST":
-                    response = await client.post(url, json=data)
-                elif method == "GET":
-                    response = await client.get(url, params=data)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
+            response = await self._send(tunnel, method, url, data, timeout)
 
-                # Update tunnel stats
-                tunnel.last_used = datetime.utcnow()
-                tunnel.request_count += 1
+            # Update tunnel stats
+            tunnel.last_used = datetime.utcnow()
+            tunnel.request_count += 1
 
-                duration_ms = (time.time() - start_time) * 1000
+            duration_ms = (time.time() - start_time) * 1000
 
-                # Log request
-                self._log_request(
-                    request_id=request_id,
-                    user_id=user_id,
-                    endpoint=endpoint,
-                    method=method,
-                    duration_ms=duration_ms,
-                    status_code=response.status_code,
-                )
+            # Log request
+            self._log_request(
+                request_id=request_id,
+                user_id=user_id,
+                endpoint=endpoint,
+                method=method,
+                duration_ms=duration_ms,
+                status_code=response.status_code,
+            )
 
-                if response.status_code == 200:
-                    logger.info(f"✅ Request successful ({duration_ms:.0f}ms)")
-                    return {
-                        "success": True,
-                        "data": response.json(),
-                        "duration_ms": duration_ms,
-                    }
-                else:
-                    logger.error(f"❌ Ollama error: HTTP {response.status_code}")
-                    return {
-                        "success": False,
-                        "error": f"Ollama returned HTTP {response.status_code}",
-                        "status_code": response.status_code,
-                    }
+            if response.status_code == 200:
+                logger.info(f"✅ Request successful ({duration_ms:.0f}ms)")
+                return {
+                    "success": True,
+                    "data": response.json(),
+                    "duration_ms": duration_ms,
+                }
+            else:
+                logger.error(f"❌ Ollama error: HTTP {response.status_code}")
+                return {
+                    "success": False,
+                    "error": f"Ollama returned HTTP {response.status_code}",
+                    "status_code": response.status_code,
+                }
 
         except httpx.TimeoutException:
             duration_ms = (time.time() - start_time) * 1000
@@ -412,6 +417,259 @@ class SecureTunnelService:
                 "error": f"Tunnel error: {str(e)}",
                 "error_code": "TUNNEL_ERROR",
             }
+        finally:
+            self._release_tunnel(tunnel)
+
+    async def stream_ollama_request(
+        self,
+        user_id: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        timeout: float = 300.0,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a request through the user's tunnel, passing through each
+        newline-delimited JSON chunk Ollama sends as it arrives
+
+        Yields ``{"success": True, "data": chunk}`` per chunk, or a single
+        ``{"success": False, ...}`` error in the same shape as
+        ``proxy_ollama_request``.
+        """
+        request_id = secrets.token_urlsafe(16)
+        start_time = time.time()
+
+        tunnel, error = self._acquire_tunnel(user_id)
+        if error:
+            yield error
+            return
+
+        url = f"{tunnel.tunnel_url}{endpoint}"
+        payload = {**(data or {}), "stream": True}
+        status_code: Optional[int] = None
+        error_message: Optional[str] = None
+        logger.info(f"🔄 Streaming request for user {user_id}: POST {endpoint}")
+
+        try:
+            response = await self._send(tunnel, "POST", url, payload, timeout, stream=True)
+            status_code = response.status_code
+            try:
+                tunnel.last_used = datetime.utcnow()
+                tunnel.request_count += 1
+                if response.status_code != 200:
+                    error_message = f"Ollama returned HTTP {response.status_code}"
+                    yield {
+                        "success": False,
+                        "error": error_message,
+                        "status_code": response.status_code,
+                    }
+                    return
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        yield {"success": True, "data": json.loads(line)}
+            finally:
+                await response.aclose()
+        except httpx.TimeoutException:
+            error_message = "Timeout"
+            yield {
+                "success": False,
+                "error": "Request timeout - Ollama may be processing a large request",
+                "error_code": "TIMEOUT",
+            }
+        except Exception as e:
+            error_message = str(e)
+            logger.error(f"❌ Streaming proxy error for user {user_id}: {e}")
+            yield {
+                "success": False,
+                "error": f"Tunnel error: {str(e)}",
+                "error_code": "TUNNEL_ERROR",
+            }
+        finally:
+            self._release_tunnel(tunnel)
+            self._log_request(
+                request_id=request_id,
+                user_id=user_id,
+                endpoint=endpoint,
+                method="POST",
+                duration_ms=(time.time() - start_time) * 1000,
+                status_code=status_code,
+                error=error_message,
+            )
+
+    def _acquire_tunnel(self, user_id: str):
+        """Rate-limit and tunnel checks shared by the proxy paths
+
+        Returns ``(tunnel, None)`` when the request may proceed, otherwise
+        ``(None, error_response)``.
+        """
+        self.evict_idle_clients()
+
+        # Rate limiting check
+        if not self._check_rate_limit(user_id):
+            logger.warning(f"⚠️ Rate limit exceeded for user {user_id}")
+            return None, {
+                "success": False,
+                "error": "Rate limit exceeded. Please wait before making more requests.",
+                "error_code": "RATE_LIMIT_EXCEEDED",
+            }
+
+        # Get tunnel
+        tunnel = self.get_tunnel(user_id)
+        if tunnel and tunnel.status == TunnelStatus.ERROR and self._probe_due(tunnel):
+            # Half-open: let this request through; success reconnects the
+            # tunnel, failure restarts the cooldown
+            logger.info(f"🔁 Probing unhealthy tunnel for user {user_id}")
+            tunnel.unhealthy_since = datetime.utcnow()
+        elif not tunnel or tunnel.status != TunnelStatus.CONNECTED:
+            logger.warning(f"⚠️ No active tunnel for user {user_id}")
+            return None, {
+                "success": False,
+                "error": "No active tunnel connection. Please enable tunnel first.",
+                "error_code": "TUNNEL_NOT_AVAILABLE",
+            }
+        # Held until the request or stream finishes so idle eviction never
+        # closes a client under a long-running generation
+        tunnel._in_flight += 1
+        tunnel.last_used = datetime.utcnow()
+        return tunnel, None
+
+    def _release_tunnel(self, tunnel: TunnelConnection) -> None:
+        """Counterpart of ``_acquire_tunnel`` once the request has finished"""
+        tunnel._in_flight = max(tunnel._in_flight - 1, 0)
+        tunnel.last_used = datetime.utcnow()
+
+    def _probe_due(self, tunnel: TunnelConnection) -> bool:
+        """Whether an ERROR tunnel has cooled down enough to be retried"""
+        since = tunnel.unhealthy_since or tunnel.last_used
+        return datetime.utcnow() - since >= timedelta(seconds=self.error_cooldown_seconds)
+
+    async def _send(
+        self,
+        tunnel: TunnelConnection,
+        method: str,
+        url: str,
+        data: Optional[Dict[str, Any]],
+        timeout: float,
+        stream: bool = False,
+    ) -> httpx.Response:
+        """Send through the tunnel's pooled client, retrying edge failures
+
+        Connection errors and 502/503/504 from the tunnel edge are retried
+        with backoff. A request that still fails counts once towards the
+        tunnel's consecutive failures, however many attempts it took.
+        Timeouts are not retried: Ollama may simply be busy with a long
+        generation.
+        """
+        if method not in ("POST", "GET"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        attempt = 0
+        while True:
+            client = self._get_client(tunnel)
+            request = client.build_request(
+                method,
+                url,
+                json=data if method == "POST" else None,
+                params=data if method == "GET" else None,
+                timeout=timeout,
+            )
+            try:
+                response = await client.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError) as e:
+                if attempt >= self.max_retries:
+                    self._record_failure(tunnel, str(e) or type(e).__name__)
+                    raise
+            else:
+                if response.status_code not in (502, 503, 504):
+                    self._record_success(tunnel)
+                    return response
+                if attempt >= self.max_retries:
+                    self._record_failure(tunnel, f"HTTP {response.status_code}")
+                    return response
+                if stream:
+                    await response.aclose()
+
+            attempt += 1
+            self.client_stats["retries"] += 1
+            logger.warning(
+                f"⚠️ Tunnel request for user {tunnel.user_id} failed, "
+                f"retrying ({attempt}/{self.max_retries})"
+            )
+            await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+
+    def _record_success(self, tunnel: TunnelConnection) -> None:
+        if tunnel.status == TunnelStatus.ERROR:
+            logger.info(f"✅ Tunnel for user {tunnel.user_id} recovered")
+            tunnel.status = TunnelStatus.CONNECTED
+        tunnel.consecutive_failures = 0
+        tunnel.error_message = None
+        tunnel.unhealthy_since = None
+
+    def _record_failure(self, tunnel: TunnelConnection, reason: str) -> None:
+        tunnel.consecutive_failures += 1
+        tunnel.error_message = reason
+        if tunnel.status == TunnelStatus.ERROR:
+            # Failed recovery probe: wait out another cooldown
+            tunnel.unhealthy_since = datetime.utcnow()
+            self._evict_client(tunnel)
+        elif tunnel.consecutive_failures >= self.max_consecutive_failures:
+            logger.error(
+                f"❌ Tunnel for user {tunnel.user_id} failed "
+                f"{tunnel.consecutive_failures} times in a row, marking unhealthy"
+            )
+            tunnel.status = TunnelStatus.ERROR
+            tunnel.unhealthy_since = datetime.utcnow()
+            self._evict_client(tunnel)
+
+    def _get_client(self, tunnel: TunnelConnection) -> httpx.AsyncClient:
+        """The tunnel's pooled client, created on first use"""
+        client = tunnel._client
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.client_max_connections,
+                    max_keepalive_connections=self.client_max_connections,
+                    keepalive_expiry=self.client_idle_seconds,
+                ),
+                timeout=30.0,
+            )
+            tunnel._client = client
+            self.client_stats["opened"] += 1
+        return client
+
+    def _evict_client(self, tunnel: TunnelConnection) -> None:
+        """Drop the tunnel's pooled client and close its connections"""
+        client, tunnel._client = tunnel._client, None
+        if client is None or client.is_closed:
+            return
+        self.client_stats["evicted"] += 1
+        try:
+            asyncio.get_running_loop().create_task(client.aclose())
+        except RuntimeError:
+            # No running loop (sync caller at shutdown); the sockets are
+            # released when the client is garbage collected
+            pass
+
+    def evict_idle_clients(self) -> int:
+        """Close clients of tunnels unused for ``client_idle_seconds``
+
+        Clients with requests or streams still in flight are never idle.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.client_idle_seconds)
+        evicted = 0
+        for tunnel in self.active_tunnels.values():
+            if tunnel._client is not None and not tunnel._in_flight and tunnel.last_used < cutoff:
+                self._evict_client(tunnel)
+                evicted += 1
+        if evicted:
+            logger.info(f"🧹 Evicted {evicted} idle tunnel clients")
+        return evicted
+
+    async def aclose(self) -> None:
+        """Close every pooled tunnel client (application shutdown)"""
+        for tunnel in self.active_tunnels.values():
+            client, tunnel._client = tunnel._client, None
+            if client is not None and not client.is_closed:
+                await client.aclose()
 
     def _check_rate_limit(self, user_id: str) -> bool:
         """Check if user is within rate limit"""
@@ -469,6 +727,7 @@ class SecureTunnelService:
         if user_id in self.active_tunnels:
             tunnel = self.active_tunnels[user_id]
             tunnel.status = TunnelStatus.DISABLED
+            self._evict_client(tunnel)
             logger.info(f"🔌 Tunnel disabled for user {user_id}")
             del self.active_tunnels[user_id]
             return {"success": True, "message": "Tunnel disabled"}
@@ -499,6 +758,9 @@ class SecureTunnelService:
             "expires_at": tunnel.expires_at.isoformat(),
             "request_count": tunnel.request_count,
             "last_used": tunnel.last_used.isoformat(),
+            "consecutive_failures": tunnel.consecutive_failures,
+            "unhealthy_since": tunnel.unhealthy_since.isoformat() if tunnel.unhealthy_since else None,
+            "client_pooled": tunnel._client is not None,
         }
 
     def get_recent_requests(
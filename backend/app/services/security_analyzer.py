@@ -20,6 +20,8 @@ from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
+from app.services.source_index import SourceIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -293,7 +295,8 @@ class SecurityAnalyzer:
             }
         }
 
-    def analyze_code(self, code: str, file_path: str, language: str = None) -> List[SecurityVulnerability]:
+    def analyze_code(self, code: str, file_path: str, language: str = None,
+                     index: Optional[SourceIndex] = None) -> List[SecurityVulnerability]:
         """
         Analyze code for security vulnerabilities
         
@@ -301,6 +304,7 @@ class SecurityAnalyzer:
             code: Source code to analyze
             file_path: Path to the file being analyzed
             language: Programming language (auto-detected if None)
+            index: Line index of ``code`` when the caller already built one
             
         Returns:
             List of detected security vulnerabilities
@@ -309,7 +313,8 @@ class SecurityAnalyzer:
             language = self._detect_language(file_path)
             
         vulnerabilities = []
-        lines = code.split('\n')
+        if index is None:
+            index = SourceIndex(code)
         
         # Analyze each pattern category
         for pattern_name, pattern_info in self.patterns.items():
@@ -317,32 +322,31 @@ class SecurityAnalyzer:
                 vulnerabilities.extend(
                     self._find_pattern_matches(
                         pattern, pattern_name, pattern_info, 
-                        code, lines, file_path, language
+                        index, file_path, language
                     )
                 )
         
         # Add crypto-specific analysis
-        vulnerabilities.extend(self._analyze_crypto_usage(code, lines, file_path))
+        vulnerabilities.extend(self._analyze_crypto_usage(index, file_path))
         
         # Add language-specific analysis
         if language.lower() in ['javascript', 'typescript']:
-            vulnerabilities.extend(self._analyze_javascript_security(code, lines, file_path))
+            vulnerabilities.extend(self._analyze_javascript_security(index, file_path))
         elif language.lower() == 'python':
-            vulnerabilities.extend(self._analyze_python_security(code, lines, file_path))
+            vulnerabilities.extend(self._analyze_python_security(index, file_path))
         elif language.lower() == 'java':
-            vulnerabilities.extend(self._analyze_java_security(code, lines, file_path))
+            vulnerabilities.extend(self._analyze_java_security(index, file_path))
             
         return vulnerabilities
 
     def _find_pattern_matches(self, pattern: str, pattern_name: str, pattern_info: Dict,
-                            code: str, lines: List[str], file_path: str, language: str) -> List[SecurityVulnerability]:
+                            index: SourceIndex, file_path: str, language: str) -> List[SecurityVulnerability]:
         """Find matches for a specific security pattern"""
         vulnerabilities = []
         
-        for match in re.finditer(pattern, code, re.MULTILINE):
+        for match in re.finditer(pattern, index.content, re.MULTILINE):
             # Find line number
-            line_num = code[:match.start()].count('\n') + 1
-            line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+            line_num, line_content = index.line_at(match.start())
             
             # Calculate confidence based on context
             confidence = self._calculate_confidence(match, line_content, pattern_name, language)
@@ -370,15 +374,14 @@ class SecurityAnalyzer:
             
         return vulnerabilities
 
-    def _analyze_crypto_usage(self, code: str, lines: List[str], file_path: str) -> List[SecurityVulnerability]:
+    def _analyze_crypto_usage(self, index: SourceIndex, file_path: str) -> List[SecurityVulnerability]:
         """Analyze cryptographic implementations"""
         vulnerabilities = []
         
         for pattern_name, pattern_info in self.crypto_patterns.items():
             for pattern in pattern_info["patterns"]:
-                for match in re.finditer(pattern, code, re.MULTILINE):
-                    line_num = code[:match.start()].count('\n') + 1
-                    line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+                for match in re.finditer(pattern, index.content, re.MULTILINE):
+                    line_num, line_content = index.line_at(match.start())
                     
                     vuln_id = self._generate_vulnerability_id(pattern_name, file_path, line_num)
                     
@@ -401,7 +404,7 @@ class SecurityAnalyzer:
                     
         return vulnerabilities
 
-    def _analyze_javascript_security(self, code: str, lines: List[str], file_path: str) -> List[SecurityVulnerability]:
+    def _analyze_javascript_security(self, index: SourceIndex, file_path: str) -> List[SecurityVulnerability]:
         """JavaScript-specific security analysis"""
         vulnerabilities = []
         
@@ -413,9 +416,8 @@ class SecurityAnalyzer:
         ]
         
         for pattern in prototype_pollution_patterns:
-            for match in re.finditer(pattern, code, re.MULTILINE):
-                line_num = code[:match.start()].count('\n') + 1
-                line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+            for match in re.finditer(pattern, index.content, re.MULTILINE):
+                line_num, line_content = index.line_at(match.start())
                 
                 vuln_id = self._generate_vulnerability_id("prototype_pollution", file_path, line_num)
                 
@@ -438,7 +440,7 @@ class SecurityAnalyzer:
                 
         return vulnerabilities
 
-    def _analyze_python_security(self, code: str, lines: List[str], file_path: str) -> List[SecurityVulnerability]:
+    def _analyze_python_security(self, index: SourceIndex, file_path: str) -> List[SecurityVulnerability]:
         """Python-specific security analysis"""
         vulnerabilities = []
         
@@ -450,9 +452,8 @@ class SecurityAnalyzer:
         ]
         
         for pattern in dangerous_eval_patterns:
-            for match in re.finditer(pattern, code, re.MULTILINE):
-                line_num = code[:match.start()].count('\n') + 1
-                line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+            for match in re.finditer(pattern, index.content, re.MULTILINE):
+                line_num, line_content = index.line_at(match.start())
                 
                 vuln_id = self._generate_vulnerability_id("dangerous_eval", file_path, line_num)
                 
@@ -475,7 +476,7 @@ class SecurityAnalyzer:
                 
         return vulnerabilities
 
-    def _analyze_java_security(self, code: str, lines: List[str], file_path: str) -> List[SecurityVulnerability]:
+    def _analyze_java_security(self, index: SourceIndex, file_path: str) -> List[SecurityVulnerability]:
         """Java-specific security analysis"""
         vulnerabilities = []
         
@@ -487,9 +488,8 @@ class SecurityAnalyzer:
         ]
         
         for pattern in unsafe_reflection_patterns:
-            for match in re.finditer(pattern, code, re.MULTILINE):
-                line_num = code[:match.start()].count('\n') + 1
-                line_content = lines[line_num - 1] if line_num <= len(lines) else ""
+            for match in re.finditer(pattern, index.content, re.MULTILINE):
+                line_num, line_content = index.line_at(match.start())
                 
                 vuln_id = self._generate_vulnerability_id("unsafe_reflection", file_path, line_num)
                 
@@ -0,0 +1,55 @@
+"""
+Source Index
+
+Line-offset index over a file's text, built once per file and shared by every
+detector that scans it. Newline offsets are computed once so a regex match
+position anywhere in the file maps back to its line with a binary search
+instead of re-splitting or counting newlines per match.
+"""
+
+from bisect import bisect_right
+from functools import cached_property
+from typing import List, Tuple
+
+
+class SourceIndex:
+    """Text plus the start offset of every line (lines split on "\\n")"""
+
+    def __init__(self, content: str):
+        self.content = content
+        starts: List[int] = [0]
+        find = content.find
+        pos = find("\n")
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find("\n", pos + 1)
+        self.line_starts = starts
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts)
+
+    def line_index(self, offset: int) -> int:
+        """0-based index of the line containing ``offset``"""
+        return bisect_right(self.line_starts, offset) - 1
+
+    def line_span(self, index: int) -> Tuple[int, int]:
+        """(start, end) offsets of a line, excluding its newline"""
+        start = self.line_starts[index]
+        if index + 1 < len(self.line_starts):
+            return start, self.line_starts[index + 1] - 1
+        return start, len(self.content)
+
+    def line(self, index: int) -> str:
+        start, end = self.line_span(index)
+        return self.content[start:end]
+
+    def line_at(self, offset: int) -> Tuple[int, str]:
+        """(1-based line number, line text) of the line containing ``offset``"""
+        index = self.line_index(offset)
+        return index + 1, self.line(index)
+
+    @cached_property
+    def lines(self) -> List[str]:
+        """All lines, split on first use"""
+        return self.content.split("\n")
@@ -0,0 +1,206 @@
+"""
+Static Analysis Runner
+
+Runs the enhanced technology, pattern and quality analyzers off the event
+loop. Source files are chosen once by the budgeted sampler and read once in
+the parent, batches of files are analyzed in the shared analysis process pool
+(one work unit per file, run through every analyzer), and the per-file
+results are merged and ranked by the analyzers' own reduce steps, so the
+output matches a sequential run over the same files.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.analysis_executor import run_in_analysis_executor
+from app.services.enhanced_code_quality_analyzer import (
+    EnhancedCodeQualityAnalyzer,
+    QualityReport,
+)
+from app.services.enhanced_pattern_detector import EnhancedPatternDetector, PatternMatch
+from app.services.enhanced_technology_detector import (
+    EnhancedTechnologyDetector,
+    TechnologyInfo,
+)
+from app.services.file_sampler import CoverageReport, FileSampler, select_source_files
+from app.services.repository_snapshot import RepositorySnapshot, read_repository_file
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileWorkUnit:
+    """One file and the analyzers to run on it"""
+
+    path: str
+    content: str
+    technologies: bool = True
+    patterns: bool = True
+    quality: bool = True
+
+
+@dataclass
+class FileWorkResult:
+    """Per-file output of each analyzer that ran on it"""
+
+    path: str
+    technologies: Optional[Dict[str, List[TechnologyInfo]]] = None
+    patterns: Optional[List[PatternMatch]] = None
+    quality: Optional[Dict[str, Any]] = None
+
+
+Analyzers = Tuple[EnhancedTechnologyDetector, EnhancedPatternDetector, EnhancedCodeQualityAnalyzer]
+
+_worker_analyzers: Optional[Analyzers] = None
+
+
+def _analyze_units(analyzers: Analyzers, units: List[FileWorkUnit]) -> List[FileWorkResult]:
+    tech_detector, pattern_detector, quality_analyzer = analyzers
+    results = []
+    for unit in units:
+        result = FileWorkResult(path=unit.path)
+        # A failing analyzer only drops its own result for the file
+        for field_name, enabled, analyzer in (
+            ("technologies", unit.technologies, tech_detector),
+            ("patterns", unit.patterns, pattern_detector),
+            ("quality", unit.quality, quality_analyzer),
+        ):
+            if not enabled:
+                continue
+            try:
+                setattr(result, field_name, analyzer.analyze_file(unit.content, unit.path))
+            except Exception as e:
+                logger.debug(f"Error analyzing file {unit.path} ({field_name}): {e}")
+        results.append(result)
+    return results
+
+
+def analyze_file_batch(units: List[FileWorkUnit]) -> List[FileWorkResult]:
+    """Process-pool entry point for a batch of per-file work units"""
+    global _worker_analyzers
+
+    if _worker_analyzers is None:
+        _worker_analyzers = (
+            EnhancedTechnologyDetector(),
+            EnhancedPatternDetector(),
+            EnhancedCodeQualityAnalyzer(),
+        )
+    return _analyze_units(_worker_analyzers, units)
+
+
+class StaticAnalysisRunner:
+    """Map/reduce driver for the enhanced static analyzers"""
+
+    def __init__(
+        self,
+        tech_detector: EnhancedTechnologyDetector,
+        pattern_detector: EnhancedPatternDetector,
+        quality_analyzer: EnhancedCodeQualityAnalyzer,
+        batch_size: int = 8,
+        sampler: Optional[FileSampler] = None,
+        time_budget_s: float = 0.0,
+    ):
+        """
+        Args:
+            batch_size: Files per process-pool work unit
+            sampler: File/byte budget for selecting source files
+            time_budget_s: Stop waiting for further work units after this
+                many seconds (0 = no limit); results analyzed so far are kept
+        """
+        self.tech_detector = tech_detector
+        self.pattern_detector = pattern_detector
+        self.quality_analyzer = quality_analyzer
+        self.batch_size = max(1, batch_size)
+        self.sampler = sampler
+        self.time_budget_s = time_budget_s
+
+    async def run(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> Tuple[
+        Dict[str, List[TechnologyInfo]],
+        Dict[str, List[PatternMatch]],
+        QualityReport,
+        CoverageReport,
+    ]:
+        """Return (technologies, patterns, quality report, coverage) for the repository"""
+        units, coverage = await asyncio.to_thread(
+            self.build_units, repo_path, file_list, snapshot
+        )
+        batches = [
+            units[i : i + self.batch_size] for i in range(0, len(units), self.batch_size)
+        ]
+        tasks = [
+            asyncio.ensure_future(run_in_analysis_executor(analyze_file_batch, batch))
+            for batch in batches
+        ]
+        results: List[FileWorkResult] = []
+        if tasks:
+            # Batches are queued in sampling priority order, so whatever
+            # finishes inside the time budget is still a stratified sample
+            done, pending = await asyncio.wait(tasks, timeout=self.time_budget_s or None)
+            for task in pending:
+                task.cancel()
+            if pending:
+                coverage.timed_out = True
+                logger.warning(
+                    f"⏱️ Static analysis time budget ({self.time_budget_s}s) reached, "
+                    f"skipped {len(pending)}/{len(tasks)} work units"
+                )
+            for task in tasks:
+                if task in done and task.exception() is None:
+                    results.extend(task.result())
+                elif task in done:
+                    logger.warning(f"⚠️ Static analysis work unit failed: {task.exception()}")
+        coverage.analyzed_files = len(results)
+        logger.info(f"⚙️ Analyzed {len(results)} files in {len(batches)} work units")
+        technologies, patterns, quality_report = await asyncio.to_thread(
+            self.merge, repo_path, file_list, results, snapshot
+        )
+        return technologies, patterns, quality_report, coverage
+
+    def build_units(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> Tuple[List[FileWorkUnit], CoverageReport]:
+        """Read each sampled source file once, in sampling priority order"""
+        sample = select_source_files(repo_path, file_list, snapshot, self.sampler)
+        units = []
+        for file_path in sample.paths:
+            try:
+                content = read_repository_file(repo_path, file_path, snapshot)
+            except Exception as e:
+                logger.debug(f"Error reading file {file_path}: {e}")
+                continue
+            if content is None:
+                continue
+            units.append(FileWorkUnit(path=file_path, content=content))
+        return units, sample.coverage
+
+    def merge(
+        self,
+        repo_path: str,
+        file_list: List[str],
+        results: List[FileWorkResult],
+        snapshot: Optional[RepositorySnapshot] = None,
+    ) -> Tuple[Dict[str, List[TechnologyInfo]], Dict[str, List[PatternMatch]], QualityReport]:
+        """Reduce per-file results with each analyzer's merge step"""
+        technologies = self.tech_detector.merge_results(
+            repo_path,
+            file_list,
+            [r.technologies for r in results if r.technologies is not None],
+            snapshot,
+        )
+        patterns = self.pattern_detector.merge_results(
+            [r.patterns for r in results if r.patterns is not None]
+        )
+        quality_report = self.quality_analyzer.merge_results(
+            [r.quality for r in results if r.quality is not None]
+        )
+        return technologies, patterns, quality_report
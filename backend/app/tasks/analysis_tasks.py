@@ -8,6 +8,7 @@ from bson import ObjectId
 
 from app.core.database import get_enhanced_database_manager
 from app.services.analysis_service import AnalysisService
+from app.services.llm_adapters.scheduler import BACKGROUND, llm_request_context
 from app.core.service_manager import (
     get_repository_service,
     get_pattern_service, 
@@ -92,14 +93,18 @@ async def analyze_repository_background(
             logger.info(f"🔍 Cloning repository {repo_url}...")
             logger.info(f"🤖 Running AI analysis with {commit_limit} commits limit...")
 
-            # Run the analysis - this will automatically persist to MongoDB
-            result = await analysis_service.analyze_repository(
-                repo_url,
-                branch,
-                commit_limit,
-                candidate_limit,
-                user_id=user_id,
-            )
+            # Run the analysis - this will automatically persist to MongoDB.
+            # LLM calls queue fairly against other running analyses.
+            with llm_request_context(
+                priority=BACKGROUND, owner=f"analysis:{analysis_session.id}"
+            ):
+                result = await analysis_service.analyze_repository(
+                    repo_url,
+                    branch,
+                    commit_limit,
+                    candidate_limit,
+                    user_id=user_id,
+                )
 
         except asyncio.CancelledError:
             logger.info(f"⏹️  Analysis cancelled for {repo.name}")
@@ -306,13 +311,16 @@ async def analyze_repository_incremental_background(
             logger.info(f"🤖 Running incremental AI analysis with {commit_limit} commits limit...")
 
             # Run the incremental analysis - this will automatically persist to MongoDB
-            result = await analysis_service.analyze_repository_incremental(
-                repo_url,
-                branch,
-                commit_limit,
-                candidate_limit,
-                user_id=user_id,
-            )
+            with llm_request_context(
+                priority=BACKGROUND, owner=f"analysis:{analysis_session.id}"
+            ):
+                result = await analysis_service.analyze_repository_incremental(
+                    repo_url,
+                    branch,
+                    commit_limit,
+                    candidate_limit,
+                    user_id=user_id,
+                )
 
         except asyncio.CancelledError:
             logger.info(f"⏹️  Incremental analysis cancelled for {repo.name}")
@@ -1,11 +1,21 @@
+import asyncio
 import json
+import math
 import os
+import re
 import logging
+import threading
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Pre-tokenizer close to the one BPE tokenizers split code with: letter runs,
+# short digit groups, single punctuation marks and whitespace runs
+_PRETOKEN_RE = re.compile(r"[A-Za-z]+|\d{1,3}|\s+|[^\sA-Za-z\d]")
+
 
 def _logs_dir() -> str:
     """Resolve a stable logs directory under backend/logs relative to this file."""
@@ -20,10 +30,29 @@ def _log_path(filename: str = "analysis_tokens.log") -> str:
     return os.path.join(_logs_dir(), filename)
 
 
+def count_tokens(text: str) -> int:
+    """Local token count for when a provider reports no usage.
+
+    Letter runs cost one token per 8 characters, digit groups and punctuation
+    one each; a single space merges into the following word.
+    """
+    total = 0
+    for piece in _PRETOKEN_RE.findall(text or ""):
+        first = piece[0]
+        if first.isalpha():
+            total += math.ceil(len(piece) / 8)
+        elif first.isspace():
+            if piece != " ":
+                total += 1
+        else:
+            total += 1
+    return total
+
+
 def estimate_tokens_from_text(text: str) -> int:
-    """Rough token estimate: ~4 chars per token (heuristic)."""
+    """Token estimate using the local tokenizer."""
     try:
-        return max(0, int(len(text) / 4))
+        return count_tokens(text)
     except Exception:
         return 0
 
@@ -35,15 +64,147 @@ def estimate_tokens_from_snippets(snippets: List[str]) -> int:
     return total
 
 
+class JsonLogSink:
+    """Buffered JSON-lines writer with size-based rotation.
+
+    Records are buffered in memory and appended in one write on a worker
+    thread once ``buffer_records`` are queued or ``flush_interval_s`` has
+    passed, so callers on the event loop never touch the disk. Outside an
+    event loop records are written immediately.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        buffer_records: int = 100,
+        flush_interval_s: float = 5.0,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_records = max(1, buffer_records)
+        self.flush_interval_s = flush_interval_s
+
+        self._buffer: List[str] = []
+        self._write_lock = threading.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: set = set()
+        self._flush_scheduled = False
+        self.stats: Dict[str, int] = {"records": 0, "flushes": 0, "rotations": 0, "errors": 0}
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.stats["records"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_lines(self._take())
+            return
+
+        if len(self._buffer) >= self.buffer_records:
+            self._schedule_flush()
+        elif self._timer is None or self._timer_loop is not loop:
+            self._timer = loop.call_later(self.flush_interval_s, self._schedule_flush)
+            self._timer_loop = loop
+
+    def _take(self) -> List[str]:
+        lines, self._buffer = self._buffer, []
+        return lines
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_scheduled:
+            return
+        self._flush_scheduled = True
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        self._flush_scheduled = False
+        lines = self._take()
+        if lines:
+            await asyncio.to_thread(self._write_lines, lines)
+
+    def _write_lines(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        data = "".join(lines)
+        try:
+            with self._write_lock:
+                if self._needs_rotation(len(data.encode("utf-8"))):
+                    self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(data)
+            self.stats["flushes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Failed to write token log: {e}")
+
+    def _needs_rotation(self, incoming: int) -> bool:
+        if self.max_bytes <= 0 or not os.path.exists(self.path):
+            return False
+        size = os.path.getsize(self.path)
+        return size > 0 and size + incoming > self.max_bytes
+
+    def _rotate(self) -> None:
+        if self.backup_count <= 0:
+            os.remove(self.path)
+        else:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self.stats["rotations"] += 1
+
+    async def aclose(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+
+
+_sinks: Dict[str, JsonLogSink] = {}
+
+
+def get_log_sink(filename: str = "analysis_tokens.log") -> JsonLogSink:
+    """Shared sink for a file under the logs directory."""
+    sink = _sinks.get(filename)
+    if sink is None:
+        sink = JsonLogSink(
+            _log_path(filename),
+            max_bytes=settings.TOKEN_LOG_MAX_MB * 1024 * 1024,
+            backup_count=settings.TOKEN_LOG_BACKUPS,
+            buffer_records=settings.TOKEN_LOG_BUFFER_RECORDS,
+            flush_interval_s=settings.TOKEN_LOG_FLUSH_INTERVAL_S,
+        )
+        _sinks[filename] = sink
+    return sink
+
+
+async def close_log_sinks() -> None:
+    """Flush every sink (called at shutdown)."""
+    for sink in list(_sinks.values()):
+        await sink.aclose()
+
+
 def append_json_log(
     record: Dict[str, Any], filename: str = "analysis_tokens.log"
 ) -> None:
-    """Append a single-line JSON record to the analysis token log file."""
+    """Queue a single-line JSON record for the given token log file."""
     try:
-        record_with_time = {"timestamp": datetime.utcnow().isoformat(), **record}
-        path = _log_path(filename)
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record_with_time, ensure_ascii=False) + "\n")
+        get_log_sink(filename).write(
+            {"timestamp": datetime.utcnow().isoformat(), **record}
+        )
     except Exception as e:
         logger.warning(f"Failed to write token log: {e}")
 
@@ -59,6 +220,7 @@ def log_analysis_run(
     task_counts: Dict[str, int],
     repo_size_bytes: Optional[int] = None,
     duration_seconds: Optional[float] = None,
+    token_usage: Optional[Dict[str, Any]] = None,
 ) -> None:
     """Aggregate and write a JSON log entry for a full analysis pipeline run.
 
@@ -72,6 +234,7 @@ def log_analysis_run(
         task_counts: Counts for each task type, e.g., {"pattern": N, "quality": N, ...}
         repo_size_bytes: Optional total repository size (sum of blobs)
         duration_seconds: Optional wall-clock duration for the run
+        token_usage: Provider-reported LLM usage for the run, per model
     """
     try:
         estimated_tokens = estimate_tokens_from_snippets(snippets)
@@ -91,6 +254,12 @@ def log_analysis_run(
             payload["repo_size_gb"] = round(repo_size_bytes / (1024**3), 3)
         if duration_seconds is not None:
             payload["duration_seconds"] = round(float(duration_seconds), 3)
+        if token_usage is not None:
+            payload["token_usage"] = token_usage
+            if duration_seconds:
+                payload["tokens_per_second"] = round(
+                    token_usage.get("total_tokens", 0) / float(duration_seconds), 2
+                )
 
         append_json_log(payload)
     except Exception as e:
@@ -0,0 +1,62 @@
+"""Benchmark the compiled path filter against the per-call regex skip check.
+
+Usage: python scripts/benchmark_path_filter.py [--repo PATH] [--rounds N]
+
+Times GitService's previous six uncompiled re.search calls per path against
+GIT_SKIP_FILTER.excludes over every path tracked in the repository.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.path_filter import GIT_SKIP_FILTER
+
+LEGACY_PATTERNS = [
+    r"\.git/",
+    r"node_modules/",
+    r"__pycache__/",
+    r"\.(jpg|jpeg|png|gif|pdf|docx?)$",
+    r"\.(pyc|lock)$",
+    r"\.env",
+]
+
+
+def legacy_should_skip(path: str) -> bool:
+    return any(re.search(p, path, re.IGNORECASE) for p in LEGACY_PATTERNS)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repo", default=os.path.join(os.path.dirname(__file__), "..", ".."))
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    paths = subprocess.run(
+        ["git", "ls-files"], cwd=args.repo, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    # Sample paths that exercise every rule
+    paths += ["web/node_modules/react/index.js", "assets/logo.PNG", "app/__pycache__/x.pyc"]
+
+    assert [legacy_should_skip(p) for p in paths] == [
+        GIT_SKIP_FILTER.excludes(p) for p in paths
+    ], "filters disagree"
+
+    legacy = timeit.timeit(lambda: [legacy_should_skip(p) for p in paths], number=args.rounds)
+    compiled = timeit.timeit(
+        lambda: [GIT_SKIP_FILTER.excludes(p) for p in paths], number=args.rounds
+    )
+    checks = len(paths) * args.rounds
+    print(f"paths: {len(paths)}  rounds: {args.rounds}")
+    print(f"legacy re.search x6 : {legacy * 1e9 / checks:8.0f} ns/path")
+    print(f"compiled PathFilter : {compiled * 1e9 / checks:8.0f} ns/path")
+    print(f"speedup             : {legacy / compiled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
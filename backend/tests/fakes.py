@@ -0,0 +1,267 @@
+"""
+In-memory stand-ins for MongoDB (motor collections, the odmantic engine, the
+cache) and ChromaDB shared by the service tests
+"""
+
+import sys
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+
+def field_value(doc, path):
+    """Value of a field reference such as ``"$version"``"""
+    return doc.get(path[1:] if path.startswith("$") else path)
+
+
+def matches(doc, query):
+    """Whether ``doc`` satisfies the subset of query syntax the services use"""
+    for key, cond in query.items():
+        if key == "$expr":
+            left, right = cond["$ne"]
+            if field_value(doc, left) == field_value(doc, right):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(cond, dict) and any(op.startswith("$") for op in cond):
+            for op, arg in cond.items():
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$gte" and (value is None or not value >= arg):
+                    return False
+                if op == "$gt" and (value is None or not value > arg):
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$type" and not (
+                    isinstance(value, (int, float)) and not isinstance(value, bool)
+                ):
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def apply_update(doc, update):
+    """Apply ``$set``, ``$inc`` and ``$max`` (dotted paths into sub-documents)"""
+    for key, n in update.get("$inc", {}).items():
+        doc[key] = doc.get(key, 0) + n
+    for path, value in update.get("$max", {}).items():
+        if "." in path:
+            field, index = path.split(".", 1)
+            target = doc.setdefault(field, {})
+            target[index] = max(target.get(index, value), value)
+        else:
+            doc[path] = max(doc.get(path, value), value)
+    doc.update(update.get("$set", {}))
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def sort(self, key, direction):
+        self.rows.sort(key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.rows)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        return self.rows
+
+
+class FakeBulkResult:
+    def __init__(self, upserted_count, matched_count):
+        self.upserted_count = upserted_count
+        self.matched_count = matched_count
+
+
+class FakeUpdateResult:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+
+class FakeInsertResult:
+    def __init__(self, ids):
+        self.inserted_ids = ids
+
+
+class FakeCollection:
+    """Motor collection over a list of documents, recording every call
+
+    ``aggregate_rows`` is returned by ``aggregate``; a callable receives the
+    documents and the pipeline. ``fail_write(request)`` marks bulk write
+    requests that fail, and ``fail_inserts`` makes that many documents of the
+    next ``insert_many`` fail.
+    """
+
+    def __init__(self, docs=None, aggregate_rows=None, name=None):
+        self.name = name
+        self.docs = list(docs or [])
+        self.aggregate_rows = aggregate_rows if aggregate_rows is not None else []
+        self.finds = 0
+        self.aggregations = []
+        self.bulk_writes = []
+        self.ordered = []
+        self.inserts = []
+        self.updates = []
+        self.fail_write = None
+        self.fail_inserts = 0
+
+    def find(self, query, projection=None):
+        self.finds += 1
+        return FakeCursor([dict(d) for d in self.docs if matches(d, query)])
+
+    async def find_one(self, query, projection=None):
+        return next((d for d in self.docs if matches(d, query)), None)
+
+    def aggregate(self, pipeline):
+        self.aggregations.append(pipeline)
+        rows = self.aggregate_rows
+        if callable(rows):
+            rows = rows(self.docs, pipeline)
+        return FakeCursor(list(rows))
+
+    async def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(list(requests))
+        self.ordered.append(ordered)
+        upserted = matched = 0
+        errors = []
+        for index, request in enumerate(requests):
+            if self.fail_write is not None and self.fail_write(request):
+                errors.append({"index": index, "code": 121, "errmsg": "Document failed validation"})
+                if ordered:
+                    break
+                continue
+            doc = await self.find_one(request._filter)
+            if doc is None:
+                if not request._upsert:
+                    continue
+                doc = {k: v for k, v in request._filter.items() if not isinstance(v, dict)}
+                doc.update(request._doc.get("$setOnInsert", {}))
+                doc.setdefault("_id", ObjectId())
+                self.docs.append(doc)
+                upserted += 1
+            else:
+                matched += 1
+            apply_update(doc, request._doc)
+        if errors:
+            raise BulkWriteError({"nUpserted": upserted, "nMatched": matched, "writeErrors": errors})
+        return FakeBulkResult(upserted, matched)
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+        doc = await self.find_one(query)
+        if doc is not None:
+            apply_update(doc, update)
+        return FakeUpdateResult(int(doc is not None))
+
+    async def insert_many(self, docs, ordered=True):
+        self.inserts.append((docs, ordered))
+        if self.fail_inserts:
+            failed, self.fail_inserts = self.fail_inserts, 0
+            self.docs.extend(docs[: len(docs) - failed])
+            raise BulkWriteError({"nInserted": len(docs) - failed, "writeErrors": [{}] * failed})
+        self.docs.extend(docs)
+        return FakeInsertResult([d["_id"] for d in docs])
+
+
+class FakeEngine:
+    """odmantic engine: a FakeCollection per model, and ``models`` holding the
+    instances returned by ``find``/``find_one``/``count``; ``saved`` records
+    every ``save``"""
+
+    def __init__(self, collections=None):
+        self.collections = {}
+        self.models = {}
+        self.saved = []
+        for model, collection in (collections or {}).items():
+            self.collections[model] = collection
+            collection.name = collection.name or model.__collection__
+
+    def get_collection(self, model):
+        if model not in self.collections:
+            self.collections[model] = FakeCollection(name=model.__collection__)
+        return self.collections[model]
+
+    async def find(self, model, *args, **kwargs):
+        return list(self.models.get(model, []))
+
+    async def find_one(self, model, *args, **kwargs):
+        return next(iter(self.models.get(model, [])), None)
+
+    async def count(self, model, *args, **kwargs):
+        return len(self.models.get(model, []))
+
+    async def save(self, instance):
+        self.saved.append(instance)
+        return instance
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+        self.deleted = []
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.values[key] = value
+
+    async def delete(self, key):
+        self.deleted.append(key)
+        self.values.pop(key, None)
+
+
+def make_service(monkeypatch, service_cls, engine=None, cache=None):
+    """Build ``service_cls`` through its own ``__init__`` on fake storage"""
+    manager = SimpleNamespace(engine=engine or FakeEngine(), cache=cache)
+    module = sys.modules[service_cls.__module__]
+    monkeypatch.setattr(module, "get_enhanced_database_manager", lambda: manager)
+    return service_cls()
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+class FakeChromaCollection:
+    """Chroma collection; ``fail_upserts`` upserts raise, ``down`` fails queries"""
+
+    def __init__(self, query_result=None):
+        self.rows = {}
+        self.upserts = 0
+        self.fail_upserts = 0
+        self.down = False
+        self.query_result = query_result
+
+    def get(self, ids, include=None):
+        return {"ids": [i for i in ids if i in self.rows]}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if self.fail_upserts:
+            self.fail_upserts -= 1
+            raise ConnectionError("chroma down")
+        self.upserts += 1
+        for i, e, d, m in zip(ids, embeddings, documents, metadatas):
+            self.rows[i] = (e, d, m)
+
+    def query(self, query_embeddings, n_results):
+        if self.down:
+            raise ConnectionError("chroma down")
+        return self.query_result
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from git import Repo
+
+from app.services.blob_reader import BlobReader, ByteBudget
+
+
+def _blob(repo, data: bytes) -> str:
+    return subprocess.run(
+        ["git", "hash-object", "-w", "--stdin"],
+        cwd=repo.working_dir,
+        input=data,
+        check=True,
+        capture_output=True,
+    ).stdout.decode().strip()
+
+
+def test_read_prefix_bounds_sniffs_and_budgets(tmp_path):
+    repo = Repo.init(tmp_path)
+    text = _blob(repo, b"x" * 20000)
+    binary = _blob(repo, b"PK\x03\x04\x00\x00data")
+    lfs = _blob(repo, b"version https://git-lfs.github.com/spec/v1\noid sha256:abc\nsize 9\n")
+    large = _blob(repo, b"y" * 4096)
+
+    reader = BlobReader(repo, ByteBudget(18000), max_blob_bytes=10000 * 3)
+
+    prefix = reader.read_prefix(text, 100)
+    assert prefix.data == b"x" * 100
+    assert prefix.truncated and prefix.size == 20000
+
+    assert reader.read_prefix(binary, 100).is_binary
+    assert reader.read_prefix(lfs, 100).is_lfs_pointer
+    assert reader.read_text(text, 5) == "xxxxx"
+
+    # Budget is spent by now, further reads are refused without touching data
+    assert reader.read_prefix(large, 100).skipped_reason == "budget_exhausted"
+
+    small = BlobReader(repo, max_blob_bytes=1000)
+    assert small.read_prefix(large, 100).skipped_reason == "too_large"
+    assert small.stats["bytes_read"] == 0
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.models.repository import Commit, FileChange
+from app.services.repository_service import RepositoryService
+from tests.fakes import make_service
+
+
+def commit(i):
+    return {
+        "hash": f"{i:040x}",
+        "message": f"change {i}",
+        "author_name": "dev",
+        "author_email": "dev@example.com",
+        "committed_date": datetime(2024, 1, 1),
+        "files_changed": [
+            {"file_path": "app.py", "change_type": "modified", "language": "Python", "additions": 3, "deletions": 1, "content": "x" * 5000},
+            {"file_path": f"new_{i}.py", "change_type": "added", "language": "Python", "additions": 10, "deletions": 0},
+        ],
+        "stats": {"additions": 13, "deletions": 1, "files": 2},
+        "analysis": {"is_feature": True},
+    }
+
+
+def test_commits_and_file_changes_are_upserted_in_batches(monkeypatch):
+    monkeypatch.setattr(settings, "COMMIT_INGEST_BATCH_SIZE", 2)
+    service = make_service(monkeypatch, RepositoryService)
+    repo_id = str(ObjectId())
+
+    added = asyncio.run(service.add_commits(repo_id, (commit(i) for i in range(5))))
+
+    commits = service.engine.get_collection(Commit)
+    files = service.engine.get_collection(FileChange)
+    assert added == 5
+    assert [len(requests) for requests in commits.bulk_writes] == [2, 2, 1]
+    assert commits.ordered == [False] * 3
+    assert len(files.bulk_writes) == 3 and len(files.docs) == 10
+
+    stored = next(d for d in commits.docs if d["hash"] == commit(0)["hash"])
+    assert stored["additions"] == 13 and stored["files_changed_count"] == 2
+    assert stored["analysis"] == {"is_feature": True}
+    change = next(d for d in files.docs if d["file_path"] == "app.py" and d["commit_id"] == stored["_id"])
+    assert len(change["content_snippet"]) == 2000
+    assert change["repository_id"] == ObjectId(repo_id)
+
+
+def test_reingesting_the_same_commits_updates_in_place(monkeypatch):
+    service = make_service(monkeypatch, RepositoryService)
+    repo_id = str(ObjectId())
+
+    async def run():
+        first = await service.add_commits(repo_id, [commit(i) for i in range(3)])
+        second = await service.add_commits(repo_id, [commit(i) for i in range(4)])
+        return first, second
+
+    assert asyncio.run(run()) == (3, 1)
+    assert len(service.engine.get_collection(Commit).docs) == 4
+    assert len(service.engine.get_collection(FileChange).docs) == 8
+
+
+def test_failed_commit_writes_do_not_stop_the_batch(monkeypatch):
+    service = make_service(monkeypatch, RepositoryService)
+    repo_id = str(ObjectId())
+    commits = service.engine.get_collection(Commit)
+    commits.fail_write = lambda request: request._filter["hash"] == commit(1)["hash"]
+
+    added = asyncio.run(service.add_commits(repo_id, [commit(i) for i in range(3)]))
+
+    assert added == 2
+    assert {d["hash"] for d in commits.docs} == {commit(0)["hash"], commit(2)["hash"]}
+    # File changes of the written commits are still stored
+    files = service.engine.get_collection(FileChange).docs
+    assert len(files) == 4
+    assert {d["commit_id"] for d in files} == {d["_id"] for d in commits.docs}
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from git import Repo
+
+from app.services.diff_pipeline import iter_commit_records
+from app.services.git_service import GitService
+
+
+def _git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_log_stream_parses_status_numstat_and_renames(tmp_path):
+    _git(tmp_path, "init", "-q")
+    body = "".join(f"line {i}\n" for i in range(20))
+    (tmp_path / "old name.py").write_text(body)
+    (tmp_path / "gone.txt").write_text("a\nb\n")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "initial\n\nwith body")
+    _git(tmp_path, "mv", "old name.py", "new_name.py")
+    (tmp_path / "new_name.py").write_text(body + "extra\n")
+    _git(tmp_path, "rm", "-q", "gone.txt")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "rename")
+
+    latest, initial = list(iter_commit_records(Repo(tmp_path), 10))
+
+    assert initial.message == "initial\n\nwith body"
+    assert {(f.status, f.path, f.additions) for f in initial.files} == {
+        ("A", "old name.py", 20),
+        ("A", "gone.txt", 2),
+    }
+
+    changes = {f.path: f for f in latest.files}
+    renamed = changes["new_name.py"]
+    assert (renamed.status, renamed.old_path, renamed.additions) == ("R", "old name.py", 1)
+    assert changes["gone.txt"].status == "D"
+    assert changes["gone.txt"].new_blob is None
+    assert changes["gone.txt"].deletions == 2
+
+
+def test_commit_history_builds_enhanced_commit_dicts(tmp_path):
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "app.py").write_text("def main():\n    return 1\n")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "feat: add app")
+
+    (commit,) = GitService().get_commit_history(Repo(tmp_path), limit=5)
+
+    assert commit["analysis"]["is_feature"] is True
+    assert commit["stats"]["additions"] == 2
+    assert commit["files_changed"] == [
+        {
+            "file_path": "app.py",
+            "change_type": "added",
+            "language": "Python",
+            "additions": 2,
+            "deletions": 0,
+            "content": "def main():\n    return 1\n",
+        }
+    ]
+
+
+def test_commit_history_honours_codeevoignore_reincludes(tmp_path):
+    _git(tmp_path, "init", "-q")
+    (tmp_path / ".codeevoignore").write_text("*.txt\n!keep.txt\n!poetry.lock\n")
+    (tmp_path / "keep.txt").write_text("kept\n")
+    (tmp_path / "drop.txt").write_text("dropped\n")
+    (tmp_path / "poetry.lock").write_text("[[package]]\n")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "chore: notes")
+
+    (commit,) = GitService().get_commit_history(Repo(tmp_path), limit=5)
+
+    paths = {change["file_path"] for change in commit["files_changed"]}
+    assert "keep.txt" in paths
+    assert "drop.txt" not in paths
+    # Built-in excludes cannot be re-included
+    assert "poetry.lock" not in paths
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.embedding_pipeline import EmbeddingPipeline, embedding_id
+from tests.fakes import FakeChromaCollection, FakeEmbeddings
+
+
+def test_snippets_are_embedded_in_batches_with_deterministic_ids():
+    embeddings = FakeEmbeddings()
+    collection = FakeChromaCollection()
+
+    async def run():
+        pipeline = EmbeddingPipeline(embeddings, collection, batch_size=3, flush_interval_s=60)
+        ids = [pipeline.enqueue(f"x = {i}", ["assignment"], {"language": "python"}) for i in range(5)]
+        await pipeline.aclose()
+        return pipeline, ids
+
+    pipeline, ids = asyncio.run(run())
+
+    assert [len(c) for c in embeddings.calls] == [3, 2]
+    assert collection.upserts == 2
+    assert ids[0] == embedding_id("x = 0")
+    assert set(collection.rows) == set(ids)
+    assert collection.rows[ids[0]][2]["patterns"] == '["assignment"]'
+    assert pipeline.get_stats()["embedded"] == 5
+
+
+def test_identical_snippets_are_never_reembedded():
+    embeddings = FakeEmbeddings()
+    collection = FakeChromaCollection()
+    collection.rows[embedding_id("stored()")] = ([1.0], "stored()", {})
+
+    async def run():
+        pipeline = EmbeddingPipeline(embeddings, collection, batch_size=10, flush_interval_s=0.01)
+        pipeline.enqueue("same()", [], {})
+        pipeline.enqueue("same()", [], {})
+        pipeline.enqueue("stored()", [], {})
+        await asyncio.sleep(0.05)  # timer flush of the partial batch
+        pipeline.enqueue("same()", [], {})
+        await pipeline.aclose()
+        return pipeline
+
+    pipeline = asyncio.run(run())
+
+    assert embeddings.calls == [["same()"]]
+    stats = pipeline.get_stats()
+    assert stats["already_stored"] == 1
+    assert stats["duplicates_skipped"] == 2
+    assert stats["pending"] == 0
+
+
+def test_failed_batches_are_retried_then_reported():
+    async def run(failures):
+        collection = FakeChromaCollection()
+        collection.fail_upserts = failures
+        pipeline = EmbeddingPipeline(
+            FakeEmbeddings(), collection, batch_size=10, flush_interval_s=60, max_attempts=3
+        )
+        pipeline.enqueue("a()", [], {})
+        pipeline.enqueue("b()", [], {})
+        assert await pipeline.flush() == 0
+        assert pipeline.pending == 2  # queued again, not lost
+        await pipeline.aclose()
+        return pipeline, collection
+
+    pipeline, collection = asyncio.run(run(failures=2))
+    stats = pipeline.get_stats()
+    assert set(collection.rows) == {embedding_id("a()"), embedding_id("b()")}
+    assert stats["requeued"] == 4 and stats["failed"] == 0
+
+    pipeline, collection = asyncio.run(run(failures=5))
+    stats = pipeline.get_stats()
+    assert not collection.rows
+    assert stats["failed"] == 2 and stats["pending"] == 0
@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.file_sampler import FileSampler
+
+
+def _tree():
+    sizes = {}
+    for i in range(300):
+        sizes[f"services/api/handler_{i}.py"] = 2000
+    for i in range(20):
+        sizes[f"web/src/component_{i}.tsx"] = 1500
+    sizes["tools/build.go"] = 900
+    sizes["services/api/huge_generated.py"] = 10_000_000
+    return sizes
+
+
+def test_full_coverage_when_budget_allows():
+    sizes = _tree()
+    sample = FileSampler(max_files=10_000, max_bytes=100 * 1024 * 1024).select(list(sizes), sizes)
+    assert sample.coverage.strategy == "full"
+    assert sample.paths == list(sizes)
+
+
+def test_stratified_sample_is_bounded_representative_and_order_independent():
+    sizes = _tree()
+    sampler = FileSampler(max_files=40, max_bytes=1024 * 1024)
+    sample = sampler.select(list(sizes), sizes)
+
+    assert sample.coverage.strategy == "stratified"
+    assert len(sample.paths) == 40
+    assert sample.coverage.selected_bytes <= 1024 * 1024
+    assert "services/api/huge_generated.py" not in sample.paths
+    # The first pass takes one file from every stratum that fits
+    assert any(p.startswith("web/") for p in sample.paths[:3])
+    assert "tools/build.go" in sample.paths
+    # Larger strata get proportionally more files
+    assert sum(p.startswith("services/") for p in sample.paths) > 30
+
+    reordered = sampler.select(list(reversed(list(sizes))), sizes)
+    assert reordered.paths == sample.paths
@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from git import Repo
+
+from app.services.git_mirror_cache import GitMirrorCache
+
+
+def _git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+def _make_source_repo(path):
+    os.makedirs(path)
+    _git(path, "init", "-q")
+    _git(path, "commit", "-q", "--allow-empty", "-m", "first")
+    _git(path, "branch", "-M", "main")
+    return str(path)
+
+
+def test_checkout_reuses_mirror_and_fetches_new_commits(tmp_path):
+    source = _make_source_repo(tmp_path / "source")
+    cache = GitMirrorCache(str(tmp_path / "cache"))
+
+    lease = cache.checkout(source, "main")
+    assert Repo(lease.worktree_path).head.commit.message.strip() == "first"
+    cache.release(lease)
+    assert not os.path.exists(lease.worktree_path)
+
+    _git(source, "commit", "-q", "--allow-empty", "-m", "second")
+    lease = cache.checkout(source, "missing-branch")
+    assert Repo(lease.worktree_path).head.commit.message.strip() == "second"
+    cache.release(lease)
+
+    assert cache.stats["misses"] == 1
+    assert cache.stats["fetches"] == 1
+
+
+def test_eviction_skips_mirrors_with_active_worktrees(tmp_path):
+    source = _make_source_repo(tmp_path / "source")
+    cache = GitMirrorCache(str(tmp_path / "cache"), max_bytes=1)
+
+    lease = cache.checkout(source)
+    assert os.path.isdir(lease.mirror_path)
+
+    cache.release(lease)
+    cache._evict_if_needed()
+    assert not os.path.isdir(lease.mirror_path)
+    assert cache.stats["evictions"] == 1
+
+
+def test_mirrors_are_full_clones_by_default(tmp_path):
+    source = _make_source_repo(tmp_path / "source")
+    cache = GitMirrorCache(str(tmp_path / "cache"))
+
+    lease = cache.checkout(f"file://{source}", "main")
+    assert cache.prefetch_blobs(Repo(lease.worktree_path), 10) == 0
+    cache.release(lease)
+
+    with pytest.raises(Exception):
+        Repo(lease.mirror_path).git.config("--get", "remote.origin.partialclonefilter")
+
+
+def test_partial_mirror_prefetches_history_blobs_in_one_batch(tmp_path):
+    source = _make_source_repo(tmp_path / "source")
+    _git(source, "config", "uploadpack.allowfilter", "true")
+    for n in range(5):
+        with open(os.path.join(source, "module.py"), "w") as handle:
+            handle.write(f"VALUE = {n}\n")
+        _git(source, "add", "module.py")
+        _git(source, "commit", "-q", "-m", f"change {n}")
+    cache = GitMirrorCache(str(tmp_path / "cache"), clone_filter="blob:none")
+
+    lease = cache.checkout(f"file://{source}", "main")
+    worktree = Repo(lease.worktree_path)
+    assert worktree.git.config("remote.origin.partialclonefilter") == "blob:none"
+
+    # The checkout only faulted in HEAD's blob; the four older versions are missing
+    assert cache.prefetch_blobs(worktree, 10) == 4
+    listing = worktree.git.rev_list("--objects", "--missing=print", "HEAD")
+    assert not [line for line in listing.splitlines() if line.startswith("?")]
+    assert cache.prefetch_blobs(worktree, 10) == 0
+    cache.release(lease)
+
+
+def test_failed_checkout_removes_its_worktree_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    cache = GitMirrorCache(str(tmp_path / "cache"))
+
+    with pytest.raises(Exception):
+        cache.checkout(str(tmp_path / "does-not-exist"))
+
+    assert not [p for p in os.listdir(tmp_path) if p.startswith("code-evo-")]
+    assert cache.get_stats()["active_leases"] == 0
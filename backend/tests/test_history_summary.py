@@ -0,0 +1,76 @@
+import os
+import signal
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from git import Repo
+
+from app.services import history_summary
+from app.services.history_summary import HistorySummaryEngine
+
+
+def _commit(cwd, message, email):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", f"user.email={email}",
+         "commit", "-q", "--allow-empty", "-m", message],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_summary_matches_full_commit_walk_and_is_cached(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    _commit(tmp_path, "first", "a@example.com")
+    _commit(tmp_path, "second", "b@example.com")
+    _commit(tmp_path, "third", "a@example.com")
+    repo = Repo(tmp_path)
+
+    engine = HistorySummaryEngine()
+    summary = engine.summarize(repo)
+
+    commits = list(repo.iter_commits())
+    assert summary.total_commits == len(commits)
+    assert summary.last_commit_date == commits[0].committed_datetime.replace(tzinfo=None)
+    assert summary.first_commit_date == commits[-1].committed_datetime.replace(tzinfo=None)
+    assert dict(summary.commits_by_author) == {"a@example.com": 2, "b@example.com": 1}
+    assert sum(summary.commits_by_month.values()) == 3
+
+    assert engine.summarize(repo) is summary
+    assert engine.stats == {"hits": 1, "misses": 1}
+
+
+def test_failed_parse_kills_git_instead_of_waiting_on_a_full_pipe(tmp_path, monkeypatch):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    # Enough history that git log blocks on the pipe long before it finishes
+    stream = "".join(
+        f"commit refs/heads/master\ncommitter t <t@example.com> {1700000000 + i} +0000\n"
+        f"data 1\nx\n\n"
+        for i in range(5000)
+    )
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=tmp_path, input=stream.encode(), check=True)
+    subprocess.run(["git", "checkout", "-q", "master"], cwd=tmp_path, check=True)
+    repo = Repo(tmp_path)
+
+    procs = []
+    log = repo.git.log
+
+    def spy_log(*args, **kwargs):
+        procs.append(log(*args, **kwargs))
+        return procs[-1]
+
+    class BrokenDatetime:
+        @staticmethod
+        def fromisoformat(value):
+            raise ValueError("unparseable date")
+
+    monkeypatch.setattr(history_summary, "datetime", BrokenDatetime)
+
+    with pytest.raises(ValueError):
+        HistorySummaryEngine().summarize(SimpleNamespace(head=repo.head, git=SimpleNamespace(log=spy_log)))
+    assert procs[0].proc.returncode == -signal.SIGKILL
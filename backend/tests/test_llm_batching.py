@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.models.ai_models import CodeQualityAnalysis
+from app.services.ai_service import AIService
+from app.services.llm_adapters.base import LLMAdapterManager, LLMProvider
+from app.services.llm_batching import batch_response_model, pack_batches
+
+
+class BatchProvider(LLMProvider):
+    """Answers batched quality prompts, skipping snippet 2"""
+
+    name = "fake"
+    model = "fake-1"
+
+    def __init__(self):
+        self.prompts = []
+
+    def is_available(self):
+        return True
+
+    async def acompletion(self, prompt, *, instructions=None, **kwargs):
+        self.prompts.append(prompt)
+        if "### Snippet" not in prompt:
+            return json.dumps({"quality_score": 10, "readability": "single"})
+        numbers = [int(line.split()[-1]) for line in prompt.splitlines() if line.startswith("### Snippet")]
+        return json.dumps(
+            {
+                "results": [
+                    {"index": n, "quality_score": 50 + n, "readability": f"r{n}"}
+                    for n in numbers
+                    if n != 2
+                ]
+            }
+        )
+
+
+def test_pack_batches_respects_budget_and_item_cap():
+    sections = ["x" * 40, "x" * 40, "x" * 400, "x" * 40, "x" * 40, "x" * 40]
+    assert pack_batches(sections, token_budget=30, max_items=2) == [[0, 1], [2], [3, 4], [5]]
+
+
+def test_batch_schema_wraps_results_with_index():
+    schema = batch_response_model(CodeQualityAnalysis).model_json_schema()
+    item = schema["$defs"]["CodeQualityAnalysisBatchItem"]
+    assert "index" in item["required"]
+    assert schema["properties"]["results"]["type"] == "array"
+
+
+def test_quality_batch_splits_results_and_retries_missing_singly():
+    provider = BatchProvider()
+    service = AIService.__new__(AIService)
+    service.llm_adapter = LLMAdapterManager([(0, provider)])
+    service._schema_instruction_cache = {}
+
+    snippets = [("a = 1", "python"), ("b = 2", "python"), ("c = 3", "python")]
+    results = asyncio.run(service.analyze_code_quality_batch(snippets))
+
+    assert [r["readability"] for r in results] == ["r1", "single", "r3"]
+    assert results[0]["quality_score"] == 51
+    assert len(provider.prompts) == 2  # one batch, one single retry
+
+
+def test_batches_skip_cached_snippets_and_number_from_one(monkeypatch):
+    import app.services.cache_service as cache_service
+
+    monkeypatch.setattr(cache_service, "_cache_service", cache_service.AnalysisCacheService())
+    provider = BatchProvider()
+    service = AIService.__new__(AIService)
+    service.llm_adapter = LLMAdapterManager([(0, provider)])
+    service._schema_instruction_cache = {}
+
+    first = [("q = 1", "python"), ("r = 2", "python"), ("s = 3", "python")]
+    asyncio.run(service.analyze_code_quality_batch(first))
+    assert len(provider.prompts) == 2
+
+    # Only the new snippet is sent, numbered from 1 inside its own batch
+    second = [("q = 1", "python"), ("t = 4", "python"), ("s = 3", "python")]
+    results = asyncio.run(service.analyze_code_quality_batch(second))
+    assert len(provider.prompts) == 3
+    assert "### Snippet 1" in provider.prompts[-1] and "q = 1" not in provider.prompts[-1]
+    assert [r["readability"] for r in results] == ["r1", "r1", "r3"]
+
+    asyncio.run(service.analyze_code_quality_batch(second))
+    assert len(provider.prompts) == 3
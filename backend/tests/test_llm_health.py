@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.llm_adapters.base import LLMAdapterManager, LLMProvider, LLMTunnelError
+from app.services.llm_adapters.health import CLOSED, HALF_OPEN, OPEN, ProviderHealth
+
+
+class FakeProvider(LLMProvider):
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    async def acompletion(self, prompt, *, instructions=None, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("down")
+        return self.name
+
+
+def test_failing_provider_is_skipped_once_circuit_opens():
+    down = FakeProvider("down", fail=True)
+    up = FakeProvider("up")
+    manager = LLMAdapterManager([(0, down), (1, up)], routing="priority")
+
+    async def run():
+        return [await manager.acompletion("p") for _ in range(6)]
+
+    assert asyncio.run(run()) == ["up"] * 6
+    assert down.calls == 3  # failure threshold, then skipped instantly
+    snapshot = manager.get_health()["down"]
+    assert snapshot["state"] == OPEN
+    assert snapshot["rejected"] == 3
+
+
+def test_half_open_trial_closes_or_reopens_circuit():
+    health = ProviderHealth("p", failure_threshold=1, open_seconds=0.01)
+    health.record_failure(0.1)
+    assert health.state == OPEN and not health.allow_request()
+
+    asyncio.run(asyncio.sleep(0.02))
+    assert health.allow_request()
+    assert health.state == HALF_OPEN
+    assert not health.allow_request()  # one trial at a time
+    health.record_failure(0.1)
+    assert health.state == OPEN and health.open_seconds == 0.02
+
+    asyncio.run(asyncio.sleep(0.03))
+    assert health.allow_request()
+    health.record_success(0.05)
+    assert health.state == CLOSED and health.open_seconds == 0.01
+
+
+def test_latency_routing_prefers_fastest_measured_provider():
+    slow = FakeProvider("slow")
+    fast = FakeProvider("fast")
+    manager = LLMAdapterManager([(0, slow), (1, fast)])
+    # Without measurements static priority decides
+    assert [m.name for m in manager._route()] == ["slow", "fast"]
+
+    for _ in range(5):
+        manager.health["slow"].record_success(2.0)
+        manager.health["fast"].record_success(0.2)
+    assert [m.name for m in manager._route()] == ["fast", "slow"]
+    assert manager.get_health()["slow"]["p95_latency_s"] == 2.0
+
+
+def test_tunnel_failures_do_not_open_the_provider_circuit():
+    class TunnelProvider(FakeProvider):
+        async def acompletion(self, prompt, *, instructions=None, **kwargs):
+            self.calls += 1
+            raise LLMTunnelError("tunnel down")
+
+    ollama = TunnelProvider("ollama")
+    manager = LLMAdapterManager([(0, ollama)], routing="priority")
+
+    async def run():
+        return [await manager.acompletion("p") for _ in range(6)]
+
+    assert asyncio.run(run()) == [None] * 6
+    assert ollama.calls == 6
+    snapshot = manager.get_health()["ollama"]
+    assert snapshot["state"] == CLOSED
+    assert snapshot["failures"] == 0
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.llm_adapters.http_pool import ProviderHTTPPool
+
+
+def test_post_json_retries_transient_failures():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503)
+        if len(calls) == 2:
+            return httpx.Response(429, headers={"retry-after": "0"})
+        return httpx.Response(200, json={"ok": True})
+
+    pool = ProviderHTTPPool(
+        "test", max_retries=2, backoff_base=0.001, transport=httpx.MockTransport(handler)
+    )
+
+    async def run():
+        try:
+            return await pool.post_json("http://llm.test/v1", {"x-key": "k"}, {"prompt": "hi"})
+        finally:
+            await pool.aclose()
+
+    assert asyncio.run(run()) == {"ok": True}
+    assert len(calls) == 3
+    assert calls[0].headers["x-key"] == "k"
+    stats = pool.get_stats()
+    assert stats["requests"] == 1
+    assert stats["retries"] == 2
+    assert stats["failures"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_post_json_raises_when_retries_exhausted():
+    pool = ProviderHTTPPool(
+        "test",
+        max_retries=1,
+        backoff_base=0.001,
+        transport=httpx.MockTransport(lambda request: httpx.Response(500)),
+    )
+
+    async def run():
+        try:
+            await pool.post_json("http://llm.test/v1", {}, {})
+        finally:
+            await pool.aclose()
+
+    try:
+        asyncio.run(run())
+    except httpx.HTTPStatusError:
+        pass
+    else:
+        raise AssertionError("expected HTTPStatusError")
+    assert pool.get_stats()["failures"] == 1
+    assert pool.get_stats()["retries"] == 1
+
+
+def test_conflicts_are_only_retried_for_idempotent_methods():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) < 3:
+            return httpx.Response(409)
+        return httpx.Response(200, json={"ok": True})
+
+    pool = ProviderHTTPPool(
+        "test", max_retries=2, backoff_base=0.001, transport=httpx.MockTransport(handler)
+    )
+
+    async def run():
+        try:
+            try:
+                await pool.post_json("http://llm.test/v1", {}, {})
+            except httpx.HTTPStatusError:
+                pass
+            else:
+                raise AssertionError("expected HTTPStatusError")
+            return await pool.get_json("http://llm.test/models")
+        finally:
+            await pool.aclose()
+
+    assert asyncio.run(run()) == {"ok": True}
+    assert calls == ["POST", "GET", "GET"]
+
+
+def test_explicit_zero_limits_are_kept():
+    pool = ProviderHTTPPool("test", max_keepalive=0, max_retries=0, backoff_base=0)
+
+    assert pool.max_keepalive == 0
+    assert pool.max_retries == 0
+    assert pool.backoff_base == 0
+
+
+def test_client_from_a_finished_loop_is_closed():
+    pool = ProviderHTTPPool(
+        "test", transport=httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+    )
+
+    async def call():
+        await pool.post_json("http://llm.test/v1", {}, {})
+        return pool._client
+
+    first = asyncio.run(call())
+    second = asyncio.run(call())
+    asyncio.run(pool.aclose())
+
+    assert first is not second
+    assert first.is_closed
+    assert pool.get_stats()["clients_closed"] == 1
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+from typing import List
+
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.llm_adapters.base import LLMAdapterManager, LLMProvider
+from app.services.llm_adapters.response_cache import LLMResponseCache
+
+
+class Answer(BaseModel):
+    patterns: List[str]
+
+
+class CountingProvider(LLMProvider):
+    name = "fake"
+    model = "fake-1"
+
+    def __init__(self):
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    async def acompletion(self, prompt, *, instructions=None, **kwargs):
+        self.calls += 1
+        return '{"patterns": ["%s"]}' % prompt
+
+
+class DictRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+def test_repeat_completions_are_served_from_cache():
+    redis = DictRedis()
+    provider = CountingProvider()
+    manager = LLMAdapterManager([(0, provider)], response_cache=LLMResponseCache(redis))
+
+    async def ask(mgr, prompt, temperature=0.2):
+        return await mgr.astructured_completion(
+            prompt, Answer, instructions="schema", temperature=temperature
+        )
+
+    first = asyncio.run(ask(manager, "a"))
+    second = asyncio.run(ask(manager, "a"))
+    assert first == second == Answer(patterns=["a"])
+    assert provider.calls == 1
+    assert manager.response_cache.stats["memory_hits"] == 1
+
+    asyncio.run(ask(manager, "a", temperature=0.7))
+    assert provider.calls == 2
+
+    # A fresh process shares entries through Redis
+    restarted = LLMAdapterManager([(0, provider)], response_cache=LLMResponseCache(redis))
+    assert asyncio.run(ask(restarted, "a")) == first
+    assert provider.calls == 2
+    assert restarted.response_cache.stats["redis_hits"] == 1
+
+
+def test_memory_tier_evicts_and_expires():
+    cache = LLMResponseCache(max_entries=2)
+
+    async def run():
+        for key in ("k1", "k2", "k3"):
+            await cache.set(key, {"v": key})
+        evicted = await cache.get("k1")
+        kept = await cache.get("k3")
+        cache.ttl_seconds = -1
+        await cache.set("k4", {"v": "k4"})
+        expired = await cache.get("k4")
+        return evicted, kept, expired
+
+    evicted, kept, expired = asyncio.run(run())
+    assert evicted is None
+    assert kept == {"v": "k3"}
+    assert expired is None
+    assert cache.stats["evictions"] >= 1
+    assert cache.stats["expired"] == 1
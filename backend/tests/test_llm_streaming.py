@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import sys
+from typing import List
+
+import httpx
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.llm_adapters import http_pool
+from app.services.llm_adapters.base import LLMAdapterManager
+from app.services.llm_adapters.http_pool import ProviderHTTPPool
+from app.services.llm_adapters.providers import OpenAIProvider
+from app.services.llm_adapters.streaming import IncrementalJSONParser
+from app.services.llm_adapters.usage import LLMUsageTracker, usage_scope
+
+
+class Answer(BaseModel):
+    patterns: List[str]
+
+
+def test_parser_finds_objects_across_chunks():
+    parser = IncrementalJSONParser()
+    text = 'Sure! ```json\n{"a": "}{", "b": {"c": "\\"}"}}``` and {"d": 1} trailing {"e"'
+    found = []
+    for i in range(0, len(text), 3):
+        found.extend(parser.feed(text[i : i + 3]))
+    assert [json.loads(f) for f in found] == [{"a": "}{", "b": {"c": '"}'}}, {"d": 1}]
+    assert parser.in_object
+
+
+def test_structured_stream_stops_at_first_valid_object():
+    pieces = ['{"note": "ex', 'ample"} ', '{"patterns": ', '["singleton"', "]}"] + [" ramble"] * 50
+    sent = []
+
+    async def body():
+        for piece in pieces:
+            sent.append(piece)
+            event = {"choices": [{"delta": {"content": piece}}]}
+            yield f"data: {json.dumps(event)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, content=body())
+
+    provider = OpenAIProvider(api_key="k", model="m", base_url="https://llm.test/v1")
+    provider.name = "openai-stream-test"
+    http_pool._http_pools[provider.name] = ProviderHTTPPool(
+        provider.name, transport=httpx.MockTransport(handler)
+    )
+
+    async def run():
+        try:
+            return await provider.astructured_completion("p", Answer, instructions="schema")
+        finally:
+            await http_pool._http_pools.pop(provider.name).aclose()
+
+    assert asyncio.run(run()) == Answer(patterns=["singleton"])
+    assert requests[0]["stream"] is True
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert len(sent) < len(pieces)
+
+
+def test_tracked_stream_stops_early_and_estimates_usage():
+    pieces = ['{"patterns": ["factory"]}'] + [" ramble"] * 5
+    sent = []
+
+    async def body():
+        for piece in pieces:
+            sent.append(piece)
+            event = {"choices": [{"delta": {"content": piece}}]}
+            yield f"data: {json.dumps(event)}\n\n".encode()
+        usage = {"choices": [], "usage": {"prompt_tokens": 42, "completion_tokens": 17}}
+        yield f"data: {json.dumps(usage)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+    provider = OpenAIProvider(api_key="k", model="m", base_url="https://llm.test/v1")
+    provider.name = "openai-usage-stream-test"
+    http_pool._http_pools[provider.name] = ProviderHTTPPool(
+        provider.name, transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+    )
+    manager = LLMAdapterManager([(0, provider)], usage_tracker=LLMUsageTracker(log_filename=None))
+
+    async def run():
+        try:
+            with usage_scope() as totals:
+                result = await manager.astructured_completion("p", Answer)
+            return result, totals
+        finally:
+            await http_pool._http_pools.pop(provider.name).aclose()
+
+    result, totals = asyncio.run(run())
+    assert result == Answer(patterns=["factory"])
+    assert len(sent) < len(pieces)
+    usage = totals.as_dict()
+    assert usage["requests"] == 1
+    assert usage["estimated_requests"] == 1
+    assert usage["completion_tokens"] > 0
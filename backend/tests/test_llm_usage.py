@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.llm_adapters import http_pool
+from app.services.llm_adapters.base import LLMAdapterManager
+from app.services.llm_adapters.http_pool import ProviderHTTPPool
+from app.services.llm_adapters.providers import AnthropicProvider
+from app.services.llm_adapters.scheduler import llm_request_context
+from app.services.llm_adapters.usage import LLMUsageTracker, usage_scope
+from app.utils.token_logger import JsonLogSink, count_tokens
+
+
+def anthropic_provider(handler, name):
+    provider = AnthropicProvider(api_key="k", model="claude-test")
+    provider.name = name
+    http_pool._http_pools[name] = ProviderHTTPPool(name, transport=httpx.MockTransport(handler))
+    return provider
+
+
+def test_provider_reported_usage_is_aggregated_per_scope_owner_and_user(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LLM_STREAMING_ENABLED", False)
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            json={
+                "content": [{"type": "text", "text": "hello"}],
+                "usage": {"input_tokens": 120, "output_tokens": 30},
+            },
+        )
+
+    provider = anthropic_provider(handler, "anthropic-usage-test")
+    tracker = LLMUsageTracker(log_filename=None)
+    manager = LLMAdapterManager([(0, provider)], usage_tracker=tracker)
+
+    async def run():
+        try:
+            with usage_scope() as totals, llm_request_context(owner="analysis:1"):
+                await manager.acompletion("p", user_id="u1")
+                await manager.acompletion("p", user_id="u2")
+            return totals
+        finally:
+            await http_pool._http_pools.pop(provider.name).aclose()
+
+    totals = asyncio.run(run()).as_dict()
+    assert totals["prompt_tokens"] == 240
+    assert totals["completion_tokens"] == 60
+    assert totals["estimated_requests"] == 0
+    assert totals["by_model"]["anthropic-usage-test/claude-test"]["requests"] == 2
+    assert tracker.owner_usage("analysis:1")["total_tokens"] == 300
+    assert tracker.user_usage("u1")["prompt_tokens"] == 120
+
+
+def test_streamed_usage_keeps_reported_input_and_counts_output_locally():
+    async def body():
+        events = [
+            {"type": "message_start", "message": {"usage": {"input_tokens": 77, "output_tokens": 1}}},
+            {"type": "content_block_delta", "delta": {"text": '{"answer": "yes"}'}},
+        ]
+        for event in events:
+            yield f"data: {json.dumps(event)}\n\n".encode()
+
+    provider = anthropic_provider(lambda request: httpx.Response(200, content=body()), "anthropic-stream-usage")
+    tracker = LLMUsageTracker(log_filename=None)
+    manager = LLMAdapterManager([(0, provider)], usage_tracker=tracker)
+
+    async def run():
+        try:
+            from pydantic import create_model
+
+            Answer = create_model("Answer", answer=(str, ...))
+            return await manager.astructured_completion("p", Answer)
+        finally:
+            await http_pool._http_pools.pop(provider.name).aclose()
+
+    assert asyncio.run(run()).answer == "yes"
+    stats = tracker.get_stats()
+    assert stats["prompt_tokens"] == 77
+    assert stats["completion_tokens"] == count_tokens('{"answer":"yes"}')
+    assert stats["estimated_requests"] == 1
+
+
+def test_local_tokenizer_counts_code_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("return x") == 2
+    assert count_tokens("user_id = 1234") == 6  # user _ id = 123 4
+    assert count_tokens("UserRepository") == 2
+    assert count_tokens("a" * 20) == 3
+
+
+def test_log_sink_buffers_and_rotates(tmp_path):
+    path = str(tmp_path / "usage.log")
+    sink = JsonLogSink(path, max_bytes=200, backup_count=2, buffer_records=5, flush_interval_s=60)
+
+    async def run():
+        for i in range(4):
+            sink.write({"i": i, "pad": "x" * 30})
+        assert not os.path.exists(path)  # still buffered
+        for i in range(4, 20):
+            sink.write({"i": i, "pad": "x" * 30})
+            await asyncio.sleep(0)  # let batch flushes run
+        await sink.aclose()
+
+    asyncio.run(run())
+
+    assert os.path.exists(path + ".1") and os.path.exists(path + ".2")
+    assert not os.path.exists(path + ".3")
+    with open(path) as f:
+        last = [json.loads(line)["i"] for line in f]
+    assert last[-1] == 19
+    assert sink.stats["rotations"] >= 2
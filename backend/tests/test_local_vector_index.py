@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from app.services.ai_service import AIService
+from app.services.embedding_pipeline import EmbeddingPipeline
+from app.services.local_vector_index import HashingEmbedder, LocalVectorIndex
+from tests.fakes import FakeChromaCollection, FakeEmbeddings
+
+SNIPPETS = {
+    "a": "async def fetch_user(session, user_id):\n    return await session.get(user_id)",
+    "b": "class UserRepository:\n    def find_by_email(self, email):\n        return self.db.query(email)",
+    "c": "for i in range(10):\n    total += values[i] * weights[i]",
+}
+
+
+def test_embedder_is_deterministic_and_unit_length():
+    embedder = HashingEmbedder(dim=64)
+    first = embedder.embed_documents(["fooBar = baz(1)", ""])
+    again = embedder.embed_query("fooBar = baz(1)")
+    assert np.allclose(first[0], again)
+    assert abs(np.linalg.norm(first[0]) - 1.0) < 1e-5
+    assert not first[1].any()
+
+
+def test_index_batch_search_and_reload_from_disk(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    assert index.add(list(SNIPPETS), list(SNIPPETS.values()), [{"k": k} for k in SNIPPETS]) == 3
+    assert index.add(["a"], [SNIPPETS["a"]], [{}]) == 0
+
+    queries = [
+        "async def fetch_order(session, order_id): return await session.get(order_id)",
+        "for j in range(5): total += values[j] * weights[j]",
+    ]
+    results = index.search(queries, k=2)
+    assert [r[0][0] for r in results] == ["a", "c"]
+    assert results[0][0][1] > results[0][1][1]
+
+    reopened = LocalVectorIndex(str(tmp_path))
+    assert len(reopened) == 3
+    assert reopened.search(queries[:1], k=1)[0][0][:1] == ("a",)
+    assert reopened.search(queries[:1], k=1)[0][0][2] == {"k": "a"}
+
+
+def test_index_recovers_from_interrupted_append(tmp_path):
+    index = LocalVectorIndex(str(tmp_path), HashingEmbedder(dim=32))
+    index.add(["a", "b"], [SNIPPETS["a"], SNIPPETS["b"]], [{}, {}])
+    with open(os.path.join(str(tmp_path), "vectors.f32"), "ab") as f:
+        f.write(b"\0" * 32 * 4)  # vector row written, metadata line lost
+
+    reopened = LocalVectorIndex(str(tmp_path), HashingEmbedder(dim=32))
+    assert len(reopened) == 2
+    assert os.path.getsize(os.path.join(str(tmp_path), "vectors.f32")) == 2 * 32 * 4
+
+
+def test_similarity_search_works_without_ollama_or_chroma(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    service = AIService.__new__(AIService)
+    service.embeddings = None
+    service.collection = None
+    service.local_index = index
+    service.embedding_pipeline = EmbeddingPipeline(None, None, local_index=index)
+
+    async def run():
+        for code in SNIPPETS.values():
+            await service.store_pattern_embedding(code, ["pattern"], {"language": "python"})
+        await service.embedding_pipeline.aclose()
+        return await service.find_similar_patterns(SNIPPETS["b"], limit=1)
+
+    similar = asyncio.run(run())
+    assert similar[0]["patterns"] == ["pattern"]
+    assert similar[0]["language"] == "python"
+    assert similar[0]["similarity_score"] > 0.99
+    assert similar[0]["code_preview"].startswith("class UserRepository")
+
+
+def test_chroma_is_queried_first_and_local_index_is_the_fallback(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    index.add(["b"], [SNIPPETS["b"]], [{"patterns": '["from_local"]'}])
+    service = AIService.__new__(AIService)
+    service.embeddings = FakeEmbeddings()
+    service.collection = FakeChromaCollection(
+        {"metadatas": [[{"patterns": '["from_chroma"]'}]], "distances": [[0.25]]}
+    )
+    service.local_index = index
+
+    first = asyncio.run(service.find_similar_patterns(SNIPPETS["b"], limit=1))
+    service.collection.down = True
+    fallback = asyncio.run(service.find_similar_patterns(SNIPPETS["b"], limit=1))
+
+    assert first == [service._similar_pattern({"patterns": '["from_chroma"]'}, 0.75)]
+    assert fallback[0]["patterns"] == ["from_local"]
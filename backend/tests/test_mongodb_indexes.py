@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.mongodb_indexes import MongoDBIndexManager
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def to_list(self, length=None):
+        return self.rows
+
+
+class FakeCollection:
+    def __init__(self, names):
+        self.names = list(names)
+
+    def list_indexes(self):
+        return FakeCursor([{"name": name} for name in self.names])
+
+    async def drop_index(self, name):
+        self.names.remove(name)
+
+    async def create_indexes(self, models):
+        created = [model.document["name"] for model in models]
+        self.names.extend(n for n in created if n not in self.names)
+        return created
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection(["_id_"]))
+
+
+def test_retired_commit_sha_index_is_dropped_before_creation():
+    database = FakeDatabase()
+    database.collections["commits"] = FakeCollection(["_id_", "sha_unique"])
+    manager = MongoDBIndexManager(database)
+
+    first = asyncio.run(manager.create_all_indexes())
+    second = asyncio.run(manager.create_all_indexes())
+
+    names = database.collections["commits"].names
+    assert "sha_unique" not in names and "repository_hash_unique" in names
+    assert first["dropped_indexes"] == ["commits.sha_unique"]
+    assert second["dropped_indexes"] == []
+    assert not first["errors"]
@@ -0,0 +1,79 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.path_filter import (
+    GIT_SKIP_FILTER,
+    INCREMENTAL_FILTER,
+    PathFilter,
+)
+
+
+def test_git_skip_filter_matches_legacy_rules():
+    assert GIT_SKIP_FILTER.excludes("web/node_modules/react/index.js")
+    assert GIT_SKIP_FILTER.excludes("docs/Diagram.PNG")
+    assert GIT_SKIP_FILTER.excludes("backend/.env.local")
+    assert GIT_SKIP_FILTER.excludes("yarn.lock")
+    assert not GIT_SKIP_FILTER.excludes(".github/workflows/ci.yml")
+    assert not GIT_SKIP_FILTER.excludes("src/app.py")
+
+
+def test_gitignore_globs_and_reincludes():
+    path_filter = PathFilter(
+        exclude_globs=["*.log", "/build/", "docs/**/*.md", "!keep.log", "# comment"]
+    )
+    assert path_filter.excludes("logs/app.log")
+    assert not path_filter.excludes("logs/keep.log")
+    assert path_filter.excludes("build/out.js")
+    assert not path_filter.excludes("src/build/out.js")
+    assert path_filter.excludes("docs/guide/intro.md")
+    assert not path_filter.excludes("README.md")
+
+
+def test_last_matching_glob_wins_and_hard_excludes_stay():
+    path_filter = PathFilter(
+        exclude_dirs=["node_modules"],
+        exclude_regexes=[r"\.lock$"],
+        exclude_globs=["!*.py", "src/gen.py", "*.md", "!README.md", "!yarn.lock"],
+    )
+    assert path_filter.excludes("node_modules/x.py")
+    assert path_filter.excludes("src/gen.py")
+    assert not path_filter.excludes("src/app.py")
+    assert path_filter.excludes("docs/guide.md")
+    assert not path_filter.excludes("README.md")
+    assert path_filter.excludes("yarn.lock")
+
+
+def test_walk_prunes_directories_and_applies_repo_overrides(tmp_path):
+    for rel in ["src/app.py", "node_modules/lib.js", ".cache/x.py", "gen/out.py", "notes.bin"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+
+    assert sorted(INCREMENTAL_FILTER.walk(str(tmp_path))) == [
+        os.path.join("gen", "out.py"),
+        os.path.join("src", "app.py"),
+    ]
+
+    (tmp_path / ".codeevoignore").write_text("gen/\n")
+    repo_filter = INCREMENTAL_FILTER.for_repository(str(tmp_path))
+    assert list(repo_filter.walk(str(tmp_path))) == [os.path.join("src", "app.py")]
+    assert INCREMENTAL_FILTER.for_repository(str(tmp_path)) is repo_filter
+
+
+def test_repo_overrides_are_cached_by_content_and_bounded(tmp_path, monkeypatch):
+    import app.services.path_filter as path_filter_module
+
+    monkeypatch.setattr(path_filter_module, "MAX_CACHED_OVERRIDES", 2)
+    base = PathFilter(exclude_dirs=["node_modules"])
+    checkouts = []
+    for index, rules in enumerate(["gen/\n", "gen/\n", "out/\n", "tmp/\n"]):
+        checkout = tmp_path / f"checkout-{index}"
+        checkout.mkdir()
+        (checkout / ".codeevoignore").write_text(rules)
+        checkouts.append(base.for_repository(str(checkout)))
+
+    assert checkouts[0] is checkouts[1]
+    assert checkouts[0].excludes("gen/a.py")
+    assert len(base._overrides) == 2
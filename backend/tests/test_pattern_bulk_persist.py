@@ -0,0 +1,48 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bson import ObjectId
+
+from app.models.repository import Pattern, PatternOccurrence, Repository
+from app.services.pattern_service import PatternService
+from tests.fakes import FakeCache, FakeEngine, make_service
+
+
+def test_occurrences_are_written_with_a_fixed_number_of_round_trips(monkeypatch):
+    service = make_service(monkeypatch, PatternService, FakeEngine(), FakeCache())
+    patterns = service.engine.get_collection(Pattern)
+    existing_id = ObjectId()
+    patterns.docs.append({"_id": existing_id, "name": "singleton"})
+    repo_id = str(ObjectId())
+    occurrences = [
+        {"pattern_name": name, "file_path": f"f{i}.py", "line_number": i}
+        for i in range(50)
+        for name in ("singleton", "factory", "observer")
+    ]
+
+    inserted = asyncio.run(service.add_pattern_occurrences_bulk(repo_id, occurrences))
+
+    assert inserted == 150
+    assert patterns.finds == 2  # all names, then the newly upserted ones
+    assert len(patterns.bulk_writes) == 1 and len(patterns.bulk_writes[0]) == 2
+    docs, ordered = service.engine.get_collection(PatternOccurrence).inserts[0]
+    assert ordered is False and len(docs) == 150
+    assert docs[0]["pattern_id"] == existing_id
+    assert {d["pattern_id"] for d in docs} == {p["_id"] for p in patterns.docs}
+    assert service.engine.get_collection(Repository).updates[0][1] == {"$inc": {"pattern_count": 150}}
+    assert service.cache.deleted.count("global_pattern_stats") == 1
+    assert len(service.cache.deleted) == 4  # one key per pattern plus global stats
+
+
+def test_partial_insert_failure_counts_only_written_occurrences(monkeypatch):
+    service = make_service(monkeypatch, PatternService, FakeEngine(), FakeCache())
+    service.engine.get_collection(PatternOccurrence).fail_inserts = 2
+    occurrences = [{"pattern_name": "factory"} for _ in range(5)]
+
+    inserted = asyncio.run(service.add_pattern_occurrences_bulk(str(ObjectId()), occurrences))
+
+    assert inserted == 3
+    assert service.engine.get_collection(Repository).updates[0][1] == {"$inc": {"pattern_count": 3}}
@@ -0,0 +1,55 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.pattern_scanner import PatternScanner, requires_newline
+from app.services.source_index import SourceIndex
+
+
+RULES = [
+    r"^\s*def\s+\w+",
+    r"return\s+this\s*;",
+    r"\s+$",
+    r"class\s+\w+\s*\{[\s\S]*?\}",
+    r"TODO\s*:|FIXME\s*:",
+    r"x*",
+    r"try:\s*\n[\s\S]*?except",
+]
+
+CONTENT = (
+    "def a():\r\n"
+    "    return this;  \n"
+    "class Foo {\n"
+    "  bar() {}\n"
+    "}\n"
+    "\n"
+    "# todo: later\n"
+    "try:\n"
+    "    pass\n"
+    "except ValueError:\n"
+    "    def b(): return this;"
+)
+
+
+def test_scan_matches_per_line_search():
+    flags = re.IGNORECASE | re.MULTILINE
+    scanner = PatternScanner(((rule, rule) for rule in RULES), flags)
+
+    expected = [
+        (rule, i)
+        for rule in RULES
+        for i, line in enumerate(CONTENT.split("\n"))
+        if re.search(rule, line, flags)
+    ]
+    assert list(scanner.scan(SourceIndex(CONTENT))) == expected
+
+
+def test_requires_newline_is_conservative():
+    assert requires_newline(r"try:\s*\n[\s\S]*?except")
+    assert not requires_newline(r"[\n]")
+    assert not requires_newline(r"a\n?b")
+    assert not requires_newline(r"a\n|b")
+    assert not requires_newline(r"a(\n)?b")
+
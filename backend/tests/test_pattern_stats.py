@@ -0,0 +1,166 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bson import ObjectId
+
+from app.models.repository import Pattern, PatternGlobalStats, PatternOccurrence
+from app.services.pattern_service import PatternService
+from app.services.pattern_stats import HyperLogLog, PatternStatsStore
+from tests.fakes import FakeCache, FakeEngine, make_service
+
+
+def test_hyperloglog_estimates_distinct_values():
+    small = HyperLogLog()
+    for value in ["a", "b", "c", "a", "b"]:
+        small.add(value)
+    assert small.count() == 3
+
+    large = HyperLogLog()
+    for i in range(20000):
+        large.add(f"repo-{i % 10000}")
+    assert abs(large.count() - 10000) < 500
+
+    assert HyperLogLog.from_sparse(large.sparse()).count() == large.count()
+
+
+def test_stats_are_recorded_on_write_and_read_per_pattern():
+    engine = FakeEngine()
+    store = PatternStatsStore(engine)
+    singleton, factory = ObjectId(), ObjectId()
+    repos = [ObjectId() for _ in range(3)]
+
+    async def run():
+        await store.record([(singleton, repos[0], "a.py", 0.9), (singleton, repos[1], "a.py", 0.7)])
+        await store.record([(factory, repos[2], "b.py", 0.5)])
+        return await store.read()
+
+    stats = asyncio.run(run())
+
+    assert stats[singleton]["occurrence_count"] == 2
+    assert abs(stats[singleton]["confidence_sum"] - 1.6) < 1e-9
+    assert stats[singleton]["repositories_estimate"] == 2
+    assert stats[singleton]["files_estimate"] == 1
+    assert stats[None]["repositories_estimate"] == 3
+    assert stats[None]["occurrence_count"] == 3
+    # Nothing changed since the last compaction
+    assert asyncio.run(store.compact()) == 0
+
+
+def test_empty_stats_are_rebuilt_by_streaming_occurrences():
+    engine = FakeEngine()
+    pattern_id, repo_id = ObjectId(), ObjectId()
+    engine.get_collection(PatternOccurrence).docs.extend(
+        {"pattern_id": pattern_id, "repository_id": repo_id, "file_path": f"f{i % 4}.py", "confidence_score": 1.0}
+        for i in range(10)
+    )
+    store = PatternStatsStore(engine)
+
+    stats = asyncio.run(store.read())
+
+    assert stats[pattern_id]["occurrence_count"] == 10
+    assert stats[pattern_id]["files_estimate"] == 4
+    assert store.get_stats()["rebuilds"] == 1
+
+
+def test_global_pattern_stats_come_from_the_store(monkeypatch):
+    engine = FakeEngine()
+    singleton = Pattern(name="singleton", category="creational")
+    unused = Pattern(name="unused")
+    engine.models[Pattern] = [unused, singleton]
+    service = make_service(monkeypatch, PatternService, engine, FakeCache())
+    repo_id = ObjectId()
+
+    async def run():
+        await service.global_stats.record([(singleton.id, repo_id, "s.py", 0.8)] * 3)
+        return await service.get_global_pattern_stats()
+
+    result = asyncio.run(run())
+
+    top = result["top_patterns"][0]
+    assert top["pattern"]["name"] == "singleton"
+    assert top["total_occurrences"] == 3
+    assert top["avg_confidence"] == 0.8
+    assert top["popularity_score"] == 3
+    assert result["total_repositories"] == 1
+    assert result["total_occurrences"] == 3
+    assert result["categories"] == ["creational"]
+    assert not engine.get_collection(PatternOccurrence).docs
+    assert len(engine.get_collection(PatternGlobalStats).bulk_writes) == 3  # record + backfill + compaction
+
+
+def test_backfill_runs_once_and_merges_with_earlier_writes():
+    engine = FakeEngine()
+    pattern_id, old_repo, new_repo = ObjectId(), ObjectId(), ObjectId()
+    occurrences = engine.get_collection(PatternOccurrence).docs
+    occurrences.extend(
+        {"pattern_id": pattern_id, "repository_id": old_repo, "file_path": "old.py", "confidence_score": 0.5}
+        for _ in range(4)
+    )
+    store = PatternStatsStore(engine)
+
+    async def run():
+        # A write lands before the backfill: it must not suppress it
+        occurrences.append(
+            {"pattern_id": pattern_id, "repository_id": new_repo, "file_path": "new.py",
+             "confidence_score": 1.0, "stats_recorded": True}
+        )
+        await store.record([(pattern_id, new_repo, "new.py", 1.0)])
+        first = await store.ensure_backfilled()
+        again = await PatternStatsStore(engine).ensure_backfilled()
+        return first, again, await store.read()
+
+    first, again, stats = asyncio.run(run())
+
+    assert first is True and again is False
+    assert stats[pattern_id]["occurrence_count"] == 5
+    assert stats[pattern_id]["repositories_estimate"] == 2
+    assert stats[pattern_id]["files_estimate"] == 2
+    assert stats[None]["backfilled"] is True
+    assert store.get_stats()["rebuilds"] == 1
+
+
+def test_writes_around_the_backfill_are_neither_lost_nor_double_counted():
+    engine = FakeEngine()
+    pattern_id, repo_id = ObjectId(), ObjectId()
+    occurrences = engine.get_collection(PatternOccurrence).docs
+    occurrences.extend(
+        {"pattern_id": pattern_id, "repository_id": repo_id, "file_path": f"{i}.py", "confidence_score": 0.5}
+        for i in range(10)
+    )
+    store = PatternStatsStore(engine)
+
+    async def write(n):
+        # What PatternService does: stamp the occurrences, then record them
+        occurrences.extend(
+            {"pattern_id": pattern_id, "repository_id": repo_id, "file_path": "late.py",
+             "confidence_score": 1.0, "stats_recorded": True}
+            for _ in range(n)
+        )
+        await store.record([(pattern_id, repo_id, "late.py", 1.0)] * n)
+
+    async def run():
+        await write(3)
+        await store.rebuild()
+        # Recorded after the backfill's cursor passed: a snapshot merge lost these
+        await write(2)
+        await store.rebuild()
+        return await store.read()
+
+    stats = asyncio.run(run())
+
+    assert stats[pattern_id]["occurrence_count"] == 15
+    assert stats[pattern_id]["confidence_sum"] == 10.0
+    assert stats[None]["occurrence_count"] == 15
+
+
+def test_stats_are_disabled_without_mongodb(monkeypatch):
+    import app.services.pattern_service as pattern_service
+
+    monkeypatch.setattr(pattern_service, "get_enhanced_database_manager", lambda: None)
+    service = PatternService()
+
+    assert service.global_stats is None
+    asyncio.run(service._record_global_stats([(ObjectId(), ObjectId(), "a.py", 0.9)]))
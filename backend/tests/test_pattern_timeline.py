@@ -0,0 +1,164 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bson import ObjectId
+
+from app.models.repository import Pattern, PatternOccurrence, PatternTimelineBucket, Repository
+from app.services.pattern_service import PatternService
+from tests.fakes import make_service, matches
+
+
+def group_by_day(docs, pipeline):
+    """The day-bucket aggregation rebuild_pattern_timeline runs"""
+    groups = {}
+    for doc in docs:
+        if matches(doc, pipeline[0]["$match"]):
+            at = doc["detected_at"]
+            key = (doc["pattern_id"], at.year, at.month, at.day)
+            groups[key] = groups.get(key, 0) + 1
+    return [
+        {"_id": {"pattern_id": p, "year": y, "month": m, "day": d}, "n": n}
+        for (p, y, m, d), n in groups.items()
+    ]
+
+
+def timeline_service(monkeypatch):
+    service = make_service(monkeypatch, PatternService)
+    service.engine.get_collection(PatternOccurrence).aggregate_rows = group_by_day
+    return service
+
+
+def add_patterns(service, *names):
+    ids = {}
+    for name in names:
+        ids[name] = ObjectId()
+        service.engine.get_collection(Pattern).docs.append({"_id": ids[name], "name": name})
+    return ids
+
+
+def test_rollup_is_incremented_and_read_by_range(monkeypatch):
+    service = timeline_service(monkeypatch)
+    ids = add_patterns(service, "singleton", "factory")
+    repo_id = ObjectId()
+    entries = [
+        (ids["singleton"], datetime(2024, 3, 1, 9)),
+        (ids["singleton"], datetime(2024, 3, 1, 17)),
+        (ids["factory"], datetime(2024, 3, 20)),
+        (ids["factory"], datetime.utcnow()),
+    ]
+
+    async def run():
+        await service._record_timeline(repo_id, entries[:2], None)
+        await service._record_timeline(repo_id, entries[2:], None)
+        daily = await service.get_pattern_timeline(str(repo_id))
+        monthly = await service.get_pattern_timeline(str(repo_id), granularity="month")
+        recent = await service.get_pattern_timeline(str(repo_id), date_range_days=7)
+        return daily, monthly, recent
+
+    daily, monthly, recent = asyncio.run(run())
+
+    assert daily["timeline"][0] == {
+        "date": "2024-03-01",
+        "total_patterns": 2,
+        "patterns": {"singleton": 2},
+    }
+    assert daily["summary"]["total_occurrences"] == 4
+    assert monthly["timeline"][0]["date"] == "2024-03"
+    assert monthly["timeline"][0]["patterns"] == {"singleton": 2, "factory": 1}
+    assert recent["summary"]["patterns_tracked"] == ["factory"]
+    # Names come from one batched lookup per call
+    assert service.engine.get_collection(Pattern).finds == 3
+    assert not service.engine.get_collection(PatternOccurrence).aggregations
+
+
+def test_rollup_of_unmarked_repository_is_rebuilt_from_occurrences(monkeypatch):
+    service = timeline_service(monkeypatch)
+    ids = add_patterns(service, "observer")
+    repo_id = ObjectId()
+    repositories = service.engine.get_collection(Repository)
+    repositories.docs.append({"_id": repo_id, "timeline_backfilled": None})
+    service.engine.get_collection(PatternOccurrence).docs.extend(
+        {"repository_id": repo_id, "pattern_id": ids["observer"], "detected_at": datetime(2023, 5, d)}
+        for d in (1, 1, 2)
+    )
+
+    async def run():
+        # Written after the rollup shipped: covers only the newest occurrence
+        await service._record_timeline(repo_id, [(ids["observer"], datetime(2023, 5, 2))], None)
+        first = await service.get_pattern_timeline(str(repo_id))
+        second = await service.get_pattern_timeline(str(repo_id))
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert [d["total_patterns"] for d in first["timeline"]] == [2, 1]
+    assert second["timeline"] == first["timeline"]
+    assert len(service.engine.get_collection(PatternOccurrence).aggregations) == 1
+    assert repositories.docs[0]["timeline_backfilled"] is True
+    buckets = service.engine.get_collection(PatternTimelineBucket).docs
+    assert sorted((b["granularity"], b["count"]) for b in buckets) == [("day", 1), ("day", 2), ("month", 3)]
+
+
+def test_failed_bucket_write_unmarks_the_repository(monkeypatch):
+    service = timeline_service(monkeypatch)
+    ids = add_patterns(service, "observer")
+    repo_id = ObjectId()
+    repositories = service.engine.get_collection(Repository)
+    repositories.docs.append({"_id": repo_id, "timeline_backfilled": True})
+    service.engine.get_collection(PatternTimelineBucket).fail_write = lambda request: True
+
+    asyncio.run(service._record_timeline(repo_id, [(ids["observer"], datetime(2023, 5, 1))], None))
+
+    assert repositories.docs[0]["timeline_backfilled"] is False
+
+
+def test_writes_racing_a_rebuild_leave_it_unmarked(monkeypatch):
+    service = timeline_service(monkeypatch)
+    ids = add_patterns(service, "observer")
+    repo_id = ObjectId()
+    repositories = service.engine.get_collection(Repository)
+    repositories.docs.append({"_id": repo_id})
+    occurrences = service.engine.get_collection(PatternOccurrence)
+    buckets = service.engine.get_collection(PatternTimelineBucket)
+    write_bucket = buckets.bulk_write
+
+    def occurrence(day):
+        return {"repository_id": repo_id, "pattern_id": ids["observer"], "detected_at": datetime(2023, 5, day)}
+
+    async def write(day):
+        seen = await service._timeline_rebuilds(repo_id)
+        occurrences.docs.append(occurrence(day))
+        return seen
+
+    async def racing_bulk_write(requests, ordered=True):
+        # A concurrent analysis lands between the aggregation and the $set
+        buckets.bulk_write = write_bucket
+        seen = await write(2)
+        await service._record_timeline(repo_id, [(ids["observer"], datetime(2023, 5, 2))], seen)
+        return await write_bucket(requests, ordered)
+
+    async def run():
+        occurrences.docs.append(occurrence(1))
+        buckets.bulk_write = racing_bulk_write
+        await service.get_pattern_timeline(str(repo_id))
+        assert repositories.docs[0]["timeline_backfilled"] is False
+
+        repaired = await service.get_pattern_timeline(str(repo_id))
+        assert repositories.docs[0]["timeline_backfilled"] is True
+
+        # A writer that started before a rebuild and finished after it
+        seen = await write(3)
+        await service.rebuild_pattern_timeline(str(repo_id))
+        await service._record_timeline(repo_id, [(ids["observer"], datetime(2023, 5, 3))], seen)
+        assert repositories.docs[0]["timeline_backfilled"] is False
+        return repaired, await service.get_pattern_timeline(str(repo_id))
+
+    repaired, final = asyncio.run(run())
+
+    assert [d["total_patterns"] for d in repaired["timeline"]] == [1, 1]
+    assert [d["total_patterns"] for d in final["timeline"]] == [1, 1, 1]
+    assert repositories.docs[0]["timeline_backfilled"] is True
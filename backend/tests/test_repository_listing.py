@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bson import ObjectId
+
+from app.models.repository import (
+    Commit,
+    PatternOccurrence,
+    Repository,
+    Technology,
+    get_repositories_with_stats,
+    increment_repository_counters,
+)
+from app.services.repository_service import RepositoryService
+from tests.fakes import FakeCache, FakeCollection, FakeEngine, make_service
+
+
+def repo_doc(counted=True):
+    doc = {"_id": ObjectId(), "url": f"https://example.com/{ObjectId()}", "name": "repo", "status": "completed"}
+    doc.update(default_branch="main", total_commits=0, created_at=datetime(2024, 1, 1))
+    if counted:
+        doc.update(commit_count=4, technology_count=2, pattern_count=7)
+    return doc
+
+
+def test_page_is_one_aggregation_with_cursor_and_status():
+    docs = [repo_doc() for _ in range(3)]
+    started = docs[0]["_id"].generation_time
+    docs[0]["latest_session"] = [{"started_at": started, "status": "completed"}]
+    repos = FakeCollection(aggregate_rows=[{"total": [{"n": 10}], "repositories": docs}])
+    engine = FakeEngine({Repository: repos})
+    cursor = str(ObjectId())
+
+    page = asyncio.run(
+        get_repositories_with_stats(engine, limit=2, status_filter="completed", cursor=cursor)
+    )
+
+    assert len(repos.aggregations) == 1
+    match, facet = repos.aggregations[0]
+    assert match == {"$match": {"status": "completed"}}
+    stages = facet["$facet"]["repositories"]
+    assert stages[0] == {"$match": {"_id": {"$gt": ObjectId(cursor)}}}
+    assert {"$limit": 3} in stages
+    assert not any("$skip" in stage for stage in stages)
+
+    assert page["total_count"] == 10
+    assert page["has_more"] is True
+    assert page["next_cursor"] == str(docs[1]["_id"])
+    assert [r["name"] for r in page["repositories"]] == ["repo", "repo"]
+    stats = page["repositories"][0]["stats"]
+    assert stats["pattern_count"] == 7
+    assert stats["analysis_status"] == "completed"
+    assert page["repositories"][1]["stats"]["has_analysis"] is False
+    assert not repos.bulk_writes
+
+
+def test_missing_counters_are_backfilled_in_bulk():
+    stale = [repo_doc(counted=False) for _ in range(2)]
+    repos = FakeCollection(aggregate_rows=[{"total": [{"n": 2}], "repositories": stale}])
+    commits = FakeCollection(aggregate_rows=[{"_id": stale[0]["_id"], "n": 12}])
+    engine = FakeEngine({Repository: repos, Commit: commits})
+
+    page = asyncio.run(get_repositories_with_stats(engine))
+
+    assert page["has_more"] is False and page["next_cursor"] is None
+    assert [len(engine.get_collection(m).aggregations) for m in (Commit, Technology, PatternOccurrence)] == [1, 1, 1]
+    assert len(repos.bulk_writes) == 1 and len(repos.bulk_writes[0]) == 2
+    assert page["repositories"][0]["stats"]["commit_count"] == 12
+    assert page["repositories"][1]["stats"]["commit_count"] == 0
+
+
+def test_increment_only_touches_backfilled_counters():
+    repos = FakeCollection()
+    engine = FakeEngine({Repository: repos})
+    repo_id = ObjectId()
+
+    asyncio.run(increment_repository_counters(engine, str(repo_id), pattern_count=3, commit_count=0))
+
+    assert repos.updates == [
+        (
+            {"_id": repo_id, "pattern_count": {"$type": "number"}},
+            {"$inc": {"pattern_count": 3}},
+        )
+    ]
+
+
+def test_user_tracking_keeps_counters_and_timeline_marker(monkeypatch):
+    doc = repo_doc()
+    doc.update(analysis_count=2, unique_users=1, timeline_backfilled=True)
+    repos = FakeCollection([doc])
+    engine = FakeEngine({Repository: repos})
+    engine.models[Repository] = [Repository(id=doc["_id"], url=doc["url"], name="repo", analysis_count=2, unique_users=1)]
+    service = make_service(monkeypatch, RepositoryService, engine=engine, cache=FakeCache())
+    user_id = ObjectId()
+
+    asyncio.run(service.track_user_repository_access(str(user_id), str(doc["_id"])))
+
+    assert not any(isinstance(saved, Repository) for saved in engine.saved)
+    assert (doc["analysis_count"], doc["unique_users"], doc["created_by_user"]) == (3, 2, user_id)
+    assert (doc["commit_count"], doc["technology_count"], doc["pattern_count"]) == (4, 2, 7)
+    assert doc["timeline_backfilled"] is True
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from git import Repo
+
+from app.services.blob_reader import BlobReader
+from app.services.repository_snapshot import RepositorySnapshot, read_repository_file
+
+
+def test_snapshot_indexes_tree_and_reads_each_file_once(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("import os\n")
+    (tmp_path / "package.json").write_text('{"dependencies": {"react": "1"}}')
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\x00\x00")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=tmp_path, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=t@example.com",
+         "commit", "-q", "-m", "init"],
+        cwd=tmp_path,
+        check=True,
+    )
+    repo = Repo(tmp_path)
+
+    snapshot = RepositorySnapshot.build(
+        repo, language_map={".py": "Python"}, reader=BlobReader(repo), max_cached_chars=12
+    )
+    assert sorted(snapshot.paths) == ["logo.png", "package.json", "src/app.py"]
+    assert snapshot.get("src/app.py").language == "Python"
+    assert snapshot.get("src/app.py").size == len("import os\n")
+
+    assert snapshot.read_text("src/app.py") == "import os\n"
+    assert read_repository_file(str(tmp_path), "src/app.py", snapshot) == "import os\n"
+    assert snapshot.read_text("logo.png") is None
+    assert snapshot.read_text("logo.png") is None
+    # Larger than the cache bound: returned but not retained
+    assert snapshot.read_text("package.json").startswith("{")
+    assert snapshot.stats == {"hits": 2, "misses": 3, "unreadable": 1, "evictions": 0}
+
+
+def test_oversized_lock_file_still_registers_package_manager(tmp_path):
+    from app.services.enhanced_technology_detector import EnhancedTechnologyDetector
+
+    (tmp_path / "yarn.lock").write_text("# yarn lockfile v1\n" + "x" * (2 * 1024 * 1024))
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=tmp_path, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=t@example.com",
+         "commit", "-q", "-m", "init"],
+        cwd=tmp_path,
+        check=True,
+    )
+    repo = Repo(tmp_path)
+    snapshot = RepositorySnapshot.build(repo, language_map={}, reader=BlobReader(repo))
+    assert snapshot.read_text("yarn.lock") is None
+
+    detected = EnhancedTechnologyDetector()._analyze_package_files(
+        str(tmp_path), ["yarn.lock"], snapshot
+    )
+    assert [tech.name for tech in detected["package_managers"]] == ["Yarn"]
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.performance_analyzer import PerformanceAnalyzer
+from app.services.security_analyzer import SecurityAnalyzer
+from app.services.source_index import SourceIndex
+
+
+CODE = (
+    "import os\n"
+    "\n"
+    "api_key = 'abcdefghijklmnop1234'\n"
+    "def run():\n"
+    "    eval(input('x'))\n"
+    "    for item in items:\n"
+    "        result.append(item)\n"
+)
+
+
+def test_source_index_maps_offsets_to_lines():
+    index = SourceIndex("ab\ncd\n")
+    assert index.line_count == 3
+    assert [index.line_index(o) for o in range(6)] == [0, 0, 0, 1, 1, 1]
+    assert index.line(1) == "cd"
+    assert index.line(2) == ""
+
+
+def test_line_at_resolves_offsets():
+    index = SourceIndex(CODE)
+    offset = CODE.index("eval")
+    assert index.line_at(offset) == (5, "    eval(input('x'))")
+    assert index.lines == CODE.split("\n")
+
+
+def test_analyzers_share_one_index_and_report_lines():
+    index = SourceIndex(CODE)
+
+    vulnerabilities = SecurityAnalyzer().analyze_code(CODE, "app.py", index=index)
+    lines = {v.name: v.line_number for v in vulnerabilities}
+    assert lines["Dangerous Eval Usage"] == 5
+    assert all(
+        v.code_snippet == CODE.split("\n")[v.line_number - 1].strip()
+        for v in vulnerabilities
+    )
+
+    issues = PerformanceAnalyzer().analyze_performance(CODE, "app.py", index=index)
+    comp = [i for i in issues if i.name == "List Comprehension Opportunity"]
+    assert [i.line_number for i in comp] == [6]
+
+
+def test_ai_service_builds_one_index_for_security_and_performance(monkeypatch):
+    from app.services import ai_service
+
+    built = []
+
+    class CountingIndex(SourceIndex):
+        def __init__(self, content):
+            built.append(content)
+            super().__init__(content)
+
+    monkeypatch.setattr(ai_service, "SourceIndex", CountingIndex)
+    monkeypatch.setattr(SecurityAnalyzer, "analyze_code", _no_new_index(SecurityAnalyzer.analyze_code))
+    monkeypatch.setattr(
+        PerformanceAnalyzer, "analyze_performance", _no_new_index(PerformanceAnalyzer.analyze_performance)
+    )
+    service = ai_service.AIService.__new__(ai_service.AIService)
+    service.security_analyzer = SecurityAnalyzer()
+    service.performance_analyzer = PerformanceAnalyzer()
+
+    result = asyncio.run(service.analyze_security_and_performance(CODE, "shared_index.py"))
+
+    assert built == [CODE]
+    assert result["security"]["total_vulnerabilities"] > 0
+    assert "performance_metrics" in result["performance"]
+    assert "error" not in result["security"] and "error" not in result["performance"]
+
+
+def test_shared_index_keeps_each_analyzers_language(monkeypatch):
+    from app.services import ai_service
+
+    checked = []
+    monkeypatch.setattr(
+        PerformanceAnalyzer,
+        "_analyze_javascript_performance",
+        lambda self, index, file_path: checked.append(file_path) or [],
+    )
+    service = ai_service.AIService.__new__(ai_service.AIService)
+    service.security_analyzer = SecurityAnalyzer()
+    service.performance_analyzer = PerformanceAnalyzer()
+
+    # The security analyzer maps .tsx to "unknown"; performance knows it is TypeScript
+    asyncio.run(service.analyze_security_and_performance("const a = 1;\n", "view_language.tsx"))
+
+    assert checked == ["view_language.tsx"]
+
+
+def _no_new_index(method):
+    def wrapper(self, code, file_path, language=None, index=None):
+        assert index is not None
+        return method(self, code, file_path, language, index=index)
+
+    return wrapper
@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.analysis_executor import shutdown_analysis_process_pool
+from app.services.enhanced_code_quality_analyzer import EnhancedCodeQualityAnalyzer
+from app.services.enhanced_pattern_detector import EnhancedPatternDetector
+from app.services.enhanced_technology_detector import EnhancedTechnologyDetector
+from app.services.static_analysis import StaticAnalysisRunner
+
+
+def test_pooled_run_matches_sequential_analyzers(tmp_path):
+    (tmp_path / "api.py").write_text(
+        "from fastapi import FastAPI\n\napp = FastAPI()\n\n"
+        "@app.get('/')\nasync def root():\n    try:\n        return {}\n"
+        "    except:\n        pass\n"
+    )
+    (tmp_path / "view.tsx").write_text(
+        "import React, { useState } from 'react';\n"
+        "export const View = () => { const [a, setA] = useState(0); return null; };\n"
+    )
+    (tmp_path / "package.json").write_text('{"dependencies": {"react": "18.0.0"}}')
+    repo_path = str(tmp_path)
+    file_list = ["api.py", "view.tsx", "package.json"]
+
+    tech = EnhancedTechnologyDetector()
+    patterns = EnhancedPatternDetector()
+    quality = EnhancedCodeQualityAnalyzer()
+    runner = StaticAnalysisRunner(tech, patterns, quality, batch_size=1)
+
+    try:
+        pooled = asyncio.run(runner.run(repo_path, file_list))
+    finally:
+        shutdown_analysis_process_pool()
+
+    assert pooled[0] == tech.detect_technologies(repo_path, file_list)
+    assert pooled[1] == patterns.detect_patterns(repo_path, file_list)
+    assert pooled[2] == quality.analyze_code_quality(repo_path, file_list)
+    assert pooled[2].summary["files_analyzed"] == 2
+    assert pooled[3].strategy == "full"
+    assert pooled[3].analyzed_files == 2
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.secure_tunnel_service import (
+    SecureTunnelService,
+    TunnelConnection,
+    TunnelMethod,
+    TunnelStatus,
+)
+
+
+def _service_with_tunnel(handler):
+    service = SecureTunnelService()
+    service.retry_backoff = 0
+    now = datetime.utcnow()
+    tunnel = TunnelConnection(
+        user_id="u1",
+        tunnel_url="https://tunnel.test",
+        tunnel_method=TunnelMethod.CLOUDFLARE,
+        auth_token="t",
+        status=TunnelStatus.CONNECTED,
+        created_at=now,
+        last_used=now,
+        expires_at=now + timedelta(hours=1),
+    )
+    tunnel._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.active_tunnels["u1"] = tunnel
+    return service, tunnel
+
+
+def test_proxy_reuses_tunnel_client_and_retries_edge_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"response": "ok"})
+
+    service, tunnel = _service_with_tunnel(handler)
+    client = tunnel._client
+
+    async def run():
+        first = await service.proxy_ollama_request("u1", "/api/generate", data={})
+        second = await service.proxy_ollama_request("u1", "/api/generate", data={})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["success"] and second["success"]
+    assert len(calls) == 3
+    assert tunnel._client is client
+    assert service.client_stats == {"opened": 0, "evicted": 0, "retries": 1}
+    assert tunnel.consecutive_failures == 0
+
+    service.disable_tunnel("u1")
+    assert tunnel._client is None
+
+
+def test_unhealthy_tunnel_is_marked_error_and_evicted():
+    service, tunnel = _service_with_tunnel(lambda request: httpx.Response(503))
+    service.max_retries = 5
+
+    result = asyncio.run(service.proxy_ollama_request("u1", "/api/generate", data={}))
+    assert not result["success"]
+    # Retries within one request count as a single failure
+    assert tunnel.status == TunnelStatus.CONNECTED
+    assert tunnel.consecutive_failures == 1
+
+    async def run():
+        for _ in range(service.max_consecutive_failures - 1):
+            await service.proxy_ollama_request("u1", "/api/generate", data={})
+
+    asyncio.run(run())
+    assert tunnel.status == TunnelStatus.ERROR
+    assert tunnel.consecutive_failures == service.max_consecutive_failures
+    assert tunnel._client is None
+
+
+def test_error_tunnel_is_probed_after_cooldown():
+    healthy = []
+
+    def handler(request):
+        return httpx.Response(200, json={}) if healthy else httpx.Response(503)
+
+    service, tunnel = _service_with_tunnel(handler)
+    service.max_retries = 0
+    service.max_consecutive_failures = 1
+    service._get_client = lambda t: t._client or httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def call():
+        return await service.proxy_ollama_request("u1", "/api/generate", data={})
+
+    asyncio.run(call())
+    assert tunnel.status == TunnelStatus.ERROR
+    # Still cooling down
+    assert asyncio.run(call())["error_code"] == "TUNNEL_NOT_AVAILABLE"
+
+    # A failed probe restarts the cooldown
+    tunnel.unhealthy_since -= timedelta(seconds=service.error_cooldown_seconds)
+    assert "error_code" not in asyncio.run(call())
+    assert tunnel.status == TunnelStatus.ERROR
+    assert asyncio.run(call())["error_code"] == "TUNNEL_NOT_AVAILABLE"
+
+    healthy.append(True)
+    tunnel.unhealthy_since -= timedelta(seconds=service.error_cooldown_seconds)
+    assert asyncio.run(call())["success"]
+    assert tunnel.status == TunnelStatus.CONNECTED
+    assert tunnel.consecutive_failures == 0
+
+
+def test_idle_eviction_skips_clients_with_streams_in_flight():
+    def handler(request):
+        return httpx.Response(200, content=b'{"response": "a"}\n{"response": "b"}\n')
+
+    service, tunnel = _service_with_tunnel(handler)
+
+    async def run():
+        stream = service.stream_ollama_request("u1", "/api/generate", {})
+        await stream.__anext__()
+        tunnel.last_used -= timedelta(seconds=service.client_idle_seconds + 1)
+        during = service.evict_idle_clients()
+        rest = [c async for c in stream]
+        return during, rest
+
+    during, rest = asyncio.run(run())
+    assert during == 0
+    assert len(rest) == 1
+    assert tunnel._client is not None
+    # Finishing the stream counts as use
+    assert service.evict_idle_clients() == 0
+
+
+def test_stream_passes_chunks_through():
+    def handler(request):
+        return httpx.Response(200, content=b'{"response": "a"}\n{"response": "b", "done": true}\n')
+
+    service, _ = _service_with_tunnel(handler)
+
+    async def run():
+        return [c async for c in service.stream_ollama_request("u1", "/api/generate", {})]
+
+    chunks = asyncio.run(run())
+    assert [c["data"]["response"] for c in chunks] == ["a", "b"]
+    assert service.request_history[-1].status_code == 200
+
+
+def test_empty_stream_is_a_bad_gateway(monkeypatch):
+    from cryptography.fernet import Fernet
+
+    monkeypatch.setenv("ENCRYPTION_KEY", os.getenv("ENCRYPTION_KEY") or Fernet.generate_key().decode())
+    from app.api import tunnel as tunnel_api
+
+    service, _ = _service_with_tunnel(lambda request: httpx.Response(200, content=b"\n"))
+    monkeypatch.setattr(tunnel_api, "get_tunnel_service", lambda: service)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(
+            tunnel_api.proxy_stream_request(
+                tunnel_api.TunnelStreamRequest(), current_user=SimpleNamespace(id="u1")
+            )
+        )
+    assert exc.value.status_code == 502
+
+
+def test_disconnected_stream_releases_the_tunnel(monkeypatch):
+    from cryptography.fernet import Fernet
+
+    monkeypatch.setenv("ENCRYPTION_KEY", os.getenv("ENCRYPTION_KEY") or Fernet.generate_key().decode())
+    from app.api import tunnel as tunnel_api
+
+    body = b'{"response": "a"}\n{"response": "b"}\n{"response": "c", "done": true}\n'
+    service, tunnel = _service_with_tunnel(lambda request: httpx.Response(200, content=body))
+    monkeypatch.setattr(tunnel_api, "get_tunnel_service", lambda: service)
+
+    async def run():
+        response = await tunnel_api.proxy_stream_request(
+            tunnel_api.TunnelStreamRequest(), current_user=SimpleNamespace(id="u1")
+        )
+        assert await anext(response.body_iterator) == '{"response": "a"}\n'
+        # Client goes away after the first chunk; checked before the loop closes
+        await response.body_iterator.aclose()
+        assert tunnel._in_flight == 0
+        assert service.request_history[-1].status_code == 200
+
+    asyncio.run(run())